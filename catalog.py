@@ -0,0 +1,146 @@
+"""
+Katalog obserwacji - linia poleceń
+Indeksowanie istniejących produktów i wyszukiwanie w katalogu SQLite
+
+Uruchom z root folderu projektu:
+    python catalog.py scan                          # zindeksuj DataConfig.DATA_DIR
+    python catalog.py scan /dysk/archiwum --workers 8
+    python catalog.py query --lna-state 5 --min-integrations 10000
+    python catalog.py query --kind spectrum --since 2025-01-01 --limit 20 --json
+    python catalog.py stats
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.storage.catalog import ObservationCatalog, parse_time
+
+
+def parse_args(argv):
+    """Parsuj argumenty linii poleceń"""
+
+    parser = argparse.ArgumentParser(description="Katalog obserwacji (SQLite)")
+    parser.add_argument("--db", default=None, help="Plik bazy (domyślnie DATA_DIR/CATALOG_FILE)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan = commands.add_parser("scan", help="Zindeksuj istniejące produkty w katalogu")
+    scan.add_argument("directory", nargs="?", default=None, help="Katalog (domyślnie DATA_DIR)")
+    scan.add_argument("--workers", type=int, default=None, help="Liczba procesów (domyślnie CATALOG_WORKERS)")
+    scan.add_argument("--force", action="store_true", help="Przeczytaj ponownie także pliki bez zmian")
+
+    query = commands.add_parser("query", help="Wyszukaj produkty")
+    query.add_argument("--kind", choices=("spectrum", "subint", "iq"), default=None)
+    query.add_argument("--format", default=None, help="NPZ, HDF5, FITS, CSV, SUBINT, IQ16")
+    query.add_argument("--lna-state", type=int, default=None)
+    query.add_argument("--min-integrations", type=int, default=None)
+    query.add_argument("--max-integrations", type=int, default=None)
+    query.add_argument("--min-freq", type=float, default=None, help="Min. częstotliwość centralna [MHz]")
+    query.add_argument("--max-freq", type=float, default=None, help="Maks. częstotliwość centralna [MHz]")
+    query.add_argument("--since", default=None, help="Początek obserwacji od (ISO lub YYYYmmdd_HHMMSS)")
+    query.add_argument("--until", default=None, help="Początek obserwacji do")
+    query.add_argument("--path", default=None, help="Wzorzec ścieżki (LIKE, np. %%2025%%)")
+    query.add_argument("--order-by", default="time_start")
+    query.add_argument("--desc", action="store_true", help="Sortuj malejąco")
+    query.add_argument("--limit", type=int, default=None)
+    query.add_argument("--json", action="store_true", help="Wyniki jako JSON (z metadanymi)")
+
+    commands.add_parser("stats", help="Podsumowanie katalogu")
+
+    return parser.parse_args(argv[1:])
+
+
+def _time_text(value):
+    return datetime.fromtimestamp(value).strftime("%Y-%m-%d %H:%M:%S") if value is not None else "-"
+
+
+def _number(value, fmt):
+    return format(value, fmt) if value is not None else "-"
+
+
+def run_scan(catalog, args):
+    """Skan katalogu z produktami"""
+
+    print(f"🗂  Skanowanie {args.directory or 'DATA_DIR'} -> {catalog.path}")
+    result = catalog.backfill(args.directory, workers=args.workers, force=args.force)
+    print(f"✓ {result['scanned']} produktów: zindeksowano {result['indexed']}, "
+          f"bez zmian {result['unchanged']}, pominięto {result['skipped']}, "
+          f"usunięto z katalogu {result['removed']} ({result['elapsed_sec']:.1f} s)")
+    for path, error in result['errors']:
+        print(f"⚠️  {path}: {error}")
+    return 0 if not result['errors'] else 1
+
+
+def run_query(catalog, args):
+    """Wyszukiwanie i wydruk wyników"""
+
+    filters = {
+        'kind': args.kind,
+        'format': args.format.upper() if args.format else None,
+        'lna_state': args.lna_state,
+        'min_integration_count': args.min_integrations,
+        'max_integration_count': args.max_integrations,
+        'min_center_freq_mhz': args.min_freq,
+        'max_center_freq_mhz': args.max_freq,
+        'min_time_start': parse_time(args.since),
+        'max_time_start': parse_time(args.until),
+        'like_path': args.path,
+    }
+    filters = {key: value for key, value in filters.items() if value is not None}
+
+    t0 = time.perf_counter()
+    rows = catalog.query(order_by=args.order_by, descending=args.desc, limit=args.limit, **filters)
+    elapsed_ms = (time.perf_counter() - t0) * 1e3
+
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False, default=str))
+        return 0
+
+    print(f"{'Początek':19}  {'Rodzaj':8} {'Format':6} {'Ramek':>10} {'LNA':>3} {'f [MHz]':>10} "
+          f"{'v_max [km/s]':>12} {'RMS [dB]':>8}  Plik")
+    for row in rows:
+        print(f"{_time_text(row['time_start']):19}  {row['kind']:8} {row['format']:6} "
+              f"{_number(row['integration_count'], ','):>10} {_number(row['lna_state'], 'd'):>3} "
+              f"{_number(row['center_freq_mhz'], '.4f'):>10} {_number(row['peak_velocity_km_s'], '+.1f'):>12} "
+              f"{_number(row['rms_db'], '.3f'):>8}  {Path(row['path']).name}")
+    print(f"\n{len(rows)} wyników ({elapsed_ms:.1f} ms)")
+    return 0
+
+
+def run_stats(catalog):
+    """Liczba produktów i przedział czasu per rodzaj"""
+
+    rows = catalog.summary()
+    if not rows:
+        print("Katalog jest pusty - uruchom: python catalog.py scan")
+        return 0
+    for row in rows:
+        print(f"{row['kind']:8} {row['count']:6} produktów, {(row['size_bytes'] or 0) / 1e9:8.2f} GB, "
+              f"{_time_text(row['time_start'])} - {_time_text(row['time_end'])}")
+    return 0
+
+
+def main():
+    """Główna funkcja"""
+
+    args = parse_args(sys.argv)
+    catalog = ObservationCatalog(args.db)
+
+    if args.command == "scan":
+        return run_scan(catalog, args)
+    if args.command == "query":
+        return run_query(catalog, args)
+    return run_stats(catalog)
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
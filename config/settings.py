@@ -78,6 +78,42 @@ class ReceiverConfig:
     # Transfer mode
     TRANSFER_MODE = "ISOCH"         # ISOCH dla 14-bit (lub BULK dla 12-bit)
 
+    # Bufor pierścieniowy I/Q (potęga 2)
+    RING_BUFFER_SAMPLES = 1 << 23   # 8M próbek complex64 = 64 MB (~1.4 s przy 6 MSPS)
+
+
+# =============================================================================
+# ŹRÓDŁO DANYCH
+# =============================================================================
+
+class AcquisitionConfig:
+    """Konfiguracja źródła próbek I/Q"""
+
+    # Źródło: sdrplay (RSP1A), simulator (syntetyczne I/Q - bez sprzętu), file (nagranie)
+    BACKEND = "sdrplay"             # Nadpisywane przez: python main.py --backend ...
+    OUT_OF_PROCESS = False          # Źródło w osobnym procesie, bufor w pamięci współdzielonej
+                                    # (nadpisywane przez: --separate-process)
+
+    # Symulator - pakiety 14-bit int16 jak z RSP1A
+    SIM_PACKET_SAMPLES = 16384      # Próbek na pakiet
+    SIM_REALTIME = True             # True = tempo SAMPLE_RATE_MHZ, False = maksymalna szybkość
+    SIM_SEED = None                 # Ziarno generatora (None = losowe)
+    SIM_NOISE_RMS = 400.0           # Szum odbiornika [jednostki ADC, RMS na składową]
+    SIM_HI_LINE_SNR_DB = -10.0      # Moc linii HI względem szumu w jej paśmie [dB]
+    SIM_HI_LINE_WIDTH_KHZ = 150.0   # Szerokość linii HI (FWHM) [kHz]
+    SIM_HI_LINE_VELOCITY_KMS = 0.0  # Prędkość radialna linii [km/s]
+    SIM_DC_OFFSET = 60.0            # DC spike [jednostki ADC]
+    SIM_RFI_TONES = [               # Tony RFI: (offset od środka [MHz], amplituda [jednostki ADC])
+        (1.25, 40.0),
+        (-2.10, 15.0),
+    ]
+
+    # Odtwarzanie nagrań surowych I/Q (int16, I/Q przeplatane)
+    REPLAY_FILE = None              # Ścieżka nagrania (nadpisywane przez: --file ...)
+    REPLAY_REALTIME = True          # True = tempo nagrania, False = maksymalna szybkość
+    REPLAY_LOOP = False             # Odtwarzaj w pętli
+    REPLAY_PACKET_SAMPLES = 65536   # Próbek na pakiet
+
 
 # =============================================================================
 # PARAMETRY PRZETWARZANIA
@@ -89,6 +125,43 @@ class ProcessingConfig:
     # FFT
     FFT_SIZE = 65536                # Rozmiar FFT (potęga 2)
     WINDOW_TYPE = "hann"            # Okno: hann, hamming, blackman, flat_top
+    SPECTRUM_NORMALIZATION = "none" # Skala mocy: none (surowe |X|^2), coherent (amplituda tonu), psd (na Hz)
+    FFT_OVERLAP = 0.0               # Nakładanie kolejnych ramek FFT: 0.0, 0.5, 0.75 (Welch)
+    FFT_BATCH_FRAMES = 8            # Ramek FFT liczonych jednym wywołaniem (i uśrednianych do wykresu)
+    FFT_WORKERS = -1                # Wątki scipy.fft (-1 = wszystkie rdzenie)
+
+    # Tryb spektrometru
+    SPECTROMETER_MODE = "fft"       # fft (okno WINDOW_TYPE + FFT) lub pfb (bank filtrów polifazowych)
+    PFB_TAPS = 4                    # PFB: gałęzie na kanał (długość filtru = PFB_TAPS * FFT_SIZE)
+    PFB_WINDOW = "hamming"          # PFB: okno filtru prototypowego (sinc * okno)
+
+    # DDC / zoom-FFT: przesunięcie i decymacja przed spektrometrem
+    DDC_ENABLED = False             # Włącz DDC (FFT_SIZE dotyczy wtedy pasma DDC_SPAN_MHZ)
+    DDC_FREQ_MHZ = 1420.40575177    # Środek pasma po DDC [MHz]
+    DDC_SPAN_MHZ = 1.5              # Szerokość pasma [MHz] (decymacja = int(SAMPLE_RATE_MHZ / DDC_SPAN_MHZ))
+    DDC_TAPS_PER_PHASE = 16         # Współczynniki filtru decymującego na gałąź polifazową
+    DDC_NCO_TABLE_SIZE = 1 << 20    # Długość tablicy NCO (krok przesunięcia = SAMPLE_RATE / rozmiar)
+
+    # Flagowanie RFI - spectral kurtosis
+    SK_ENABLED = False              # Maskuj kanały / grupy ramek z SK poza progami przed integracją
+    SK_FRAMES = 64                  # M - ramek FFT na grupę SK
+    SK_SIGMA = 3.0                  # Progi akceptacji: 1 ± SK_SIGMA * odchylenie SK
+    SK_MAX_FLAGGED_FRACTION = 0.25  # Odrzuć całą grupę gdy oznaczono więcej kanałów
+
+    # Wygaszanie impulsów w dziedzinie czasu (przed oknem i FFT)
+    BLANKER_ENABLED = False         # Wygaszaj próbki z |x| ponad progiem
+    BLANKER_SIGMA = 5.0             # Próg: BLANKER_SIGMA * odchylenie składowej I/Q (z mediany |x|)
+    BLANKER_SEGMENT_SAMPLES = 8192  # Segment statystyki (mediana |x|)
+    BLANKER_WINDOW_SEGMENTS = 15    # Mediana krocząca po tylu segmentach (~20 ms przy 6 MSPS)
+    BLANKER_GUARD_SAMPLES = 16      # Próbek wygaszanych przed i po impulsie
+    BLANKER_MODE = "zero"           # zero lub noise (szum o odpornej skali)
+
+    # Dodatkowe rozdzielczości z tego samego strumienia (zwykłe FFT bez nakładania, bez SK)
+    # Krotki (nazwa, rozmiar FFT, widm/s (0 = wszystkie ramki), ramek na widmo), np.:
+    #   ("quicklook", 4096, 20.0, 8)  - szybki podgląd / waterfall
+    #   ("line", 262144, 0, 1)        - wysoka rozdzielczość linii
+    EXTRA_OUTPUTS = []
+    MULTIRES_CPU_BUDGET = 0.7       # Łączny czas przetwarzania (wszystkie wyjścia) / czas strumienia
 
     # Integracja
     INTEGRATION_TIME_SEC = 1.0      # Czas integracji [sekundy]
@@ -102,10 +175,23 @@ class ProcessingConfig:
     SPECTRUM_INTEGRATION_ENABLED = False   # Czy integracja jest aktywna
     SPECTRUM_INTEGRATION_AUTO_SAVE = False # Automatyczny zapis po zakończeniu
 
+    # Stabilność integracji (wariancja Allana) i automatyczne zakończenie
+    INTEGRATION_STOP_MODE = "count" # count (liczba widm), sigma (cel niepewności), allan (minimum Allana)
+    INTEGRATION_TARGET_SIGMA = 1e-3 # Tryb sigma: mediana sigma/sqrt(N) / moc w kanałach poza linią
+    ALLAN_BASE_FRAMES = 64          # Ramek FFT na najkrótszy blok wariancji Allana
+    ALLAN_MIN_PAIRS = 32            # Różnic bloków wymaganych do oceny poziomu (tryb allan)
+    ALLAN_OFFLINE_MIN_KMS = 400.0   # Kanały "poza linią": |v| powyżej [km/s]
+    ALLAN_CHANNEL_STRIDE = 8        # Co który kanał poza linią (niezależne mimo przecieku okna)
+
     # Detekcja
     DETECTION_THRESHOLD_SIGMA = 3.0 # Próg detekcji [sigma powyżej szumu]
     BASELINE_WINDOW_MHZ = 1.0       # Okno do estymacji baseline [MHz]
 
+    # Linia bazowa (przetwarzanie wsadowe archiwum - reprocess_archive.py)
+    BASELINE_ORDER = 3              # Stopień wielomianu dopasowanego do mocy liniowej (0 = stały poziom)
+    BASELINE_LINE_KMS = 300.0       # Kanały |v| poniżej [km/s] wyłączone z dopasowania (linia HI)
+    BASELINE_EDGE_FRACTION = 0.05   # Ułamek kanałów przy każdej krawędzi pasma pominięty w dopasowaniu
+
 
 # =============================================================================
 # PARAMETRY GUI
@@ -140,6 +226,10 @@ class GUIConfig:
     WATERFALL_COLORMAP = 'viridis'  # Mapa kolorów: viridis, plasma, inferno, hot, jet
     WATERFALL_MIN_DB = -100         # Domyślne min [dB]
     WATERFALL_MAX_DB = -40          # Domyślne max [dB]
+    WATERFALL_SOURCE = "main"       # Wyjście zasilające waterfall: main lub nazwa z EXTRA_OUTPUTS
+
+    # Wykres stabilności (odchylenie Allana vs równanie radiometru)
+    ALLAN_PLOT_ENABLED = True
 
 
 # =============================================================================
@@ -160,6 +250,34 @@ class DataConfig:
     COMPRESSION_ENABLED = True
     COMPRESSION_LEVEL = 6           # 0-9 dla gzip
 
+    # HDF5 (h5py): porcja zbiorów widm = 1 rekord x HDF5_CHUNK_CHANNELS kanałów
+    HDF5_CHUNK_CHANNELS = 4096
+
+    # Nagrywanie surowych I/Q (int16, I/Q przeplatane + metadane .json)
+    RAW_FILE_EXTENSION = ".iq16"
+    RAW_BUFFER_MB = 8               # Rozmiar bufora zapisu [MB] (~0.33 s przy 6 MSPS)
+    RAW_BUFFER_COUNT = 4            # Liczba buforów (min. 2 - podwójne buforowanie)
+
+    # Checkpointy integracji (wznowienie po awarii przy tym samym planie widma)
+    CHECKPOINT_ENABLED = True
+    CHECKPOINT_INTERVAL_SEC = 60.0  # Odstęp zapisów [s]
+    CHECKPOINT_FILE = "integration_checkpoint.npz"     # W DATA_DIR
+
+    # Zrzuty sub-integracji (widmo co N ramek lub T sekund do katalogu .subint)
+    SUBINT_FRAMES = 0               # Ramek FFT na rekord (0 = bez limitu)
+    SUBINT_SECONDS = 10.0           # Sekund strumienia na rekord (0 = bez limitu)
+    SUBINT_QUEUE_RECORDS = 32       # Rekordów oczekujących na zapis (pełna kolejka = odrzucenie)
+
+    # Katalog obserwacji (SQLite w DATA_DIR - indeks zapisanych widm, zrzutów i nagrań)
+    CATALOG_ENABLED = True
+    CATALOG_FILE = "catalog.sqlite"
+    CATALOG_WORKERS = 0             # Procesy skanera (0 = liczba rdzeni)
+
+    # Przetwarzanie wsadowe archiwum (reprocess_archive.py)
+    REPROCESS_DIR = "./data/reprocessed"    # Katalog wyników
+    REPROCESS_WORKERS = 0           # Procesy (0 = liczba rdzeni)
+    REPROCESS_CHUNK_SEC = 30.0      # Sekund nagrania I/Q na zadanie (jednostka równoległości i wznowienia)
+
     # Metadane
     SAVE_METADATA = True            # Zapisuj metadane (czas, parametry, etc.)
     OBSERVER_NAME = ""              # Nazwa obserwatora
@@ -218,6 +336,142 @@ def validate_config():
     if not (math.log2(ProcessingConfig.FFT_SIZE).is_integer()):
         errors.append(f"FFT_SIZE musi być potęgą 2, jest: {ProcessingConfig.FFT_SIZE}")
 
+    # Sprawdź normalizację widma
+    if ProcessingConfig.SPECTRUM_NORMALIZATION not in ("none", "coherent", "psd"):
+        errors.append(f"SPECTRUM_NORMALIZATION musi być 'none', 'coherent' lub 'psd', "
+                      f"jest: {ProcessingConfig.SPECTRUM_NORMALIZATION}")
+
+    # Sprawdź nakładanie i wsad FFT
+    if ProcessingConfig.FFT_OVERLAP not in (0.0, 0.5, 0.75):
+        errors.append(f"FFT_OVERLAP musi być 0.0, 0.5 lub 0.75, jest: {ProcessingConfig.FFT_OVERLAP}")
+
+    if ProcessingConfig.SPECTROMETER_MODE not in ("fft", "pfb"):
+        errors.append(f"SPECTROMETER_MODE musi być 'fft' lub 'pfb', jest: {ProcessingConfig.SPECTROMETER_MODE}")
+
+    if ProcessingConfig.PFB_TAPS < 1:
+        errors.append(f"PFB_TAPS musi być >= 1, jest: {ProcessingConfig.PFB_TAPS}")
+
+    if ProcessingConfig.FFT_BATCH_FRAMES < 1:
+        errors.append(f"FFT_BATCH_FRAMES musi być >= 1, jest: {ProcessingConfig.FFT_BATCH_FRAMES}")
+
+    if ProcessingConfig.SK_FRAMES < 2:
+        errors.append(f"SK_FRAMES musi być >= 2, jest: {ProcessingConfig.SK_FRAMES}")
+
+    if ProcessingConfig.SK_SIGMA <= 0:
+        errors.append(f"SK_SIGMA musi być > 0, jest: {ProcessingConfig.SK_SIGMA}")
+
+    if not 0 < ProcessingConfig.SK_MAX_FLAGGED_FRACTION <= 1:
+        errors.append(f"SK_MAX_FLAGGED_FRACTION musi być w (0, 1], jest: {ProcessingConfig.SK_MAX_FLAGGED_FRACTION}")
+
+    if ProcessingConfig.BLANKER_MODE not in ("zero", "noise"):
+        errors.append(f"BLANKER_MODE musi być 'zero' lub 'noise', jest: {ProcessingConfig.BLANKER_MODE}")
+
+    if ProcessingConfig.BLANKER_SIGMA <= 0:
+        errors.append(f"BLANKER_SIGMA musi być > 0, jest: {ProcessingConfig.BLANKER_SIGMA}")
+
+    if ProcessingConfig.BLANKER_SEGMENT_SAMPLES < 256 or ProcessingConfig.BLANKER_WINDOW_SEGMENTS < 1:
+        errors.append("BLANKER_SEGMENT_SAMPLES musi być >= 256, a BLANKER_WINDOW_SEGMENTS >= 1")
+
+    # Dodatkowe rozdzielczości
+    output_names = []
+    for output in ProcessingConfig.EXTRA_OUTPUTS:
+        if len(output) != 4:
+            errors.append(f"EXTRA_OUTPUTS: oczekiwano (nazwa, FFT, widm/s, ramek), jest: {output}")
+            continue
+        name, size, rate_hz, frames = output
+        if size & (size - 1) or size < 16:
+            errors.append(f"EXTRA_OUTPUTS '{name}': rozmiar FFT musi być potęgą 2, jest: {size}")
+        if rate_hz < 0 or frames < 1:
+            errors.append(f"EXTRA_OUTPUTS '{name}': widm/s musi być >= 0, a ramek >= 1")
+        if name in output_names or name == "main":
+            errors.append(f"EXTRA_OUTPUTS: powtórzona lub zarezerwowana nazwa '{name}'")
+        output_names.append(name)
+
+    if ProcessingConfig.INTEGRATION_STOP_MODE not in ("count", "sigma", "allan"):
+        errors.append(f"INTEGRATION_STOP_MODE musi być 'count', 'sigma' lub 'allan', "
+                      f"jest: {ProcessingConfig.INTEGRATION_STOP_MODE}")
+
+    if ProcessingConfig.INTEGRATION_TARGET_SIGMA <= 0 or ProcessingConfig.ALLAN_BASE_FRAMES < 1:
+        errors.append("INTEGRATION_TARGET_SIGMA musi być > 0, a ALLAN_BASE_FRAMES >= 1")
+
+    if ProcessingConfig.ALLAN_MIN_PAIRS < 2 or ProcessingConfig.ALLAN_CHANNEL_STRIDE < 1:
+        errors.append("ALLAN_MIN_PAIRS musi być >= 2, a ALLAN_CHANNEL_STRIDE >= 1")
+
+    if not 0 < ProcessingConfig.MULTIRES_CPU_BUDGET <= 1:
+        errors.append(f"MULTIRES_CPU_BUDGET musi być w (0, 1], jest: {ProcessingConfig.MULTIRES_CPU_BUDGET}")
+
+    if GUIConfig.WATERFALL_SOURCE != "main" and GUIConfig.WATERFALL_SOURCE not in output_names:
+        errors.append(f"WATERFALL_SOURCE musi być 'main' lub nazwą z EXTRA_OUTPUTS, jest: {GUIConfig.WATERFALL_SOURCE}")
+
+    # Sprawdź rozmiar bufora pierścieniowego (potęga 2, min. 4 bloki FFT)
+    ring = ReceiverConfig.RING_BUFFER_SAMPLES
+    if ring & (ring - 1) or ring < 4 * ProcessingConfig.FFT_SIZE:
+        errors.append(f"RING_BUFFER_SAMPLES musi być potęgą 2 i >= 4*FFT_SIZE, jest: {ring}")
+
+    batch_samples = (ProcessingConfig.FFT_BATCH_FRAMES + ProcessingConfig.PFB_TAPS) * ProcessingConfig.FFT_SIZE
+    if ring < 4 * batch_samples:
+        errors.append(f"RING_BUFFER_SAMPLES musi być >= 4*(FFT_BATCH_FRAMES+PFB_TAPS)*FFT_SIZE, jest: {ring}")
+
+    # DDC: pasmo w zakresie wejścia, bufor na wsad przed decymacją
+    if ProcessingConfig.DDC_ENABLED:
+        span = ProcessingConfig.DDC_SPAN_MHZ
+        half_band = ReceiverConfig.SAMPLE_RATE_MHZ / 2
+        if not 0 < span <= ReceiverConfig.SAMPLE_RATE_MHZ:
+            errors.append(f"DDC_SPAN_MHZ musi być w (0, SAMPLE_RATE_MHZ], jest: {span}")
+        elif abs(ProcessingConfig.DDC_FREQ_MHZ - ReceiverConfig.CENTER_FREQ_MHZ) + span / 2 > half_band:
+            errors.append(f"Pasmo DDC {ProcessingConfig.DDC_FREQ_MHZ} ± {span / 2} MHz poza pasmem odbiornika")
+        else:
+            decimation = max(1, int(ReceiverConfig.SAMPLE_RATE_MHZ / span))
+            if ring < 2 * batch_samples * decimation:
+                errors.append(f"RING_BUFFER_SAMPLES musi być >= 2*(FFT_BATCH_FRAMES+PFB_TAPS)*FFT_SIZE*decymacja DDC, "
+                              f"jest: {ring}")
+
+        if ProcessingConfig.DDC_TAPS_PER_PHASE < 1:
+            errors.append(f"DDC_TAPS_PER_PHASE musi być >= 1, jest: {ProcessingConfig.DDC_TAPS_PER_PHASE}")
+
+    if DataConfig.CHECKPOINT_INTERVAL_SEC <= 0:
+        errors.append(f"CHECKPOINT_INTERVAL_SEC musi być > 0, jest: {DataConfig.CHECKPOINT_INTERVAL_SEC}")
+
+    if DataConfig.SUBINT_FRAMES < 0 or DataConfig.SUBINT_SECONDS < 0:
+        errors.append("SUBINT_FRAMES i SUBINT_SECONDS muszą być >= 0")
+    elif DataConfig.SUBINT_FRAMES == 0 and DataConfig.SUBINT_SECONDS == 0:
+        errors.append("SUBINT_FRAMES lub SUBINT_SECONDS musi być > 0")
+
+    if DataConfig.DEFAULT_FORMAT not in ("hdf5", "fits", "csv", "npz"):
+        errors.append(f"DEFAULT_FORMAT musi być 'hdf5', 'fits', 'csv' lub 'npz', jest: {DataConfig.DEFAULT_FORMAT}")
+
+    if not 0 <= DataConfig.COMPRESSION_LEVEL <= 9:
+        errors.append(f"COMPRESSION_LEVEL musi być w zakresie 0-9, jest: {DataConfig.COMPRESSION_LEVEL}")
+
+    if DataConfig.HDF5_CHUNK_CHANNELS < 1:
+        errors.append(f"HDF5_CHUNK_CHANNELS musi być >= 1, jest: {DataConfig.HDF5_CHUNK_CHANNELS}")
+
+    if DataConfig.SUBINT_QUEUE_RECORDS < 1:
+        errors.append(f"SUBINT_QUEUE_RECORDS musi być >= 1, jest: {DataConfig.SUBINT_QUEUE_RECORDS}")
+
+    if DataConfig.CATALOG_WORKERS < 0:
+        errors.append(f"CATALOG_WORKERS musi być >= 0, jest: {DataConfig.CATALOG_WORKERS}")
+
+    if DataConfig.REPROCESS_WORKERS < 0:
+        errors.append(f"REPROCESS_WORKERS musi być >= 0, jest: {DataConfig.REPROCESS_WORKERS}")
+
+    if DataConfig.REPROCESS_CHUNK_SEC <= 0:
+        errors.append(f"REPROCESS_CHUNK_SEC musi być > 0, jest: {DataConfig.REPROCESS_CHUNK_SEC}")
+
+    if ProcessingConfig.BASELINE_ORDER < 0:
+        errors.append(f"BASELINE_ORDER musi być >= 0, jest: {ProcessingConfig.BASELINE_ORDER}")
+
+    if not 0 <= ProcessingConfig.BASELINE_EDGE_FRACTION < 0.5:
+        errors.append(f"BASELINE_EDGE_FRACTION musi być w zakresie 0 - 0.5, jest: "
+                      f"{ProcessingConfig.BASELINE_EDGE_FRACTION}")
+
+    # Sprawdź źródło danych
+    if AcquisitionConfig.BACKEND not in ("sdrplay", "simulator", "file"):
+        errors.append(f"BACKEND musi być 'sdrplay', 'simulator' lub 'file', jest: {AcquisitionConfig.BACKEND}")
+
+    if AcquisitionConfig.BACKEND == "file" and not AcquisitionConfig.REPLAY_FILE:
+        errors.append("BACKEND='file' wymaga REPLAY_FILE (lub --file)")
+
     # Sprawdź sample rate
     if not (0.2 <= ReceiverConfig.SAMPLE_RATE_MHZ <= 10.0):
         errors.append(f"SAMPLE_RATE_MHZ poza zakresem, jest: {ReceiverConfig.SAMPLE_RATE_MHZ}")
@@ -275,6 +529,9 @@ def print_system_info():
     print(f"   Antena:        Parabola {HardwareConfig.ANTENNA_DIAMETER_M}m")
     print(f"   T_sys:         {HardwareConfig.T_SYS_KELVIN} K")
 
+    print(f"\n🔌 ŹRÓDŁO:        {AcquisitionConfig.BACKEND}"
+          f"{' (osobny proces)' if AcquisitionConfig.OUT_OF_PROCESS else ''}")
+
     print(f"\n📻 ODBIORNIK:")
     print(f"   Częstotliwość: {ReceiverConfig.CENTER_FREQ_MHZ} MHz")
     print(f"   Próbkowanie:   {ReceiverConfig.SAMPLE_RATE_MHZ} MHz")
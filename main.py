@@ -4,9 +4,13 @@ Punkt wejścia aplikacji
 
 Uruchom z root folderu projektu:
     python main.py
+    python main.py --backend simulator    # bez sprzętu (syntetyczne I/Q)
+    python main.py --file nagranie.iq16   # odtwarzanie nagrania
+    python main.py --separate-process     # źródło w osobnym procesie
 """
 
 import sys
+import argparse
 from pathlib import Path
 
 # Dodaj root projektu do Python path
@@ -17,12 +21,57 @@ if str(project_root) not in sys.path:
 # Importy
 from PyQt5.QtWidgets import QApplication
 from src.gui.main_window import RadioTelescopeWindow
-from config.settings import print_system_info, validate_config
+from config.settings import print_system_info, validate_config, AcquisitionConfig
+from src.hardware.backend import create_backend, BACKEND_TYPES
+
+
+def parse_args(argv):
+    """Parsuj argumenty linii poleceń (pozostałe przekazywane do Qt)"""
+
+    parser = argparse.ArgumentParser(description="Radioteleskop 1420 MHz - SDRplay RSP1A")
+    parser.add_argument(
+        "--backend", choices=BACKEND_TYPES, default=None,
+        help=f"Źródło próbek I/Q (domyślnie z config: {AcquisitionConfig.BACKEND})"
+    )
+    parser.add_argument(
+        "--file", default=None,
+        help="Odtwarzaj nagranie surowych I/Q int16 (implikuje --backend file)"
+    )
+    parser.add_argument(
+        "--loop", action="store_true",
+        help="Odtwarzanie: zapętl nagranie"
+    )
+    parser.add_argument(
+        "--max-speed", action="store_true",
+        help="Symulator/odtwarzanie: bez limitu tempa (pomiar przepustowości)"
+    )
+    parser.add_argument(
+        "--separate-process", action="store_true",
+        help="Uruchom źródło w osobnym procesie (bufor I/Q w pamięci współdzielonej)"
+    )
+
+    return parser.parse_known_args(argv[1:])
 
 
 def main():
     """Główna funkcja aplikacji"""
 
+    args, qt_args = parse_args(sys.argv)
+
+    # Nadpisz źródło z linii poleceń
+    if args.backend:
+        AcquisitionConfig.BACKEND = args.backend
+    if args.file:
+        AcquisitionConfig.BACKEND = args.backend or "file"
+        AcquisitionConfig.REPLAY_FILE = args.file
+    if args.loop:
+        AcquisitionConfig.REPLAY_LOOP = True
+    if args.max_speed:
+        AcquisitionConfig.SIM_REALTIME = False
+        AcquisitionConfig.REPLAY_REALTIME = False
+    if args.separate_process:
+        AcquisitionConfig.OUT_OF_PROCESS = True
+
     print("=" * 70)
     print("RADIOTELESKOP 1420 MHz - SDRplay RSP1A")
     print("=" * 70)
@@ -43,10 +92,10 @@ def main():
     print("\n🚀 Uruchamianie GUI...")
     print("=" * 70)
 
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setStyle('Fusion')  # Nowoczesny styl
 
-    window = RadioTelescopeWindow()
+    window = RadioTelescopeWindow(create_backend())
     window.show()
 
     return app.exec_()
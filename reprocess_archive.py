@@ -0,0 +1,113 @@
+"""
+Przetwarzanie wsadowe archiwum - linia poleceń
+Ponowne okno / FFT / integracja / linia bazowa / eksport dla katalogu
+nagrań I/Q i zapisanych widm, równolegle w procesach
+
+Uruchom z root folderu projektu:
+    python reprocess_archive.py data/                       # parametry z config
+    python reprocess_archive.py /dysk/archiwum --fft-size 262144 --window blackman --integrate-sec 600
+    python reprocess_archive.py data/ --format hdf5 --workers 16 --catalog
+    python reprocess_archive.py data/ --max-chunks 500      # porcja pracy; ponowne uruchomienie kontynuuje
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import DataConfig, validate_config
+from src.dsp.spectral_plan import NORMALIZATION_TYPES, SPECTROMETER_MODES
+from src.dsp.reprocess import ReprocessPipeline, ArchiveReprocessor, EXPORT_SUFFIXES, find_inputs
+
+
+def parse_args(argv):
+    """Parsuj argumenty linii poleceń"""
+
+    parser = argparse.ArgumentParser(description="Przetwarzanie wsadowe archiwum nagrań I/Q i widm")
+    parser.add_argument("inputs", nargs="+", help="Pliki lub katalogi (rekurencyjnie)")
+    parser.add_argument("--output", default=None, help=f"Katalog wyników (domyślnie {DataConfig.REPROCESS_DIR})")
+
+    spectral = parser.add_argument_group("okno i FFT (tylko nagrania I/Q)")
+    spectral.add_argument("--fft-size", type=int, default=None)
+    spectral.add_argument("--window", default=None, help="hann, hamming, blackman, flat_top")
+    spectral.add_argument("--overlap", type=float, default=None, help="0.0, 0.5 lub 0.75")
+    spectral.add_argument("--mode", choices=SPECTROMETER_MODES, default=None)
+    spectral.add_argument("--normalization", choices=NORMALIZATION_TYPES, default=None)
+
+    stages = parser.add_argument_group("integracja, linia bazowa, eksport")
+    stages.add_argument("--integrate-sec", type=float, default=0.0,
+                        help="Przedział integracji [s] (0 = całe wejście)")
+    stages.add_argument("--no-baseline", action="store_true", help="Bez odejmowania linii bazowej")
+    stages.add_argument("--baseline-order", type=int, default=None)
+    stages.add_argument("--line-kms", type=float, default=None,
+                        help="Kanały |v| poniżej [km/s] poza dopasowaniem linii bazowej")
+    stages.add_argument("--format", choices=tuple(EXPORT_SUFFIXES), default=None,
+                        help=f"Format wyników (domyślnie {DataConfig.DEFAULT_FORMAT})")
+
+    run = parser.add_argument_group("wykonanie")
+    run.add_argument("--workers", type=int, default=None, help="Liczba procesów (domyślnie REPROCESS_WORKERS)")
+    run.add_argument("--chunk-sec", type=float, default=None,
+                     help="Sekund nagrania na zadanie (domyślnie REPROCESS_CHUNK_SEC)")
+    run.add_argument("--max-chunks", type=int, default=None,
+                     help="Najwyżej tyle fragmentów nagrań w tym uruchomieniu")
+    run.add_argument("--force", action="store_true", help="Przelicz także istniejące wyniki")
+    run.add_argument("--catalog", action="store_true", help="Zindeksuj wyniki w katalogu obserwacji")
+
+    return parser.parse_args(argv[1:])
+
+
+def main():
+    """Główna funkcja"""
+
+    args = parse_args(sys.argv)
+    if not validate_config():
+        return 1
+
+    export_format = args.format or DataConfig.DEFAULT_FORMAT
+    if export_format == "hdf5":
+        from src.storage.hdf5_writer import hdf5_available
+        if not hdf5_available():
+            print("⚠️  Brak h5py - wyniki w formacie NPZ")
+            export_format = "npz"
+
+    pipeline = ReprocessPipeline(
+        fft_size=args.fft_size, window_type=args.window, overlap=args.overlap, mode=args.mode,
+        normalization=args.normalization, integrate_sec=args.integrate_sec,
+        baseline=not args.no_baseline, baseline_order=args.baseline_order,
+        baseline_line_kms=args.line_kms, export_format=export_format)
+    reprocessor = ArchiveReprocessor(pipeline, args.output, args.workers, args.chunk_sec)
+
+    inputs = find_inputs(args.inputs, exclude=reprocessor.output_dir)
+    print(f"🔁 Potok: {pipeline.describe()}")
+    print(f"   {len(inputs)} wejść -> {reprocessor.output_dir} ({reprocessor.workers} procesów)")
+
+    def progress(done, total, source):
+        print(f"\r   {done}/{total} zadań ({Path(source).name})", end="", flush=True)
+
+    try:
+        result = reprocessor.run(inputs, force=args.force, max_chunks=args.max_chunks, progress=progress)
+    except KeyboardInterrupt:
+        print("\n⏸  Przerwano - gotowe fragmenty zachowane, uruchom ponownie aby kontynuować")
+        return 130
+
+    print(f"\n✓ Wyniki: {result['done']}, istniejące: {result['skipped']}, "
+          f"do dokończenia: {result['remaining']}, błędy: {len(result['errors'])} "
+          f"({result['frames']:,} ramek FFT w {result['elapsed_sec']:.1f} s)")
+    for path, error in result['errors']:
+        print(f"⚠️  {path}: {error}")
+
+    if args.catalog and result['outputs']:
+        from src.storage.catalog import ObservationCatalog
+        indexed = ObservationCatalog().index(*result['outputs'])
+        print(f"🗂  Zindeksowano {indexed} wyników w katalogu")
+
+    return 0 if not result['errors'] else 1
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
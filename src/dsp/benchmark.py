@@ -0,0 +1,882 @@
+"""
+Weryfikacja i pomiary potoku DSP
+Kontrole numeryczne względem referencji float64 i testy przepustowości
+
+Uruchom z root folderu projektu:
+    python src/dsp/benchmark.py
+"""
+
+import os
+import sys
+import time
+import numpy as np
+from pathlib import Path
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import ReceiverConfig, ProcessingConfig
+from src.hardware.ring_buffer import ADC_SCALE
+from src.dsp.spectral_plan import SpectralPlan, make_window, power_to_db
+from src.dsp.spectrum_engine import SpectrumEngine
+from src.dsp.ddc import DigitalDownConverter
+from src.dsp.rfi import ImpulseBlanker
+from src.dsp.integrator import SpectrumIntegrator
+from src.dsp.stability import StabilityMonitor
+from src.storage.subint import SubintegrationDumper, SubintegrationStore, open_subint, record_dtype
+from src.storage.hdf5_writer import HDF5SubintStore, hdf5_available
+from src.storage.sdfits import SDFITSWriter
+from src.storage.save_service import write_csv
+from src.storage.catalog import ObservationCatalog, COLUMN_NAMES
+
+
+# Dopuszczalna różnica ścieżki float32 względem float64 [dB]
+FLOAT32_TOLERANCE_DB = 1e-3
+
+
+def make_test_frames(num_frames, fft_size, seed=0):
+    """
+    Ramki testowe jak z RSP1A: szum + ton + DC, kwantyzacja 14-bit
+
+    Returns:
+        (xi, xq) - tablice int16 o kształcie (num_frames, fft_size)
+    """
+    rng = np.random.default_rng(seed)
+    n = np.arange(num_frames * fft_size)
+
+    signal = 40.0 * np.exp(2j * np.pi * 0.2083 * n) + 60.0
+    iq = rng.standard_normal((2, len(n))) * 400.0
+    iq[0] += signal.real
+    iq[1] += signal.imag
+
+    iq16 = np.clip(np.rint(iq), -8192, 8191).astype(np.int16)
+    return iq16[0].reshape(num_frames, fft_size), iq16[1].reshape(num_frames, fft_size)
+
+
+def reference_spectrum_db(xi, xq, window_type, sample_rate_mhz):
+    """
+    Referencja float64: complex128, okno float64, np.fft.fft ramka po ramce,
+    średnia |X|^2, notch DC na mocy liniowej, na końcu dB
+    """
+    fft_size = xi.shape[-1]
+    window = make_window(window_type, fft_size)
+
+    power = np.zeros(fft_size, dtype=np.float64)
+    for frame_i, frame_q in zip(xi, xq):
+        samples = (frame_i.astype(np.float64) + 1j * frame_q.astype(np.float64)) * ADC_SCALE
+        fft_data = np.fft.fftshift(np.fft.fft(samples * window))
+        power += np.abs(fft_data) ** 2
+    power /= len(xi)
+
+    if ReceiverConfig.DC_NOTCH_ENABLED:
+        center_idx = fft_size // 2
+        bin_width_hz = sample_rate_mhz * 1e6 / fft_size
+        notch_bins = int(ReceiverConfig.DC_NOTCH_WIDTH_KHZ * 1000 / bin_width_hz / 2)
+        if 0 < notch_bins < fft_size // 4:
+            left_idx, right_idx = center_idx - notch_bins, center_idx + notch_bins + 1
+            power[left_idx:right_idx] = np.linspace(
+                power[left_idx - 1], power[right_idx], right_idx - left_idx)
+
+    return 10 * np.log10(power)
+
+
+def check_float32_regression(num_frames=16, fft_size=None, window_type=None,
+                             tolerance_db=FLOAT32_TOLERANCE_DB):
+    """
+    Porównaj ścieżkę complex64/float32 silnika z referencją float64
+
+    Sprawdza pojedynczą ramkę i średnią z num_frames ramek.
+
+    Returns:
+        Słownik: max_error_db / rms_error_db (ramka i średnia), passed
+    """
+    fft_size = fft_size or ProcessingConfig.FFT_SIZE
+    window_type = window_type or ProcessingConfig.WINDOW_TYPE
+    sample_rate_mhz = ReceiverConfig.SAMPLE_RATE_MHZ
+
+    xi, xq = make_test_frames(num_frames, fft_size)
+
+    # Ścieżka silnika: int16 -> complex64 (jak IQRingBuffer.write_int16)
+    frames = np.empty((num_frames, fft_size), dtype=np.complex64)
+    frames.real = xi * np.float32(ADC_SCALE)
+    frames.imag = xq * np.float32(ADC_SCALE)
+
+    engine = SpectrumEngine(None, fft_size=fft_size, window_type=window_type, batch_frames=num_frames)
+    engine.sample_rate_mhz = sample_rate_mhz
+
+    single_db = power_to_db(engine.compute_spectrum(frames[:1])[0])
+    batch_db = power_to_db(engine.compute_spectrum(frames)[0])
+
+    single_ref = reference_spectrum_db(xi[:1], xq[:1], window_type, sample_rate_mhz)
+    batch_ref = reference_spectrum_db(xi, xq, window_type, sample_rate_mhz)
+
+    single_err = np.abs(single_db.astype(np.float64) - single_ref)
+    batch_err = np.abs(batch_db.astype(np.float64) - batch_ref)
+
+    result = {
+        'dtype': str(single_db.dtype),
+        'frame_max_error_db': float(single_err.max()),
+        'frame_rms_error_db': float(np.sqrt(np.mean(single_err ** 2))),
+        'mean_max_error_db': float(batch_err.max()),
+        'mean_rms_error_db': float(np.sqrt(np.mean(batch_err ** 2))),
+    }
+    result['passed'] = (result['dtype'] == 'float32'
+                        and result['frame_max_error_db'] < tolerance_db
+                        and result['mean_max_error_db'] < tolerance_db)
+    return result
+
+
+def print_float32_regression(result):
+    """Wyświetl wynik check_float32_regression"""
+
+    print("\n🔬 Ścieżka float32 vs referencja float64:")
+    print(f"   Typ widma:            {result['dtype']}")
+    print(f"   Ramka - maks. błąd:   {result['frame_max_error_db']:.2e} dB "
+          f"(RMS {result['frame_rms_error_db']:.2e} dB)")
+    print(f"   Średnia - maks. błąd: {result['mean_max_error_db']:.2e} dB "
+          f"(RMS {result['mean_rms_error_db']:.2e} dB)")
+    print(f"   {'✓ OK' if result['passed'] else '✗ PRZEKROCZONO'} (tolerancja {FLOAT32_TOLERANCE_DB} dB)")
+
+
+# =============================================================================
+# TRYBY SPEKTROMETRU: FFT vs PFB
+# =============================================================================
+
+def _make_engine(mode, fft_size, batch_frames=None):
+    """Silnik bez backendu (tylko compute_spectrum) w zadanym trybie"""
+    engine = SpectrumEngine(None, fft_size=fft_size, batch_frames=batch_frames, mode=mode)
+    engine.sample_rate_mhz = ReceiverConfig.SAMPLE_RATE_MHZ
+    return engine
+
+
+def benchmark_throughput(mode, fft_size=None, batch_frames=None, duration_sec=2.0):
+    """
+    Przepustowość compute_spectrum w trybie mode ("fft" / "pfb")
+
+    Wsady budowane jak w SpectrumEngine: widok sliding_window_view na ciągłym
+    buforze complex64 z krokiem plan.hop.
+
+    Returns:
+        Słownik: frames_per_sec, msps (próbek wejściowych/s), realtime_factor
+        (względem ReceiverConfig.SAMPLE_RATE_MHZ)
+    """
+    fft_size = fft_size or ProcessingConfig.FFT_SIZE
+    batch_frames = batch_frames or ProcessingConfig.FFT_BATCH_FRAMES
+
+    engine = _make_engine(mode, fft_size, batch_frames)
+    plan = engine.plan
+
+    rng = np.random.default_rng(0)
+    stage_len = batch_frames * plan.hop + plan.frame_len - plan.hop
+    stage = (rng.standard_normal(stage_len) + 1j * rng.standard_normal(stage_len)).astype(np.complex64)
+    frames = sliding_window_view(stage, plan.frame_len)[::plan.hop][:batch_frames]
+
+    engine.compute_spectrum(frames)     # rozgrzewka (plan scipy.fft)
+
+    batches = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration_sec:
+        engine.compute_spectrum(frames)
+        batches += 1
+    elapsed = time.perf_counter() - start
+
+    frames_per_sec = batches * batch_frames / elapsed
+    msps = frames_per_sec * plan.hop / 1e6
+    return {
+        'mode': mode,
+        'fft_size': fft_size,
+        'frame_len': plan.frame_len,
+        'frames_per_sec': frames_per_sec,
+        'msps': msps,
+        'realtime_factor': msps / ReceiverConfig.SAMPLE_RATE_MHZ,
+    }
+
+
+def measure_leakage(mode, fft_size=None, far_bins=10):
+    """
+    Płaskość kanału i przeciek dla tonu przesuniętego względem środka kanału
+
+    Returns:
+        Słownik: quarter_loss_db / scalloping_db (spadek szczytu tonu
+        przesuniętego o 1/4 i 1/2 kanału względem tonu w środku kanału),
+        leakage_db (moc far_bins kanałów od tonu z połowy kanału względem szczytu)
+    """
+    fft_size = fft_size or ProcessingConfig.FFT_SIZE
+    engine = _make_engine(mode, fft_size)
+    plan = engine.plan
+
+    num_frames = 8
+    n = np.arange((num_frames - 1) * plan.hop + plan.frame_len)
+    k0 = fft_size // 4
+    peak_idx = fft_size // 2 + k0
+
+    def tone_power(offset_bins):
+        tone = np.exp(2j * np.pi * (k0 + offset_bins) * n / fft_size).astype(np.complex64)
+        frames = sliding_window_view(tone, plan.frame_len)[::plan.hop][:num_frames]
+        return engine.compute_spectrum(frames)[0].astype(np.float64)
+
+    centered = tone_power(0.0)
+    quarter = tone_power(0.25)
+    halfway = tone_power(0.5)
+
+    return {
+        'mode': mode,
+        'quarter_loss_db': float(10 * np.log10(centered[peak_idx] / quarter[peak_idx])),
+        'scalloping_db': float(10 * np.log10(centered[peak_idx] / max(halfway[peak_idx], halfway[peak_idx + 1]))),
+        'leakage_db': float(10 * np.log10(halfway[peak_idx + far_bins] / halfway[peak_idx])),
+    }
+
+
+def print_mode_comparison(modes=("fft", "pfb"), fft_size=None):
+    """Porównaj przepustowość i przeciek trybów spektrometru"""
+
+    fft_size = fft_size or ProcessingConfig.FFT_SIZE
+    print(f"\n⚡ Tryby spektrometru (FFT {fft_size}, cel {ReceiverConfig.SAMPLE_RATE_MHZ} MSPS):")
+
+    all_realtime = True
+    for mode in modes:
+        speed = benchmark_throughput(mode, fft_size)
+        leak = measure_leakage(mode, fft_size)
+        all_realtime &= speed['realtime_factor'] >= 1.0
+        print(f"   {mode.upper():4s} ramka {speed['frame_len']:6d}: {speed['frames_per_sec']:8.0f} FFT/s, "
+              f"{speed['msps']:6.1f} MSPS (x{speed['realtime_factor']:.1f} czasu rzeczywistego), "
+              f"spadek @1/4 kanału {leak['quarter_loss_db']:.2f} dB, @1/2 {leak['scalloping_db']:.2f} dB, "
+              f"przeciek @10 kanałów {leak['leakage_db']:.1f} dB")
+
+    print(f"   {'✓ OK' if all_realtime else '✗ PONIŻEJ CZASU RZECZYWISTEGO'}")
+    return all_realtime
+
+
+def benchmark_ddc(span_mhz=None, block_samples=1 << 20, duration_sec=2.0):
+    """
+    Przepustowość DDC (NCO + decymator polifazowy) dla pasma span_mhz
+
+    Returns:
+        Słownik: decimation, msps (próbek wejściowych/s), realtime_factor
+    """
+    sample_rate_mhz = ReceiverConfig.SAMPLE_RATE_MHZ
+    ddc = DigitalDownConverter(sample_rate_mhz, ReceiverConfig.CENTER_FREQ_MHZ, span_mhz=span_mhz)
+
+    rng = np.random.default_rng(0)
+    block = (rng.standard_normal(block_samples) + 1j * rng.standard_normal(block_samples)).astype(np.complex64)
+    samples = np.empty_like(block)
+
+    processed = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration_sec:
+        samples[:] = block
+        ddc.process(samples, processed)
+        processed += block_samples
+    msps = processed / (time.perf_counter() - start) / 1e6
+
+    return {
+        'decimation': ddc.decimation,
+        'output_rate_mhz': ddc.output_rate_mhz,
+        'msps': msps,
+        'realtime_factor': msps / sample_rate_mhz,
+    }
+
+
+def print_ddc_benchmark(span_mhz=None):
+    """Wyświetl przepustowość DDC i oszczędność pracy FFT"""
+
+    result = benchmark_ddc(span_mhz)
+    print(f"\n🔎 DDC {ReceiverConfig.SAMPLE_RATE_MHZ} -> {result['output_rate_mhz']:.3f} MSPS "
+          f"(decymacja {result['decimation']}):")
+    print(f"   {result['msps']:.1f} MSPS (x{result['realtime_factor']:.1f} czasu rzeczywistego), "
+          f"{result['decimation']}x mniej ramek FFT/s (przy tym samym FFT_SIZE "
+          f"{result['decimation']}x drobniejsza rozdzielczość)")
+    return result['realtime_factor'] >= 1.0
+
+
+def benchmark_blanker(fft_size=None, batch_frames=None, pulse_rate_hz=100.0, duration_sec=2.0):
+    """
+    Koszt wygaszania impulsów względem FFT tego samego wsadu
+
+    Blok szumu z krótkimi impulsami (4 próbki, ok. 20 sigma) w tempie
+    pulse_rate_hz (zapłon silnika ~ 100/s) - jak wsad silnika.
+
+    Returns:
+        Słownik: blanker_ns / fft_ns (na próbkę), cost_ratio, detected (udział
+        wykrytych impulsów), false_fraction (wygaszone próbki na czystym szumie)
+    """
+    fft_size = fft_size or ProcessingConfig.FFT_SIZE
+    batch_frames = batch_frames or ProcessingConfig.FFT_BATCH_FRAMES
+    n = fft_size * batch_frames
+
+    rng = np.random.default_rng(0)
+    noise = ((rng.standard_normal(n) + 1j * rng.standard_normal(n)) * 0.05).astype(np.complex64)
+    pulsed = noise.copy()
+    pulses = max(1, int(round(pulse_rate_hz * n / (ReceiverConfig.SAMPLE_RATE_MHZ * 1e6))))
+    positions = rng.choice(n - 8, pulses, replace=False)
+    for offset in range(4):
+        pulsed[positions + offset] += 1.0
+
+    def timed(func, setup=None):
+        # Najlepszy z pomiarów (jak timeit) - odporny na inne procesy
+        best = float('inf')
+        deadline = time.perf_counter() + duration_sec / 2
+        while time.perf_counter() < deadline:
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best / n * 1e9
+
+    blanker = ImpulseBlanker(ReceiverConfig.SAMPLE_RATE_MHZ)
+    work = np.empty_like(pulsed)
+
+    def fresh_block():
+        # Świeżo zapisany blok - jak wsad tuż po odczycie z bufora
+        work[:] = pulsed
+
+    blanker_ns = timed(lambda: blanker.process(work), setup=fresh_block)
+
+    work[:] = pulsed
+    blanker.process(work)
+    detected = float(np.mean(work[positions] == 0))
+
+    clean = ImpulseBlanker(ReceiverConfig.SAMPLE_RATE_MHZ, guard_samples=0)
+    false_blanked = clean.process(noise.copy())
+
+    engine = _make_engine("fft", fft_size, batch_frames)
+    frames = noise.reshape(batch_frames, fft_size)
+    fft_ns = timed(lambda: engine.compute_spectrum(frames))
+
+    return {
+        'blanker_ns': blanker_ns,
+        'fft_ns': fft_ns,
+        'cost_ratio': blanker_ns / fft_ns,
+        'detected': detected,
+        'false_fraction': false_blanked / n,
+    }
+
+
+def print_blanker_benchmark():
+    """Wyświetl koszt i skuteczność wygaszania impulsów"""
+
+    result = benchmark_blanker()
+    print("\n⚡ Wygaszanie impulsów:")
+    print(f"   {result['blanker_ns']:.2f} ns/próbkę vs FFT {result['fft_ns']:.2f} ns/próbkę "
+          f"({result['cost_ratio'] * 100:.1f}% czasu FFT)")
+    print(f"   Wykryte impulsy: {result['detected'] * 100:.0f}% | "
+          f"fałszywie wygaszone (szum): {result['false_fraction']:.1e}")
+    passed = result['cost_ratio'] < 0.1 and result['detected'] == 1.0
+    print(f"   {'✓ OK' if passed else '✗ ZA WOLNO LUB NIEWYKRYTE'} (limit 10% czasu FFT)")
+    return passed
+
+
+# =============================================================================
+# INTEGRATOR: ŚREDNIA I WARIANCJA (WELFORD / CHAN)
+# =============================================================================
+
+def check_integrator_statistics(num_bins=256, long_frames=1_000_000, batch_frames=64, seed=0):
+    """
+    Średnia i sigma integratora względem referencji
+
+    - Krótka seria z maską kanałów: wynik vs np.mean / np.var dwuprzebiegowo
+      (po przyjętych ramkach każdego kanału)
+    - Długa seria (long_frames ramek mocy o rozkładzie wykładniczym na dużym
+      poziomie stałym): sigma musi zgadzać się z rozkładem, a pamięć nie rośnie
+
+    Returns:
+        dict z błędami względnymi i 'passed'
+    """
+    rng = np.random.default_rng(seed)
+
+    def batch_m2(frames):
+        return ((frames - frames.mean(axis=0)) ** 2).sum(axis=0)
+
+    # Krótka seria vs referencja dwuprzebiegowa
+    frames = rng.exponential(1.0, (40, batch_frames, num_bins))
+    masks = rng.random((40, num_bins)) > 0.1
+    integrator = SpectrumIntegrator(target=10 ** 9)
+    integrator.start()
+    for batch, accepted in zip(frames, masks):
+        integrator.add(batch.mean(axis=0), None, batch_frames, accepted, batch_m2(batch))
+
+    weights = np.repeat(masks, batch_frames, axis=0)
+    flat = frames.reshape(-1, num_bins)
+    ref_mean = np.array([flat[weights[:, k], k].mean() for k in range(num_bins)])
+    ref_var = np.array([flat[weights[:, k], k].var(ddof=1) for k in range(num_bins)])
+    mean_error = np.max(np.abs(integrator.mean_power() / ref_mean - 1))
+    var_error = np.max(np.abs(integrator.variance() / ref_var - 1))
+
+    # Długa seria: poziom 1e6 + szum o sigma 1 (sumy kwadratów straciłyby tu precyzję)
+    offset = 1e6
+    integrator = SpectrumIntegrator(target=long_frames)
+    integrator.start()
+    state_bytes = None
+    for _ in range(long_frames // batch_frames):
+        batch = offset + rng.exponential(1.0, (batch_frames, num_bins))
+        integrator.add(batch.mean(axis=0), None, batch_frames, None, batch_m2(batch))
+        if state_bytes is None:
+            state_bytes = integrator.power_mean.nbytes + integrator.power_m2.nbytes + integrator.bin_counts.nbytes
+
+    sigma_error = np.max(np.abs(integrator.std() - 1.0))
+    stderr_expected = 1.0 / np.sqrt(integrator.count)
+    mean_sigmas = np.max(np.abs(integrator.mean_power() - offset - 1.0) / stderr_expected)
+    final_bytes = integrator.power_mean.nbytes + integrator.power_m2.nbytes + integrator.bin_counts.nbytes
+
+    return {
+        'mean_error': mean_error,
+        'var_error': var_error,
+        'long_frames': integrator.count,
+        'sigma_error': sigma_error,
+        'mean_sigmas': mean_sigmas,
+        'state_bytes': final_bytes,
+        'passed': (mean_error < 1e-12 and var_error < 1e-10 and sigma_error < 0.02
+                   and mean_sigmas < 6 and final_bytes == state_bytes),
+    }
+
+
+def print_integrator_statistics():
+    """Wyświetl kontrolę średniej i sigma integratora"""
+
+    result = check_integrator_statistics()
+    print("\n📈 Integrator - średnia i wariancja (Welford / Chan):")
+    print(f"   Z maską vs referencja: średnia {result['mean_error']:.1e}, "
+          f"wariancja {result['var_error']:.1e} (błąd względny)")
+    print(f"   {result['long_frames']:,} ramek na poziomie 1e6: błąd sigma {result['sigma_error']:.2e}, "
+          f"średnia w {result['mean_sigmas']:.1f} sigma/sqrt(N), stan {result['state_bytes'] / 1024:.0f} kB")
+    print(f"   {'✓ OK' if result['passed'] else '✗ BŁĄD'}")
+    return result['passed']
+
+
+# =============================================================================
+# STABILNOŚĆ: WARIANCJA ALLANA I AUTOMATYCZNE ZAKOŃCZENIE
+# =============================================================================
+
+def check_allan_monitor(fft_size=1024, max_blocks=8000, drift=5e-4, seeds=(0, 1, 2)):
+    """
+    Monitor stabilności na syntetycznych widmach (kanały niezależne, bloki po
+    ALLAN_BASE_FRAMES ramek, moc ~ Gamma)
+
+    - Szum biały: odchylenie Allana kanałów poza linią zgodne z równaniem
+      radiometru, tryb "allan" nie kończy integracji
+    - Szum + błądzenie losowe wzmocnienia: tryb "allan" kończy integrację
+      w pobliżu minimum krzywej
+
+    Returns:
+        dict z wynikami i 'passed'
+    """
+    plan = SpectralPlan(fft_size, "hann", ReceiverConfig.SAMPLE_RATE_MHZ, ReceiverConfig.CENTER_FREQ_MHZ,
+                        mode="fft")
+    base_frames = ProcessingConfig.ALLAN_BASE_FRAMES
+
+    def run(seed, gain_drift):
+        rng = np.random.default_rng(seed)
+        monitor = StabilityMonitor(plan, "allan")
+        integrator = SpectrumIntegrator(target=10 ** 12, monitor=monitor)
+        integrator.start()
+        gain = 1.0
+        blocks = 0
+        while integrator.active and blocks < max_blocks:
+            gain += gain_drift * rng.standard_normal()
+            power = rng.gamma(base_frames, 1.0 / base_frames, fft_size) * gain
+            integrator.add(power.astype(np.float32), None, base_frames)
+            blocks += 1
+        return blocks, monitor.curves(integrator.mean_power())
+
+    white_ratio = []
+    false_stops = 0
+    for seed in seeds:
+        blocks, curves = run(seed, 0.0)
+        false_stops += blocks < max_blocks
+        white_ratio.append(curves['offline_adev'][:8] / curves['offline_pred'][:8])
+    white_ratio = np.concatenate(white_ratio)
+
+    stop_blocks = [run(seed, drift)[0] for seed in seeds]
+
+    return {
+        'white_ratio_min': white_ratio.min(),
+        'white_ratio_max': white_ratio.max(),
+        'false_stops': false_stops,
+        'drift_stop_blocks': stop_blocks,
+        'passed': (0.8 < white_ratio.min() and white_ratio.max() < 1.25 and false_stops == 0
+                   and all(b < max_blocks for b in stop_blocks)),
+    }
+
+
+def print_allan_monitor():
+    """Wyświetl kontrolę monitora stabilności"""
+
+    result = check_allan_monitor()
+    print("\n📉 Wariancja Allana vs równanie radiometru:")
+    print(f"   Szum biały: pomiar / przewidywanie {result['white_ratio_min']:.2f} - "
+          f"{result['white_ratio_max']:.2f}, fałszywe zakończenia: {result['false_stops']}")
+    print(f"   Z dryfem: zakończenie po {', '.join(str(b) for b in result['drift_stop_blocks'])} blokach")
+    print(f"   {'✓ OK' if result['passed'] else '✗ BŁĄD'}")
+    return result['passed']
+
+
+# =============================================================================
+# ZRZUTY SUB-INTEGRACJI
+# =============================================================================
+
+def check_subint_average(store_class=SubintegrationStore, suffix=".subint", num_bins=256, batches=40,
+                         batch_frames=16, batches_per_record=5, seed=0):
+    """
+    Zrzuty sub-integracji -> zbiór na dysku -> ponowne uśrednienie
+
+    Średnia i wariancja z average() zbioru (całość, wycinek rekordów oraz
+    wycinek rekordów x zakres kanałów) vs SpectrumIntegrator karmiony tymi
+    samymi wsadami z maską; różnica tylko z zapisu rekordów we float32.
+
+    Returns:
+        dict z błędami względnymi i 'passed'
+    """
+    import tempfile
+
+    rng = np.random.default_rng(seed)
+    plan = SpectralPlan(num_bins, "hann", ReceiverConfig.SAMPLE_RATE_MHZ, ReceiverConfig.CENTER_FREQ_MHZ)
+    frames = rng.exponential(1.0, (batches, batch_frames, num_bins))
+    masks = rng.random((batches, num_bins)) > 0.1
+
+    def batch_m2(batch):
+        return ((batch - batch.mean(axis=0)) ** 2).sum(axis=0)
+
+    def integrate(selection):
+        integrator = SpectrumIntegrator(target=10 ** 9)
+        integrator.start()
+        for batch, accepted in zip(frames[selection], masks[selection]):
+            integrator.add(batch.mean(axis=0), None, batch_frames, accepted, batch_m2(batch))
+        return integrator.mean_power(), integrator.variance()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = store_class(Path(tmp) / f"test{suffix}")
+        dumper = SubintegrationDumper(store, every_frames=batches_per_record * batch_frames, every_sec=0)
+        for i, (batch, accepted) in enumerate(zip(frames, masks)):
+            first = i * batch_frames * num_bins
+            dumper.add(plan, batch.mean(axis=0), batch_frames, accepted, batch_m2(batch),
+                       first, first + batch_frames * num_bins)
+        dumper.close()
+
+        dataset = open_subint(store.path)
+        records = len(dataset)
+        contiguous = bool(np.all(dataset.column('first_sample')[1:] == dataset.column('end_sample')[:-1]))
+
+        errors = []
+        for start, stop, channels in ((0, records, slice(None)), (2, 5, slice(None)), (1, 4, slice(40, 90))):
+            _, mean, sigma, _ = dataset.average(start, stop, channels, chunk_records=3)
+            ref_mean, ref_var = integrate(slice(start * batches_per_record, stop * batches_per_record))
+            errors.append((np.max(np.abs(mean / ref_mean[channels] - 1)),
+                           np.max(np.abs(sigma ** 2 / ref_var[channels] - 1))))
+        dataset.close()
+
+    mean_error = max(e[0] for e in errors)
+    var_error = max(e[1] for e in errors)
+    return {
+        'records': records,
+        'contiguous': contiguous,
+        'mean_error': mean_error,
+        'var_error': var_error,
+        'passed': (records == batches // batches_per_record and contiguous
+                   and mean_error < 1e-6 and var_error < 1e-5),
+    }
+
+
+def print_subint_average():
+    """Wyświetl kontrolę zrzutów sub-integracji"""
+
+    print("\n📼 Sub-integracje - zapis i ponowne uśrednienie:")
+    formats = [("katalog .subint", SubintegrationStore, ".subint"), ("SDFITS", SDFITSWriter, ".fits")]
+    if hdf5_available():
+        formats.append(("HDF5", HDF5SubintStore, ".h5"))
+    else:
+        print("   HDF5: brak h5py - pominięto")
+
+    passed = True
+    for name, store_class, suffix in formats:
+        result = check_subint_average(store_class, suffix)
+        print(f"   {name}: {result['records']} rekordów, ciągłe indeksy próbek: "
+              f"{'tak' if result['contiguous'] else 'NIE'}, vs integrator: średnia {result['mean_error']:.1e}, "
+              f"wariancja {result['var_error']:.1e} {'✓' if result['passed'] else '✗'}")
+        passed &= result['passed']
+    print(f"   {'✓ OK' if passed else '✗ BŁĄD'}")
+    return passed
+
+
+def benchmark_sdfits(channels=65536, rows=120, dump_interval_sec=1.0):
+    """
+    Przepustowość strumieniowego zapisu SDFITS (wiersz = widmo channels kanałów)
+
+    Returns:
+        dict z wierszami/s, MB/s i krotnością czasu rzeczywistego przy
+        jednym wierszu co dump_interval_sec
+    """
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    plan = SpectralPlan(channels, "hann", ReceiverConfig.SAMPLE_RATE_MHZ, ReceiverConfig.CENTER_FREQ_MHZ)
+    records = np.zeros(8, dtype=record_dtype(channels))
+    records['time_start'] = time.time() + np.arange(8)
+    records['time_end'] = records['time_start'] + dump_interval_sec
+    records['frames'] = 91
+    records['power'] = rng.exponential(1.0, (8, channels))
+    records['m2'] = records['power'] ** 2 * 90
+    records['counts'] = 91
+
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = SDFITSWriter(Path(tmp) / "bench.fits")
+        writer.open({'freqs_mhz': plan.freqs_mhz}, {'channels': channels})
+        start = time.perf_counter()
+        for i in range(rows):
+            writer.write(records[i % 8:i % 8 + 1])
+        writer.close()
+        elapsed = time.perf_counter() - start
+        size = writer.path.stat().st_size
+
+    rows_per_sec = rows / elapsed
+    return {
+        'channels': channels,
+        'rows_per_sec': rows_per_sec,
+        'mb_per_sec': size / elapsed / 1e6,
+        'realtime_factor': rows_per_sec * dump_interval_sec,
+    }
+
+
+def print_sdfits_benchmark():
+    """Wyświetl przepustowość zapisu SDFITS"""
+
+    result = benchmark_sdfits()
+    realtime = result['realtime_factor'] >= 1.0
+    print(f"\n🔭 SDFITS - strumieniowy zapis {result['channels']} kanałów:")
+    print(f"   {result['rows_per_sec']:.0f} wierszy/s ({result['mb_per_sec']:.0f} MB/s), "
+          f"{result['realtime_factor']:.0f}x czasu rzeczywistego przy widmie co sekundę "
+          f"{'✓' if realtime else '✗'}")
+    return realtime
+
+
+def benchmark_spectrum_save(channels=65536, frames=100, seed=0):
+    """
+    Zapis zintegrowanego widma w tle: koszt migawki (jedyna część w wątku GUI)
+    i wektorowy CSV względem csv.writer wiersz po wierszu (te same liczby)
+
+    Returns:
+        dict z czasami [ms], przyspieszeniem CSV i zgodnością wartości
+    """
+    import csv
+    import tempfile
+
+    rng = np.random.default_rng(seed)
+    integrator = SpectrumIntegrator(target=10 * frames)
+    integrator.start()
+    axis = np.linspace(-600.0, 600.0, channels)
+    for _ in range(frames):
+        integrator.add(rng.exponential(1.0, channels).astype(np.float32), axis)
+
+    start = time.perf_counter()
+    snapshot = integrator.copy()
+    snapshot_ms = (time.perf_counter() - start) * 1e3
+
+    columns = [snapshot.axis, snapshot.mean_db(), snapshot.mean_power(), snapshot.std(), snapshot.stderr()]
+    names = ['Doppler_Velocity_km_s', 'Power_dB', 'Power_Linear', 'Sigma_Linear', 'Stderr_Linear']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fast_path = Path(tmp) / "fast.csv"
+        start = time.perf_counter()
+        write_csv(fast_path, columns, names)
+        fast_ms = (time.perf_counter() - start) * 1e3
+
+        slow_path = Path(tmp) / "slow.csv"
+        start = time.perf_counter()
+        with open(slow_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(names)
+            for row in zip(*columns):
+                writer.writerow(row)
+        slow_ms = (time.perf_counter() - start) * 1e3
+
+        fast = np.loadtxt(fast_path, delimiter=",", skiprows=1)
+        slow = np.loadtxt(slow_path, delimiter=",", skiprows=1)
+
+    return {
+        'channels': channels,
+        'snapshot_ms': snapshot_ms,
+        'csv_ms': fast_ms,
+        'csv_writer_ms': slow_ms,
+        'speedup': slow_ms / fast_ms,
+        'max_rel_diff': float(np.max(np.abs(fast - slow) / np.maximum(np.abs(slow), 1e-30))),
+    }
+
+
+def print_spectrum_save_benchmark():
+    """Wyświetl koszt migawki i zapisu CSV"""
+
+    result = benchmark_spectrum_save()
+    passed = result['max_rel_diff'] < 1e-9 and result['speedup'] > 1.0
+    print(f"\n💾 Zapis widma w tle - {result['channels']} kanałów:")
+    print(f"   Migawka integracji (wątek GUI): {result['snapshot_ms']:.2f} ms")
+    print(f"   CSV wektorowo: {result['csv_ms']:.0f} ms, csv.writer: {result['csv_writer_ms']:.0f} ms "
+          f"({result['speedup']:.1f}x), różnica względna {result['max_rel_diff']:.1e} "
+          f"{'✓' if passed else '✗'}")
+    return passed
+
+
+def benchmark_catalog(products=20000, seed=0):
+    """
+    Zapytania katalogu obserwacji przy archiwum products produktów
+
+    Returns:
+        dict z czasem wstawienia [s] i zapytań [ms] (filtry z indeksami)
+    """
+    import json
+    import tempfile
+
+    rng = np.random.default_rng(seed)
+    t0 = time.time() - products * 600.0
+    entries = []
+    for i in range(products):
+        entry = dict.fromkeys(COLUMN_NAMES)
+        entry.update({
+            'path': f"/archiwum/spectrum_integrated_{i}.npz",
+            'kind': 'spectrum',
+            'format': 'NPZ',
+            'time_start': t0 + i * 600.0,
+            'time_end': t0 + i * 600.0 + 300.0,
+            'center_freq_mhz': 1420.40575177,
+            'lna_state': int(rng.integers(0, 10)),
+            'integration_count': int(rng.integers(100, 100000)),
+            'peak_velocity_km_s': float(rng.normal(0.0, 50.0)),
+            'rms_db': float(rng.exponential(0.1)),
+            'metadata': json.dumps({'fft_size': 65536, 'window_type': 'hann'}),
+        })
+        entries.append(entry)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = ObservationCatalog(Path(tmp) / "catalog.sqlite")
+        start = time.perf_counter()
+        catalog.add(entries)
+        insert_sec = time.perf_counter() - start
+
+        queries = {
+            'LNA 5, >10k integracji': dict(lna_state=5, min_integration_count=10000),
+            'ostatnia doba': dict(min_time_start=time.time() - 86400.0),
+            'LNA 5, 20 najnowszych': dict(lna_state=5, order_by='time_start', descending=True, limit=20),
+        }
+        timings = {}
+        for name, filters in queries.items():
+            start = time.perf_counter()
+            rows = catalog.query(**filters)
+            timings[name] = ((time.perf_counter() - start) * 1e3, len(rows))
+
+    return {'products': products, 'insert_sec': insert_sec, 'queries': timings}
+
+
+def print_catalog_benchmark(max_query_ms=100.0):
+    """Wyświetl czasy zapytań katalogu"""
+
+    result = benchmark_catalog()
+    passed = all(ms < max_query_ms for ms, _ in result['queries'].values())
+    print(f"\n🗂  Katalog obserwacji - {result['products']} produktów "
+          f"(wstawienie {result['insert_sec']:.2f} s):")
+    for name, (ms, rows) in result['queries'].items():
+        print(f"   {name:24} {rows:6} wyników w {ms:6.1f} ms {'✓' if ms < max_query_ms else '✗'}")
+    return passed
+
+
+def check_reprocess(duration_sec=4.0, sample_rate_mhz=2.0, fft_size=8192, workers=2, seed=0):
+    """
+    Przetwarzanie wsadowe nagrania I/Q: zgodność z referencją float64,
+    wynik niezależny od liczby procesów i identyczny po wznowieniu
+
+    Returns:
+        dict z błędem względnym średniej / sigma, zgodnością wyników i
+        przepustowością [MSPS] (1 proces i workers procesów)
+    """
+    import json
+    import tempfile
+    from src.dsp.reprocess import ReprocessPipeline, ArchiveReprocessor, find_inputs
+
+    rng = np.random.default_rng(seed)
+    num_samples = int(duration_sec * sample_rate_mhz * 1e6)
+    iq = rng.normal(0.0, 300.0, (num_samples, 2)).round().astype(np.int16)
+
+    # Referencja float64: wszystkie ramki bez nakładania, notch jak w planie
+    plan = SpectralPlan(fft_size, "hann", sample_rate_mhz, 1420.40575177, ReceiverConfig.FREQ_CALIBRATION_ENABLED,
+                        ReceiverConfig.FREQ_OFFSET_PPM, ReceiverConfig.FREQ_OFFSET_KHZ, overlap=0.0,
+                        dtype=np.float64, mode="fft")
+    num_frames = num_samples // fft_size
+    x = (iq[:num_frames * fft_size, 0] + 1j * iq[:num_frames * fft_size, 1]) * ADC_SCALE
+    frame_power = np.abs(np.fft.fft(x.reshape(num_frames, fft_size) * plan.window, axis=1)) ** 2
+    ref_mean = np.fft.fftshift(frame_power.mean(axis=0))
+    ref_sigma = np.fft.fftshift(frame_power.std(axis=0, ddof=1))
+    plan.apply_notch(ref_mean)
+    plan.apply_notch(ref_sigma)
+
+    pipeline = ReprocessPipeline(fft_size=fft_size, window_type="hann", overlap=0.0, mode="fft",
+                                 normalization="none", integrate_sec=1.0, baseline=False, export_format="npz")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / "archiwum").mkdir()
+        iq.tofile(tmp / "archiwum" / "test.iq16")
+        with open(tmp / "archiwum" / "test.iq16.json", 'w', encoding='utf-8') as f:
+            json.dump({'sample_rate_mhz': sample_rate_mhz, 'center_freq_mhz': 1420.40575177,
+                       'start_time': "2025-01-01T00:00:00"}, f)
+        inputs = find_inputs([tmp / "archiwum"])
+
+        results = {}
+        for name, count, max_chunks in (("serial", 1, None), ("parallel", workers, None),
+                                        ("resumed", workers, 3), ("resumed", workers, None)):
+            reprocessor = ArchiveReprocessor(pipeline, tmp / name, workers=count, chunk_sec=0.5)
+            results[name] = reprocessor.run(inputs, max_chunks=max_chunks)
+
+        outputs = {}
+        for name in ("serial", "parallel", "resumed"):
+            with np.load(results[name]['outputs'][0], allow_pickle=True) as data:
+                outputs[name] = {key: data[key] for key in data.files if key != 'metadata'}
+
+    serial = outputs['serial']
+    identical = all(np.array_equal(serial[key], outputs[name][key], equal_nan=True)
+                    for name in ("parallel", "resumed") for key in serial)
+    valid = np.isfinite(ref_mean) & (ref_sigma > 0)
+    mean_error = float(np.max(np.abs(serial['power_linear'][valid] / ref_mean[valid] - 1)))
+    sigma_error = float(np.median(np.abs(serial['sigma_linear'][valid] / ref_sigma[valid] - 1)))
+
+    return {
+        'frames': int(results['serial']['frames']),
+        'intervals': len(serial['interval_frames']),
+        'mean_error': mean_error,
+        'sigma_error': sigma_error,
+        'identical': identical,
+        'serial_msps': num_samples / results['serial']['elapsed_sec'] / 1e6,
+        'parallel_msps': num_samples / results['parallel']['elapsed_sec'] / 1e6,
+        'workers': workers,
+        'passed': identical and mean_error < 1e-5 and sigma_error < 1e-4,
+    }
+
+
+def print_reprocess_check():
+    """Wyświetl kontrolę przetwarzania wsadowego"""
+
+    result = check_reprocess()
+    print(f"\n🔁 Przetwarzanie wsadowe - {result['frames']} ramek, {result['intervals']} przedziałów:")
+    print(f"   vs referencja float64: średnia {result['mean_error']:.1e}, sigma (mediana) {result['sigma_error']:.1e}")
+    print(f"   1 proces / {result['workers']} procesy / wznowienie: "
+          f"{'identyczne' if result['identical'] else 'RÓŻNE'}")
+    print(f"   Przepustowość: {result['serial_msps']:.1f} MSPS (1 proces), "
+          f"{result['parallel_msps']:.1f} MSPS ({result['workers']} procesy, {os.cpu_count()} rdzeni)")
+    print(f"   {'✓ OK' if result['passed'] else '✗ BŁĄD'}")
+    return result['passed']
+
+
+if __name__ == "__main__":
+    result = check_float32_regression()
+    print_float32_regression(result)
+    realtime = print_mode_comparison()
+    realtime &= print_ddc_benchmark()
+    realtime &= print_blanker_benchmark()
+    realtime &= print_sdfits_benchmark()
+    realtime &= print_spectrum_save_benchmark()
+    realtime &= print_catalog_benchmark()
+    statistics = print_integrator_statistics()
+    statistics &= print_allan_monitor()
+    statistics &= print_subint_average()
+    statistics &= print_reprocess_check()
+    sys.exit(0 if result['passed'] and realtime and statistics else 1)
@@ -0,0 +1,127 @@
+"""
+Checkpointy integracji
+Okresowy, atomowy zapis stanu integratora (średnia, M2, liczniki, monitor
+stabilności) - wznowienie długiej integracji po awarii lub odłączeniu SDR
+"""
+
+import os
+import sys
+import json
+import time
+import numpy as np
+from pathlib import Path
+from datetime import datetime
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import DataConfig
+
+
+def plan_signature(plan, **extra):
+    """
+    Podpis konfiguracji widma - checkpoint można wznowić tylko przy identycznym
+
+    Args:
+        plan: SpectralPlan
+        **extra: Dodatkowe parametry wpływające na sumę (np. sk_enabled)
+
+    Returns:
+        str (JSON)
+    """
+    return json.dumps({'plan': list(plan.key), **extra}, default=str, sort_keys=True)
+
+
+class IntegrationCheckpoint:
+    """
+    Plik checkpointu integracji w DataConfig.DATA_DIR
+
+    - save(): np.savez (bez kompresji - koszt zapisu ograniczony do kilku
+      tablic float64 o długości FFT) do pliku tymczasowego, fsync, potem
+      os.replace - plik checkpointu jest zawsze kompletny (stary albo nowy)
+    - Metadane (podpis planu, parametry) jako JSON w tablicy tekstowej -
+      odczyt bez pickle
+    - due(): czy minął interval_sec od ostatniego zapisu
+    """
+
+    def __init__(self, path=None, interval_sec=None):
+        """
+        Args:
+            path: Plik checkpointu (None = DATA_DIR / CHECKPOINT_FILE)
+            interval_sec: Minimalny odstęp zapisów [s] (None = z config)
+        """
+        self.path = Path(path) if path is not None else Path(DataConfig.DATA_DIR) / DataConfig.CHECKPOINT_FILE
+        self.interval_sec = interval_sec or DataConfig.CHECKPOINT_INTERVAL_SEC
+
+        self._last_save = time.monotonic()
+        self.saves = 0
+        self.last_save_sec = 0.0    # Czas ostatniego zapisu [s]
+        self.last_save_bytes = 0
+
+    def due(self):
+        """Czy pora na kolejny zapis"""
+        return time.monotonic() - self._last_save >= self.interval_sec
+
+    def save(self, state, metadata):
+        """
+        Zapisz checkpoint atomowo
+
+        Args:
+            state: dict tablic / skalarów numpy (SpectrumIntegrator.get_state)
+            metadata: dict serializowalny do JSON
+        """
+        t0 = time.perf_counter()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        metadata = dict(metadata, saved_at=datetime.now().isoformat(timespec='seconds'))
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, metadata=np.array(json.dumps(metadata)), **state)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        self._last_save = time.monotonic()
+        self.saves += 1
+        self.last_save_sec = time.perf_counter() - t0
+        self.last_save_bytes = self.path.stat().st_size
+
+    def read_metadata(self):
+        """Metadane checkpointu (bez wczytywania tablic) lub None gdy brak / uszkodzony"""
+        if not self.path.exists():
+            return None
+        try:
+            with np.load(self.path) as data:
+                return json.loads(str(data['metadata']))
+        except Exception as e:
+            print(f"⚠️  Nie można odczytać checkpointu {self.path}: {e}")
+            return None
+
+    def load(self):
+        """
+        Wczytaj checkpoint
+
+        Returns:
+            (state, metadata) lub None gdy brak / uszkodzony
+        """
+        if not self.path.exists():
+            return None
+        try:
+            with np.load(self.path) as data:
+                metadata = json.loads(str(data['metadata']))
+                state = {key: data[key] for key in data.files if key != 'metadata'}
+            return state, metadata
+        except Exception as e:
+            print(f"⚠️  Nie można odczytać checkpointu {self.path}: {e}")
+            return None
+
+    def remove(self):
+        """Usuń checkpoint (integracja zakończona lub przerwana przez użytkownika)"""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        self._last_save = time.monotonic()
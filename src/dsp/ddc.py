@@ -0,0 +1,234 @@
+"""
+Cyfrowy konwerter w dół (DDC / zoom-FFT)
+Przesunięcie wybranego pasma do zera (NCO) i decymacja filtrem polifazowym
+przed spektrometrem - mniej pracy FFT i drobniejsza rozdzielczość
+"""
+
+import sys
+import numpy as np
+from pathlib import Path
+from scipy.signal import firwin
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import ProcessingConfig
+from src.hardware.ring_buffer import IQBlock
+
+
+def ddc_decimation(sample_rate_mhz, span_mhz):
+    """Całkowita decymacja dająca pasmo >= span_mhz (min. 1)"""
+    return max(1, int(sample_rate_mhz / span_mhz))
+
+
+class DigitalDownConverter:
+    """
+    Mieszanie z NCO + polifazowy decymator FIR
+
+    - NCO to zapamiętana tablica fazorów o długości table_size; przesunięcie
+      jest zaokrąglane do sample_rate / table_size, więc tablica jest dokładnie
+      okresowa. Faza jest liczona z bezwzględnego indeksu próbki w strumieniu -
+      ciągła między blokami (i po lukach)
+    - Filtr dolnoprzepustowy (taps_per_phase * decymacja współczynników) jest
+      rozłożony na gałęzie polifazowe; wyjście liczone tylko co decymacja
+      próbek (taps_per_phase mnożeń macierz-wektor na blok)
+    - Historia filtru i niepełna grupa próbek przechodzą między blokami
+
+    process() nie jest wątkowo bezpieczne - używa go jeden czytelnik.
+    """
+
+    def __init__(self, sample_rate_mhz, center_freq_mhz, target_freq_mhz=None, span_mhz=None,
+                 taps_per_phase=None, table_size=None):
+        """
+        Args:
+            sample_rate_mhz: Częstotliwość próbkowania wejścia [MHz]
+            center_freq_mhz: Częstotliwość środkowa wejścia (LO) [MHz]
+            target_freq_mhz: Środek pasma po DDC [MHz] (None = z config)
+            span_mhz: Żądana szerokość pasma [MHz] (None = z config)
+            taps_per_phase: Współczynniki filtru na gałąź polifazową (None = z config)
+            table_size: Długość tablicy NCO (None = z config)
+        """
+        target_freq_mhz = target_freq_mhz or ProcessingConfig.DDC_FREQ_MHZ
+        span_mhz = span_mhz or ProcessingConfig.DDC_SPAN_MHZ
+        self.taps_per_phase = taps_per_phase or ProcessingConfig.DDC_TAPS_PER_PHASE
+        self.table_size = table_size or ProcessingConfig.DDC_NCO_TABLE_SIZE
+
+        self.input_rate_mhz = sample_rate_mhz
+        self.decimation = ddc_decimation(sample_rate_mhz, span_mhz)
+        self.output_rate_mhz = sample_rate_mhz / self.decimation
+
+        # Przesunięcie NCO zaokrąglone do okresu tablicy
+        sr_hz = sample_rate_mhz * 1e6
+        cycles = int(round((target_freq_mhz - center_freq_mhz) * 1e6 * self.table_size / sr_hz))
+        self.offset_hz = cycles * sr_hz / self.table_size
+        self.center_freq_mhz = center_freq_mhz + self.offset_hz / 1e6
+
+        if abs(self.offset_hz) / 1e6 + self.output_rate_mhz / 2 > sample_rate_mhz / 2:
+            raise ValueError(f"Pasmo DDC {self.center_freq_mhz:.4f} ± {self.output_rate_mhz / 2:.3f} MHz "
+                             f"wychodzi poza pasmo wejściowe ± {sample_rate_mhz / 2:.3f} MHz")
+
+        n = np.arange(self.table_size)
+        self.nco_table = np.exp(-2j * np.pi * cycles * n / self.table_size).astype(np.complex64)
+
+        self._build_filter()
+        self.reset()
+
+    def _build_filter(self):
+        """Prototyp dolnoprzepustowy (granica = Nyquist wyjścia) w układzie polifazowym"""
+
+        D, T = self.decimation, self.taps_per_phase
+
+        if D == 1:
+            self.coeffs = np.ones(1)
+            self.branches = None
+            return
+
+        self.coeffs = firwin(T * D, 1.0 / D, window=('kaiser', 8.0))
+
+        # branches[j, c] = h[j*D + D-1-c] - wiersz j mnoży j-tą wcześniejszą grupę
+        # D próbek (w kolejności czasowej), y[m] = sum_j grupa[m-j] @ branches[j]
+        self.branches = self.coeffs.reshape(T, D)[:, ::-1].astype(np.complex64)
+
+    def reset(self):
+        """Wyzeruj historię filtru (nowy strumień lub nieciągłość)"""
+
+        self._history = np.zeros((self.taps_per_phase - 1) * self.decimation, dtype=np.complex64)
+        self._pending = np.empty(0, dtype=np.complex64)
+
+    @property
+    def pending(self):
+        """Próbek wejściowych czekających na pełną grupę decymacji"""
+        return len(self._pending)
+
+    # =========================================================================
+    # PRZETWARZANIE
+    # =========================================================================
+
+    def mix(self, samples, first_sample):
+        """Pomnóż blok (w miejscu) przez fazory NCO od indeksu first_sample"""
+
+        L = self.table_size
+        pos = first_sample % L
+        done = 0
+        while done < len(samples):
+            chunk = min(len(samples) - done, L - pos)
+            samples[done:done + chunk] *= self.nco_table[pos:pos + chunk]
+            done += chunk
+            pos = 0
+        return samples
+
+    def process(self, samples, first_sample):
+        """
+        Zmiksuj i zdecymuj blok kolejnych próbek
+
+        Args:
+            samples: complex64 - modyfikowane w miejscu (mieszanie)
+            first_sample: Indeks pierwszej próbki w strumieniu (faza NCO)
+
+        Returns:
+            complex64 - len(samples) + pending // decymacja próbek wyjściowych
+        """
+        self.mix(samples, first_sample)
+
+        D = self.decimation
+        if D == 1:
+            return samples
+
+        # [historia | niepełna grupa | nowe próbki] -> grupy po D próbek
+        x = np.concatenate((self._history, self._pending, samples))
+        groups = len(x) // D
+        rows = x[:groups * D].reshape(groups, D)
+
+        T = self.taps_per_phase
+        n_out = groups - (T - 1)
+        out = rows[T - 1:] @ self.branches[0]
+        for j in range(1, T):
+            out += rows[T - 1 - j:T - 1 - j + n_out] @ self.branches[j]
+
+        self._history = x[(groups - (T - 1)) * D:groups * D].copy()
+        self._pending = x[groups * D:].copy()
+        return out
+
+    def describe(self):
+        """Opis do logu"""
+        return (f"DDC {self.center_freq_mhz:.6f} MHz (przesunięcie {self.offset_hz / 1e3:+.3f} kHz), "
+                f"decymacja {self.decimation} -> {self.output_rate_mhz:.3f} MSPS, "
+                f"filtr {len(self.coeffs)} współczynników")
+
+
+class DecimatingReader:
+    """
+    Czytelnik strumienia po DDC - ten sam interfejs co RingReader
+    (lag / read_block / detach), indeksy i długości w próbkach wyjściowych
+    """
+
+    def __init__(self, reader, ddc):
+        """
+        Args:
+            reader: RingReader strumienia wejściowego
+            ddc: DigitalDownConverter
+        """
+        self.reader = reader
+        self.ddc = ddc
+        self._raw = np.empty(reader.ring.capacity // 4, dtype=np.complex64)
+        self._skipped = 0           # Luka z przerwanego odczytu - zgłaszana w następnym bloku
+
+    def lag(self):
+        """Liczba próbek wyjściowych możliwych do odczytania"""
+        return (self.reader.lag() + self.ddc.pending) // self.ddc.decimation
+
+    def raw_lag(self):
+        """Liczba próbek wejściowych czekających w buforze"""
+        return self.reader.lag()
+
+    def read_block(self, num_samples, out=None):
+        """
+        Odczytaj następne num_samples próbek po DDC
+
+        Returns:
+            IQBlock (skipped w próbkach wyjściowych) lub None
+        """
+        D = self.ddc.decimation
+        if self.lag() < num_samples:
+            return None
+
+        if out is None:
+            out = np.empty(num_samples, dtype=np.complex64)
+
+        produced = 0
+        first_sample = None
+        while produced < num_samples:
+            needed = min((num_samples - produced) * D - self.ddc.pending, len(self._raw))
+            block = self.reader.read_block(needed, out=self._raw[:needed])
+            if block is None:
+                break
+
+            if block.skipped:
+                # Luka - faza NCO zostaje ciągła (indeks bezwzględny), historia filtru nie
+                self.ddc.reset()
+                self._skipped += -(-block.skipped // D)
+                produced = 0
+                first_sample = None
+
+            if first_sample is None:
+                first_sample = (block.first_sample - self.ddc.pending) // D
+
+            y = self.ddc.process(block.samples, block.first_sample)
+            take = min(len(y), num_samples - produced)
+            out[produced:produced + take] = y[:take]
+            produced += take
+
+        if produced < num_samples:
+            # Przerwany po luce - odczytane próbki przepadają, nowy blok zgłosi nieciągłość
+            self._skipped += produced
+            self.ddc.reset()
+            return None
+
+        skipped, self._skipped = self._skipped, 0
+        return IQBlock(out, first_sample, skipped)
+
+    def detach(self):
+        """Odłącz czytelnika strumienia wejściowego"""
+        self.reader.detach()
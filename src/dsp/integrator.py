@@ -0,0 +1,259 @@
+"""
+Integrator widm
+Średnia i wariancja mocy liniowej per kanał (float64, Welford / Chan) -
+konwersja do dB tylko na żądanie (wykres, zapis)
+"""
+
+import sys
+import time
+import numpy as np
+from pathlib import Path
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import ProcessingConfig
+from src.dsp.spectral_plan import power_to_db
+
+
+class SpectrumIntegrator:
+    """
+    Długoterminowa integracja widm w jednostkach liniowych
+
+    - add() łączy |X|^2 (średnią z num_frames ramek) z bieżącą średnią
+      float64 - bez log10 / 10**x na każdą ramkę
+    - Obok średniej per kanał M2 (suma kwadratów odchyleń), łączone wzorem
+      Chana z M2 wsadu: stabilne numerycznie i O(kanały) pamięci niezależnie
+      od liczby ramek. Bez M2 wsadu (m2=None) wsad liczy się jak num_frames
+      identycznych ramek - wariancja opisuje wtedy tylko rozrzut między wsadami
+    - std() / stderr(): odchylenie mocy pojedynczej ramki i niepewność średniej
+      (sigma / sqrt(N)) per kanał
+    - Opcjonalny monitor (StabilityMonitor) dostaje każde widmo: wariancja
+      Allana pasma i kanałów poza linią; może zakończyć integrację przed
+      celem (cel sigma lub minimum Allana)
+    - Średnia w dB jest liczona leniwie (mean_db) i zapamiętywana do
+      następnego add(), więc wielokrotne odświeżenie wykresu nic nie kosztuje
+    - Podłoga (POWER_FLOOR) jest stosowana tylko przy konwersji do dB;
+      sama średnia jej nie zawiera
+    - Maska RFI (add(..., accepted=...)): odrzucone kanały nie są
+      aktualizowane, bin_counts liczy przyjęte ramki osobno dla każdego
+      kanału (kanał nigdy nieprzyjęty = NaN)
+
+    Klasa nie jest wątkowo bezpieczna - SpectrumEngine woła ją pod blokadą.
+    """
+
+    def __init__(self, target=None, monitor=None):
+        """
+        Args:
+            target: Docelowa (maksymalna) liczba ramek (None = z config)
+            monitor: StabilityMonitor - wariancja Allana i wcześniejsze zakończenie (None = brak)
+        """
+        self.reset(target, monitor)
+
+    def reset(self, target=None, monitor=None):
+        """Wyzeruj sumę i rozpocznij nową integrację"""
+        self.target = target or ProcessingConfig.SPECTRUM_INTEGRATION_COUNT
+        self.monitor = monitor
+        self.count = 0
+        self.power_mean = None
+        self.power_m2 = None
+        self.bin_counts = None
+        self.axis = None
+        self.active = False
+        self.start_time = None
+        self.end_time = None
+
+        self._mean_db = None
+        self._mean_db_count = 0
+
+    # =========================================================================
+    # AKUMULACJA
+    # =========================================================================
+
+    def start(self):
+        """Zacznij przyjmować widma"""
+        self.active = True
+        self.start_time = time.time()
+        self.end_time = None
+
+    def stop(self):
+        """Przestań przyjmować widma (suma zostaje)"""
+        if self.active:
+            self.active = False
+            self.end_time = time.time()
+
+    def add(self, power, axis=None, num_frames=1, accepted=None, m2=None):
+        """
+        Dodaj widmo mocy liniowej
+
+        Args:
+            power: |X|^2 - średnia z num_frames ramek (float32/float64)
+            axis: Oś widma (zapamiętana przy pierwszym widmie)
+            num_frames: Liczba ramek uśrednionych w power (waga)
+            accepted: Maska kanałów przyjętych (bool) lub None = wszystkie
+            m2: Suma kwadratów odchyleń ramek wsadu od power (per kanał) lub None
+
+        Returns:
+            True gdy osiągnięto cel (integracja zatrzymana)
+        """
+        if not self.active:
+            return False
+
+        # Pierwsze widmo - inicjalizuj stan (float64 - długie integracje)
+        if self.power_mean is None:
+            self.power_mean = np.zeros(len(power), dtype=np.float64)
+            self.power_m2 = np.zeros(len(power), dtype=np.float64)
+            self.bin_counts = np.zeros(len(power), dtype=np.int64)
+            self.axis = axis.copy() if axis is not None else None
+
+        # Chan: (n_a, mean_a, M2_a) + (n_b, mean_b, M2_b)
+        #   delta = mean_b - mean_a, n = n_a + n_b
+        #   mean += delta * n_b / n, M2 += M2_b + delta^2 * n_a * n_b / n
+        sel = slice(None) if accepted is None else accepted
+        n_a = self.bin_counts[sel]
+        n = n_a + num_frames
+        delta = power[sel] - self.power_mean[sel]
+
+        self.power_mean[sel] += delta * (num_frames / n)
+        self.power_m2[sel] += delta * delta * (n_a * num_frames / n)
+        if m2 is not None:
+            self.power_m2[sel] += m2[sel]
+
+        self.bin_counts[sel] = n
+        self.count += num_frames
+
+        if self.count >= self.target:
+            self.stop()
+            return True
+
+        # Monitor stabilności - kryteria sprawdzane po każdym pełnym bloku bazowym
+        if self.monitor is not None and self.monitor.add(power, num_frames, accepted):
+            if self.monitor.should_stop(self):
+                self.stop()
+                return True
+        return False
+
+    @property
+    def remaining(self):
+        """Ile ramek brakuje do celu"""
+        return max(0, self.target - self.count)
+
+    # =========================================================================
+    # WYNIKI
+    # =========================================================================
+
+    def mean_power(self):
+        """Średnia moc liniowa (po przyjętych ramkach każdego kanału) lub None gdy brak danych"""
+        if self.power_mean is None or self.count == 0:
+            return None
+        return np.where(self.bin_counts > 0, self.power_mean, np.nan)
+
+    def variance(self):
+        """Wariancja mocy pojedynczej ramki per kanał (nieobciążona, NaN przy < 2 ramkach) lub None"""
+        if self.power_m2 is None or self.count == 0:
+            return None
+        variance = np.full(len(self.power_m2), np.nan)
+        np.divide(self.power_m2, self.bin_counts - 1, out=variance, where=self.bin_counts > 1)
+        return variance
+
+    def std(self):
+        """Odchylenie standardowe mocy ramki (sigma) per kanał lub None"""
+        variance = self.variance()
+        return np.sqrt(variance) if variance is not None else None
+
+    def stderr(self):
+        """Niepewność średniej (sigma / sqrt(N)) per kanał lub None"""
+        variance = self.variance()
+        if variance is None:
+            return None
+        return np.sqrt(variance / np.maximum(self.bin_counts, 1))
+
+    def accepted_fraction(self):
+        """Udział przyjętych ramek w każdym kanale (1 = bez flag RFI) lub None"""
+        if self.bin_counts is None or self.count == 0:
+            return None
+        return self.bin_counts / self.count
+
+    def mean_db(self):
+        """Średnia moc [dB] (liczona tylko gdy suma zmieniła się od ostatniego wywołania)"""
+        if self.power_mean is None or self.count == 0:
+            return None
+
+        if self._mean_db is None or self._mean_db_count != self.count:
+            self._mean_db = power_to_db(self.mean_power())
+            self._mean_db_count = self.count
+
+        return self._mean_db
+
+    # =========================================================================
+    # CHECKPOINT
+    # =========================================================================
+
+    def copy(self):
+        """
+        Niezależna kopia sumy (migawka do zapisu w tle) - nieaktywna, bez monitora;
+        czas końca zamrożony w chwili kopii
+        """
+        other = SpectrumIntegrator(self.target)
+        other.count = self.count
+        for name in ('power_mean', 'power_m2', 'bin_counts', 'axis'):
+            value = getattr(self, name)
+            setattr(other, name, value.copy() if value is not None else None)
+        other.start_time = self.start_time
+        other.end_time = self.end_time or time.time()
+        return other
+
+    def get_state(self):
+        """
+        Kopia stanu integracji (checkpoint) - tablice float64 / int64 i skalary
+
+        Returns:
+            dict lub None gdy nic jeszcze nie zintegrowano
+        """
+        if self.power_mean is None:
+            return None
+
+        state = {
+            'target': np.int64(self.target),
+            'count': np.int64(self.count),
+            'elapsed_sec': np.float64(self.elapsed()),
+            'power_mean': self.power_mean.copy(),
+            'power_m2': self.power_m2.copy(),
+            'bin_counts': self.bin_counts.copy(),
+        }
+        if self.axis is not None:
+            state['axis'] = self.axis.copy()
+        if self.monitor is not None:
+            for key, value in self.monitor.get_state().items():
+                state[f'monitor_{key}'] = value
+        return state
+
+    def set_state(self, state):
+        """
+        Wznów integrację ze stanu get_state() - po wywołaniu integrator
+        przyjmuje widma dalej (monitor, jeśli jest, musi być dla tego samego planu)
+        """
+        self.target = int(state['target'])
+        self.count = int(state['count'])
+        self.power_mean = np.array(state['power_mean'], dtype=np.float64)
+        self.power_m2 = np.array(state['power_m2'], dtype=np.float64)
+        self.bin_counts = np.array(state['bin_counts'], dtype=np.int64)
+        self.axis = np.array(state['axis']) if 'axis' in state else None
+
+        if self.monitor is not None:
+            self.monitor.set_state({key[len('monitor_'):]: value for key, value in state.items()
+                                    if key.startswith('monitor_')})
+
+        self._mean_db = None
+        self.active = True
+        self.start_time = time.time() - float(state['elapsed_sec'])
+        self.end_time = None
+
+    def elapsed(self):
+        """Czas trwania integracji [s]"""
+        if self.start_time is None:
+            return 0.0
+        end = self.end_time or time.time()
+        return end - self.start_time
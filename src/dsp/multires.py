@@ -0,0 +1,292 @@
+"""
+Dodatkowe rozdzielczości widma z tego samego strumienia
+Każde wyjście ma własny plan, integrator i historię widm; próbki czyta
+z bufora wsadu SpectrumEngine (bez osobnej kopii I/Q)
+"""
+
+import sys
+import time
+import numpy as np
+import scipy.fft
+from pathlib import Path
+from collections import deque
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import ProcessingConfig
+from src.dsp.spectral_plan import SpectralPlan, SpectrumFrame
+from src.dsp.integrator import SpectrumIntegrator
+
+
+class SpectrumOutput:
+    """
+    Jedno dodatkowe wyjście spektrometru (np. szybki podgląd 4096 punktów)
+
+    - rate_hz > 0: rate_hz widm na sekundę strumienia, każde ze średniej
+      frames_per_spectrum ramek z końca swojego przedziału czasu (podgląd)
+    - rate_hz = 0: pełne pokrycie - wszystkie ramki, jedno widmo na wsad
+      (praca liniowa, np. 262144 punktów)
+    - Ramki bez nakładania; próbki już przetworzone (reszta wsadu
+      przeniesiona do następnego) nie są liczone drugi raz. Przy pełnym
+      pokryciu niepełna ramka z końca wsadu (< fft_size próbek) jest
+      kopiowana i dokończona początkiem następnego
+    - Harmonogram: process() dostaje budżet czasu od silnika i liczy
+      co najwyżej tyle ramek, ile się w nim zmieści (średni koszt ramki);
+      ramki ponad budżet są pomijane i liczone w frames_dropped. Po
+      PROBE_AFTER_STARVED wsadach bez żadnej ramki liczona jest jedna
+      (próbna), której czas zastępuje oszacowanie kosztu
+
+    Metody wołane z wątku silnika; odczyty z GUI przez latest / drain()
+    i metody integracji pod blokadą silnika.
+    """
+
+    PROBE_AFTER_STARVED = 8     # Wsadów bez ramki, po których liczona jest jedna ramka próbna
+
+    def __init__(self, engine, name, fft_size, rate_hz=0.0, frames_per_spectrum=1, window_type=None):
+        """
+        Args:
+            engine: SpectrumEngine (strumień, kalibracja, blokada)
+            name: Nazwa wyjścia (GUI, zapis)
+            fft_size: Rozmiar FFT
+            rate_hz: Widm na sekundę (0 = pełne pokrycie strumienia)
+            frames_per_spectrum: Ramek uśrednianych w widmie (gdy rate_hz > 0)
+            window_type: Okno (None = z config)
+        """
+        self.engine = engine
+        self.name = name
+        self.fft_size = fft_size
+        self.rate_hz = rate_hz
+        self.frames_per_spectrum = max(1, frames_per_spectrum)
+        self.window_type = window_type or ProcessingConfig.WINDOW_TYPE
+
+        self._plan = None
+        self.integrator = SpectrumIntegrator()
+
+        # Wyniki: ostatnie widmo i kolejka dla ujść, które chcą każde widmo (waterfall)
+        self.latest = None
+        self.history = deque(maxlen=64)
+
+        # Harmonogram
+        self.next_sample = None     # Indeks strumienia pierwszej nieprzetworzonej próbki
+        self._tail = np.empty(fft_size, dtype=np.complex64)    # Niepełna ramka (pełne pokrycie)
+        self._tail_len = 0
+        self._due = 0.0             # Ułamek widma "należny" z poprzednich wsadów
+        self._frame_cost = None     # Średni czas jednej ramki [s]
+        self._starved = 0           # Kolejne wsady, w których budżet nie starczył na ramkę
+
+        # Statystyki
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self.spectra_published = 0
+
+    # =========================================================================
+    # PLAN
+    # =========================================================================
+
+    @property
+    def plan(self):
+        """SpectralPlan tego wyjścia (parametry strumienia i kalibracji z silnika)"""
+
+        plan = self._plan
+        if plan is None:
+            engine = self.engine
+            plan = SpectralPlan(
+                self.fft_size, self.window_type, engine.sample_rate_mhz, engine.center_freq_mhz,
+                engine.calibration_enabled, engine.freq_offset_ppm, engine.freq_offset_khz,
+                dc_notch_enabled=engine._dc_notch_enabled(), mode="fft")
+            self._plan = plan
+        return plan
+
+    def invalidate_plan(self):
+        """Przebuduj plan przy następnym wsadzie"""
+        self._plan = None
+
+    def reset(self):
+        """Nowy strumień - zapomnij pozycję, niepełną ramkę i harmonogram"""
+        self.next_sample = None
+        self._tail_len = 0
+        self._due = 0.0
+        self.history.clear()
+
+    # =========================================================================
+    # PRZETWARZANIE
+    # =========================================================================
+
+    def process(self, samples, first_sample, budget_sec):
+        """
+        Policz widma z ciągłego fragmentu strumienia
+
+        Args:
+            samples: complex64 - kolejne próbki (widok bufora wsadu)
+            first_sample: Indeks strumienia samples[0]
+            budget_sec: Czas, który wyjście może zużyć
+
+        Returns:
+            Zużyty czas [s]
+        """
+        F = self.fft_size
+        end_index = first_sample + len(samples)
+
+        # Pomiń próbki przetworzone w poprzednim wsadzie; po luce zacznij od nowa
+        if self.next_sample is not None and first_sample <= self.next_sample <= end_index:
+            skip = self.next_sample - first_sample
+        else:
+            skip = 0
+            self._tail_len = 0
+        samples = samples[skip:]
+        start_index = first_sample + skip
+
+        # Pełne pokrycie: ramka na granicy wsadów = reszta poprzedniego + początek bieżącego
+        head = None
+        if self._tail_len:
+            need = F - self._tail_len
+            if len(samples) < need:
+                self._tail[self._tail_len:self._tail_len + len(samples)] = samples
+                self._tail_len += len(samples)
+                self.next_sample = end_index
+                return 0.0
+            self._tail[self._tail_len:] = samples[:need]
+            head = (self._tail[None, :].copy(), start_index - self._tail_len)
+            self._tail_len = 0
+            samples = samples[need:]
+            start_index += need
+
+        n_avail = len(samples) // F
+        frames = sliding_window_view(samples, F)[::F][:n_avail] if n_avail else None
+
+        if self.rate_hz > 0:
+            self.next_sample = start_index + n_avail * F
+        else:
+            rest = len(samples) - n_avail * F
+            self._tail[:rest] = samples[n_avail * F:]
+            self._tail_len = rest
+            self.next_sample = end_index
+
+        # Które ramki: pełne pokrycie (jedno widmo) albo rate_hz przedziałów po frames_per_spectrum
+        if self.rate_hz > 0:
+            if n_avail == 0:
+                return 0.0
+            self._due += self.rate_hz * n_avail * F / (self.engine.sample_rate_mhz * 1e6)
+            n_spectra = min(int(self._due), n_avail)
+            self._due -= int(self._due)
+            if n_spectra == 0:
+                return 0.0
+            per_slot = min(self.frames_per_spectrum, n_avail // n_spectra)
+            slot_end = np.arange(1, n_spectra + 1) * n_avail // n_spectra
+            groups = [[(frames[end - per_slot:end], start_index + (end - per_slot) * F)] for end in slot_end]
+        else:
+            group = [head] if head is not None else []
+            if n_avail:
+                group.append((frames, start_index))
+            groups = [group] if group else []
+
+        # Budżet: odrzuć najstarsze ramki ponad liczbę mieszczącą się w czasie
+        wanted = sum(len(f) for group in groups for f, _ in group)
+        allowed = wanted
+        probe = False
+        if self._frame_cost is not None:
+            allowed = max(0, min(wanted, int(budget_sec / self._frame_cost)))
+            if wanted and allowed == 0:
+                # Zawyżony koszt (np. chwilowe obciążenie) nie może zablokować wyjścia na stałe
+                self._starved += 1
+                if self._starved >= self.PROBE_AFTER_STARVED:
+                    allowed = 1
+                    probe = True
+        if allowed:
+            self._starved = 0
+        if allowed < wanted:
+            self.frames_dropped += wanted - allowed
+            groups = self._keep_newest(groups, allowed)
+        if not groups:
+            return 0.0
+
+        plan = self.plan
+        start = time.perf_counter()
+        for group in groups:
+            self._publish(group, plan)
+        elapsed = time.perf_counter() - start
+
+        cost = elapsed / allowed
+        if self._frame_cost is None or probe:
+            self._frame_cost = cost
+        else:
+            self._frame_cost = 0.8 * self._frame_cost + 0.2 * cost
+        return elapsed
+
+    def _keep_newest(self, groups, allowed):
+        """Zostaw allowed najnowszych ramek (grupy i zestawy ramek w kolejności czasowej)"""
+
+        kept = []
+        for group in reversed(groups):
+            kept_group = []
+            for f, first in reversed(group):
+                if allowed <= 0:
+                    break
+                take = min(len(f), allowed)
+                kept_group.append((f[len(f) - take:], first + (len(f) - take) * self.fft_size))
+                allowed -= take
+            if kept_group:
+                kept.append(kept_group[::-1])
+        return kept[::-1]
+
+    def _publish(self, group, plan):
+        """Widmo grupy ramek -> integrator -> latest / history"""
+
+        integrate = self.integrator.active
+        power = None
+        sq_sum = None
+        n_frames = 0
+        for frames, _ in group:
+            windowed = frames * plan.window
+            spectra = scipy.fft.fft(windowed, axis=-1, workers=self.engine.fft_workers, overwrite_x=True)
+            frame_power = spectra.real ** 2 + spectra.imag ** 2
+            frame_sum = frame_power.sum(axis=0, dtype=np.float64)
+            power = frame_sum if power is None else power + frame_sum
+            if integrate:
+                frame_sq = np.einsum('ij,ij->j', frame_power, frame_power, dtype=np.float64)
+                sq_sum = frame_sq if sq_sum is None else sq_sum + frame_sq
+            n_frames += len(frames)
+
+        mean = power / n_frames
+        power = np.fft.fftshift(mean).astype(np.float32)
+        if plan.power_scale != 1:
+            power *= plan.power_scale
+        plan.apply_notch(power)
+
+        if integrate:
+            # M2 wsadu jak w SpectrumEngine._finish_m2
+            m2 = np.fft.fftshift(np.maximum(sq_sum - mean * mean * n_frames, 0.0))
+            if plan.power_scale != 1:
+                m2 *= plan.power_scale ** 2
+            plan.apply_notch(m2)
+            with self.engine._lock:
+                self.integrator.add(power, plan.doppler, n_frames, m2=m2)
+
+        frame = SpectrumFrame(power, plan.doppler, plan.freqs_mhz, plan.freqs_mhz_raw,
+                              group[0][1], n_frames, time.time(), None)
+        self.latest = frame
+        self.history.append(frame)
+        self.frames_processed += n_frames
+        self.spectra_published += 1
+
+    def drain(self):
+        """Zwróć i usuń widma opublikowane od ostatniego wywołania (np. dla waterfall)"""
+        frames = []
+        while self.history:
+            frames.append(self.history.popleft())
+        return frames
+
+    def get_stats(self):
+        """Statystyki wyjścia"""
+        return {
+            'name': self.name,
+            'fft_size': self.fft_size,
+            'frames_processed': self.frames_processed,
+            'frames_dropped': self.frames_dropped,
+            'spectra_published': self.spectra_published,
+            'frame_cost_ms': self._frame_cost * 1e3 if self._frame_cost else 0.0,
+        }
@@ -0,0 +1,841 @@
+"""
+Przetwarzanie wsadowe archiwum
+Potok okno -> FFT -> integracja -> linia bazowa -> eksport dla katalogu
+nagrań I/Q i zapisanych widm - równolegle w procesach, ze wznowieniem
+po przerwaniu
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import numpy as np
+import scipy.fft
+from pathlib import Path
+from datetime import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import ProcessingConfig, ReceiverConfig, DataConfig
+from src.dsp.spectral_plan import SpectralPlan, power_to_db
+from src.dsp.integrator import SpectrumIntegrator
+from src.dsp.checkpoint import IntegrationCheckpoint
+from src.hardware.file_source import open_iq_memmap, load_sidecar
+from src.hardware.ring_buffer import ADC_SCALE
+from src.storage.catalog import find_products, parse_time, read_spectrum
+from src.storage.subint import open_subint, make_record
+
+
+# Format eksportu -> rozszerzenie pliku wyniku
+EXPORT_SUFFIXES = {'npz': '.npz', 'hdf5': '.h5', 'fits': '.fits', 'csv': '.csv'}
+
+# Próbek I/Q czytanych z memmap naraz w zadaniu (~32 MB int16 + ramki complex64)
+READ_SAMPLES = 1 << 22
+
+# Zadań zleconych naraz na proces puli (reszta czeka w procesie głównym)
+IN_FLIGHT_PER_WORKER = 2
+
+# Katalog roboczy (fragmenty, pliki w trakcie zapisu) w katalogu wyników
+WORK_DIR = ".work"
+
+# Cel integratorów fragmentów - bez limitu ramek
+_NO_TARGET = 1 << 62
+
+
+# =============================================================================
+# POTOK
+# =============================================================================
+
+class ReprocessPipeline:
+    """
+    Parametry potoku przetwarzania wsadowego
+
+    - Nagrania I/Q: okno i FFT (SpectralPlan jak w SpectrumEngine),
+      integracja w przedziałach integrate_sec, linia bazowa, eksport
+    - Zapisane widma i sub-integracje: okna ani FFT nie da się powtórzyć
+      (brak próbek) - ponowna integracja rekordów w przedziały, linia
+      bazowa, eksport
+    - signature(): wszystkie parametry wpływające na wynik (także domyślne
+      z config) - skrót podpisu jest w nazwie pliku wyniku, więc inny potok
+      nigdy nie nadpisze ani nie wznowi cudzych wyników
+    """
+
+    def __init__(self, fft_size=None, window_type=None, overlap=None, mode=None, normalization=None,
+                 integrate_sec=0.0, baseline=True, baseline_order=None, baseline_line_kms=None,
+                 export_format=None):
+        """
+        Args:
+            fft_size: Rozmiar FFT (None = z config)
+            window_type: Okno (None = z config)
+            overlap: Nakładanie ramek (None = z config)
+            mode: "fft" lub "pfb" (None = z config)
+            normalization: "none", "coherent" lub "psd" (None = z config)
+            integrate_sec: Długość przedziału integracji [s] (0 = całe wejście)
+            baseline: Odejmij linię bazową
+            baseline_order: Stopień wielomianu (None = z config)
+            baseline_line_kms: Kanały |v| poniżej wyłączone z dopasowania (None = z config)
+            export_format: npz, hdf5, fits lub csv (None = DataConfig.DEFAULT_FORMAT)
+        """
+        self.fft_size = fft_size or ProcessingConfig.FFT_SIZE
+        self.window_type = window_type or ProcessingConfig.WINDOW_TYPE
+        self.overlap = ProcessingConfig.FFT_OVERLAP if overlap is None else overlap
+        self.mode = (mode or ProcessingConfig.SPECTROMETER_MODE).lower()
+        self.normalization = (normalization or ProcessingConfig.SPECTRUM_NORMALIZATION).lower()
+        self.integrate_sec = float(integrate_sec or 0.0)
+        self.baseline = baseline
+        self.baseline_order = ProcessingConfig.BASELINE_ORDER if baseline_order is None else baseline_order
+        self.baseline_line_kms = (ProcessingConfig.BASELINE_LINE_KMS if baseline_line_kms is None
+                                  else baseline_line_kms)
+        self.baseline_edge_fraction = ProcessingConfig.BASELINE_EDGE_FRACTION
+        self.export_format = (export_format or DataConfig.DEFAULT_FORMAT).lower()
+        if self.export_format not in EXPORT_SUFFIXES:
+            raise ValueError(f"Nieznany format eksportu: {self.export_format} "
+                             f"(dostępne: {', '.join(EXPORT_SUFFIXES)})")
+
+    @property
+    def suffix(self):
+        """Rozszerzenie pliku wyniku"""
+        return EXPORT_SUFFIXES[self.export_format]
+
+    def plan(self, sample_rate_mhz, center_freq_mhz):
+        """SpectralPlan dla nagrania (kalibracja częstotliwości i notch DC z config)"""
+        return SpectralPlan(
+            self.fft_size, self.window_type, sample_rate_mhz, center_freq_mhz,
+            ReceiverConfig.FREQ_CALIBRATION_ENABLED, ReceiverConfig.FREQ_OFFSET_PPM,
+            ReceiverConfig.FREQ_OFFSET_KHZ, normalization=self.normalization,
+            overlap=self.overlap, mode=self.mode)
+
+    def signature(self, kind='iq'):
+        """
+        Parametry wpływające na wynik
+
+        Args:
+            kind: 'iq' (pełny potok) lub rodzaj zapisanego produktu (bez okna i FFT)
+
+        Returns:
+            dict
+        """
+        signature = {'integrate_sec': self.integrate_sec, 'baseline': None}
+        if self.baseline:
+            signature['baseline'] = {'order': self.baseline_order, 'line_kms': self.baseline_line_kms,
+                                     'edge_fraction': self.baseline_edge_fraction}
+        if kind == 'iq':
+            signature.update({
+                'fft_size': self.fft_size,
+                'window_type': self.window_type,
+                'overlap': self.overlap,
+                'spectrometer_mode': self.mode,
+                'pfb_taps': ProcessingConfig.PFB_TAPS if self.mode == "pfb" else 1,
+                'pfb_window': ProcessingConfig.PFB_WINDOW if self.mode == "pfb" else None,
+                'normalization': self.normalization,
+                'calibration': [ReceiverConfig.FREQ_CALIBRATION_ENABLED, ReceiverConfig.FREQ_OFFSET_PPM,
+                                ReceiverConfig.FREQ_OFFSET_KHZ],
+                'dc_notch': [ReceiverConfig.DC_NOTCH_ENABLED, ReceiverConfig.DC_NOTCH_WIDTH_KHZ],
+            })
+        return signature
+
+    def tag(self, kind='iq'):
+        """
+        Znacznik potoku w nazwie wyniku, np. hann65536_int600s_bl3_1a2b3c4d
+        (czytelne parametry + skrót pełnego podpisu)
+        """
+        signature = self.signature(kind)
+        digest = hashlib.sha1(json.dumps(signature, sort_keys=True).encode()).hexdigest()[:8]
+
+        parts = []
+        if kind == 'iq':
+            kernel = f"pfb{signature['pfb_taps']}x" if self.mode == "pfb" else self.window_type.lower()
+            parts.append(f"{kernel}{self.fft_size}")
+        parts.append(f"int{self.integrate_sec:g}s" if self.integrate_sec > 0 else "intall")
+        parts.append(f"bl{self.baseline_order}" if self.baseline else "nobl")
+        parts.append(digest)
+        return "_".join(parts)
+
+    def describe(self):
+        """Opis potoku (logi)"""
+        stages = [f"okno {self.window_type}" if self.mode != "pfb" else "PFB",
+                  f"FFT {self.fft_size}",
+                  f"integracja {self.integrate_sec:g} s" if self.integrate_sec > 0 else "integracja całości"]
+        if self.baseline:
+            stages.append(f"linia bazowa st. {self.baseline_order} (|v| > {self.baseline_line_kms:g} km/s)")
+        stages.append(f"eksport {self.export_format.upper()}")
+        return " -> ".join(stages)
+
+    def output_name(self, source, kind):
+        """Deterministyczna nazwa wyniku: <nazwa wejścia>__<znacznik>.<format>"""
+        return f"{Path(source).name}__{self.tag(kind)}{self.suffix}"
+
+
+def fit_baseline(doppler, power, order=None, line_kms=None, edge_fraction=None):
+    """
+    Linia bazowa: wielomian w mocy liniowej dopasowany do kanałów poza linią
+
+    Kanały |v| < line_kms (emisja HI) i edge_fraction kanałów przy każdej
+    krawędzi pasma (zbocza filtru antyaliasingowego) nie biorą udziału
+    w dopasowaniu; wielomian jest liczony na całej osi.
+
+    Args:
+        doppler: Oś prędkości [km/s]
+        power: Moc liniowa (NaN = kanał pominięty)
+        order, line_kms, edge_fraction: Parametry (None = z config)
+
+    Returns:
+        Linia bazowa (tablica jak power) lub None gdy za mało kanałów do dopasowania
+    """
+    order = ProcessingConfig.BASELINE_ORDER if order is None else order
+    line_kms = ProcessingConfig.BASELINE_LINE_KMS if line_kms is None else line_kms
+    edge_fraction = ProcessingConfig.BASELINE_EDGE_FRACTION if edge_fraction is None else edge_fraction
+
+    doppler = np.asarray(doppler, dtype=np.float64)
+    power = np.asarray(power, dtype=np.float64)
+    edge = int(len(power) * edge_fraction)
+
+    use = np.zeros(len(power), dtype=bool)
+    use[edge:len(power) - edge] = True
+    use &= (np.abs(doppler) >= line_kms) & np.isfinite(power) & np.isfinite(doppler)
+    if use.sum() <= order + 1:
+        return None
+
+    # Polynomial.fit skaluje oś do [-1, 1] - dobre uwarunkowanie dla wyższych stopni
+    poly = np.polynomial.Polynomial.fit(doppler[use], power[use], order)
+    return poly(doppler)
+
+
+# =============================================================================
+# ZADANIA
+# =============================================================================
+
+class ReprocessJob:
+    """
+    Jedno wejście archiwum
+
+    Nagranie I/Q jest dzielone na fragmenty ramek (chunks) zawarte
+    w przedziałach integracji; każdy fragment to osobne zadanie procesu,
+    którego wynik (stan integratora) trafia atomowo do katalogu roboczego -
+    po przerwaniu gotowe fragmenty nie są liczone ponownie. Zapisane widma
+    i zbiory sub-integracji to jedno zadanie.
+    """
+
+    def __init__(self, source, kind, output, work_dir):
+        self.source = Path(source)
+        self.kind = kind                # iq / spectrum / subint
+        self.output = Path(output)
+        self.work_dir = Path(work_dir)
+
+        # Tylko nagrania I/Q
+        self.metadata = {}
+        self.sample_rate_mhz = None
+        self.center_freq_mhz = None
+        self.intervals = []             # [(pierwsza ramka, koniec)] przedziałów integracji
+        self.chunks = []                # [(pierwsza ramka, koniec)] w kolejności ramek
+        self.chunk_frames = 0           # Ramek na fragment
+        self.pending = []               # Fragmenty bez zapisanego wyniku
+        self.runnable = False           # Wszystkie brakujące fragmenty w tym uruchomieniu (eksport)
+
+    def chunk_path(self, chunk):
+        """Plik wyniku fragmentu (stan integratora)"""
+        return self.work_dir / f"chunk_{chunk[0]:012d}.npz"
+
+    def manifest(self, pipeline, chunk_frames):
+        """Opis zadania - katalog roboczy z innym opisem jest czyszczony"""
+        stat = self.source.stat()
+        return {'source': str(self.source.resolve()), 'size': stat.st_size, 'mtime': stat.st_mtime,
+                'signature': pipeline.signature(self.kind), 'chunk_frames': chunk_frames}
+
+
+def _recording_clock(metadata, num_samples, sample_rate_mhz, path):
+    """
+    Czas próbki z pliku nagrania [s od epoki] - z luk strumienia zapisanych
+    przez IQRecorder (jak FileReplaySource); bez start_time w metadanych
+    koniec nagrania = czas modyfikacji pliku
+
+    Returns:
+        callable(pozycja w pliku) -> czas
+    """
+    sr_hz = sample_rate_mhz * 1e6
+    gaps = np.array(metadata.get('gaps', []), dtype=np.int64).reshape(-1, 2)
+    positions, offsets = gaps[:, 0], np.cumsum(gaps[:, 1])
+
+    def stream_sample(position):
+        k = np.searchsorted(positions, position, side='right')
+        return position + (int(offsets[k - 1]) if k > 0 else 0)
+
+    start = parse_time(metadata.get('start_time'))
+    if start is None:
+        start = Path(path).stat().st_mtime - stream_sample(num_samples) / sr_hz
+
+    return lambda position: start + stream_sample(position) / sr_hz
+
+
+def _chunk_task(pipeline, job, chunk):
+    """
+    Proces roboczy: fragment nagrania -> stan integratora w katalogu roboczym
+
+    Ramki czytane z memmap porcjami READ_SAMPLES; moc jak w SpectrumEngine
+    (_frame_power, _finish_power, _frame_m2, _finish_m2), sumowanie w float64
+    """
+    plan = pipeline.plan(job.sample_rate_mhz, job.center_freq_mhz)
+    iq = open_iq_memmap(job.source)
+    frames_per_read = max(1, READ_SAMPLES // plan.hop)
+
+    integrator = SpectrumIntegrator(_NO_TARGET)
+    integrator.start()
+    for f0 in range(chunk[0], chunk[1], frames_per_read):
+        f1 = min(f0 + frames_per_read, chunk[1])
+        raw = iq[f0 * plan.hop:(f1 - 1) * plan.hop + plan.frame_len]
+        samples = np.multiply(raw, ADC_SCALE, dtype=np.float32).view(np.complex64).ravel()
+        frames = sliding_window_view(samples, plan.frame_len)[::plan.hop]
+
+        spectra = scipy.fft.fft(plan.weight(frames), axis=-1, workers=1, overwrite_x=True)
+        frame_power = spectra.real ** 2 + spectra.imag ** 2
+
+        s1 = frame_power.sum(axis=0, dtype=np.float64)
+        s2 = np.einsum('ij,ij->j', frame_power, frame_power, dtype=np.float64)
+        power = np.fft.fftshift(s1 / len(frames))
+        m2 = np.fft.fftshift(np.maximum(s2 - s1 * (s1 / len(frames)), 0.0))
+        if plan.power_scale != 1:
+            power *= plan.power_scale
+            m2 *= float(plan.power_scale) ** 2
+        plan.apply_notch(power)
+        plan.apply_notch(m2)
+
+        integrator.add(power, plan.doppler, len(frames), m2=m2)
+
+    IntegrationCheckpoint(job.chunk_path(chunk)).save(
+        integrator.get_state(), {'source': str(job.source), 'frames': list(chunk)})
+    return chunk[1] - chunk[0]
+
+
+def merge_integrators(parts, start_time=None, end_time=None):
+    """
+    Połącz integratory (Chan per kanał - także przy różnej liczbie przyjętych ramek)
+
+    Args:
+        parts: Integratory w kolejności czasu (wynik nie zależy od procesu, który je policzył)
+        start_time, end_time: Czas przedziału (None = z pierwszej / ostatniej części)
+
+    Returns:
+        SpectrumIntegrator (nieaktywny)
+    """
+    total = SpectrumIntegrator(_NO_TARGET)
+    channels = len(parts[0].power_mean)
+    n = np.zeros(channels, dtype=np.int64)
+    mean = np.zeros(channels, dtype=np.float64)
+    m2 = np.zeros(channels, dtype=np.float64)
+
+    for part in parts:
+        n_b = part.bin_counts
+        total_n = n + n_b
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(total_n > 0, n_b / total_n, 0.0)
+        delta = part.power_mean - mean
+        mean += delta * weight
+        m2 += part.power_m2 + delta * delta * n * weight
+        n = total_n
+
+    total.power_mean, total.power_m2, total.bin_counts = mean, m2, n
+    total.count = sum(part.count for part in parts)
+    total.axis = parts[0].axis
+    total.start_time = parts[0].start_time if start_time is None else start_time
+    total.end_time = parts[-1].end_time if end_time is None else end_time
+    return total
+
+
+def _load_chunk(job, chunk):
+    """Stan fragmentu jako nieaktywny integrator"""
+    loaded = IntegrationCheckpoint(job.chunk_path(chunk)).load()
+    if loaded is None:
+        raise RuntimeError(f"Brak wyniku fragmentu {chunk} ({job.chunk_path(chunk)})")
+    integrator = SpectrumIntegrator(_NO_TARGET)
+    integrator.set_state(loaded[0])
+    integrator.active = False
+    return integrator
+
+
+def _finalize_recording(pipeline, job):
+    """Proces roboczy: fragmenty -> przedziały integracji -> linia bazowa -> eksport"""
+    plan = pipeline.plan(job.sample_rate_mhz, job.center_freq_mhz)
+    clock = _recording_clock(job.metadata, len(open_iq_memmap(job.source)), job.sample_rate_mhz, job.source)
+
+    intervals = []
+    samples = []
+    for first, end in job.intervals:
+        chunks = [chunk for chunk in job.chunks if first <= chunk[0] < end]
+        first_sample, end_sample = first * plan.hop, (end - 1) * plan.hop + plan.frame_len
+        intervals.append(merge_integrators([_load_chunk(job, chunk) for chunk in chunks],
+                                           clock(first_sample), clock(end_sample)))
+        samples.append((first_sample, end_sample))
+
+    metadata = dict(job.metadata)
+    metadata.pop('gaps', None)
+    metadata.update({
+        'center_freq_mhz': plan.center_freq_mhz,
+        'sample_rate_mhz': plan.sample_rate_mhz,
+        'fft_size': plan.fft_size,
+        'window_type': plan.window_type,
+        'overlap': plan.overlap,
+        'spectrometer_mode': plan.mode,
+        'pfb_taps': plan.pfb_taps,
+        'hop': plan.hop,
+        'enbw_hz': plan.enbw_hz,
+        'frame_len': plan.frame_len,
+        'normalization': plan.normalization,
+        'calibration_enabled': plan.calibration_enabled,
+        'freq_offset_ppm': plan.freq_offset_ppm,
+        'freq_offset_khz': plan.freq_offset_khz,
+    })
+    export_product(pipeline, job, plan.doppler, plan.freqs_mhz, intervals, metadata, samples)
+
+
+def _integrator_from(mean, sigma, counts, frames, start_time, end_time):
+    """Integrator ze średniej, sigma i liczby przyjętych ramek per kanał (zapisany produkt)"""
+    integrator = SpectrumIntegrator(_NO_TARGET)
+    counts = np.broadcast_to(np.asarray(counts, dtype=np.int64), np.shape(mean)).copy()
+    valid = np.isfinite(mean) & (counts > 0)
+    integrator.power_mean = np.where(valid, mean, 0.0).astype(np.float64)
+    sigma = np.zeros(len(mean)) if sigma is None else np.nan_to_num(np.asarray(sigma, dtype=np.float64))
+    integrator.power_m2 = np.where(valid, sigma ** 2 * np.maximum(counts - 1, 0), 0.0)
+    integrator.bin_counts = np.where(valid, counts, 0)
+    integrator.count = int(frames)
+    integrator.start_time = start_time
+    integrator.end_time = end_time
+    return integrator
+
+
+def _reprocess_product(pipeline, job):
+    """Proces roboczy: zapisane widmo / sub-integracje -> ponowna integracja -> linia bazowa -> eksport"""
+    if job.kind == 'subint':
+        dataset = open_subint(job.source)
+        try:
+            metadata = dict(dataset.metadata)
+            freqs = dataset.axes.get('freqs_mhz')
+            starts, ends = dataset.column('time_start'), dataset.column('time_end')
+            frames = dataset.column('frames')
+
+            # Rekordy w przedziały integrate_sec od początku zbioru (0 = wszystkie razem)
+            if pipeline.integrate_sec > 0:
+                group = np.floor((dataset.times - starts[0]) / pipeline.integrate_sec).astype(np.int64)
+                bounds = np.flatnonzero(np.diff(group)) + 1
+                edges = [0, *bounds.tolist(), len(dataset)]
+            else:
+                edges = [0, len(dataset)]
+
+            intervals = []
+            for start, stop in zip(edges[:-1], edges[1:]):
+                doppler, mean, sigma, counts = dataset.average(start, stop)
+                intervals.append(_integrator_from(mean, sigma, counts, frames[start:stop].sum(),
+                                                  float(starts[start]), float(ends[stop - 1])))
+        finally:
+            dataset.close()
+    else:
+        spectrum = read_spectrum(job.source)
+        if spectrum is None:
+            raise ValueError("Plik nie zawiera widma (power_db)")
+        arrays, metadata, _ = spectrum
+        doppler = arrays['doppler_velocities_km_s']
+        mean = arrays.get('power_linear')
+        if mean is None:
+            mean = 10 ** (np.asarray(arrays['power_db'], dtype=np.float64) / 10)
+        count = int(metadata.get('integration_count') or 1)
+        time_start = parse_time(metadata.get('time_start') or metadata.get('timestamp'))
+        time_end = parse_time(metadata.get('time_end'))
+        time_start = time_start if time_start is not None else job.source.stat().st_mtime
+        intervals = [_integrator_from(mean, arrays.get('sigma_linear'), count, count,
+                                      time_start, time_end if time_end is not None else time_start)]
+        freqs = arrays.get('freqs_mhz')
+
+    if freqs is None:
+        from src.dsp.spectral_plan import doppler_to_freq
+        freqs = doppler_to_freq(doppler)
+    export_product(pipeline, job, doppler, freqs, intervals, metadata)
+
+
+def _run_task(pipeline, job, chunk=None):
+    """Wejście procesu roboczego: (źródło, liczba ramek lub None, czas [s], błąd lub None)"""
+    t0 = time.perf_counter()
+    try:
+        if chunk is not None:
+            result = _chunk_task(pipeline, job, chunk)
+        elif job.kind == 'iq':
+            result = _finalize_recording(pipeline, job)
+        else:
+            result = _reprocess_product(pipeline, job)
+        return str(job.source), result, time.perf_counter() - t0, None
+    except Exception as e:
+        return str(job.source), None, time.perf_counter() - t0, f"{type(e).__name__}: {e}"
+
+
+# =============================================================================
+# EKSPORT
+# =============================================================================
+
+def export_product(pipeline, job, doppler, freqs_mhz, intervals, metadata, samples=None):
+    """
+    Zapisz wynik potoku - atomowo (plik w katalogu roboczym, potem os.replace)
+
+    Widmo całości (przedziały połączone metodą Chana) ma te same klucze co
+    write_integrated_spectrum (katalog i narzędzia czytają je bez zmian),
+    a linia bazowa dodaje baseline_linear i power_corrected_linear.
+    Przedziały integracji (gdy jest ich więcej niż jeden) trafiają do
+    tablic interval_* (NPZ, HDF5: grupa /intervals) lub wierszy SDFITS.
+    CSV zawiera tylko widmo całości; SDFITS - moc, M2 i liczniki bez linii
+    bazowej (do odjęcia przy analizie).
+
+    Args:
+        pipeline: ReprocessPipeline
+        job: ReprocessJob
+        doppler, freqs_mhz: Osie
+        intervals: Integratory przedziałów w kolejności czasu
+        metadata: dict metadanych wejścia / planu widma
+        samples: [(pierwsza próbka, koniec)] przedziałów (nagrania I/Q) lub None
+    """
+    total = merge_integrators(intervals)
+    power = total.mean_power()
+
+    metadata = dict(metadata, integration_count=int(total.count), time_start=total.start_time,
+                    time_end=total.end_time, intervals=len(intervals), reprocessed_from=str(job.source),
+                    pipeline=pipeline.signature(job.kind), pipeline_tag=pipeline.tag(job.kind),
+                    timestamp=datetime.now().strftime("%Y%m%d_%H%M%S"))
+
+    spectrum = {
+        'power_db': power_to_db(power),
+        'power_linear': power,
+        'sigma_linear': total.std(),
+        'stderr_linear': total.stderr(),
+        'accepted_fraction': total.accepted_fraction(),
+    }
+    interval_arrays = {}
+    if len(intervals) > 1:
+        interval_arrays = {
+            'time_start': np.array([part.start_time for part in intervals]),
+            'time_end': np.array([part.end_time for part in intervals]),
+            'frames': np.array([part.count for part in intervals], dtype=np.int64),
+            'power_linear': np.stack([part.mean_power() for part in intervals]).astype(np.float32),
+            'stderr_linear': np.stack([part.stderr() for part in intervals]).astype(np.float32),
+        }
+
+    if pipeline.baseline:
+        baseline = fit_baseline(doppler, power, pipeline.baseline_order, pipeline.baseline_line_kms,
+                                pipeline.baseline_edge_fraction)
+        if baseline is not None:
+            spectrum['baseline_linear'] = baseline
+            spectrum['power_corrected_linear'] = power - baseline
+            if interval_arrays:
+                interval_arrays['power_corrected_linear'] = np.stack([
+                    part.mean_power() - _baseline_or_zero(doppler, part.mean_power(), pipeline)
+                    for part in intervals]).astype(np.float32)
+        else:
+            print(f"⚠️  {job.source.name}: za mało kanałów poza linią do dopasowania linii bazowej")
+            metadata['baseline_failed'] = True
+
+    job.work_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = job.work_dir / f"output{pipeline.suffix}"
+    axes = {'doppler_velocities_km_s': doppler, 'freqs_mhz': freqs_mhz}
+
+    if pipeline.export_format == 'hdf5':
+        from src.storage.hdf5_writer import save_spectrum_hdf5
+        save_spectrum_hdf5(tmp_path, axes, spectrum, metadata,
+                           groups={'intervals': interval_arrays} if interval_arrays else None)
+    elif pipeline.export_format == 'fits':
+        from src.storage.sdfits import SDFITSWriter
+        writer = SDFITSWriter(tmp_path)
+        writer.open({'freqs_mhz': freqs_mhz}, dict(metadata, channels=len(doppler)))
+        try:
+            for i, part in enumerate(intervals):
+                first, end = samples[i] if samples is not None else (None, None)
+                writer.write(make_record(part, first, end))
+        finally:
+            writer.close()
+    elif pipeline.export_format == 'csv':
+        from src.storage.save_service import write_csv
+        names = ['Doppler_Velocity_km_s', 'Power_dB', 'Power_Linear', 'Sigma_Linear', 'Stderr_Linear']
+        columns = [doppler, spectrum['power_db'], power, spectrum['sigma_linear'], spectrum['stderr_linear']]
+        if 'baseline_linear' in spectrum:
+            names += ['Baseline_Linear', 'Power_Corrected_Linear']
+            columns += [spectrum['baseline_linear'], spectrum['power_corrected_linear']]
+        write_csv(tmp_path, columns, names, header=[
+            f"Przetworzone widmo - {job.source.name}",
+            f"Liczba integracji: {total.count}",
+            f"Częstotliwość centralna: {metadata.get('center_freq_mhz')} MHz",
+            f"Data: {metadata['timestamp']}",
+            f"Metadane: {json.dumps(metadata, default=str, ensure_ascii=False)}",
+        ])
+    else:
+        np.savez_compressed(tmp_path, **axes, **spectrum,
+                            **{f"interval_{key}": value for key, value in interval_arrays.items()},
+                            metadata=metadata)
+
+    job.output.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp_path, job.output)
+    shutil.rmtree(job.work_dir, ignore_errors=True)
+
+
+def _baseline_or_zero(doppler, power, pipeline):
+    """Linia bazowa przedziału (0 gdy dopasowanie niemożliwe)"""
+    baseline = fit_baseline(doppler, power, pipeline.baseline_order, pipeline.baseline_line_kms,
+                            pipeline.baseline_edge_fraction)
+    return baseline if baseline is not None else 0.0
+
+
+# =============================================================================
+# PRZETWARZANIE ARCHIWUM
+# =============================================================================
+
+def find_inputs(paths, exclude=None):
+    """
+    Wejścia potoku: nagrania I/Q, zapisane widma i zbiory sub-integracji
+
+    Args:
+        paths: Pliki lub katalogi (przeszukiwane rekurencyjnie - find_products)
+        exclude: Katalog pominięty (np. katalog wyników wewnątrz archiwum)
+
+    Returns:
+        Lista (ścieżka, katalog bazowy do nazw wyników)
+    """
+    exclude = Path(exclude).resolve() if exclude is not None else None
+    inputs = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir() and path.suffix.lower() != ".subint":
+            found = [(p, path) for p in find_products(path)]
+        else:
+            found = [(path, path.parent)]
+        for product, root in found:
+            if exclude is not None and (product.resolve() == exclude or exclude in product.resolve().parents):
+                continue
+            if product.name == DataConfig.CHECKPOINT_FILE or product.name == DataConfig.CATALOG_FILE:
+                continue
+            inputs.append((product, root))
+    return inputs
+
+
+def _product_kind(path):
+    """Rodzaj wejścia: 'iq', 'subint' lub 'spectrum'"""
+    suffix = path.suffix.lower()
+    if suffix == DataConfig.RAW_FILE_EXTENSION:
+        return 'iq'
+    if suffix in (".subint", ".fits", ".sdfits"):
+        return 'subint'
+    if suffix in (".h5", ".hdf5"):
+        from src.storage.hdf5_writer import h5py
+        with h5py.File(path, 'r') as f:
+            return 'spectrum' if 'spectrum' in f else 'subint'
+    return 'spectrum'
+
+
+class ArchiveReprocessor:
+    """
+    Równoległe przetwarzanie archiwum (ProcessPoolExecutor)
+
+    - Zadania: fragmenty nagrań I/Q (REPROCESS_CHUNK_SEC sekund ramek) i całe
+      zapisane produkty. Procesy nie dzielą stanu: każdy otwiera swój memmap,
+      FFT w jednym wątku (równoległość = procesy), wynik fragmentu zapisuje
+      sam - do procesu głównego wraca tylko liczba ramek, więc skalowanie
+      z liczbą rdzeni ogranicza dysk, nie proces główny
+    - Gdy wszystkie fragmenty nagrania są gotowe, łączenie i eksport idą
+      jako kolejne zadanie - w kolejności ramek, więc wynik nie zależy od
+      liczby procesów ani kolejności ich zakończenia
+    - Wznowienie: istniejący wynik jest pomijany (chyba że force), gotowe
+      fragmenty z katalogu roboczego nie są liczone ponownie; zmiana
+      nagrania lub podziału na fragmenty czyści katalog roboczy
+    """
+
+    def __init__(self, pipeline, output_dir=None, workers=None, chunk_sec=None):
+        """
+        Args:
+            pipeline: ReprocessPipeline
+            output_dir: Katalog wyników (None = DataConfig.REPROCESS_DIR)
+            workers: Liczba procesów (None = REPROCESS_WORKERS / liczba rdzeni, 1 = w tym procesie)
+            chunk_sec: Sekund nagrania na zadanie (None = z config)
+        """
+        self.pipeline = pipeline
+        self.output_dir = Path(output_dir if output_dir is not None else DataConfig.REPROCESS_DIR)
+        self.workers = workers or DataConfig.REPROCESS_WORKERS or os.cpu_count() or 1
+        self.chunk_sec = chunk_sec or DataConfig.REPROCESS_CHUNK_SEC
+
+    def plan_job(self, source, root, force=False):
+        """
+        Zadanie dla wejścia (None gdy wynik już istnieje)
+
+        Args:
+            source: Ścieżka wejścia
+            root: Katalog bazowy - podkatalogi wejścia powtarzane w katalogu wyników
+            force: Przelicz także istniejące wyniki
+        """
+        source = Path(source)
+        kind = _product_kind(source)
+        relative = source.parent.resolve().relative_to(Path(root).resolve())
+        output = self.output_dir / relative / self.pipeline.output_name(source, kind)
+        work_dir = self.output_dir / WORK_DIR / relative / output.stem
+        if output.exists() and not force:
+            return None
+
+        job = ReprocessJob(source, kind, output, work_dir)
+        chunk_frames = 0
+        if kind == 'iq':
+            self._split_recording(job)
+            chunk_frames = job.chunk_frames
+
+        # Katalog roboczy innego nagrania / podziału / potoku - od nowa
+        manifest = job.manifest(self.pipeline, chunk_frames)
+        manifest_path = work_dir / "job.json"
+        if force or not manifest_path.exists() or _read_json(manifest_path) != json.loads(json.dumps(manifest)):
+            shutil.rmtree(work_dir, ignore_errors=True)
+            work_dir.mkdir(parents=True, exist_ok=True)
+            with open(manifest_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+
+        job.pending = [chunk for chunk in job.chunks if not job.chunk_path(chunk).exists()]
+        return job
+
+    def _split_recording(self, job):
+        """Przedziały integracji i fragmenty ramek nagrania"""
+        metadata = load_sidecar(job.source)
+        job.metadata = metadata
+        job.sample_rate_mhz = metadata.get('sample_rate_mhz') or ReceiverConfig.SAMPLE_RATE_MHZ
+        job.center_freq_mhz = metadata.get('center_freq_mhz') or ReceiverConfig.CENTER_FREQ_MHZ
+
+        plan = self.pipeline.plan(job.sample_rate_mhz, job.center_freq_mhz)
+        num_samples = len(open_iq_memmap(job.source))
+        num_frames = 0 if num_samples < plan.frame_len else (num_samples - plan.frame_len) // plan.hop + 1
+        if num_frames == 0:
+            raise ValueError(f"Nagranie krótsze niż ramka ({num_samples} < {plan.frame_len} próbek)")
+
+        frames_per_sec = job.sample_rate_mhz * 1e6 / plan.hop
+        job.chunk_frames = max(1, int(round(self.chunk_sec * frames_per_sec)))
+        per_interval = (max(1, int(round(self.pipeline.integrate_sec * frames_per_sec)))
+                        if self.pipeline.integrate_sec > 0 else num_frames)
+
+        for first in range(0, num_frames, per_interval):
+            end = min(first + per_interval, num_frames)
+            job.intervals.append((first, end))
+            job.chunks.extend((f0, min(f0 + job.chunk_frames, end)) for f0 in range(first, end, job.chunk_frames))
+
+    def run(self, inputs, force=False, max_chunks=None, progress=None):
+        """
+        Przetwórz wejścia
+
+        Args:
+            inputs: Lista (ścieżka, katalog bazowy) z find_inputs
+            force: Przelicz także istniejące wyniki
+            max_chunks: Najwyżej tyle fragmentów nagrań w tym uruchomieniu
+                        (praca porcjami - kolejne uruchomienie kontynuuje; None = bez limitu)
+            progress: callable(gotowe zadania, wszystkie zadania, źródło) lub None
+
+        Returns:
+            dict: inputs, done, skipped, remaining, frames, outputs, errors [(ścieżka, błąd)],
+            elapsed_sec, cpu_sec (suma czasów zadań)
+        """
+        t0 = time.perf_counter()
+        jobs, errors, skipped = [], [], 0
+        for source, root in inputs:
+            try:
+                job = self.plan_job(source, root, force)
+            except Exception as e:
+                errors.append((str(source), f"{type(e).__name__}: {e}"))
+                continue
+            if job is None:
+                skipped += 1
+            else:
+                jobs.append(job)
+
+        # Kolejka: fragmenty w kolejności wejść; eksport wejścia po jego ostatnim fragmencie
+        budget = sum(len(job.pending) for job in jobs) if max_chunks is None else max_chunks
+        tasks = []
+        waiting = {}
+        for job in jobs:
+            selected = job.pending[:max(0, min(budget, len(job.pending)))]
+            budget -= len(selected)
+            job.runnable = len(selected) == len(job.pending)
+            waiting[id(job)] = len(selected)
+            tasks.extend((job, chunk) for chunk in selected)
+        finals = {id(job) for job in jobs if job.runnable}
+
+        total = len(tasks) + len(finals)
+        stats = {'done': 0, 'frames': 0, 'cpu_sec': 0.0, 'outputs': []}
+        failed = set()
+
+        def finished(job, chunk, result):
+            """Wynik zadania -> statystyki; zwraca wejście gotowe do eksportu lub None"""
+            _, frames, elapsed, error = result
+            stats['done'] += 1
+            stats['cpu_sec'] += elapsed
+            if progress is not None:
+                progress(stats['done'], total, job.source)
+            if error is not None:
+                errors.append((str(job.source), error))
+                failed.add(id(job))
+                finals.discard(id(job))
+                return None
+            if chunk is None:
+                stats['outputs'].append(job.output)
+                return None
+            stats['frames'] += frames
+            waiting[id(job)] -= 1
+            return job if waiting[id(job)] == 0 and id(job) in finals else None
+
+        queue = deque(tasks)
+        queue.extend((job, None) for job in jobs if id(job) in finals and waiting[id(job)] == 0)
+
+        if self.workers <= 1:
+            while queue:
+                job, chunk = queue.popleft()
+                final = finished(job, chunk, _run_task(self.pipeline, job, chunk))
+                if final is not None:
+                    queue.appendleft((final, None))
+        else:
+            # Najwyżej IN_FLIGHT_PER_WORKER zadań na proces w kolejce puli - przerwanie
+            # (Ctrl+C) czeka tylko na nie, a nie na całe archiwum
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = {}
+                while queue or futures:
+                    while queue and len(futures) < IN_FLIGHT_PER_WORKER * self.workers:
+                        job, chunk = queue.popleft()
+                        futures[pool.submit(_run_task, self.pipeline, job, chunk)] = (job, chunk)
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job, chunk = futures.pop(future)
+                        final = finished(job, chunk, future.result())
+                        if final is not None:
+                            queue.appendleft((final, None))     # Eksport przed kolejnymi fragmentami
+
+        _remove_empty_dirs(self.output_dir / WORK_DIR)
+        return {
+            'inputs': len(inputs),
+            'done': len(stats['outputs']),
+            'skipped': skipped,
+            'remaining': len(jobs) - len(stats['outputs']) - len(failed),
+            'frames': stats['frames'],
+            'outputs': stats['outputs'],
+            'errors': errors,
+            'elapsed_sec': time.perf_counter() - t0,
+            'cpu_sec': stats['cpu_sec'],
+        }
+
+
+def _remove_empty_dirs(directory):
+    """Usuń puste podkatalogi (i sam katalog, gdy pusty) - pozostałości po zakończonych wejściach"""
+    if not directory.is_dir():
+        return
+    for root, _, _ in sorted(os.walk(directory), key=lambda entry: len(entry[0]), reverse=True):
+        try:
+            os.rmdir(root)
+        except OSError:
+            pass
+
+
+def _read_json(path):
+    """JSON z pliku lub None gdy brak / uszkodzony"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
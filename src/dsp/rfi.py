@@ -0,0 +1,298 @@
+"""
+Flagowanie RFI
+Spectral kurtosis (SK) liczone strumieniowo per kanał FFT i wygaszanie
+impulsów w dziedzinie czasu
+"""
+
+import sys
+import numpy as np
+from pathlib import Path
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import ProcessingConfig
+
+
+def sk_thresholds(num_frames, sigma, shape=1.0):
+    """
+    Progi akceptacji estymatora SK (symetryczne, sigma odchyleń od 1)
+
+    Wariancja SK dla szumu gaussowskiego (Nita & Gary 2010, N = 1):
+        2 d (d + 1) M^2 / ((M - 1) (M d + 2) (M d + 3))
+
+    Returns:
+        (dolny, górny) próg
+    """
+    m, d = num_frames, shape
+    variance = 2 * d * (d + 1) * m ** 2 / ((m - 1) * (m * d + 2) * (m * d + 3))
+    half_width = sigma * np.sqrt(variance)
+    return 1.0 - half_width, 1.0 + half_width
+
+
+class SpectralKurtosis:
+    """
+    Uogólniony estymator spectral kurtosis na grupach M ramek
+
+    - add() dokłada sumy S1 = sum P i S2 = sum P^2 dla każdego kanału
+      (jedno dodatkowe mnożenie-dodawanie na kanał i ramkę)
+    - flush() liczy SK = (M d + 1) / (M - 1) * (M S2 / S1^2 - 1), oznacza
+      kanały poza progami, a gdy oznaczonych jest więcej niż
+      max_flagged_fraction - odrzuca całą grupę (impulsy szerokopasmowe)
+    - Szum gaussowski daje SK ~ 1; impulsy (radar, GSM) SK > 1,
+      stałe nośne (CW) SK < 1
+
+    Ramki nakładające się (FFT_OVERLAP 0.75) są skorelowane - progi są
+    wtedy zbyt wąskie i fałszywych flag jest więcej.
+    """
+
+    def __init__(self, group_frames=None, sigma=None, max_flagged_fraction=None, shape=1.0):
+        """
+        Args:
+            group_frames: M - ramek na grupę (None = z config)
+            sigma: Szerokość progów w odchyleniach standardowych SK (None = z config)
+            max_flagged_fraction: Udział oznaczonych kanałów odrzucający grupę (None = z config)
+            shape: d - parametr kształtu (1 = moc pojedynczej FFT)
+        """
+        self.group_frames = group_frames or ProcessingConfig.SK_FRAMES
+        self.sigma = sigma or ProcessingConfig.SK_SIGMA
+        self.max_flagged_fraction = max_flagged_fraction or ProcessingConfig.SK_MAX_FLAGGED_FRACTION
+        self.shape = shape
+
+        self.groups = 0
+        self.groups_rejected = 0
+        self.reset()
+
+    def reset(self):
+        """Porzuć niepełną grupę"""
+        self.s1 = None
+        self.s2 = None
+        self.frames = 0
+
+    @property
+    def complete(self):
+        """Czy grupa ma już M ramek"""
+        return self.frames >= self.group_frames
+
+    def add(self, power):
+        """
+        Dodaj moce ramek do sum grupy
+
+        Args:
+            power: |X|^2 ramek (ramki, kanały) - bez uśredniania i skalowania
+        """
+        if self.s1 is None:
+            self.s1 = np.zeros(power.shape[-1], dtype=np.float64)
+            self.s2 = np.zeros(power.shape[-1], dtype=np.float64)
+
+        self.s1 += power.sum(axis=0)
+        self.s2 += np.einsum('ij,ij->j', power, power)
+        self.frames += len(power)
+
+    def flush(self):
+        """
+        Zakończ grupę
+
+        Returns:
+            (mean_power, accepted, num_frames, m2) - średnia moc grupy (float64),
+            maska kanałów przyjętych (bool), liczba ramek, suma kwadratów
+            odchyleń od średniej (float64, dla integratora); None gdy grupa pusta
+        """
+        if self.frames == 0:
+            return None
+
+        m = self.frames
+        mean_power = self.s1 / m
+        m2 = np.maximum(self.s2 - self.s1 * mean_power, 0.0)
+
+        if m < 2:
+            accepted = np.ones(len(self.s1), dtype=bool)
+        else:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                sk = (m * self.shape + 1) / (m - 1) * (m * self.s2 / self.s1 ** 2 - 1)
+            lower, upper = sk_thresholds(m, self.sigma, self.shape)
+            accepted = (sk >= lower) & (sk <= upper)
+
+            if 1.0 - accepted.mean() > self.max_flagged_fraction:
+                accepted[:] = False
+                self.groups_rejected += 1
+
+        self.groups += 1
+        self.reset()
+        return mean_power, accepted, m, m2
+
+
+class ImpulseBlanker:
+    """
+    Wygaszanie impulsów w dziedzinie czasu (przed oknem i FFT)
+
+    - Odporna skala szumu: mediana |x| z podpróbki każdego segmentu
+      (segment_samples), wygładzona medianą kroczącą po window_segments
+      ostatnich segmentach; dla szumu gaussowskiego mediana |x| =
+      sigma * sqrt(2 ln 2) (sigma - odchylenie składowej I/Q, jak z MAD)
+    - Próbki z |x| > threshold_sigma * sigma (i guard próbek wokół) są
+      zerowane albo zastępowane szumem o tej samej skali
+    - Wektorowo po całych blokach: |x| raz na próbkę, maksimum segmentu
+      decyduje, czy segment wymaga przeglądu próbka po próbce; |x| liczone
+      kawałkami, maksima i podpróbka mediany z cache (jeden odczyt bloku)
+    """
+
+    MODES = ("zero", "noise")
+
+    # Próbek segmentu w medianie (równomiernie rozłożonych, nieparzyście - środek jednoznaczny)
+    MEDIAN_SAMPLES = 63
+
+    # Próbek |x| liczonych naraz (float32 512 kB - mieści się w L2)
+    CHUNK_SAMPLES = 131072
+
+    def __init__(self, sample_rate_mhz, threshold_sigma=None, segment_samples=None,
+                 window_segments=None, guard_samples=None, mode=None):
+        """
+        Args:
+            sample_rate_mhz: Próbkowanie strumienia (okno metryki = 1 s)
+            threshold_sigma: Próg w odchyleniach składowej I/Q (None = z config)
+            segment_samples: Długość segmentu statystyki (None = z config)
+            window_segments: Segmentów w medianie kroczącej (None = z config)
+            guard_samples: Próbek wygaszanych przed i po impulsie (None = z config)
+            mode: "zero" lub "noise" (None = z config)
+        """
+        self.threshold_sigma = threshold_sigma or ProcessingConfig.BLANKER_SIGMA
+        self.segment_samples = segment_samples or ProcessingConfig.BLANKER_SEGMENT_SAMPLES
+        self.window_segments = window_segments or ProcessingConfig.BLANKER_WINDOW_SEGMENTS
+        self.guard_samples = ProcessingConfig.BLANKER_GUARD_SAMPLES if guard_samples is None else guard_samples
+        self.mode = (mode or ProcessingConfig.BLANKER_MODE).lower()
+        if self.mode not in self.MODES:
+            raise ValueError(f"Nieznany tryb wygaszania: {self.mode} (dostępne: {', '.join(self.MODES)})")
+
+        # Mediana |x| -> odchylenie składowej I/Q
+        self._median_to_sigma = float(1.0 / np.sqrt(2 * np.log(2)))
+
+        self._rng = np.random.default_rng()
+        self._abs = np.empty(0, dtype=np.float32)
+        self._history = None        # Mediany ostatnich window_segments - 1 segmentów
+        self._window_index = None   # Indeksy okien mediany kroczącej (segmenty, window_segments)
+        self._last_scale = None     # Skala ostatniego segmentu (bloki krótsze niż segment)
+
+        # Metryka: udział wygaszonych próbek w ostatniej pełnej sekundzie strumienia
+        self.metric_window = int(sample_rate_mhz * 1e6)
+        self.blanked_fraction = 0.0
+        self.samples_blanked = 0
+        self.samples_total = 0
+        self._window_blanked = 0
+        self._window_total = 0
+
+    def process(self, samples):
+        """
+        Wygaś impulsy w bloku (w miejscu)
+
+        Args:
+            samples: complex64 - kolejne próbki strumienia
+
+        Returns:
+            Liczba wygaszonych próbek
+        """
+        n = len(samples)
+        W = self.segment_samples
+        n_seg = n // W
+        if n_seg == 0 and self._last_scale is None:
+            self._account(0, n)
+            return 0
+
+        if len(self._abs) < n:
+            self._abs = np.empty(n, dtype=np.float32)
+        amplitude = self._abs[:n]
+        segments = amplitude[:n_seg * W].reshape(n_seg, W)
+
+        if n_seg:
+            # |x| kawałkami po CHUNK_SAMPLES: maksimum segmentu i podpróbka
+            # mediany czytane z cache zaraz po zapisie, nie z pamięci
+            m = min(self.MEDIAN_SAMPLES, W)
+            step = W // m
+            rows = samples[:n_seg * W].reshape(n_seg, W)
+            peaks = np.empty(n_seg, dtype=np.float32)
+            subsample = np.empty((n_seg, m), dtype=np.float32)
+            chunk = max(1, self.CHUNK_SAMPLES // W)
+            for start in range(0, n_seg, chunk):
+                block = np.abs(rows[start:start + chunk], out=segments[start:start + chunk])
+                block.max(axis=1, out=peaks[start:start + chunk])
+                subsample[start:start + chunk] = block[:, :step * m:step]
+
+            # Mediana |x| segmentów z podpróbki, potem mediana krocząca po segmentach
+            medians = np.partition(subsample, m // 2, axis=1)[:, m // 2]
+
+            K = self.window_segments
+            if self._history is None:
+                self._history = np.full(K - 1, medians[0], dtype=np.float32)
+            combined = np.concatenate((self._history, medians))
+            if self._window_index is None or len(self._window_index) != n_seg:
+                self._window_index = np.arange(n_seg)[:, None] + np.arange(K)
+            windows = np.partition(combined[self._window_index], K // 2, axis=1)
+            scale = windows[:, K // 2] * self._median_to_sigma
+            self._history = combined[len(combined) - (K - 1):]
+            self._last_scale = scale[-1]
+        else:
+            scale = np.empty(0, dtype=np.float32)
+
+        # Ogon bloku (niepełny segment) - próg ostatniego segmentu
+        scale = np.concatenate((scale, [self._last_scale]))
+        thresholds = scale * self.threshold_sigma
+
+        # Maksimum segmentu decyduje o przeglądzie próbka po próbce; gorące
+        # segmenty (nieliczne) razem, jednym porównaniem
+        hits = []
+        if n_seg:
+            hot = np.flatnonzero(peaks > thresholds[:n_seg])
+            if len(hot):
+                index = np.flatnonzero(segments[hot] > thresholds[hot, None])
+                hits.append(hot[index // W] * W + index % W)
+
+        if n % W:
+            tail = np.abs(samples[n_seg * W:], out=amplitude[n_seg * W:])
+            hits.append(np.flatnonzero(tail > thresholds[-1]) + n_seg * W)
+
+        hits = np.concatenate(hits) if hits else np.empty(0, dtype=np.intp)
+
+        if len(hits) == 0:
+            self._account(0, n)
+            return 0
+
+        # Guard wokół impulsów; przedziały [h - g, h + g] mają równą szerokość,
+        # a hits są posortowane - sumę wygaszonych daje długość ich sumy
+        # (odstępy między impulsami, przycięcie na brzegach bloku) bez np.unique
+        g = self.guard_samples
+        if g:
+            span = 2 * g + 1
+            index = (hits[:, None] + np.arange(-g, g + 1)).ravel()
+            if hits[0] < g or hits[-1] >= n - g:
+                np.clip(index, 0, n - 1, out=index)
+            gaps = np.minimum(hits[1:] - hits[:-1], span)
+            first, last = int(hits[0]), int(hits[-1])
+            blanked = span + int(np.add.reduce(gaps)) - max(0, g - first) - max(0, last + g - (n - 1))
+        else:
+            blanked = len(hits)
+            index = hits
+
+        if self.mode == "noise":
+            sigma = scale[np.minimum(index // W, n_seg)]
+            noise = self._rng.standard_normal((2, len(index))).astype(np.float32) * sigma
+            samples[index] = noise[0] + 1j * noise[1]
+        else:
+            samples[index] = 0
+
+        self._account(blanked, n)
+        return blanked
+
+    def _account(self, blanked, total):
+        """Liczniki i metryka udziału wygaszonych próbek na sekundę strumienia"""
+
+        self.samples_blanked += blanked
+        self.samples_total += total
+        self._window_blanked += blanked
+        self._window_total += total
+
+        if self._window_total >= self.metric_window:
+            self.blanked_fraction = self._window_blanked / self._window_total
+            self._window_blanked = 0
+            self._window_total = 0
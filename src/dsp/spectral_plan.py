@@ -0,0 +1,352 @@
+"""
+Plan widma
+Okno, osie częstotliwości i prędkości, notch DC - liczone raz na konfigurację
+"""
+
+import sys
+import numpy as np
+from pathlib import Path
+from collections import namedtuple
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import ReceiverConfig, ProcessingConfig, PhysicsConstants
+
+
+# Prędkość światła [km/s]
+_C_KM_S = PhysicsConstants.SPEED_OF_LIGHT / 1000.0
+
+# Dostępne normalizacje mocy (ProcessingConfig.SPECTRUM_NORMALIZATION)
+NORMALIZATION_TYPES = ("none", "coherent", "psd")
+
+# Tryby spektrometru (ProcessingConfig.SPECTROMETER_MODE)
+SPECTROMETER_MODES = ("fft", "pfb")
+
+# Podłoga mocy przy konwersji do dB (odpowiednik dawnego |X| + 1e-10)
+POWER_FLOOR = 1e-20
+
+
+# =============================================================================
+# KONWERSJE OSI
+# =============================================================================
+
+def freq_to_doppler_velocity(freqs_mhz):
+    """
+    Konwertuj częstotliwości na prędkości Dopplera w km/s
+
+    Wzór: v = c * (f0 - f) / f0
+    gdzie:
+    - v to prędkość radialna [km/s]
+    - c to prędkość światła [km/s]
+    - f0 to częstotliwość linii wodoru w spoczynku [MHz]
+    - f to obserwowana częstotliwość [MHz]
+
+    Uwaga: dla wzrostu częstotliwości (f > f0) mamy ujemne prędkości (zbliżanie)
+           dla spadku częstotliwości (f < f0) mamy dodatnie prędkości (oddalanie)
+    """
+    f0 = PhysicsConstants.HYDROGEN_LINE_FREQ_MHZ
+    return _C_KM_S * (f0 - freqs_mhz) / f0
+
+
+def doppler_to_freq(velocities_km_s):
+    """
+    Konwertuj prędkości Dopplera z powrotem na częstotliwości
+
+    Odwrotność freq_to_doppler_velocity: f = f0 * (1 - v/c)
+    """
+    f0 = PhysicsConstants.HYDROGEN_LINE_FREQ_MHZ
+    return f0 * (1 - velocities_km_s / _C_KM_S)
+
+
+def power_to_db(power):
+    """Moc liniowa -> dB (podłoga POWER_FLOOR tylko tutaj, nie w sumach)"""
+    return 10 * np.log10(power + POWER_FLOOR)
+
+
+def apply_frequency_calibration(freqs_mhz, ppm, khz):
+    """Korekcja PPM (proporcjonalnie do częstotliwości) + offset w kHz"""
+    return freqs_mhz * (1 + ppm / 1e6) + khz / 1000
+
+
+def make_pfb_coefficients(num_channels, taps, window_type):
+    """
+    Filtr prototypowy bank filtrów polifazowych: sinc o szerokości jednego
+    kanału, długość taps * num_channels, zwężony oknem window_type
+
+    Returns:
+        Tablica (taps, num_channels) - wiersz p mnoży p-ty segment ramki
+    """
+    length = taps * num_channels
+    n = np.arange(length) - (length - 1) / 2
+    h = np.sinc(n / num_channels) * make_window(window_type, length)
+    return h.reshape(taps, num_channels)
+
+
+def make_window(window_type, size):
+    """Zwróć okno do FFT (hann, hamming, blackman, flat_top; inne = prostokątne)"""
+
+    window_type = window_type.lower()
+
+    if window_type == "hann":
+        return np.hanning(size)
+    elif window_type == "hamming":
+        return np.hamming(size)
+    elif window_type == "blackman":
+        return np.blackman(size)
+    elif window_type == "flat_top":
+        # Flat top window - implementacja własna (bez scipy)
+        a0 = 0.21557895
+        a1 = 0.41663158
+        a2 = 0.277263158
+        a3 = 0.083578947
+        a4 = 0.006947368
+
+        n = np.arange(size)
+        return (a0
+                - a1 * np.cos(2 * np.pi * n / (size - 1))
+                + a2 * np.cos(4 * np.pi * n / (size - 1))
+                - a3 * np.cos(6 * np.pi * n / (size - 1))
+                + a4 * np.cos(8 * np.pi * n / (size - 1)))
+    else:
+        # Domyślnie: prostokątne (bez okna)
+        return np.ones(size)
+
+
+# =============================================================================
+# WYNIK
+# =============================================================================
+
+class SpectrumFrame(namedtuple('SpectrumFrame', [
+    'power',            # Moc liniowa |X|^2 uśredniona po ramkach wsadu, po fftshift
+    'doppler',          # Prędkości Dopplera [km/s] (po kalibracji)
+    'freqs_mhz',        # Częstotliwości [MHz] po kalibracji
+    'freqs_mhz_raw',    # Częstotliwości [MHz] przed kalibracją (auto-kalibracja)
+    'first_sample',     # Indeks pierwszej próbki pierwszej ramki w strumieniu
+    'num_frames',       # Liczba ramek FFT uśrednionych w tym widmie
+    'timestamp',        # Czas przetworzenia (time.time())
+    'rfi_mask',         # Kanały oznaczone przez SK w ostatniej pełnej grupie (bool) lub None
+])):
+    """Wynik przetworzenia jednego wsadu (ostatni publikowany dla GUI)"""
+
+    __slots__ = ()
+
+    @property
+    def power_db(self):
+        """Moc [dB] - liczona przy odczycie (tylko wyświetlane ramki)"""
+        return power_to_db(self.power)
+
+
+# =============================================================================
+# PLAN WIDMA
+# =============================================================================
+
+class SpectralPlan:
+    """
+    Wszystko, co zależy tylko od konfiguracji, a nie od danych
+
+    Klucz: (rozmiar FFT, okno, sample rate, częstotliwość centralna,
+    kalibracja, notch DC, normalizacja, nakładanie ramek). Plan jest
+    niezmienny - zmiana któregokolwiek parametru oznacza nowy plan
+    (SpectrumEngine.invalidate_plan).
+
+    Na ramkę zostaje tylko: mnożenie przez okno, FFT, |X|^2 i notch
+    (gotowe indeksy i rampa interpolacji).
+
+    Tryb "pfb": krytycznie próbkowany bank filtrów polifazowych - ramka ma
+    taps * FFT_SIZE próbek, jest mnożona przez filtr prototypowy (taps x
+    FFT_SIZE) i sumowana po gałęziach przed FFT. Płaska odpowiedź kanału
+    i strome zbocza: mniej przecieku i scallopingu niż samo okno.
+
+    Okno jest przechowywane w precyzji dtype (domyślnie float32), więc
+    complex64 z bufora zostaje complex64 przez okno, FFT i moc. Sumy
+    okna (CG, ENBW, normalizacja) są liczone w float64.
+    """
+
+    def __init__(self, fft_size, window_type, sample_rate_mhz, center_freq_mhz,
+                 calibration_enabled=False, freq_offset_ppm=0.0, freq_offset_khz=0.0,
+                 dc_notch_enabled=None, dc_notch_width_khz=None, normalization=None,
+                 overlap=0.0, dtype=np.float32, mode=None, pfb_taps=None, pfb_window=None):
+        """
+        Args:
+            fft_size: Rozmiar FFT
+            window_type: Typ okna (make_window)
+            sample_rate_mhz: Sample rate [MHz]
+            center_freq_mhz: Częstotliwość centralna [MHz]
+            calibration_enabled: Czy stosować kalibrację częstotliwości
+            freq_offset_ppm: Offset kalibracji [ppm]
+            freq_offset_khz: Offset kalibracji [kHz]
+            dc_notch_enabled: Notch DC (None = z config)
+            dc_notch_width_khz: Szerokość notch [kHz] (None = z config)
+            normalization: "none", "coherent" lub "psd" (None = z config)
+            overlap: Nakładanie kolejnych ramek (0.0 - 0.75)
+            dtype: Precyzja okna i widma (np.float32 lub np.float64 - referencja)
+            mode: "fft" (okno + FFT) lub "pfb" (bank filtrów) (None = z config)
+            pfb_taps: Gałęzie PFB na kanał (None = z config)
+            pfb_window: Okno filtru prototypowego PFB (None = z config)
+        """
+        if dc_notch_enabled is None:
+            dc_notch_enabled = ReceiverConfig.DC_NOTCH_ENABLED
+        if dc_notch_width_khz is None:
+            dc_notch_width_khz = ReceiverConfig.DC_NOTCH_WIDTH_KHZ
+        normalization = (normalization or ProcessingConfig.SPECTRUM_NORMALIZATION).lower()
+        if normalization not in NORMALIZATION_TYPES:
+            raise ValueError(f"Nieznana normalizacja: {normalization} (dostępne: {', '.join(NORMALIZATION_TYPES)})")
+        mode = (mode or ProcessingConfig.SPECTROMETER_MODE).lower()
+        if mode not in SPECTROMETER_MODES:
+            raise ValueError(f"Nieznany tryb spektrometru: {mode} (dostępne: {', '.join(SPECTROMETER_MODES)})")
+
+        self.fft_size = fft_size
+        self.window_type = window_type
+        self.sample_rate_mhz = sample_rate_mhz
+        self.center_freq_mhz = center_freq_mhz
+        self.calibration_enabled = calibration_enabled
+        self.freq_offset_ppm = freq_offset_ppm
+        self.freq_offset_khz = freq_offset_khz
+        self.dc_notch_enabled = dc_notch_enabled
+        self.dc_notch_width_khz = dc_notch_width_khz
+        self.normalization = normalization
+        self.overlap = overlap
+        self.dtype = np.dtype(dtype)
+        self.mode = mode
+        self.pfb_taps = (pfb_taps or ProcessingConfig.PFB_TAPS) if mode == "pfb" else 1
+        self.pfb_window = (pfb_window or ProcessingConfig.PFB_WINDOW) if mode == "pfb" else None
+
+        # Długość ramki wejściowej i krok między ramkami [próbki];
+        # PFB jest krytycznie próbkowany (krok = FFT_SIZE, bez nakładania)
+        self.frame_len = self.pfb_taps * fft_size
+        if mode == "pfb":
+            self.overlap = 0.0
+            self.hop = fft_size
+        else:
+            self.hop = max(1, int(round(fft_size * (1 - overlap))))
+
+        self.key = (fft_size, window_type.lower(), sample_rate_mhz, center_freq_mhz,
+                    calibration_enabled, freq_offset_ppm, freq_offset_khz,
+                    dc_notch_enabled, dc_notch_width_khz, normalization, self.overlap, self.dtype.name,
+                    mode, self.pfb_taps, self.pfb_window)
+
+        sr_hz = sample_rate_mhz * 1e6
+        self.bin_width_hz = sr_hz / fft_size
+
+        self._build_window()
+        self._build_axes(sr_hz)
+        self._build_notch()
+
+    def _build_window(self):
+        """Okno (lub filtr prototypowy PFB), wzmocnienie koherentne, ENBW i skala mocy"""
+
+        if self.mode == "pfb":
+            coeffs = make_pfb_coefficients(self.fft_size, self.pfb_taps, self.pfb_window)
+            self.pfb_coeffs = coeffs.astype(self.dtype)
+            self.window = None
+            window = coeffs.ravel()
+        else:
+            window = make_window(self.window_type, self.fft_size)
+            self.window = window.astype(self.dtype)
+            self.pfb_coeffs = None
+
+        s1 = np.sum(window)
+        s2 = np.sum(window ** 2)
+
+        # Wzmocnienie koherentne (amplituda tonu) i szerokość szumowa okna
+        self.coherent_gain = s1 / self.fft_size
+        self.enbw_bins = self.fft_size * s2 / s1 ** 2
+        self.enbw_hz = self.enbw_bins * self.bin_width_hz
+
+        # Mnożnik |X|^2:
+        # - none:     surowe |X|^2 (jak dotychczas)
+        # - coherent: ton o amplitudzie A daje A^2 niezależnie od okna i N
+        # - psd:      gęstość widmowa mocy [jednostki^2 / Hz]
+        if self.normalization == "coherent":
+            self.power_scale = 1.0 / s1 ** 2
+        elif self.normalization == "psd":
+            self.power_scale = 1.0 / (s2 * self.bin_width_hz * self.fft_size)
+        else:
+            self.power_scale = 1.0
+
+        self.db_offset = 10 * np.log10(self.power_scale)
+        self.power_scale = self.dtype.type(self.power_scale)
+
+    def _build_axes(self, sr_hz):
+        """Osie częstotliwości (przed i po kalibracji) i prędkości Dopplera"""
+
+        freqs = np.fft.fftshift(np.fft.fftfreq(self.fft_size, 1 / sr_hz))
+        self.freqs_mhz_raw = (freqs / 1e6) + self.center_freq_mhz
+
+        if self.calibration_enabled:
+            self.freqs_mhz = apply_frequency_calibration(
+                self.freqs_mhz_raw, self.freq_offset_ppm, self.freq_offset_khz)
+        else:
+            self.freqs_mhz = self.freqs_mhz_raw
+
+        self.doppler = freq_to_doppler_velocity(self.freqs_mhz)
+
+        # Tablice osi są współdzielone przez wszystkie ramki - tylko do odczytu
+        for axis in (self.freqs_mhz_raw, self.freqs_mhz, self.doppler):
+            axis.flags.writeable = False
+
+    def _build_notch(self):
+        """Zakres binów wokół DC i rampa interpolacji liniowej"""
+
+        self.notch_slice = None
+        self.notch_ramp = None
+
+        if not self.dc_notch_enabled:
+            return
+
+        # Indeks DC (środek widma po fftshift), połowa szerokości na każdą stronę
+        center_idx = self.fft_size // 2
+        notch_bins = int(self.dc_notch_width_khz * 1000 / self.bin_width_hz / 2)
+
+        if notch_bins > 0 and notch_bins < self.fft_size // 4:
+            left_idx = max(0, center_idx - notch_bins)
+            right_idx = min(self.fft_size, center_idx + notch_bins + 1)
+
+            if left_idx > 0 and right_idx < self.fft_size:
+                self.notch_slice = slice(left_idx, right_idx)
+                self.notch_ramp = np.linspace(0.0, 1.0, right_idx - left_idx, dtype=self.dtype)
+
+    def weight(self, frames):
+        """
+        Przygotuj ramki do FFT: okno (fft) lub filtr polifazowy (pfb)
+
+        Args:
+            frames: (ramki, frame_len) - może być widokiem bufora
+
+        Returns:
+            Nowa tablica (ramki, FFT_SIZE) - FFT może ją nadpisać
+        """
+        frames = np.atleast_2d(frames)
+
+        if self.mode != "pfb":
+            return frames * self.window
+
+        # (ramki, taps, FFT_SIZE) - widok; suma ważona gałęzi wektorowo po ramkach
+        branches = frames.reshape(len(frames), self.pfb_taps, self.fft_size)
+        out = branches[:, 0] * self.pfb_coeffs[0]
+        for p in range(1, self.pfb_taps):
+            out += branches[:, p] * self.pfb_coeffs[p]
+        return out
+
+    def apply_notch(self, spectrum):
+        """Zastąp biny wokół DC interpolacją liniową z sąsiednich binów (w miejscu, moc liniowa)"""
+
+        if self.notch_slice is None:
+            return
+
+        left_val = spectrum[self.notch_slice.start - 1]
+        right_val = spectrum[self.notch_slice.stop]
+        spectrum[self.notch_slice] = left_val + (right_val - left_val) * self.notch_ramp
+
+    def describe(self):
+        """Krótki opis planu (logi)"""
+        if self.mode == "pfb":
+            kernel = f"PFB {self.pfb_taps} gałęzi/kanał, prototyp sinc*{self.pfb_window}"
+        else:
+            kernel = f"okno {self.window_type}"
+        return (f"FFT {self.fft_size}, nakładanie {self.overlap * 100:.0f}%, {kernel} "
+                f"(CG {self.coherent_gain:.3f}, ENBW {self.enbw_bins:.2f} bin = {self.enbw_hz:.1f} Hz), "
+                f"normalizacja {self.normalization}")
@@ -0,0 +1,970 @@
+"""
+Silnik widma bez GUI
+Wątek przetwarzania: kolejne ramki z bufora I/Q -> okno -> FFT (wsadowo) -> moc -> integracja
+"""
+
+import sys
+import time
+import threading
+import numpy as np
+import scipy.fft
+from pathlib import Path
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import ReceiverConfig, ProcessingConfig, DataConfig
+from src.dsp.spectral_plan import SpectralPlan, SpectrumFrame
+from src.dsp.integrator import SpectrumIntegrator
+from src.dsp.ddc import DigitalDownConverter, DecimatingReader
+from src.dsp.rfi import SpectralKurtosis, ImpulseBlanker
+from src.dsp.multires import SpectrumOutput
+from src.dsp.stability import StabilityMonitor
+from src.dsp.checkpoint import IntegrationCheckpoint, plan_signature
+from src.storage.subint import SubintegrationDumper, SubintegrationStore, make_record
+from src.storage.hdf5_writer import HDF5SubintStore, hdf5_available
+from src.storage.sdfits import SDFITSWriter
+
+
+# =============================================================================
+# SILNIK WIDMA
+# =============================================================================
+
+class SpectrumEngine:
+    """
+    Przetwarzanie widma niezależne od GUI
+
+    - Własny wątek czyta KAŻDY kolejny blok z bufora źródła (RingReader),
+      więc przepustowość DSP nie zależy od częstotliwości odświeżania ekranu
+    - Publikuje ostatnie widmo (latest) i stan integracji; GUI tylko
+      próbkuje najnowszy wynik w swoim tempie
+    - Ten sam silnik działa bez okna (obserwacja bezobsługowa, testy)
+
+    Stan integracji jest zmieniany tylko w wątku przetwarzania; odczyty
+    z innych wątków przez get_integrated_spectrum() (pod blokadą).
+
+    Okno, osie i notch pochodzą z SpectralPlan budowanego raz na
+    konfigurację; każda zmiana parametrów woła invalidate_plan().
+
+    Przetwarzanie wsadowe (Welch): ciąg kolejnych próbek jest dzielony na
+    ramki FFT_SIZE z nakładaniem FFT_OVERLAP (widok, bez kopiowania; w trybie
+    PFB ramki PFB_TAPS * FFT_SIZE z krokiem FFT_SIZE), cały
+    stos (ramki x FFT_SIZE) idzie do jednego wywołania scipy.fft.fft
+    z wieloma wątkami i jest od razu redukowany do średniej mocy.
+    Koniec wsadu (długość ramki - hop próbek) przechodzi do następnego, więc
+    żadna próbka nie jest pomijana przy nakładaniu.
+
+    Opcjonalny DDC (DDC_ENABLED) przed spektrometrem: czytelnik zwraca
+    strumień przesunięty do DDC_FREQ_MHZ i zdecymowany do DDC_SPAN_MHZ,
+    a plan jest budowany dla tego strumienia (zoom-FFT).
+
+    Flagowanie RFI (SK_ENABLED): moce ramek trafiają do SpectralKurtosis;
+    do integracji idzie średnia z grupy SK_FRAMES ramek z maską kanałów
+    przyjętych, a maska ostatniej grupy jest publikowana w latest.rfi_mask.
+    Opcjonalne wygaszanie impulsów (BLANKER_ENABLED) działa na nowych
+    próbkach wsadu, zanim zostaną podzielone na ramki.
+
+    Checkpointy (CHECKPOINT_ENABLED): w trakcie integracji co
+    CHECKPOINT_INTERVAL_SEC stan integratora jest zapisywany atomowo do
+    DATA_DIR; resume_integration() wznawia go przy tym samym planie widma.
+
+    Zrzuty sub-integracji (start_dumps): widma wsadów / grup SK są dodatkowo
+    łączone w rekordy co SUBINT_FRAMES ramek lub SUBINT_SECONDS sekund
+    i zapisywane w tle (SubintegrationDumper), niezależnie od integracji.
+    """
+
+    def __init__(self, backend, fft_size=None, window_type=None, overlap=None,
+                 batch_frames=None, fft_workers=None, mode=None, pfb_taps=None, ddc_enabled=None,
+                 sk_enabled=None, blanker_enabled=None):
+        """
+        Args:
+            backend: Źródło próbek (AcquisitionBackend)
+            fft_size: Rozmiar FFT (None = z config)
+            window_type: Typ okna (None = z config)
+            overlap: Nakładanie ramek 0.0 / 0.5 / 0.75 (None = z config)
+            batch_frames: Ramek FFT na wsad (None = z config)
+            fft_workers: Wątki scipy.fft, -1 = wszystkie rdzenie (None = z config)
+            mode: Tryb spektrometru "fft" / "pfb" (None = z config)
+            pfb_taps: Gałęzie PFB na kanał (None = z config)
+            ddc_enabled: DDC przed spektrometrem (None = z config)
+            sk_enabled: Flagowanie RFI spectral kurtosis (None = z config)
+            blanker_enabled: Wygaszanie impulsów przed FFT (None = z config)
+        """
+        self.backend = backend
+        self.fft_size = fft_size or ProcessingConfig.FFT_SIZE
+        self.window_type = window_type or ProcessingConfig.WINDOW_TYPE
+        self.overlap = ProcessingConfig.FFT_OVERLAP if overlap is None else overlap
+        self.batch_frames = batch_frames or ProcessingConfig.FFT_BATCH_FRAMES
+        self.fft_workers = fft_workers or ProcessingConfig.FFT_WORKERS
+        self.mode = mode or ProcessingConfig.SPECTROMETER_MODE
+        self.pfb_taps = pfb_taps or ProcessingConfig.PFB_TAPS
+        self.ddc_enabled = ProcessingConfig.DDC_ENABLED if ddc_enabled is None else ddc_enabled
+        self.blanker_enabled = ProcessingConfig.BLANKER_ENABLED if blanker_enabled is None else blanker_enabled
+
+        # Parametry strumienia (z backendu przy starcie)
+        self.center_freq_mhz = ReceiverConfig.CENTER_FREQ_MHZ
+        self.sample_rate_mhz = ReceiverConfig.SAMPLE_RATE_MHZ
+
+        # Kalibracja częstotliwości
+        self.calibration_enabled = ReceiverConfig.FREQ_CALIBRATION_ENABLED
+        self.freq_offset_ppm = ReceiverConfig.FREQ_OFFSET_PPM
+        self.freq_offset_khz = ReceiverConfig.FREQ_OFFSET_KHZ
+
+        # Plan widma (budowany przy pierwszym bloku po zmianie konfiguracji)
+        self._plan = None
+
+        # Bufor wsadu: [reszta poprzedniego wsadu | nowe próbki]
+        self._stage = None
+        self._carry = 0             # Próbek przeniesionych z poprzedniego wsadu
+        self._stage_first = None    # Indeks strumienia próbki _stage[0]
+
+        # Wątek przetwarzania; reader = strumień dla FFT (po DDC jeśli włączony)
+        self.ddc = None
+        self.blanker = None
+        self.reader = None
+        self._raw_reader = None
+        self._thread = None
+        self._running = False
+        self._lock = threading.Lock()
+
+        # Ostatni wynik
+        self.latest = None
+        self.frames_processed = 0
+        self._start_time = None
+
+        # Integracja widm (moc liniowa)
+        self.integrator = SpectrumIntegrator()
+        self._integration_completed = False
+
+        # Flagowanie RFI (grupa SK zaczyna się od nowa przy starcie integracji)
+        sk_enabled = ProcessingConfig.SK_ENABLED if sk_enabled is None else sk_enabled
+        self.sk = SpectralKurtosis() if sk_enabled else None
+        self.rfi_mask = None
+        self._sk_restart = False
+
+        # Dodatkowe rozdzielczości (te same próbki wsadu, własne plany i integratory)
+        self.cpu_budget = ProcessingConfig.MULTIRES_CPU_BUDGET
+        self.outputs = [SpectrumOutput(self, *spec) for spec in ProcessingConfig.EXTRA_OUTPUTS]
+
+        # Checkpoint integracji (zapis z wątku przetwarzania, poza blokadą)
+        self.checkpoint = IntegrationCheckpoint() if DataConfig.CHECKPOINT_ENABLED else None
+
+        # Zrzuty sub-integracji (None = wyłączone)
+        self.dumper = None
+        self._sk_first_sample = None
+
+    # =========================================================================
+    # START / STOP
+    # =========================================================================
+
+    def start(self, from_start=False):
+        """
+        Uruchom wątek przetwarzania (źródło musi już streamować)
+
+        Args:
+            from_start: True = przetwórz też dane już zebrane w buforze
+        """
+        if self._running:
+            return
+
+        self.center_freq_mhz = self.backend.center_freq_mhz or self.center_freq_mhz
+        self.sample_rate_mhz = self.backend.sample_rate_mhz or self.sample_rate_mhz
+
+        self._raw_reader = self.backend.create_reader(from_start=from_start)
+        self.reader = self._raw_reader
+        self.ddc = None
+
+        # DDC: plan widma dla strumienia po konwersji (środek i próbkowanie)
+        if self.ddc_enabled:
+            self.ddc = DigitalDownConverter(self.sample_rate_mhz, self.center_freq_mhz)
+            self.reader = DecimatingReader(self._raw_reader, self.ddc)
+            self.center_freq_mhz = self.ddc.center_freq_mhz
+            self.sample_rate_mhz = self.ddc.output_rate_mhz
+            print(f"🔎 {self.ddc.describe()}")
+
+        # Wygaszanie impulsów (skala i metryka dla strumienia po DDC)
+        self.blanker = ImpulseBlanker(self.sample_rate_mhz) if self.blanker_enabled else None
+
+        self.invalidate_plan()
+        for output in self.outputs:
+            output.reset()
+        self._carry = 0
+        self.frames_processed = 0
+        self._start_time = time.perf_counter()
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="SpectrumEngine", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Zatrzymaj wątek przetwarzania i odłącz czytelnika (trwająca integracja -> checkpoint)"""
+
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+        if self.reader is not None:
+            self.reader.detach()
+
+        if self.integrator.active:
+            self.save_checkpoint()
+
+        self.stop_dumps()
+
+    @property
+    def is_running(self):
+        """Czy wątek przetwarzania działa"""
+        return self._running
+
+    def _run(self):
+        """Pętla wątku - przetwarzaj wsady, a gdy ich brak, poczekaj ~ćwierć wsadu"""
+
+        plan = self.plan
+        idle_sleep = self.batch_frames * plan.hop / (self.sample_rate_mhz * 1e6) / 4
+
+        while self._running:
+            try:
+                processed = self.process_available()
+            except Exception as e:
+                print(f"✗ Błąd przetwarzania widma: {e}")
+                processed = 0
+
+            if self.checkpoint is not None and self.integrator.active and self.checkpoint.due():
+                self.save_checkpoint()
+
+            if processed == 0:
+                time.sleep(idle_sleep)
+
+    def process_available(self):
+        """
+        Przetwórz wszystkie pełne wsady czekające w buforze
+
+        Returns:
+            Liczba przetworzonych ramek FFT
+        """
+        count = 0
+        while self._running:
+            frames = self._process_next_batch()
+            if frames == 0:
+                break
+            count += frames
+
+        return count
+
+    # =========================================================================
+    # PRZETWARZANIE
+    # =========================================================================
+
+    def _process_next_batch(self):
+        """Wczytaj próbki na jeden wsad (pełny) i przetwórz go. Zwraca liczbę ramek"""
+
+        plan = self.plan
+        frame_len, hop = plan.frame_len, plan.hop
+
+        # Ile ramek w tym wsadzie - przy integracji nie więcej niż brakuje do celu
+        max_frames = self.batch_frames
+        if self.integrator.active:
+            pending = self.sk.frames if self.sk is not None else 0
+            max_frames = max(1, min(max_frames, self.integrator.remaining - pending))
+
+        stage_len = self.batch_frames * hop + frame_len - hop
+        if self._stage is None or len(self._stage) != stage_len:
+            self._stage = np.empty(stage_len, dtype=np.complex64)
+            self._carry = 0
+
+        carry = self._carry
+        n_new = (max_frames - 1) * hop + frame_len - carry
+        if self.reader.lag() < n_new:
+            return 0
+
+        block = self.reader.read_block(n_new, out=self._stage[carry:carry + n_new])
+        if block is None:
+            return 0
+
+        # Wygaś impulsy w nowych próbkach (reszta poprzedniego wsadu już wygaszona)
+        if self.blanker is not None:
+            self.blanker.process(block.samples)
+
+        total = carry + n_new
+        if block.skipped or carry == 0:
+            # Nieciągłość (utrata lub przepełnienie) - reszta poprzedniego wsadu nie pasuje
+            start = carry
+            self._stage_first = block.first_sample - carry
+        else:
+            start = 0
+
+        n_frames = (total - start - frame_len) // hop + 1 if total - start >= frame_len else 0
+
+        if n_frames > 0:
+            # Ramki jako widok (n_frames, frame_len) z krokiem hop - bez kopiowania
+            t0 = time.perf_counter()
+            frames = sliding_window_view(self._stage[start:total], frame_len)[::hop][:n_frames]
+            self.process_frames(frames, self._stage_first + start)
+
+            # Dodatkowe wyjścia z tych samych próbek - w czasie, który zostaje z budżetu wsadu
+            if self.outputs:
+                budget = self.cpu_budget * n_new / (self.sample_rate_mhz * 1e6)
+                budget -= time.perf_counter() - t0
+                for output in self.outputs:
+                    budget -= output.process(self._stage[start:total], self._stage_first + start, budget)
+
+        # Przenieś niewykorzystany koniec na początek bufora
+        consumed = start + n_frames * hop
+        self._carry = total - consumed
+        self._stage[:self._carry] = self._stage[consumed:total]
+        self._stage_first += consumed
+
+        return n_frames
+
+    def process_frames(self, frames, first_sample=None):
+        """Widmo wsadu ramek -> integracja -> publikacja jako latest"""
+
+        frames = np.atleast_2d(frames)
+        plan = self.plan
+        frame_power = self._frame_power(frames)
+        power = self._finish_power(np.mean(frame_power, axis=0))
+
+        end_sample = None
+        if first_sample is not None:
+            end_sample = first_sample + (len(frames) - 1) * plan.hop + plan.frame_len
+
+        if self.sk is not None:
+            self._accumulate_sk(frame_power, first_sample, end_sample)
+        elif self.integrator.active or self.dumper is not None:
+            m2 = self._finish_m2(self._frame_m2(frame_power))
+            if self.integrator.active:
+                self.integrate_spectrum(power, plan.doppler, len(frames), m2=m2)
+            self._dump(power, len(frames), None, m2, first_sample, end_sample)
+
+        self.latest = SpectrumFrame(power, plan.doppler, plan.freqs_mhz, plan.freqs_mhz_raw,
+                                    first_sample, len(frames), time.time(), self.rfi_mask)
+        self.frames_processed += len(frames)
+
+    def _accumulate_sk(self, frame_power, first_sample=None, end_sample=None):
+        """Dodaj ramki do grupy SK; po pełnej grupie (lub przy końcu integracji) zintegruj z maską"""
+
+        if self._sk_restart:
+            self.sk.reset()
+            self._sk_restart = False
+
+        if self.sk.frames == 0:
+            self._sk_first_sample = first_sample
+        self.sk.add(frame_power)
+
+        active = self.integrator.active
+        if not (self.sk.complete or (active and self.sk.frames >= self.integrator.remaining)):
+            return
+
+        mean_power, accepted, num_frames, m2 = self.sk.flush()
+        power = self._finish_power(mean_power.astype(np.float32))
+        accepted = np.fft.fftshift(accepted)
+
+        # Kanały notcha DC są interpolowane - ich flagi nie mają znaczenia
+        plan = self.plan
+        if plan.notch_slice is not None:
+            accepted[plan.notch_slice] = True
+
+        self.rfi_mask = ~accepted
+        m2 = self._finish_m2(m2)
+        if active:
+            self.integrate_spectrum(power, plan.doppler, num_frames, accepted, m2)
+        self._dump(power, num_frames, accepted, m2, self._sk_first_sample, end_sample)
+
+    def compute_spectrum(self, frames):
+        """
+        Oblicz średnie widmo wsadu ramek
+
+        Args:
+            frames: Tablica complex64 (ramki, frame_len) lub jedna ramka (frame_len,);
+                    frame_len = FFT_SIZE (fft) lub PFB_TAPS * FFT_SIZE (pfb)
+
+        Returns:
+            (power, freqs_mhz_raw, freqs_mhz, doppler_velocities) - power liniowa,
+            do dB dopiero przy wyświetlaniu / zapisie (power_to_db)
+        """
+        plan = self.plan
+        power = self._finish_power(np.mean(self._frame_power(frames), axis=0))
+        return power, plan.freqs_mhz_raw, plan.freqs_mhz, plan.doppler
+
+    def _frame_power(self, frames):
+        """|X|^2 każdej ramki (ramki, FFT_SIZE) float32 - przed fftshift i skalowaniem"""
+
+        # Okno lub filtr PFB (nowa tablica - FFT może ją nadpisać) i FFT całego
+        # stosu naraz; complex64 * float32 -> complex64, scipy.fft w pojedynczej precyzji
+        windowed = self.plan.weight(frames)
+        spectra = scipy.fft.fft(windowed, axis=-1, workers=self.fft_workers, overwrite_x=True)
+        return spectra.real ** 2 + spectra.imag ** 2
+
+    def _finish_power(self, power):
+        """Średnia moc -> fftshift, skala normalizacji i notch DC"""
+
+        plan = self.plan
+        power = np.fft.fftshift(power)
+        if plan.power_scale != 1:
+            power *= plan.power_scale
+
+        # Opcjonalny software notch filter na DC spike (tylko dla Zero IF)
+        plan.apply_notch(power)
+        return power
+
+    @staticmethod
+    def _frame_m2(frame_power):
+        """Suma kwadratów odchyleń mocy ramek od ich średniej per kanał (float64)"""
+        s1 = frame_power.sum(axis=0, dtype=np.float64)
+        s2 = np.einsum('ij,ij->j', frame_power, frame_power, dtype=np.float64)
+        return np.maximum(s2 - s1 * (s1 / len(frame_power)), 0.0)
+
+    def _finish_m2(self, m2):
+        """M2 wsadu w tych samych jednostkach i kolejności kanałów co _finish_power"""
+
+        plan = self.plan
+        m2 = np.fft.fftshift(m2)
+        if plan.power_scale != 1:
+            m2 *= plan.power_scale ** 2
+
+        # Kanały notcha - interpolacja jak dla mocy
+        plan.apply_notch(m2)
+        return m2
+
+    # =========================================================================
+    # PLAN WIDMA I KALIBRACJA
+    # =========================================================================
+
+    @property
+    def plan(self):
+        """Aktualny SpectralPlan (zbudowany przy pierwszym użyciu po invalidate_plan)"""
+
+        plan = self._plan
+        if plan is not None:
+            return plan
+
+        with self._lock:
+            if self._plan is None:
+                self._plan = SpectralPlan(
+                    self.fft_size, self.window_type, self.sample_rate_mhz, self.center_freq_mhz,
+                    self.calibration_enabled, self.freq_offset_ppm, self.freq_offset_khz,
+                    dc_notch_enabled=self._dc_notch_enabled(),
+                    overlap=self.overlap, mode=self.mode, pfb_taps=self.pfb_taps)
+                print(f"📐 Plan widma: {self._plan.describe()}")
+            return self._plan
+
+    def _dc_notch_enabled(self):
+        """Notch DC tylko gdy składowa stała odbiornika jest w środku widma (nie po przesunięciu DDC)"""
+        if self.ddc is not None and self.ddc.offset_hz != 0:
+            return False
+        return None
+
+    def invalidate_plan(self):
+        """Wymuś przebudowę planu (po zmianie rozmiaru FFT, okna, strumienia lub kalibracji)"""
+        with self._lock:
+            self._plan = None
+        for output in self.outputs:
+            output.invalidate_plan()
+
+    def configure(self, fft_size=None, window_type=None, overlap=None, mode=None, pfb_taps=None):
+        """Zmień rozmiar FFT, okno, nakładanie i/lub tryb (obowiązują od następnego wsadu)"""
+        if fft_size is not None:
+            self.fft_size = fft_size
+        if window_type is not None:
+            self.window_type = window_type
+        if overlap is not None:
+            self.overlap = overlap
+        if mode is not None:
+            self.mode = mode
+        if pfb_taps is not None:
+            self.pfb_taps = pfb_taps
+        self.invalidate_plan()
+
+    def set_calibration(self, enabled, ppm=None, khz=None):
+        """Ustaw parametry kalibracji (obowiązują od następnego bloku)"""
+        self.calibration_enabled = enabled
+        if ppm is not None:
+            self.freq_offset_ppm = ppm
+        if khz is not None:
+            self.freq_offset_khz = khz
+        self.invalidate_plan()
+
+    # =========================================================================
+    # INTEGRACJA WIDM
+    # =========================================================================
+
+    def start_integration(self, target=None, stop_mode=None):
+        """
+        Rozpocznij integrację
+
+        Args:
+            target: Liczba ramek FFT - cel lub limit przy wcześniejszym zakończeniu (None = z config)
+            stop_mode: "count", "sigma" lub "allan" (None = z config)
+        """
+        monitor = StabilityMonitor(self.plan, stop_mode)
+
+        with self._lock:
+            self.integrator.reset(target, monitor)
+            self.integrator.start()
+            self._integration_completed = False
+            self._sk_restart = True
+
+            # Wyjścia dodatkowe integrują równolegle, do końca głównej integracji
+            for output in self.outputs:
+                output.integrator.reset(float('inf'))
+                output.integrator.start()
+
+        if self.checkpoint is not None:
+            self.checkpoint.remove()
+
+    def stop_integration(self):
+        """Zatrzymaj integrację (zebrane widma zostają, checkpoint jest usuwany)"""
+        with self._lock:
+            self.integrator.stop()
+            for output in self.outputs:
+                output.integrator.stop()
+
+        if self.checkpoint is not None:
+            self.checkpoint.remove()
+
+    def integrate_spectrum(self, power, doppler_velocities, num_frames=1, accepted=None, m2=None):
+        """
+        Dodaj widmo mocy liniowej do integracji (wątek przetwarzania)
+
+        Args:
+            power: |X|^2 (średnia z num_frames ramek)
+            doppler_velocities: Oś prędkości
+            num_frames: Liczba ramek uśrednionych w power (waga)
+            accepted: Maska kanałów przyjętych przez SK (None = wszystkie)
+            m2: Suma kwadratów odchyleń ramek od power per kanał (None = brak)
+        """
+        with self._lock:
+            completed = self.integrator.add(power, doppler_velocities, num_frames, accepted, m2)
+            if completed:
+                self._integration_completed = True
+                for output in self.outputs:
+                    output.integrator.stop()
+
+        if completed and self.checkpoint is not None:
+            self.checkpoint.remove()
+
+    # =========================================================================
+    # CHECKPOINT
+    # =========================================================================
+
+    def _checkpoint_signature(self):
+        """Podpis planu i przetwarzania, od których zależy suma integracji"""
+        return plan_signature(self.plan, sk_enabled=self.sk is not None,
+                              blanker_enabled=self.blanker_enabled, ddc_enabled=self.ddc_enabled)
+
+    def save_checkpoint(self):
+        """
+        Zapisz stan trwającej integracji (kopia pod blokadą, zapis pliku poza nią)
+
+        Returns:
+            True gdy zapisano
+        """
+        if self.checkpoint is None:
+            return False
+
+        with self._lock:
+            state = self.integrator.get_state()
+            monitor = self.integrator.monitor
+        if state is None:
+            return False
+
+        metadata = {
+            'signature': self._checkpoint_signature(),
+            'stop_mode': monitor.stop_mode if monitor is not None else None,
+            'target_sigma': monitor.target_sigma if monitor is not None else None,
+            'center_freq_mhz': self.center_freq_mhz,
+            'fft_size': self.fft_size,
+            'count': int(state['count']),
+            'target': int(state['target']),
+        }
+        try:
+            self.checkpoint.save(state, metadata)
+        except OSError as e:
+            print(f"⚠️  Nie udało się zapisać checkpointu: {e}")
+            return False
+        return True
+
+    def find_checkpoint(self):
+        """
+        Checkpoint, który można wznowić w bieżącej konfiguracji
+
+        Returns:
+            dict metadanych lub None
+        """
+        if self.checkpoint is None:
+            return None
+
+        metadata = self.checkpoint.read_metadata()
+        if metadata is None:
+            return None
+        if metadata.get('signature') != self._checkpoint_signature():
+            print(f"⚠️  Checkpoint {self.checkpoint.path.name} z inną konfiguracją widma - pomijam")
+            return None
+        return metadata
+
+    def resume_integration(self):
+        """
+        Wznów przerwaną integrację z checkpointu (ten sam plan widma)
+
+        Wyjścia dodatkowe zaczynają integrację od zera - checkpoint obejmuje
+        tylko integrację główną.
+
+        Returns:
+            True gdy wznowiono
+        """
+        if self.find_checkpoint() is None:
+            return False
+        loaded = self.checkpoint.load()
+        if loaded is None:
+            return False
+        state, metadata = loaded
+
+        stop_mode = metadata.get('stop_mode')
+        monitor = StabilityMonitor(self.plan, stop_mode, metadata.get('target_sigma')) if stop_mode else None
+
+        with self._lock:
+            self.integrator.reset(int(state['target']), monitor)
+            try:
+                self.integrator.set_state(state)
+            except (KeyError, ValueError) as e:
+                self.integrator.reset(None, None)
+                print(f"⚠️  Uszkodzony checkpoint: {e}")
+                return False
+            self._integration_completed = False
+            self._sk_restart = True
+
+            for output in self.outputs:
+                output.integrator.reset(float('inf'))
+                output.integrator.start()
+
+        print(f"↻ Wznowiono integrację: {self.integrator.count} / {self.integrator.target} ramek "
+              f"(checkpoint z {metadata.get('saved_at', '?')})")
+        return True
+
+    # =========================================================================
+    # ZRZUTY SUB-INTEGRACJI
+    # =========================================================================
+
+    def start_dumps(self, path=None, every_frames=None, every_sec=None):
+        """
+        Zacznij zrzucać sub-integracje do zbioru na dysku
+
+        Format wg DataConfig.DEFAULT_FORMAT lub rozszerzenia path: "hdf5"
+        (.h5) gdy h5py jest dostępne, "fits" (SDFITS, .fits), w pozostałych
+        przypadkach katalog .subint
+
+        Args:
+            path: Plik / katalog zbioru (None = DATA_DIR/subint_<czas>.<format>)
+            every_frames: Ramek FFT na rekord (None = z config)
+            every_sec: Sekund strumienia na rekord (None = z config)
+
+        Returns:
+            Ścieżka zbioru
+        """
+        with self._lock:
+            if self.dumper is None:
+                store = self._subint_store(path)
+                self.dumper = SubintegrationDumper(store, every_frames, every_sec,
+                                                   describe=self.describe_plan)
+                print(f"📼 Zrzuty sub-integracji: {store.base_path} "
+                      f"(co {self.dumper.every_frames or '-'} ramek / {self.dumper.every_sec or '-'} s)")
+            return self.dumper.sink.base_path
+
+    def stop_dumps(self):
+        """
+        Zakończ zrzuty (ostatni niepełny rekord jest zapisywany)
+
+        Returns:
+            Statystyki zrzutów lub None jeśli nie były włączone
+        """
+        with self._lock:
+            dumper = self.dumper
+            self.dumper = None
+        if dumper is None:
+            return None
+
+        dumper.close()
+        stats = dumper.get_stats()
+        print(f"⏹  Zrzuty sub-integracji zakończone: {stats['records_queued']} rekordów, "
+              f"odrzucone: {stats['records_dropped']}")
+        return stats
+
+    @staticmethod
+    def _subint_store(path=None):
+        """Ujście zrzutów wg formatu (rozszerzenie path lub DEFAULT_FORMAT)"""
+        if path is not None:
+            suffix = Path(path).suffix.lower()
+            use_hdf5 = suffix in (".h5", ".hdf5")
+            use_fits = suffix in (".fits", ".sdfits")
+        else:
+            use_hdf5 = DataConfig.DEFAULT_FORMAT == "hdf5"
+            use_fits = DataConfig.DEFAULT_FORMAT == "fits"
+
+        if use_fits:
+            return SDFITSWriter(path)
+        if use_hdf5 and hdf5_available():
+            return HDF5SubintStore(path)
+        if use_hdf5:
+            print("⚠️  Brak h5py - zrzuty w formacie .subint")
+            path = Path(path).with_suffix(".subint") if path is not None else None
+        return SubintegrationStore(path)
+
+    def _dump(self, power, num_frames, accepted, m2, first_sample, end_sample):
+        """Dodaj widmo do bieżącej sub-integracji (wątek przetwarzania)"""
+        with self._lock:
+            dumper = self.dumper
+        # Poza blokadą silnika - otwarcie nowej części czeka na kolejkę zapisu,
+        # a gettery GUI nie mogą czekać na dysk (plan sam bierze blokadę przy przebudowie)
+        if dumper is not None:
+            dumper.add(self.plan, power, num_frames, accepted, m2, first_sample, end_sample)
+
+    def describe_plan(self, plan):
+        """Metadane produktu (źródło, odbiornik, plan widma) - dla zapisów na dysk"""
+        backend = self.backend
+        return {
+            'source': getattr(backend, 'name', None),
+            'center_freq_mhz': plan.center_freq_mhz,
+            'sample_rate_mhz': plan.sample_rate_mhz,
+            'gain_reduction_db': ReceiverConfig.GAIN_REDUCTION_DB,
+            'lna_state': ReceiverConfig.LNA_STATE,
+            'if_mode': ReceiverConfig.IF_MODE,
+            'fft_size': plan.fft_size,
+            'window_type': plan.window_type,
+            'overlap': plan.overlap,
+            'spectrometer_mode': plan.mode,
+            'pfb_taps': plan.pfb_taps,
+            'hop': plan.hop,
+            'enbw_hz': plan.enbw_hz,
+            'frame_len': plan.frame_len,
+            'normalization': plan.normalization,
+            'calibration_enabled': plan.calibration_enabled,
+            'freq_offset_ppm': plan.freq_offset_ppm,
+            'freq_offset_khz': plan.freq_offset_khz,
+            'sk_enabled': self.sk is not None,
+            'blanker_enabled': self.blanker_enabled,
+            'ddc_enabled': self.ddc_enabled,
+        }
+
+    @property
+    def integration_active(self):
+        """Czy integracja przyjmuje widma"""
+        return self.integrator.active
+
+    @property
+    def integration_count(self):
+        """Liczba zintegrowanych ramek"""
+        return self.integrator.count
+
+    @property
+    def integration_target(self):
+        """Docelowa liczba ramek"""
+        return self.integrator.target
+
+    def pop_integration_completed(self):
+        """Zwróć True raz po zakończeniu integracji (dla GUI / pętli bezobsługowej)"""
+        with self._lock:
+            completed = self._integration_completed
+            self._integration_completed = False
+            return completed
+
+    def get_integrated_spectrum(self):
+        """
+        Uśrednione zintegrowane widmo w dB (konwersja tylko gdy suma się zmieniła)
+
+        Returns:
+            (doppler_velocities, averaged_db, count) lub None gdy brak danych
+        """
+        with self._lock:
+            averaged_db = self.integrator.mean_db()
+            if averaged_db is None:
+                return None
+            return self.integrator.axis, averaged_db, self.integrator.count
+
+    def get_integrated_power(self):
+        """
+        Uśrednione zintegrowane widmo mocy liniowej
+
+        Returns:
+            (doppler_velocities, averaged_power, count) lub None gdy brak danych
+        """
+        with self._lock:
+            averaged = self.integrator.mean_power()
+            if averaged is None:
+                return None
+            return self.integrator.axis, averaged, self.integrator.count
+
+    def get_integrated_errors(self):
+        """
+        Rozrzut zintegrowanego widma w mocy liniowej
+
+        Returns:
+            (doppler_velocities, sigma, sigma / sqrt(N), count) lub None gdy brak danych
+        """
+        with self._lock:
+            variance = self.integrator.variance()
+            if variance is None:
+                return None
+            return (self.integrator.axis, np.sqrt(variance), self.integrator.stderr(),
+                    self.integrator.count)
+
+    def get_stability(self):
+        """
+        Odchylenie Allana (pasmo, kanały poza linią) i przewidywanie z równania radiometru
+
+        Returns:
+            dict StabilityMonitor.curves() z 'stop_reason' lub None gdy brak monitora
+        """
+        with self._lock:
+            monitor = self.integrator.monitor
+            if monitor is None:
+                return None
+            curves = monitor.curves(self.integrator.mean_power())
+            curves['stop_reason'] = monitor.stop_reason
+            return curves
+
+    def get_integrated_record(self):
+        """
+        Cała integracja jako jeden rekord sub-integracji (eksport SDFITS)
+
+        Returns:
+            Tablica record_dtype (1 rekord) lub None gdy brak danych
+        """
+        with self._lock:
+            if self.integrator.power_mean is None:
+                return None
+            return make_record(self.integrator)
+
+    def snapshot_integration(self):
+        """
+        Spójna kopia integracji do zapisu w tle - jedna kopia tablic pod blokadą,
+        formatowanie i I/O poza wątkiem silnika i GUI
+
+        Returns:
+            (SpectrumIntegrator - kopia, SpectralPlan) lub None gdy brak danych
+        """
+        plan = self.plan
+        with self._lock:
+            if self.integrator.power_mean is None or self.integrator.count == 0:
+                return None
+            return self.integrator.copy(), plan
+
+    def get_accepted_fraction(self):
+        """
+        Udział ramek przyjętych przez SK w każdym kanale zintegrowanego widma
+
+        Returns:
+            (doppler_velocities, fraction) lub None gdy brak danych
+        """
+        with self._lock:
+            fraction = self.integrator.accepted_fraction()
+            if fraction is None:
+                return None
+            return self.integrator.axis, fraction
+
+    def get_output(self, name):
+        """Wyjście dodatkowe o podanej nazwie (None gdy brak)"""
+        for output in self.outputs:
+            if output.name == name:
+                return output
+        return None
+
+    def get_output_integrated_power(self, name):
+        """
+        Uśrednione widmo wyjścia dodatkowego (moc liniowa)
+
+        Returns:
+            (doppler_velocities, averaged_power, count) lub None gdy brak danych
+        """
+        output = self.get_output(name)
+        if output is None:
+            return None
+        with self._lock:
+            averaged = output.integrator.mean_power()
+            if averaged is None:
+                return None
+            return output.integrator.axis, averaged, output.integrator.count
+
+    def integration_elapsed(self):
+        """Czas trwania integracji [s]"""
+        return self.integrator.elapsed()
+
+    # =========================================================================
+    # STATYSTYKI
+    # =========================================================================
+
+    def get_stats(self):
+        """Zwróć statystyki przetwarzania"""
+
+        elapsed = time.perf_counter() - self._start_time if self._start_time else 0.0
+        reader = self._raw_reader
+
+        return {
+            'is_running': self._running,
+            'frames_processed': self.frames_processed,
+            'frames_per_sec': self.frames_processed / elapsed if elapsed > 0 else 0.0,
+            'backlog_samples': reader.lag() if reader is not None else 0,
+            'skipped_samples': reader.samples_skipped if reader is not None else 0,
+            'rfi_flagged_fraction': float(self.rfi_mask.mean()) if self.rfi_mask is not None else 0.0,
+            'sk_groups_rejected': self.sk.groups_rejected if self.sk is not None else 0,
+            'blanked_fraction': self.blanker.blanked_fraction if self.blanker is not None else 0.0,
+            'outputs': [output.get_stats() for output in self.outputs],
+            'subint': self.dumper.get_stats() if self.dumper is not None else None,
+        }
+
+
+# =============================================================================
+# PRACA BEZ GUI
+# =============================================================================
+
+def run_headless(backend, integration_count=None, timeout_sec=None, resume=False):
+    """
+    Obserwacja bez okna: uruchom źródło i silnik, zintegruj widma
+
+    Args:
+        backend: Źródło próbek (AcquisitionBackend)
+        integration_count: Liczba widm do zintegrowania (None = z config)
+        timeout_sec: Maksymalny czas [s] (None = bez limitu)
+        resume: Wznów integrację z checkpointu, jeśli pasuje do konfiguracji
+
+    Returns:
+        (doppler_velocities, averaged_db, count) lub None
+    """
+    if not backend.initialize() or not backend.configure_and_start():
+        print("✗ Nie udało się uruchomić źródła")
+        return None
+
+    engine = SpectrumEngine(backend)
+    engine.start()
+    if not (resume and engine.resume_integration()):
+        engine.start_integration(integration_count)
+
+    t0 = time.time()
+    try:
+        while not engine.pop_integration_completed():
+            if timeout_sec is not None and time.time() - t0 > timeout_sec:
+                print("⏱  Przekroczono limit czasu")
+                break
+            time.sleep(0.5)
+
+            stats = engine.get_stats()
+            print(f"   {engine.integration_count} / {engine.integration_target} widm | "
+                  f"{stats['frames_per_sec']:.1f} FFT/s | pominięte: {stats['skipped_samples']:,}")
+    finally:
+        engine.stop()
+        backend.close()
+
+    return engine.get_integrated_spectrum()
+
+
+if __name__ == "__main__":
+    from src.hardware.backend import create_backend
+
+    result = run_headless(create_backend("simulator"), integration_count=200, timeout_sec=120)
+    if result is not None:
+        doppler, averaged_db, count = result
+        print(f"✓ Zintegrowano {count} widm, maks. {averaged_db.max():.1f} dB "
+              f"przy {doppler[np.argmax(averaged_db)]:+.1f} km/s")
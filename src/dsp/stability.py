@@ -0,0 +1,341 @@
+"""
+Stabilność integracji
+Wariancja Allana liczona przyrostowo (oktawy czasu uśredniania) i porównanie
+z równaniem radiometru; kryteria automatycznego zakończenia integracji
+"""
+
+import sys
+import numpy as np
+from pathlib import Path
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import ProcessingConfig
+
+
+STOP_MODES = ("count", "sigma", "allan")
+
+
+class AllanVariance:
+    """
+    Nienakładająca się wariancja Allana szeregu o stałym kroku, poziomy 2^k
+
+    - Poziom k: bloki 2^k kolejnych próbek; każdy nowy blok daje różnicę
+      z poprzednim blokiem tego poziomu (suma kwadratów i liczba różnic)
+    - Dwa kolejne bloki poziomu k składają się w blok poziomu k+1
+    - Stan: kilka liczb na poziom, poziomów log2(N) - O(log N) pamięci
+
+    AVAR(tau_k) = 1/2 * średnia (y_{i+1} - y_i)^2 po blokach poziomu k
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Wyzeruj szereg"""
+        self._last = []         # Ostatni pełny blok poziomu (różnica z następnym)
+        self._half = []         # Pierwszy blok pary czekający na drugi (składanie w wyższy poziom)
+        self._sum_sq = []       # Suma kwadratów różnic
+        self._diffs = []        # Liczba różnic
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        """Dodaj próbkę szeregu (średnia z jednego bloku bazowego)"""
+
+        self.count += 1
+        self.total += value
+
+        level = 0
+        while True:
+            if level == len(self._last):
+                self._last.append(None)
+                self._half.append(None)
+                self._sum_sq.append(0.0)
+                self._diffs.append(0)
+
+            if self._last[level] is not None:
+                diff = value - self._last[level]
+                self._sum_sq[level] += diff * diff
+                self._diffs[level] += 1
+            self._last[level] = value
+
+            # Para bloków -> blok następnego poziomu
+            if self._half[level] is None:
+                self._half[level] = value
+                return
+            value = 0.5 * (self._half[level] + value)
+            self._half[level] = None
+            level += 1
+
+    def get_state(self):
+        """Stan jako tablice float64 (checkpoint); brak bloku = NaN"""
+        def values(items):
+            return np.array([np.nan if v is None else v for v in items], dtype=np.float64)
+        return {
+            'last': values(self._last),
+            'half': values(self._half),
+            'sum_sq': np.array(self._sum_sq, dtype=np.float64),
+            'diffs': np.array(self._diffs, dtype=np.int64),
+            'count': np.int64(self.count),
+            'total': np.float64(self.total),
+        }
+
+    def set_state(self, state):
+        """Odtwórz stan z get_state()"""
+        def values(array):
+            return [None if np.isnan(v) else float(v) for v in array]
+        self._last = values(state['last'])
+        self._half = values(state['half'])
+        self._sum_sq = [float(v) for v in state['sum_sq']]
+        self._diffs = [int(v) for v in state['diffs']]
+        self.count = int(state['count'])
+        self.total = float(state['total'])
+
+    @property
+    def mean(self):
+        """Średnia szeregu"""
+        return self.total / self.count if self.count else 0.0
+
+    def deviation(self, relative=True):
+        """
+        Odchylenie Allana na wszystkich poziomach z co najmniej jedną różnicą
+
+        Args:
+            relative: Podziel przez średnią szeregu (odchylenie ułamkowe)
+
+        Returns:
+            (levels, adev, diffs) - indeksy poziomów, odchylenie, liczba różnic
+        """
+        levels = np.array([k for k, n in enumerate(self._diffs) if n > 0], dtype=int)
+        if len(levels) == 0:
+            return levels, np.empty(0), np.empty(0, dtype=int)
+
+        sum_sq = np.array([self._sum_sq[k] for k in levels])
+        diffs = np.array([self._diffs[k] for k in levels])
+        adev = np.sqrt(0.5 * sum_sq / diffs)
+        if relative and self.mean != 0:
+            adev /= abs(self.mean)
+        return levels, adev, diffs
+
+
+class StabilityMonitor:
+    """
+    Szum integracji zmierzony vs przewidywany (równanie radiometru)
+
+    Dwa szeregi (bloki bazowe po base_frames ramek):
+    - moc pasma - średnia wszystkich przyjętych kanałów; wrażliwa na dryf
+      wzmocnienia, przewidywanie 1/sqrt(B_eff * tau), B_eff z okna (lub
+      filtra PFB) i płaskości widma
+    - kanały poza linią HI - co channel_stride-ty kanał z |v| > offline_kms
+      (kanały niezależne mimo przecieku okna), przewidywanie
+      1/sqrt(K_eff * dnu * tau), dnu = odstęp kanałów
+
+    Dla szumu białego odchylenie Allana bloków tau = niepewność średniej
+    po czasie tau; gdy dominuje dryf, odchylenie przestaje maleć (minimum
+    krzywej Allana) - dalsza integracja nie poprawia widma.
+
+    Kryteria zakończenia (stop_mode):
+    - count: tylko liczba ramek (cel integratora)
+    - sigma: mediana sigma/sqrt(N) / moc w kanałach poza linią <= target_sigma
+    - allan: odchylenie Allana kanałów poza linią na najdłuższym ocenianym
+      poziomie (>= min_pairs różnic) sięga DRIFT_RATIO razy ekstrapolacji
+      szumu białego z poziomu bazowego (adev_0 / sqrt(tau / tau_0)). Dla
+      szumu białego + dryfu typu błądzenia losowego AVAR = a/tau + b*tau,
+      w minimum oba składniki są równe - odchylenie jest wtedy dokładnie
+      sqrt(2) razy większe od samego szumu białego. Samo porównanie
+      sąsiednich poziomów przy kilkudziesięciu różnicach daje fałszywe
+      minima na czystym szumie
+
+    Nakładanie ramek (FFT_OVERLAP) koreluje kolejne ramki - przewidywanie
+    zakłada ramki niezależne i jest wtedy nieco optymistyczne.
+    """
+
+    # Odchylenie / ekstrapolacja szumu białego w minimum krzywej Allana
+    DRIFT_RATIO = np.sqrt(2)
+
+    def __init__(self, plan, stop_mode=None, target_sigma=None, base_frames=None,
+                 min_pairs=None, offline_kms=None, channel_stride=None):
+        """
+        Args:
+            plan: SpectralPlan integrowanego widma
+            stop_mode: "count", "sigma" lub "allan" (None = z config)
+            target_sigma: Cel niepewności względnej (None = z config)
+            base_frames: Ramek na blok bazowy (None = z config)
+            min_pairs: Różnic wymaganych do oceny poziomu (None = z config)
+            offline_kms: Kanały poza linią: |v| powyżej [km/s] (None = z config)
+            channel_stride: Co który kanał poza linią (None = z config)
+        """
+        self.stop_mode = (stop_mode or ProcessingConfig.INTEGRATION_STOP_MODE).lower()
+        if self.stop_mode not in STOP_MODES:
+            raise ValueError(f"Nieznany tryb zakończenia: {self.stop_mode} (dostępne: {', '.join(STOP_MODES)})")
+        self.target_sigma = target_sigma or ProcessingConfig.INTEGRATION_TARGET_SIGMA
+        self.base_frames = base_frames or ProcessingConfig.ALLAN_BASE_FRAMES
+        self.min_pairs = min_pairs or ProcessingConfig.ALLAN_MIN_PAIRS
+        offline_kms = ProcessingConfig.ALLAN_OFFLINE_MIN_KMS if offline_kms is None else offline_kms
+        stride = channel_stride or ProcessingConfig.ALLAN_CHANNEL_STRIDE
+
+        # Czas bloku bazowego i szerokości pasm do równania radiometru
+        sr_hz = plan.sample_rate_mhz * 1e6
+        self.base_tau_sec = self.base_frames * plan.hop / sr_hz
+        self.channel_hz = plan.bin_width_hz
+
+        if plan.mode == "pfb":
+            sample_weight = np.sum(plan.pfb_coeffs.astype(np.float64) ** 2, axis=0)
+        else:
+            sample_weight = plan.window.astype(np.float64) ** 2
+        n_eff = np.sum(sample_weight) ** 2 / np.sum(sample_weight ** 2)
+        self.band_window_hz = sr_hz * n_eff / plan.fft_size
+
+        # Kanały poza linią (gdy pasmo jest węższe - zewnętrzne ćwiartki),
+        # bez notcha DC, co stride-ty kanał
+        F = plan.fft_size
+        offline = np.abs(plan.doppler) > offline_kms
+        if offline.sum() < 16 * stride:
+            offset = np.abs(np.arange(F) - F // 2)
+            offline = offset > F // 4
+        if plan.notch_slice is not None:
+            offline[plan.notch_slice] = False
+        self.offline_channels = np.flatnonzero(offline)[::stride]
+
+        self.band = AllanVariance()
+        self.offline = AllanVariance()
+        self._offline_sum = np.zeros(len(self.offline_channels), dtype=np.float64)
+
+        # Blok bazowy w budowie (ważony liczbą ramek)
+        self._block_frames = 0
+        self._band_acc = 0.0
+        self._offline_acc = 0.0
+        self.stop_reason = None
+
+    def add(self, power, num_frames, accepted=None):
+        """
+        Dodaj widmo integracji
+
+        Returns:
+            True gdy domknięto blok bazowy (moment na sprawdzenie kryteriów)
+        """
+        channels_power = power[self.offline_channels]
+        if accepted is None:
+            band = power.mean(dtype=np.float64)
+            offline = channels_power
+            self._offline_sum += num_frames * channels_power
+        else:
+            if not accepted.any():
+                return False
+            band = power[accepted].mean(dtype=np.float64)
+            offline_accepted = accepted[self.offline_channels]
+            offline = channels_power[offline_accepted]
+            if len(offline) == 0:
+                return False
+            self._offline_sum[offline_accepted] += num_frames * offline
+
+        self._band_acc += num_frames * band
+        self._offline_acc += num_frames * offline.mean(dtype=np.float64)
+        self._block_frames += num_frames
+
+        if self._block_frames < self.base_frames:
+            return False
+
+        self.band.add(self._band_acc / self._block_frames)
+        self.offline.add(self._offline_acc / self._block_frames)
+        self._block_frames = 0
+        self._band_acc = 0.0
+        self._offline_acc = 0.0
+        return True
+
+    def get_state(self):
+        """Stan monitora (checkpoint) - płaski słownik tablic"""
+        state = {
+            'offline_sum': self._offline_sum.copy(),
+            'block': np.array([self._block_frames, self._band_acc, self._offline_acc], dtype=np.float64),
+        }
+        for name, series in (('band', self.band), ('offline', self.offline)):
+            for key, value in series.get_state().items():
+                state[f'{name}_{key}'] = value
+        return state
+
+    def set_state(self, state):
+        """Odtwórz stan z get_state() (monitor zbudowany dla tego samego planu)"""
+        if len(state['offline_sum']) != len(self._offline_sum):
+            raise ValueError("Stan monitora nie pasuje do planu widma")
+        self._offline_sum[:] = state['offline_sum']
+        block_frames, self._band_acc, self._offline_acc = (float(v) for v in state['block'])
+        self._block_frames = int(block_frames)
+        for name, series in (('band', self.band), ('offline', self.offline)):
+            prefix = f'{name}_'
+            series.set_state({key[len(prefix):]: value for key, value in state.items()
+                              if key.startswith(prefix)})
+
+    def should_stop(self, integrator):
+        """Sprawdź kryterium zakończenia (po domknięciu bloku bazowego)"""
+
+        if self.stop_mode == "sigma":
+            channels = self.offline_channels
+            counts = integrator.bin_counts[channels]
+            valid = counts > 1
+            if not valid.any():
+                return False
+            mean = integrator.power_mean[channels][valid]
+            stderr = np.sqrt(integrator.power_m2[channels][valid] / (counts[valid] - 1) / counts[valid])
+            if np.median(stderr / mean) <= self.target_sigma:
+                self.stop_reason = "sigma"
+                return True
+
+        elif self.stop_mode == "allan":
+            levels, adev, diffs = self.offline.deviation()
+            eligible = np.flatnonzero(diffs >= self.min_pairs)
+            if len(eligible) >= 2 and levels[0] == 0:
+                k = eligible[-1]
+                white = adev[0] / np.sqrt(2.0 ** levels[k])
+                if adev[k] >= self.DRIFT_RATIO * white:
+                    self.stop_reason = "allan"
+                    return True
+
+        return False
+
+    def curves(self, mean_power=None):
+        """
+        Zmierzone i przewidywane odchylenie względne w funkcji tau
+
+        Args:
+            mean_power: Średnie widmo integracji (płaskość pasma do B_eff)
+
+        Returns:
+            dict: tau_sec, band_adev, band_pred, offline_adev, offline_pred, min_tau_sec
+        """
+        band_levels, band_adev, _ = self.band.deviation()
+        offline_levels, offline_adev, offline_diffs = self.offline.deviation()
+
+        # B_eff pasma: okno * płaskość widma ((sum P)^2 / (N sum P^2))
+        band_hz = self.band_window_hz
+        if mean_power is not None:
+            finite = mean_power[np.isfinite(mean_power)]
+            if len(finite):
+                band_hz *= finite.sum() ** 2 / (len(finite) * np.sum(finite ** 2))
+
+        # K_eff kanałów poza linią (różne poziomy mocy kanałów)
+        if self._offline_sum.any():
+            k_eff = self._offline_sum.sum() ** 2 / np.sum(self._offline_sum ** 2)
+        else:
+            k_eff = len(self.offline_channels)
+
+        band_tau = self.base_tau_sec * 2.0 ** band_levels
+        offline_tau = self.base_tau_sec * 2.0 ** offline_levels
+
+        # Minimum krzywej Allana (tylko poziomy z min_pairs różnic)
+        eligible = np.flatnonzero(offline_diffs >= self.min_pairs)
+        min_tau = offline_tau[eligible[np.argmin(offline_adev[eligible])]] if len(eligible) else None
+
+        return {
+            'band_tau_sec': band_tau,
+            'band_adev': band_adev,
+            'band_pred': 1.0 / np.sqrt(band_hz * band_tau),
+            'offline_tau_sec': offline_tau,
+            'offline_adev': offline_adev,
+            'offline_pred': 1.0 / np.sqrt(k_eff * self.channel_hz * offline_tau),
+            'min_tau_sec': min_tau,
+        }
@@ -8,7 +8,6 @@ import sys
 import numpy as np
 from pathlib import Path
 from datetime import datetime
-import time
 
 # Dodaj root projektu do Python path
 project_root = Path(__file__).parent.parent.parent
@@ -18,12 +17,17 @@ if str(project_root) not in sys.path:
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QPushButton, QLabel, QGroupBox, QMessageBox, 
                              QSplitter, QSpinBox, QProgressBar, QFileDialog,
-                             QDoubleSpinBox, QCheckBox)
+                             QDoubleSpinBox, QCheckBox, QComboBox)
 from PyQt5.QtCore import QTimer, Qt
 import pyqtgraph as pg
 
-from src.hardware.sdr_controller import SDRplayController
+from src.hardware.backend import create_backend
+from src.dsp.spectrum_engine import SpectrumEngine
+from src.dsp.spectral_plan import freq_to_doppler_velocity, doppler_to_freq, power_to_db
 from src.gui.waterfall_widget import WaterfallWidget
+from src.storage.hdf5_writer import hdf5_available
+from src.storage.save_service import SaveService, write_integrated_spectrum
+from src.storage.catalog import ObservationCatalog
 from config.settings import ReceiverConfig, GUIConfig, ProcessingConfig, DataConfig
 
 
@@ -39,28 +43,45 @@ class RadioTelescopeWindow(QMainWindow):
     - Pasek statusu
     """
 
-    def __init__(self):
+    def __init__(self, backend=None):
+        """
+        Args:
+            backend: Źródło próbek (AcquisitionBackend), None = wg AcquisitionConfig.BACKEND
+        """
         super().__init__()
 
-        # Kontroler SDR
-        self.sdr = SDRplayController()
+        # Źródło próbek I/Q (SDRplay lub symulator)
+        self.sdr = backend if backend is not None else create_backend()
+
+        # Przetwarzanie widma (własny wątek) - GUI tylko wyświetla najnowszy wynik
+        self.engine = SpectrumEngine(self.sdr)
+        self._last_frame = None
 
         # Timer do odświeżania wykresu
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_spectrum)
 
+        # Zapis produktów w tle - postęp i wynik odczytywane osobnym timerem
+        # (działa także po zatrzymaniu obserwacji)
+        self.saver = SaveService()
+        self.save_timer = QTimer()
+        self.save_timer.timeout.connect(self.poll_saves)
+
+        # Katalog obserwacji - indeksowanie każdego zapisanego produktu
+        self.catalog = None
+        if DataConfig.CATALOG_ENABLED:
+            try:
+                self.catalog = ObservationCatalog()
+            except Exception as e:
+                print(f"⚠️  Katalog obserwacji niedostępny: {e}")
+
         # Parametry
         self.current_freq_mhz = ReceiverConfig.CENTER_FREQ_MHZ
         self.current_sr_mhz = ReceiverConfig.SAMPLE_RATE_MHZ
 
-        # Integracja widm
+        # Integracja widm (sumowanie w silniku, tu tylko stan UI)
         self.integration_active = False
-        self.integration_count = 0
         self.integration_target = ProcessingConfig.SPECTRUM_INTEGRATION_COUNT
-        self.integrated_spectrum = None
-        self.integration_freqs = None
-        self.integration_start_time = None  # Czas rozpoczęcia integracji
-        self.last_integration_update_time = None  # Ostatnia aktualizacja
 
         # Kalibracja częstotliwości
         self.freq_offset_ppm = ReceiverConfig.FREQ_OFFSET_PPM
@@ -78,7 +99,7 @@ class RadioTelescopeWindow(QMainWindow):
         """Stwórz interfejs użytkownika"""
 
         # Ustawienia okna
-        self.setWindowTitle(GUIConfig.WINDOW_TITLE)
+        self.setWindowTitle(f"{GUIConfig.WINDOW_TITLE} [{self.sdr.name}]")
         self.setGeometry(100, 100, GUIConfig.WINDOW_WIDTH, GUIConfig.WINDOW_HEIGHT)
 
         # Główny widget
@@ -118,6 +139,14 @@ class RadioTelescopeWindow(QMainWindow):
         else:
             self.waterfall = None
 
+        # Stabilność integracji (odchylenie Allana vs równanie radiometru)
+        if GUIConfig.ALLAN_PLOT_ENABLED:
+            self.create_stability_plot()
+            splitter.addWidget(self.stability_plot)
+            splitter.setStretchFactor(splitter.count() - 1, 1)
+        else:
+            self.stability_plot = None
+
         main_layout.addWidget(splitter)
 
         # Pasek statusu
@@ -213,6 +242,69 @@ class RadioTelescopeWindow(QMainWindow):
         self.stop_btn.clicked.connect(self.stop_observation)
         btn_layout.addWidget(self.stop_btn)
 
+        # Przycisk nagrywania surowych I/Q
+        self.record_btn = QPushButton("⏺  Nagrywaj I/Q")
+        self.record_btn.setMinimumHeight(60)
+        self.record_btn.setMinimumWidth(160)
+        self.record_btn.setCheckable(True)
+        self.record_btn.setEnabled(False)
+        self.record_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #6f42c1;
+                color: white;
+                font-size: 15px;
+                font-weight: bold;
+                border: none;
+                border-radius: 8px;
+                padding: 10px 20px;
+            }
+            QPushButton:hover {
+                background-color: #5a32a3;
+            }
+            QPushButton:checked {
+                background-color: #dc3545;
+            }
+            QPushButton:disabled {
+                background-color: #6c757d;
+                color: #adb5bd;
+            }
+        """)
+        self.record_btn.clicked.connect(self.toggle_recording)
+        btn_layout.addWidget(self.record_btn)
+
+        # Przycisk zrzutów sub-integracji (widmo co N ramek / T sekund na dysk)
+        self.subint_btn = QPushButton("📼  Sub-integracje")
+        self.subint_btn.setMinimumHeight(60)
+        self.subint_btn.setMinimumWidth(160)
+        self.subint_btn.setCheckable(True)
+        self.subint_btn.setEnabled(False)
+        self.subint_btn.setToolTip(
+            f"Zapisuj widmo co {DataConfig.SUBINT_SECONDS:g} s strumienia "
+            f"(lub {DataConfig.SUBINT_FRAMES} ramek) do zbioru .subint w {DataConfig.DATA_DIR}")
+        self.subint_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #17a2b8;
+                color: white;
+                font-size: 15px;
+                font-weight: bold;
+                border: none;
+                border-radius: 8px;
+                padding: 10px 20px;
+            }
+            QPushButton:hover {
+                background-color: #138496;
+            }
+            QPushButton:checked {
+                background-color: #dc3545;
+            }
+            QPushButton:disabled {
+                background-color: #6c757d;
+                color: #adb5bd;
+            }
+        """)
+        self.subint_btn.clicked.connect(self.toggle_subint_dumps)
+        btn_layout.addWidget(self.subint_btn)
+
         layout.addLayout(btn_layout)
 
         group.setLayout(layout)
@@ -376,6 +468,16 @@ class RadioTelescopeWindow(QMainWindow):
         """)
         settings_layout.addWidget(self.integration_spinbox)
 
+        # Kryterium zakończenia - liczba widm jest wtedy limitem
+        settings_layout.addWidget(QLabel("Zakończ:"))
+        self.stop_mode_combo = QComboBox()
+        self.stop_mode_combo.addItem("po liczbie widm", "count")
+        self.stop_mode_combo.addItem(f"przy σ/√N ≤ {ProcessingConfig.INTEGRATION_TARGET_SIGMA:g}", "sigma")
+        self.stop_mode_combo.addItem("w minimum Allana", "allan")
+        self.stop_mode_combo.setCurrentIndex(
+            max(0, self.stop_mode_combo.findData(ProcessingConfig.INTEGRATION_STOP_MODE)))
+        settings_layout.addWidget(self.stop_mode_combo)
+
         settings_layout.addStretch()
 
         # Przyciski kontroli integracji
@@ -526,11 +628,40 @@ class RadioTelescopeWindow(QMainWindow):
             )
         )
 
-        # Krzywa zintegrowanego widma (czerwona, grubsza)
+        # Krzywa zintegrowanego widma (czerwona, grubsza); kanały w całości
+        # odrzucone przez flagowanie RFI (NaN) są przerwami w krzywej
         self.integrated_curve = self.plot_widget.plot(
-            pen=pg.mkPen(color='r', width=3)
+            pen=pg.mkPen(color='r', width=3),
+            connect='finite'
+        )
+
+        # Pasmo ±1 sigma/sqrt(N) wokół zintegrowanego widma (niepewność średniej)
+        band_pen = pg.mkPen(color=(255, 80, 80, 120), width=1)
+        self.integrated_upper = self.plot_widget.plot(pen=band_pen, connect='finite')
+        self.integrated_lower = self.plot_widget.plot(pen=band_pen, connect='finite')
+        self.integrated_band = pg.FillBetweenItem(
+            self.integrated_lower, self.integrated_upper, brush=pg.mkBrush(255, 0, 0, 50))
+        self.plot_widget.addItem(self.integrated_band)
+
+        # Maska RFI (spectral kurtosis) - kanały oznaczone w ostatniej grupie
+        self.rfi_scatter = self.plot_widget.plot(
+            pen=None,
+            symbol='o',
+            symbolSize=4,
+            symbolPen=None,
+            symbolBrush=pg.mkBrush(255, 0, 255, 200),
+            name='RFI'
         )
 
+        # Dodatkowe rozdzielczości (EXTRA_OUTPUTS) - cienkie krzywe w osobnych kolorach
+        output_colors = ['c', 'g', 'm', 'w']
+        self.output_curves = {}
+        for i, output in enumerate(self.engine.outputs):
+            self.output_curves[output.name] = self.plot_widget.plot(
+                pen=pg.mkPen(color=output_colors[i % len(output_colors)], width=1),
+                name=output.name
+            )
+
         # Linia referencyjna dla linii wodoru (v=0 km/s)
         vline = pg.InfiniteLine(
             pos=0,  # v=0 km/s
@@ -551,49 +682,46 @@ class RadioTelescopeWindow(QMainWindow):
         # Zachowujemy referencje do konwersji Doppler <-> MHz
         self.freq_mhz_array = None
 
+    def create_stability_plot(self):
+        """Wykres odchylenia Allana (log-log) - zmierzone vs równanie radiometru"""
+
+        self.stability_plot = pg.PlotWidget()
+        self.stability_plot.setBackground(GUIConfig.PLOT_BG_COLOR)
+        self.stability_plot.setLogMode(x=True, y=True)
+        self.stability_plot.setLabel('left', 'Odchylenie Allana (względne)')
+        self.stability_plot.setLabel('bottom', 'Czas uśredniania τ [s]')
+        self.stability_plot.showGrid(x=True, y=True, alpha=GUIConfig.PLOT_GRID_ALPHA)
+        self.stability_plot.addLegend()
+
+        # Punkty - pomiar, linie przerywane - 1/sqrt(Δν·τ)
+        self.allan_band_curve = self.stability_plot.plot(
+            pen=pg.mkPen('y', width=2), symbol='o', symbolSize=5, symbolBrush='y', name='Moc pasma')
+        self.allan_band_pred = self.stability_plot.plot(
+            pen=pg.mkPen('y', width=1, style=Qt.DashLine), name='Radiometr (pasmo)')
+        self.allan_offline_curve = self.stability_plot.plot(
+            pen=pg.mkPen('c', width=2), symbol='o', symbolSize=5, symbolBrush='c', name='Kanały poza linią')
+        self.allan_offline_pred = self.stability_plot.plot(
+            pen=pg.mkPen('c', width=1, style=Qt.DashLine), name='Radiometr (kanały)')
+
+    def refresh_stability_plot(self):
+        """Odśwież wykres odchylenia Allana"""
+
+        if self.stability_plot is None:
+            return
+
+        stability = self.engine.get_stability()
+        if stability is None:
+            return
+
+        self.allan_band_curve.setData(stability['band_tau_sec'], stability['band_adev'])
+        self.allan_band_pred.setData(stability['band_tau_sec'], stability['band_pred'])
+        self.allan_offline_curve.setData(stability['offline_tau_sec'], stability['offline_adev'])
+        self.allan_offline_pred.setData(stability['offline_tau_sec'], stability['offline_pred'])
+
     # =========================================================================
-    # INTEGRACJA WIDM
+    # OŚ CZĘSTOTLIWOŚCI
     # =========================================================================
-    
-    def freq_to_doppler_velocity(self, freqs_mhz):
-        """
-        Konwertuj częstotliwości na prędkości Dopplera w km/s
-        
-        Wzór: v = c * (f0 - f) / f0
-        gdzie:
-        - v to prędkość radialna [km/s]
-        - c to prędkość światła [km/s]
-        - f0 to częstotliwość linii wodoru w spoczynku [MHz]
-        - f to obserwowana częstotliwość [MHz]
-        
-        Uwaga: dla wzrostu częstotliwości (f > f0) mamy ujemne prędkości (zbliżanie)
-               dla spadku częstotliwości (f < f0) mamy dodatnie prędkości (oddalanie)
-        """
-        c = 299792.458  # Prędkość światła w km/s
-        f0 = 1420.40575177  # Częstotliwość linii HI w MHz
-        
-        # v = c * (f0 - f) / f0
-        # Dla f > f0 (blue shift): v < 0 (zbliżanie się)
-        # Dla f < f0 (red shift): v > 0 (oddalanie się)
-        velocities_km_s = c * (f0 - freqs_mhz) / f0
-        
-        return velocities_km_s
-    
-    def doppler_to_freq(self, velocities_km_s):
-        """
-        Konwertuj prędkości Dopplera z powrotem na częstotliwości
-        
-        Odwrotność freq_to_doppler_velocity
-        """
-        c = 299792.458  # Prędkość światła w km/s
-        f0 = 1420.40575177  # Częstotliwość linii HI w MHz
-        
-        # Z wzoru: v = c * (f0 - f) / f0
-        # Wyznaczamy f: f = f0 * (1 - v/c)
-        freqs_mhz = f0 * (1 - velocities_km_s / c)
-        
-        return freqs_mhz
-    
+
     def update_top_axis_ticks(self, doppler_velocities):
         """
         Aktualizuj znaczniki na górnej osi MHz na podstawie zakresu prędkości Dopplera
@@ -606,8 +734,8 @@ class RadioTelescopeWindow(QMainWindow):
         v_max = np.max(doppler_velocities)
         
         # Konwertuj na częstotliwości
-        freq_at_vmin = self.doppler_to_freq(v_min)
-        freq_at_vmax = self.doppler_to_freq(v_max)
+        freq_at_vmin = doppler_to_freq(v_min)
+        freq_at_vmax = doppler_to_freq(v_max)
         
         # Utwórz znaczniki częstotliwości
         # Wybieramy ~8-10 znaczników
@@ -615,7 +743,7 @@ class RadioTelescopeWindow(QMainWindow):
         freq_ticks = np.linspace(freq_at_vmax, freq_at_vmin, num_ticks)
         
         # Konwertuj z powrotem na pozycje v (dla wyrównania z dolną osią)
-        v_positions = self.freq_to_doppler_velocity(freq_ticks)
+        v_positions = freq_to_doppler_velocity(freq_ticks)
         
         # Utwórz etykiety
         tick_labels = [(v_pos, f"{freq:.2f}") for v_pos, freq in zip(v_positions, freq_ticks)]
@@ -633,23 +761,15 @@ class RadioTelescopeWindow(QMainWindow):
         # Pobierz liczbę integracji z spinboxa
         self.integration_target = self.integration_spinbox.value()
 
-        # Resetuj liczniki
-        self.integration_count = 0
-        self.integrated_spectrum = None
-        self.integration_freqs = None
-        
-        # Zapisz czas rozpoczęcia
-        self.integration_start_time = time.time()
-        self.last_integration_update_time = time.time()
-        self.integration_freqs = None
-
-        # Ustaw status
+        # Silnik zeruje sumę i zaczyna integrować kolejne bloki
+        self.engine.start_integration(self.integration_target, self.stop_mode_combo.currentData())
         self.integration_active = True
 
         # Aktualizuj UI
         self.start_integration_btn.setEnabled(False)
         self.stop_integration_btn.setEnabled(True)
         self.integration_spinbox.setEnabled(False)
+        self.stop_mode_combo.setEnabled(False)
         self.save_spectrum_btn.setEnabled(False)
 
         # Aktualizuj pasek postępu
@@ -667,43 +787,86 @@ class RadioTelescopeWindow(QMainWindow):
         print(f"   Odszumianie w czasie rzeczywistym...")
         print(f"{'='*70}\n")
 
+    def offer_resume_integration(self):
+        """Zapytaj o wznowienie integracji z checkpointu (jeśli pasuje do planu widma)"""
+
+        checkpoint = self.engine.find_checkpoint()
+        if checkpoint is None:
+            return
+
+        reply = QMessageBox.question(
+            self,
+            "Przerwana integracja",
+            f"Znaleziono checkpoint integracji z {checkpoint.get('saved_at', '?')}:\n"
+            f"{checkpoint['count']} / {checkpoint['target']} widm.\n\n"
+            f"Czy wznowić integrację?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply == QMessageBox.No or not self.engine.resume_integration():
+            return
+
+        self.integration_target = self.engine.integration_target
+        self.integration_spinbox.setValue(self.integration_target)
+        index = self.stop_mode_combo.findData(checkpoint.get('stop_mode'))
+        if index >= 0:
+            self.stop_mode_combo.setCurrentIndex(index)
+        self.integration_active = True
+
+        # Aktualizuj UI
+        self.start_integration_btn.setEnabled(False)
+        self.stop_integration_btn.setEnabled(True)
+        self.integration_spinbox.setEnabled(False)
+        self.stop_mode_combo.setEnabled(False)
+        self.save_spectrum_btn.setEnabled(False)
+        self.update_integration_progress()
+
+        self.set_status(
+            f"↻ Integracja wznowiona: {self.engine.integration_count} / {self.integration_target} widm",
+            "blue"
+        )
+
     def stop_integration(self):
         """Zatrzymaj integrację widm"""
 
+        self.engine.stop_integration()
         self.integration_active = False
+        integration_count = self.engine.integration_count
 
         # Aktualizuj UI
         self.start_integration_btn.setEnabled(True)
         self.stop_integration_btn.setEnabled(False)
         self.integration_spinbox.setEnabled(True)
+        self.stop_mode_combo.setEnabled(True)
 
         # Włącz zapis jeśli mamy dane
-        if self.integrated_spectrum is not None and self.integration_count > 0:
+        if integration_count > 0:
             self.save_spectrum_btn.setEnabled(True)
 
         self.set_status(
-            f"⏸ Integracja zatrzymana: {self.integration_count} / {self.integration_target} widm",
+            f"⏸ Integracja zatrzymana: {integration_count} / {self.integration_target} widm",
             "orange"
         )
 
-        print(f"\n⏸ Integracja zatrzymana na {self.integration_count} widmach")
+        print(f"\n⏸ Integracja zatrzymana na {integration_count} widmach")
 
     def update_integration_progress(self):
         """Aktualizuj pasek postępu integracji"""
 
+        integration_count = self.engine.integration_count
+
         if self.integration_target > 0:
-            progress_pct = (self.integration_count / self.integration_target) * 100
+            progress_pct = (integration_count / self.integration_target) * 100
             self.integration_progressbar.setValue(int(progress_pct))
 
             self.integration_progress_label.setText(
-                f"Postęp: {self.integration_count} / {self.integration_target} widm ({progress_pct:.1f}%)"
+                f"Postęp: {integration_count} / {self.integration_target} widm ({progress_pct:.1f}%)"
             )
             
             # Oblicz szacowany czas pozostały
-            if self.integration_count > 0 and self.integration_start_time is not None:
-                elapsed_time = time.time() - self.integration_start_time
-                avg_time_per_spectrum = elapsed_time / self.integration_count
-                remaining_spectra = self.integration_target - self.integration_count
+            if integration_count > 0:
+                elapsed_time = self.engine.integration_elapsed()
+                avg_time_per_spectrum = elapsed_time / integration_count
+                remaining_spectra = self.integration_target - integration_count
                 estimated_remaining_time = avg_time_per_spectrum * remaining_spectra
                 
                 # Formatuj czas
@@ -728,68 +891,75 @@ class RadioTelescopeWindow(QMainWindow):
             self.integration_progress_label.setText("Postęp: 0 / 0 widm (0.0%)")
             self.integration_time_label.setText("Szacowany czas do zakończenia: --")
 
-    def integrate_spectrum(self, power_db, doppler_velocities):
-        """Zintegruj bieżące widmo z narastającą sumą"""
+    def refresh_integration_display(self):
+        """Odśwież wykres zintegrowanego widma i postęp (raz na odświeżenie GUI)"""
 
-        if not self.integration_active:
+        result = self.engine.get_integrated_spectrum()
+        if result is None:
             return
 
-        # Pierwsza integracja - inicjalizuj bufor
-        if self.integrated_spectrum is None:
-            self.integrated_spectrum = np.zeros_like(power_db, dtype=np.float64)
-            self.integration_freqs = doppler_velocities.copy()  # Teraz przechowujemy prędkości Dopplera
-
-        # Dodaj bieżące widmo do sumy
-        # Konwertujemy z dB do mocy liniowej, sumujemy, i z powrotem do dB
-        linear_power = 10 ** (power_db / 10.0)
-        self.integrated_spectrum += linear_power
-
-        # Zwiększ licznik
-        self.integration_count += 1
-
-        # Oblicz uśrednione widmo (w dB)
-        averaged_spectrum_linear = self.integrated_spectrum / self.integration_count
-        averaged_spectrum_db = 10 * np.log10(averaged_spectrum_linear + 1e-10)
+        # Uśrednione widmo (w dB) na osi prędkości Dopplera
+        doppler_velocities, averaged_spectrum_db, integration_count = result
+        self.integrated_curve.setData(doppler_velocities, averaged_spectrum_db)
 
-        # Aktualizuj wykres zintegrowanego widma (używając prędkości Dopplera)
-        self.integrated_curve.setData(self.integration_freqs, averaged_spectrum_db)
+        # Pasmo ±1 sigma/sqrt(N) (moc liniowa -> dB; dolna granica nie schodzi poniżej podłogi)
+        power_result = self.engine.get_integrated_power()
+        errors = self.engine.get_integrated_errors()
+        if power_result is not None and errors is not None:
+            averaged_power = power_result[1]
+            stderr = np.nan_to_num(errors[2])
+            self.integrated_upper.setData(doppler_velocities, power_to_db(averaged_power + stderr))
+            self.integrated_lower.setData(doppler_velocities,
+                                          power_to_db(np.maximum(averaged_power - stderr, 0.0)))
 
         # Aktualizuj pasek postępu
         self.update_integration_progress()
 
-        # Aktualizuj status co 10 integracji
-        if self.integration_count % 10 == 0:
-            progress_pct = (self.integration_count / self.integration_target) * 100
+        # Aktualizuj status co ~1 s
+        self._integration_status_counter = getattr(self, '_integration_status_counter', 0) + 1
+        if self._integration_status_counter % 10 == 0:
+            self.refresh_stability_plot()
+            progress_pct = (integration_count / self.integration_target) * 100
             self.set_status(
-                f"🔬 Integracja: {self.integration_count} / {self.integration_target} widm ({progress_pct:.1f}%)",
+                f"🔬 Integracja: {integration_count} / {self.integration_target} widm ({progress_pct:.1f}%)",
                 "blue"
             )
 
-        # Sprawdź czy osiągnięto cel
-        if self.integration_count >= self.integration_target:
-            self.integration_complete()
-
     def integration_complete(self):
         """Obsługa zakończenia integracji"""
 
         self.integration_active = False
+        integration_count = self.engine.integration_count
+        self.refresh_stability_plot()
+
+        # Powód zakończenia przed limitem liczby widm (cel sigma / minimum Allana)
+        stability = self.engine.get_stability()
+        stop_reason = stability['stop_reason'] if stability is not None else None
+        if stop_reason == "sigma":
+            reason_text = f"osiągnięto σ/√N ≤ {ProcessingConfig.INTEGRATION_TARGET_SIGMA:g}"
+        elif stop_reason == "allan":
+            reason_text = "dryf dominuje nad szumem (minimum Allana)"
+        else:
+            reason_text = "osiągnięto liczbę widm"
 
         # Aktualizuj UI
         self.start_integration_btn.setEnabled(True)
         self.stop_integration_btn.setEnabled(False)
         self.integration_spinbox.setEnabled(True)
+        self.stop_mode_combo.setEnabled(True)
         self.save_spectrum_btn.setEnabled(True)
 
         self.set_status(
-            f"✓ Integracja zakończona: {self.integration_count} widm zintegrowanych",
+            f"✓ Integracja zakończona: {integration_count} widm zintegrowanych",
             "green"
         )
 
         print(f"\n{'='*70}")
         print(f"✓ INTEGRACJA ZAKOŃCZONA")
         print(f"{'='*70}")
-        print(f"   Liczba zintegrowanych widm: {self.integration_count}")
-        print(f"   Czas integracji: ~{self.integration_count * 0.1:.1f} sekund")
+        print(f"   Liczba zintegrowanych widm: {integration_count}")
+        print(f"   Zakończenie: {reason_text}")
+        print(f"   Czas integracji: ~{self.engine.integration_elapsed():.1f} sekund")
         print(f"   Widmo gotowe do zapisu")
         print(f"{'='*70}\n")
 
@@ -797,15 +967,22 @@ class RadioTelescopeWindow(QMainWindow):
         QMessageBox.information(
             self,
             "Integracja zakończona",
-            f"Zintegrowano {self.integration_count} widm!\n\n"
+            f"Zintegrowano {integration_count} widm!\n"
+            f"Zakończenie: {reason_text}\n\n"
             f"Widmo zostało odszumione i jest gotowe do zapisu.\n"
             f"Użyj przycisku 'Zapisz Widmo' aby zapisać dane."
         )
 
     def save_integrated_spectrum(self):
-        """Zapisz zintegrowane widmo do pliku"""
+        """
+        Zapisz zintegrowane widmo do pliku - w tle
+
+        Migawka integracji (kopia tablic pod blokadą silnika) powstaje tutaj,
+        formatowanie i zapis robi SaveService; postęp i wynik w pasku statusu
+        """
 
-        if self.integrated_spectrum is None or self.integration_count == 0:
+        snapshot = self.engine.snapshot_integration()
+        if snapshot is None:
             QMessageBox.warning(
                 self,
                 "Brak danych",
@@ -814,81 +991,83 @@ class RadioTelescopeWindow(QMainWindow):
             )
             return
 
-        # Dialog zapisu pliku
+        integrator, plan = snapshot
+        integration_count = integrator.count
+
+        # Dialog zapisu pliku - domyślny format z DataConfig.DEFAULT_FORMAT
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        default_filename = f"spectrum_integrated_{self.integration_count}x_{timestamp}.npz"
+        extensions = {'hdf5': ".h5", 'fits': ".fits", 'csv': ".csv"}
+        if not hdf5_available():
+            del extensions['hdf5']
+        extension = extensions.get(DataConfig.DEFAULT_FORMAT, ".npz")
+        default_filename = f"spectrum_integrated_{integration_count}x_{timestamp}{extension}"
+
+        file_filters = ["HDF5 (*.h5 *.hdf5)"] if hdf5_available() else []
+        file_filters += ["NumPy Archive (*.npz)", "SDFITS (*.fits)", "CSV (*.csv)"]
+        default_filter = next(f for f in file_filters if f"*{extension}" in f)
+        file_filters.remove(default_filter)
 
         filename, _ = QFileDialog.getSaveFileName(
             self,
             "Zapisz zintegrowane widmo",
             str(Path(DataConfig.DATA_DIR) / default_filename),
-            "NumPy Archive (*.npz);;CSV (*.csv);;All Files (*)"
+            ";;".join([default_filter] + file_filters + ["All Files (*)"])
         )
 
         if not filename:
             return  # Użytkownik anulował
 
-        try:
-            # Oblicz uśrednione widmo w dB
-            averaged_spectrum_linear = self.integrated_spectrum / self.integration_count
-            averaged_spectrum_db = 10 * np.log10(averaged_spectrum_linear + 1e-10)
-
-            # Przygotuj metadane
-            metadata = {
-                'integration_count': self.integration_count,
-                'center_freq_mhz': self.current_freq_mhz,
-                'sample_rate_mhz': self.current_sr_mhz,
-                'fft_size': ProcessingConfig.FFT_SIZE,
-                'window_type': ProcessingConfig.WINDOW_TYPE,
-                'timestamp': timestamp,
-                'gain_reduction_db': ReceiverConfig.GAIN_REDUCTION_DB,
-                'lna_state': ReceiverConfig.LNA_STATE
-            }
+        # Metadane z planu widma (po DDC: zdecymowany sample rate i środek pasma)
+        metadata = dict(self.engine.describe_plan(plan), integration_count=integration_count, timestamp=timestamp)
 
-            # Zapisz w formacie NPZ lub CSV
-            if filename.endswith('.csv'):
-                # Format CSV
-                import csv
-                with open(filename, 'w', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(['# Zintegrowane widmo - Radioteleskop 1420 MHz'])
-                    writer.writerow([f'# Liczba integracji: {self.integration_count}'])
-                    writer.writerow([f'# Częstotliwość centralna: {self.current_freq_mhz} MHz'])
-                    writer.writerow([f'# Data: {timestamp}'])
-                    writer.writerow(['Doppler_Velocity_km_s', 'Power_dB'])
-                    for velocity, power in zip(self.integration_freqs, averaged_spectrum_db):
-                        writer.writerow([velocity, power])
-            else:
-                # Format NPZ (domyślny)
-                np.savez_compressed(
-                    filename,
-                    doppler_velocities_km_s=self.integration_freqs,
-                    power_db=averaged_spectrum_db,
-                    metadata=metadata
-                )
+        job = self.saver.submit(
+            filename, write_integrated_spectrum, filename, integrator, metadata,
+            freqs_mhz=plan.freqs_mhz, catalog=self.catalog)
 
-            self.set_status(f"✓ Widmo zapisane: {Path(filename).name}", "green")
+        print(f"💾 Zapis w tle #{job.id}: {filename} ({integration_count} integracji)")
+        self.poll_saves()
+        self.save_timer.start(200)
 
-            print(f"\n✓ Zintegrowane widmo zapisane:")
-            print(f"   Plik: {filename}")
-            print(f"   Liczba integracji: {self.integration_count}")
-            print(f"   Format: {'CSV' if filename.endswith('.csv') else 'NPZ'}")
+    def catalog_products(self, paths):
+        """Zindeksuj zakończone produkty (zrzuty, nagrania) w katalogu - w tle"""
 
-            QMessageBox.information(
-                self,
-                "Zapis pomyślny",
-                f"Zintegrowane widmo zapisane pomyślnie!\n\n"
-                f"Plik: {Path(filename).name}\n"
-                f"Liczba integracji: {self.integration_count}"
-            )
+        if self.catalog is None or not paths:
+            return
+        self.saver.submit(", ".join(Path(p).name for p in paths), self.catalog.index, *paths, kind="catalog")
+        self.save_timer.start(200)
 
-        except Exception as e:
-            print(f"✗ Błąd zapisu widma: {e}")
-            QMessageBox.critical(
-                self,
-                "Błąd zapisu",
-                f"Nie udało się zapisać widma:\n\n{str(e)}"
-            )
+    def poll_saves(self):
+        """Postęp i wyniki zapisów w tle (wywołane przez save_timer)"""
+
+        for job in self.saver.poll():
+            name = Path(job.name).name
+            if job.kind == "catalog":
+                if job.error is None:
+                    print(f"🗂  Katalog: zindeksowano {job.result} ({job.name})")
+                else:
+                    print(f"⚠️  Katalog: nie zindeksowano {job.name}: {job.error}")
+            elif job.error is None:
+                self.set_status(f"✓ Widmo zapisane: {name}", "green")
+                print(f"\n✓ Zintegrowane widmo zapisane:")
+                print(f"   Plik: {job.name}")
+                print(f"   Format: {job.result}")
+                print(f"   Czas zapisu: {job.elapsed_sec:.2f} s")
+            else:
+                self.set_status(f"✗ Błąd zapisu: {name}", "red")
+                print(f"✗ Błąd zapisu widma: {job.error}")
+                QMessageBox.critical(
+                    self,
+                    "Błąd zapisu",
+                    f"Nie udało się zapisać widma:\n\n{job.name}\n\n{str(job.error)}"
+                )
+
+        job = self.saver.current
+        if job is not None and job.kind == "save":
+            queued = self.saver.pending - 1
+            self.set_status(f"💾 Zapisywanie {Path(job.name).name}: {job.progress:.0%}"
+                            + (f" (+{queued} w kolejce)" if queued > 0 else ""), "blue")
+        elif job is None and self.saver.pending == 0:
+            self.save_timer.stop()
 
     # =========================================================================
     # KALIBRACJA CZĘSTOTLIWOŚCI
@@ -897,6 +1076,7 @@ class RadioTelescopeWindow(QMainWindow):
     def toggle_calibration(self, state):
         """Włącz/wyłącz kalibrację"""
         self.calibration_enabled = (state == Qt.Checked)
+        self.engine.set_calibration(self.calibration_enabled)
         self.update_effective_frequency_display()
         
         if self.calibration_enabled:
@@ -908,6 +1088,7 @@ class RadioTelescopeWindow(QMainWindow):
         """Aktualizuj wartości kalibracji z spinboxów"""
         self.freq_offset_ppm = self.ppm_spinbox.value()
         self.freq_offset_khz = self.khz_spinbox.value()
+        self.engine.set_calibration(self.calibration_enabled, self.freq_offset_ppm, self.freq_offset_khz)
         self.update_effective_frequency_display()
 
     def update_effective_frequency_display(self):
@@ -928,27 +1109,12 @@ class RadioTelescopeWindow(QMainWindow):
                 f"Częstotliwość bazowa: {base_freq:.9f} MHz (bez kalibracji)"
             )
 
-    def apply_frequency_calibration(self, freqs_mhz):
-        """Zastosuj kalibrację do tablicy częstotliwości"""
-        if not self.calibration_enabled:
-            return freqs_mhz
-        
-        # Oblicz offset względem częstotliwości centralnej
-        center_freq = ReceiverConfig.CENTER_FREQ_MHZ
-        
-        # Zastosuj korekcję PPM (proporcjonalnie do częstotliwości)
-        freqs_corrected = freqs_mhz * (1 + self.freq_offset_ppm / 1e6)
-        
-        # Dodaj offset w kHz
-        freqs_corrected += self.freq_offset_khz / 1000
-        
-        return freqs_corrected
-
     def auto_calibrate_frequency(self):
         """Automatyczna kalibracja na podstawie wykrytego szczytu"""
         
         # Potrzebujemy bieżącego widma
-        if not hasattr(self, '_last_power_db') or not hasattr(self, '_last_freqs_mhz'):
+        frame = self.engine.latest
+        if frame is None:
             QMessageBox.warning(
                 self,
                 "Brak danych",
@@ -956,8 +1122,8 @@ class RadioTelescopeWindow(QMainWindow):
             )
             return
         
-        power_db = self._last_power_db
-        freqs_mhz = self._last_freqs_mhz
+        power_db = frame.power_db
+        freqs_mhz = frame.freqs_mhz_raw  # Przed kalibracją!
         
         # Znajdź szczyt w oknie ±2 MHz wokół linii HI
         HI_FREQ = 1420.40575177
@@ -1134,7 +1300,14 @@ class RadioTelescopeWindow(QMainWindow):
             self.sdr.close()
             return
 
-        # Sukces - uruchom odświeżanie
+        # Parametry faktycznego strumienia (np. z metadanych nagrania)
+        self.current_freq_mhz = self.sdr.center_freq_mhz or self.current_freq_mhz
+        self.current_sr_mhz = self.sdr.sample_rate_mhz or self.current_sr_mhz
+
+        # Sukces - silnik przetwarza kolejne bloki, timer tylko odświeża wykresy
+        self.engine.set_calibration(self.calibration_enabled, self.freq_offset_ppm, self.freq_offset_khz)
+        self.engine.start()
+        self._last_frame = None
         self.timer.start(GUIConfig.REFRESH_RATE_MS)
 
         # Aktualizuj UI
@@ -1142,6 +1315,8 @@ class RadioTelescopeWindow(QMainWindow):
         self.stop_btn.setEnabled(True)
         self.start_integration_btn.setEnabled(True)
         self.auto_calibrate_btn.setEnabled(True)  # Włącz auto-kalibrację
+        self.record_btn.setEnabled(True)
+        self.subint_btn.setEnabled(True)
 
         self.set_status(
             f"✓ Obserwacja aktywna - {self.current_freq_mhz} MHz, "
@@ -1149,6 +1324,9 @@ class RadioTelescopeWindow(QMainWindow):
             "green"
         )
 
+        # Przerwana integracja z tą samą konfiguracją widma - zaproponuj wznowienie
+        self.offer_resume_integration()
+
     def stop_observation(self):
         """Zatrzymaj obserwację"""
 
@@ -1159,7 +1337,14 @@ class RadioTelescopeWindow(QMainWindow):
         if self.integration_active:
             self.stop_integration()
 
-        # Zatrzymaj SDR
+        # Zakończ nagrywanie i zatrzymaj SDR
+        if self.record_btn.isChecked():
+            self.record_btn.setChecked(False)
+            self.toggle_recording()
+        if self.subint_btn.isChecked():
+            self.subint_btn.setChecked(False)
+            self.toggle_subint_dumps()
+        self.engine.stop()
         self.sdr.stop()
 
         # Aktualizuj UI
@@ -1168,72 +1353,98 @@ class RadioTelescopeWindow(QMainWindow):
         self.start_integration_btn.setEnabled(False)
         self.stop_integration_btn.setEnabled(False)
         self.auto_calibrate_btn.setEnabled(False)  # Wyłącz auto-kalibrację
+        self.record_btn.setEnabled(False)
+        self.subint_btn.setEnabled(False)
 
         self.set_status("Zatrzymano", "blue")
 
-    def update_spectrum(self):
-        """Odśwież wykres FFT (wywołane przez timer)"""
+    def toggle_recording(self):
+        """Włącz/wyłącz nagrywanie surowych I/Q"""
+
+        if self.record_btn.isChecked():
+            try:
+                path = self.sdr.start_recording()
+            except Exception as e:
+                self.record_btn.setChecked(False)
+                QMessageBox.critical(self, "Błąd nagrywania", f"Nie udało się rozpocząć nagrywania:\n\n{e}")
+                return
+
+            self.record_btn.setText("⏹  Stop nagrywania")
+            self.set_status(f"⏺ Nagrywanie I/Q: {Path(path).name}", "red")
+        else:
+            stats = self.sdr.stop_recording()
+            self.record_btn.setText("⏺  Nagrywaj I/Q")
+
+            if stats is not None:
+                self.catalog_products([stats['path']])
+                lost = stats['dropped_samples'] + stats['stream_gap_samples']
+                self.set_status(
+                    f"✓ Nagranie zapisane: {Path(stats['path']).name} "
+                    f"({stats['bytes_written'] / 1e9:.2f} GB, utracone: {lost:,} próbek)",
+                    "green" if lost == 0 else "orange"
+                )
+
+    def toggle_subint_dumps(self):
+        """Włącz/wyłącz zrzuty sub-integracji"""
 
-        # Pobierz próbki
-        samples = self.sdr.get_samples(ProcessingConfig.FFT_SIZE)
+        if self.subint_btn.isChecked():
+            try:
+                path = self.engine.start_dumps()
+            except Exception as e:
+                self.subint_btn.setChecked(False)
+                QMessageBox.critical(self, "Błąd zapisu", f"Nie udało się rozpocząć zrzutów:\n\n{e}")
+                return
+
+            self.subint_btn.setText("⏹  Stop zrzutów")
+            self.set_status(f"📼 Zrzuty sub-integracji: {Path(path).name}", "blue")
+        else:
+            stats = self.engine.stop_dumps()
+            self.subint_btn.setText("📼  Sub-integracje")
+
+            if stats is not None:
+                self.catalog_products(stats['paths'])
+                lost = stats['records_dropped'] + stats['write_errors']
+                self.set_status(
+                    f"✓ Sub-integracje zapisane: {Path(stats['path']).name if stats['path'] else '-'} "
+                    f"({stats['records_queued']} rekordów, utracone: {lost})",
+                    "green" if lost == 0 else "orange"
+                )
+
+    def update_spectrum(self):
+        """Odśwież wykresy najnowszym wynikiem silnika widma (wywołane przez timer)"""
 
-        if samples is None:
+        if not self.engine.is_running:
             return
 
         try:
-            # Oblicz FFT
-            # Zastosuj okno (hann, hamming, etc.)
-            window = self.get_window(len(samples))
-            windowed_samples = samples * window
-
-            # FFT
-            fft_data = np.fft.fftshift(np.fft.fft(windowed_samples))
+            # Integracja kończy się w wątku silnika - UI reaguje tutaj
+            if self.integration_active and self.engine.pop_integration_completed():
+                self.refresh_integration_display()
+                self.integration_complete()
+
+            # Silnik przetwarza każdy blok, wykres pokazuje ostatni
+            frame = self.engine.latest
+            if frame is None or frame is self._last_frame:
+                return
+            self._last_frame = frame
 
-            # Moc w dB (Power Spectral Density)
-            power_db = 20 * np.log10(np.abs(fft_data) + 1e-10)
-            
-            # Opcjonalny software notch filter na DC spike (tylko dla Zero IF)
-            if hasattr(ReceiverConfig, 'DC_NOTCH_ENABLED') and ReceiverConfig.DC_NOTCH_ENABLED:
-                # Znajdź indeks DC (środek widma)
-                center_idx = len(power_db) // 2
-                
-                # Oblicz szerokość notch w binach FFT
-                bin_width_hz = sr_hz / len(samples)
-                notch_width_hz = ReceiverConfig.DC_NOTCH_WIDTH_KHZ * 1000
-                notch_bins = int(notch_width_hz / bin_width_hz / 2)  # połowa szerokości na każdą stronę
-                
-                # Zastosuj notch: zastąp wartości DC przez interpolację z sąsiednich binów
-                if notch_bins > 0 and notch_bins < len(power_db) // 4:
-                    left_idx = max(0, center_idx - notch_bins)
-                    right_idx = min(len(power_db), center_idx + notch_bins + 1)
-                    
-                    # Interpolacja liniowa przez DC spike
-                    if left_idx > 0 and right_idx < len(power_db):
-                        left_val = power_db[left_idx - 1]
-                        right_val = power_db[right_idx]
-                        power_db[left_idx:right_idx] = np.linspace(left_val, right_val, right_idx - left_idx)
-
-            # Częstotliwości
-            sr_hz = self.current_sr_mhz * 1e6
-            freqs = np.fft.fftshift(np.fft.fftfreq(len(samples), 1 / sr_hz))
-            freqs_mhz = (freqs / 1e6) + self.current_freq_mhz
-
-            # Zastosuj kalibrację częstotliwości
-            freqs_mhz_calibrated = self.apply_frequency_calibration(freqs_mhz)
-
-            # Zapisz dla auto-kalibracji
-            self._last_power_db = power_db.copy()
-            self._last_freqs_mhz = freqs_mhz.copy()  # Przed kalibracją!
-            
-            # Konwertuj częstotliwości na prędkości Dopplera (w km/s)
-            doppler_velocities = self.freq_to_doppler_velocity(freqs_mhz_calibrated)
-            
-            # Zapisz tablicę częstotliwości dla górnej osi
-            self.freq_mhz_array = freqs_mhz_calibrated
+            power_db = frame.power_db  # dB liczone tylko dla wyświetlanej ramki
+            doppler_velocities = frame.doppler
+            self.freq_mhz_array = frame.freqs_mhz
 
             # Aktualizuj wykres bieżącego widma (używając prędkości Dopplera)
             self.curve.setData(doppler_velocities, power_db)
-            
+
+            # Kanały oznaczone jako RFI - punkty na bieżącym widmie
+            if frame.rfi_mask is not None and len(frame.rfi_mask) == len(power_db):
+                self.rfi_scatter.setData(doppler_velocities[frame.rfi_mask], power_db[frame.rfi_mask])
+            else:
+                self.rfi_scatter.setData([], [])
+
+            # Aktualizuj wykres zintegrowanego widma i postęp
+            if self.integration_active:
+                self.refresh_integration_display()
+
             # Aktualizuj górną oś X (częstotliwości MHz)
             # Robmy to tylko co jakiś czas aby nie obciążać CPU
             if not hasattr(self, '_axis_update_counter'):
@@ -1243,32 +1454,51 @@ class RadioTelescopeWindow(QMainWindow):
             if self._axis_update_counter % 20 == 0:  # Co 2 sekundy przy 100ms refresh
                 self.update_top_axis_ticks(doppler_velocities)
 
-            # Jeśli integracja aktywna - dodaj do sumy
-            if self.integration_active:
-                # Przekaż zarówno widmo jak i prędkości Dopplera
-                self.integrate_spectrum(power_db, doppler_velocities)
+            # Krzywe dodatkowych rozdzielczości (ostatnie widmo każdego wyjścia)
+            for output in self.engine.outputs:
+                output_frame = output.latest
+                if output_frame is not None:
+                    self.output_curves[output.name].setData(output_frame.doppler, output_frame.power_db)
 
-            # Aktualizuj waterfall (używając prędkości Dopplera)
+            # Aktualizuj waterfall (używając prędkości Dopplera) - główne widmo
+            # albo każde widmo wyjścia WATERFALL_SOURCE opublikowane od ostatniego odświeżenia
             if self.waterfall is not None:
-                self.waterfall.add_spectrum(power_db, doppler_velocities)
+                source = self.engine.get_output(GUIConfig.WATERFALL_SOURCE)
+                if source is None:
+                    self.waterfall.add_spectrum(power_db, doppler_velocities)
+                else:
+                    spectra = source.drain()
+                    if spectra:
+                        self.waterfall.add_spectra([f.power_db for f in spectra], spectra[-1].doppler)
 
-            # Aktualizuj status co jakiś czas
-            buffer_size = self.sdr.get_buffer_size()
-            if buffer_size > 0:
-                samples_per_sec = self.current_sr_mhz * 1e6
-                buffer_time_sec = buffer_size / samples_per_sec
+            # Aktualizuj co 1 sekundę (10 razy przy 100ms refresh)
+            if hasattr(self, '_update_counter'):
+                self._update_counter += 1
+            else:
+                self._update_counter = 0
 
-                # Aktualizuj co 1 sekundę (10 razy przy 100ms refresh)
-                if hasattr(self, '_update_counter'):
-                    self._update_counter += 1
+            if self._update_counter % 10 == 0 and not self.integration_active:
+                stats = self.sdr.get_stats()
+                engine_stats = self.engine.get_stats()
+                recording = stats.get('recording')
+                if recording is not None:
+                    self.set_status(
+                        f"⏺ Nagrywanie | {recording['bytes_written'] / 1e9:.2f} GB | "
+                        f"Bufory w kolejce: {recording['pending_buffers']} | "
+                        f"Odrzucone pakiety: {recording['dropped_packets']} | "
+                        f"Luki strumienia: {recording['stream_gap_samples']:,}",
+                        "red"
+                    )
                 else:
-                    self._update_counter = 0
-
-                if self._update_counter % 10 == 0 and not self.integration_active:
-                    stats = self.sdr.get_stats()
+                    backlog = engine_stats['backlog_samples']
+                    backlog_time_sec = backlog / (self.current_sr_mhz * 1e6)
                     self.set_status(
-                        f"✓ Aktywny | Bufor: {buffer_size:,} próbek ({buffer_time_sec:.1f}s) | "
+                        f"✓ Aktywny | {engine_stats['frames_per_sec']:.1f} FFT/s | "
+                        f"Zaległość: {backlog:,} próbek ({backlog_time_sec:.2f}s) | "
                         f"Łącznie: {stats['total_samples']:,} | "
+                        f"Pominięte: {engine_stats['skipped_samples']:,} | "
+                        f"RFI: {engine_stats['rfi_flagged_fraction'] * 100:.1f}% | "
+                        f"Wygaszone: {engine_stats['blanked_fraction'] * 100:.3f}% | "
                         f"Przeciążenia: {stats['overload_count']}",
                         "green"
                     )
@@ -1276,37 +1506,6 @@ class RadioTelescopeWindow(QMainWindow):
         except Exception as e:
             print(f"✗ Błąd aktualizacji wykresu: {e}")
 
-    def get_window(self, size):
-        """Zwróć okno do FFT"""
-
-        window_type = ProcessingConfig.WINDOW_TYPE.lower()
-
-        if window_type == "hann":
-            return np.hanning(size)
-        elif window_type == "hamming":
-            return np.hamming(size)
-        elif window_type == "blackman":
-            return np.blackman(size)
-        elif window_type == "flat_top":
-            # Flat top window - implementacja własna (bez scipy)
-            # Współczynniki dla flat top window
-            a0 = 0.21557895
-            a1 = 0.41663158
-            a2 = 0.277263158
-            a3 = 0.083578947
-            a4 = 0.006947368
-
-            n = np.arange(size)
-            window = (a0
-                      - a1 * np.cos(2 * np.pi * n / (size - 1))
-                      + a2 * np.cos(4 * np.pi * n / (size - 1))
-                      - a3 * np.cos(6 * np.pi * n / (size - 1))
-                      + a4 * np.cos(8 * np.pi * n / (size - 1)))
-            return window
-        else:
-            # Domyślnie: prostokątne (bez okna)
-            return np.ones(size)
-
     def set_status(self, message, color="black"):
         """Ustaw status i kolor"""
 
@@ -1342,13 +1541,19 @@ class RadioTelescopeWindow(QMainWindow):
         # Zatrzymaj timer
         self.timer.stop()
 
-        # Zatrzymaj integrację
-        if self.integration_active:
-            self.stop_integration()
+        # Trwająca integracja nie jest zatrzymywana - engine.stop() zapisze
+        # checkpoint do wznowienia przy następnym starcie
 
-        # Zamknij SDR
+        # Zatrzymaj przetwarzanie i zamknij SDR
+        self.engine.stop()
         self.sdr.close()
 
+        # Dokończ zlecone zapisy
+        self.save_timer.stop()
+        if self.saver.pending:
+            print(f"⏳ Kończenie zapisów w tle ({self.saver.pending})...")
+        self.saver.close()
+
         # Zaakceptuj zamknięcie
         event.accept()
 
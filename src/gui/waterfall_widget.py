@@ -223,6 +223,24 @@ class WaterfallWidget(QWidget):
         # Aktualizuj obraz
         self.update_image()
 
+    def add_spectra(self, spectra_db, frequencies=None):
+        """
+        Dodaj kilka widm naraz (jedno odświeżenie obrazu)
+
+        Args:
+            spectra_db: Lista tablic mocy w dB (od najstarszej)
+            frequencies: Tablica częstotliwości [MHz] (opcjonalne, tylko przy pierwszym)
+        """
+        if not spectra_db:
+            return
+
+        if frequencies is not None and self.frequencies is None:
+            self.frequencies = frequencies
+            self.plot_widget.setXRange(frequencies[0], frequencies[-1])
+
+        self.spectrum_history.extend(spectra_db)
+        self.update_image()
+
     def update_image(self):
         """Aktualizuj obraz waterfall"""
 
@@ -0,0 +1,294 @@
+"""
+Wspólny interfejs źródeł próbek I/Q
+SDRplay RSP1A, symulator, odtwarzanie plików - ta sama ścieżka do bufora
+"""
+
+import sys
+from pathlib import Path
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from datetime import datetime
+
+from config.settings import ReceiverConfig, AcquisitionConfig, DataConfig
+from src.hardware.ring_buffer import IQRingBuffer, RingReader
+
+
+# Próg saturacji 14-bit ADC (max = 8191)
+ADC_OVERLOAD_THRESHOLD = 8000
+
+
+class AcquisitionBackend:
+    """
+    Bazowa klasa źródła próbek I/Q
+
+    Podklasy implementują:
+    - initialize()                           - połączenie ze źródłem
+    - configure_and_start(freq, sr, gain)    - konfiguracja i start strumienia
+    - stop() / close()                       - zatrzymanie i zwolnienie zasobów
+
+    Wspólne (tutaj):
+    - _ingest_packet(xi, xq, first)          - jedyna ścieżka zapisu pakietów int16
+    - get_samples / create_reader            - odczyt z bufora pierścieniowego
+    - get_stats / print_stats                - statystyki
+    """
+
+    # Nazwa wyświetlana w logach/GUI
+    name = "Źródło I/Q"
+
+    def __init__(self):
+        """Inicjalizacja bufora i statystyk"""
+
+        # Bufor pierścieniowy I/Q (complex64, prealokowany)
+        self.max_buffer_size = ReceiverConfig.RING_BUFFER_SAMPLES
+        self.ring = self._create_ring(self.max_buffer_size)
+
+        # Parametry aktywnego strumienia (ustawiane w configure_and_start)
+        self.center_freq_mhz = None
+        self.sample_rate_mhz = None
+
+        # Rejestrator surowych I/Q (aktywny tylko podczas nagrywania)
+        self.recorder = None
+
+        # Statystyki
+        self.overload_count = 0
+
+        # Status
+        self.is_streaming = False
+
+    def _create_ring(self, capacity):
+        """Utwórz bufor pierścieniowy (podklasy mogą użyć pamięci współdzielonej)"""
+        return IQRingBuffer(capacity)
+
+    # =========================================================================
+    # INTERFEJS (implementowany przez podklasy)
+    # =========================================================================
+
+    def initialize(self):
+        """Połącz ze źródłem. Zwraca True przy sukcesie"""
+        raise NotImplementedError
+
+    def configure_and_start(self, freq_mhz=None, sr_mhz=None, gain_db=None):
+        """Skonfiguruj i uruchom strumień. Zwraca True przy sukcesie"""
+        raise NotImplementedError
+
+    def stop(self):
+        """Zatrzymaj strumień"""
+        raise NotImplementedError
+
+    def close(self):
+        """Zamknij źródło i zwolnij zasoby"""
+        self.stop_recording()
+        if self.is_streaming:
+            self.stop()
+        self.clear_buffer()
+
+    # =========================================================================
+    # ZAPIS PAKIETÓW (wspólna ścieżka wszystkich źródeł)
+    # =========================================================================
+
+    def _ingest_packet(self, xi, xq, first_sample_num=None):
+        """
+        Przyjmij pakiet 14-bit I/Q (int16) - wywoływane z wątku strumienia
+
+        Args:
+            xi: Tablica int16 próbek I
+            xq: Tablica int16 próbek Q
+            first_sample_num: Numer pierwszej próbki (wykrywanie zgubionych pakietów)
+        """
+
+        # Sprawdź saturację ADC (max/min bez tablic pośrednich)
+        max_i = max(int(xi.max()), -int(xi.min()))
+        max_q = max(int(xq.max()), -int(xq.min()))
+
+        if max_i > ADC_OVERLOAD_THRESHOLD or max_q > ADC_OVERLOAD_THRESHOLD:
+            self.overload_count += 1
+            if self.overload_count % 100 == 0:  # Co 100 pakietów
+                print(f"⚠️  Saturacja ADC: I={max_i}, Q={max_q} (max=8191)")
+
+        # Surowe próbki do rejestratora (tylko kopia do pamięci, zapis w jego wątku)
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.write_packet(xi, xq, first_sample_num)
+
+        # Jedna kopia: int16 -> complex64 (znormalizowane) prosto do bufora
+        self.ring.write_int16(xi, xq, first_sample_num)
+
+    # =========================================================================
+    # NAGRYWANIE SUROWYCH I/Q
+    # =========================================================================
+
+    def start_recording(self, path=None):
+        """
+        Rozpocznij zapis nieprzetworzonych pakietów int16 do pliku
+
+        Args:
+            path: Ścieżka pliku (None = DataConfig.DATA_DIR/iq_raw_<czas>.iq16)
+
+        Returns:
+            Ścieżka pliku nagrania
+        """
+        from src.hardware.iq_recorder import IQRecorder
+
+        if self.recorder is not None:
+            return self.recorder.path
+
+        if path is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            path = Path(DataConfig.DATA_DIR) / f"iq_raw_{timestamp}{DataConfig.RAW_FILE_EXTENSION}"
+
+        metadata = {
+            'source': self.name,
+            'center_freq_mhz': self.center_freq_mhz or ReceiverConfig.CENTER_FREQ_MHZ,
+            'sample_rate_mhz': self.sample_rate_mhz or ReceiverConfig.SAMPLE_RATE_MHZ,
+            'gain_reduction_db': ReceiverConfig.GAIN_REDUCTION_DB,
+            'lna_state': ReceiverConfig.LNA_STATE,
+            'if_mode': ReceiverConfig.IF_MODE,
+        }
+
+        recorder = IQRecorder()
+        recorder.start(path, metadata)
+        self.recorder = recorder
+
+        return recorder.path
+
+    def stop_recording(self):
+        """
+        Zakończ zapis surowych I/Q
+
+        Returns:
+            Statystyki nagrania lub None jeśli nie nagrywano
+        """
+        recorder = self.recorder
+        if recorder is None:
+            return None
+
+        # Najpierw odłącz od callbacku, potem opróżnij bufory
+        self.recorder = None
+        recorder.stop()
+
+        return recorder.get_stats()
+
+    # =========================================================================
+    # POBIERANIE DANYCH
+    # =========================================================================
+
+    def get_samples(self, num_samples=65536):
+        """
+        Pobierz najnowsze próbki I/Q z bufora (podgląd - kolejne wywołania
+        mogą się nakładać lub pomijać dane, do przetwarzania użyj create_reader)
+
+        Args:
+            num_samples: Liczba próbek (domyślnie 65536 dla FFT)
+
+        Returns:
+            Tablica complex64 (I+jQ) lub None jeśli za mało danych
+        """
+        return self.ring.read_latest(num_samples)
+
+    def create_reader(self, from_start=False):
+        """
+        Utwórz czytelnika kolejnych bloków bez luk
+
+        Każde wywołanie reader.read_block(n) zwraca IQBlock z następnymi n
+        próbkami, indeksem pierwszej próbki w strumieniu i liczbą próbek
+        pominiętych (utrata USB lub czytelnik nie nadążał).
+
+        Kursor czytelnika jest publikowany w nagłówku bufora - źródła bez
+        limitu tempa (odtwarzanie pliku) czekają na niego zamiast nadpisywać dane.
+
+        Args:
+            from_start: True = zacznij od najstarszych danych w buforze
+
+        Returns:
+            RingReader
+        """
+        return RingReader(self.ring, from_start=from_start, publish_cursor=True)
+
+    @property
+    def total_samples(self):
+        """Łączna liczba odebranych próbek"""
+        return self.ring.total_written
+
+    def get_buffer_size(self):
+        """Zwróć aktualny rozmiar bufora"""
+        return self.ring.available()
+
+    def clear_buffer(self):
+        """Wyczyść bufor danych"""
+        self.ring.reset()
+
+    # =========================================================================
+    # STATYSTYKI I INFO
+    # =========================================================================
+
+    def get_stats(self):
+        """Zwróć statystyki działania"""
+        buffer_size = self.ring.available()
+        return {
+            'is_streaming': self.is_streaming,
+            'buffer_size': buffer_size,
+            'total_samples': self.ring.total_written,
+            'overload_count': self.overload_count,
+            'dropped_samples': self.ring.hw_dropped,
+            'buffer_fill_percent': (buffer_size / self.ring.capacity) * 100,
+            'recording': self.recorder.get_stats() if self.recorder is not None else None
+        }
+
+    def print_stats(self):
+        """Wyświetl statystyki"""
+        stats = self.get_stats()
+
+        print(f"\n📊 Statystyki ({self.name}):")
+        print(f"   Streaming:     {'✓ AKTYWNY' if stats['is_streaming'] else '✗ ZATRZYMANY'}")
+        print(f"   Bufor:         {stats['buffer_size']:,} próbek ({stats['buffer_fill_percent']:.1f}%)")
+        print(f"   Łącznie:       {stats['total_samples']:,} próbek")
+        print(f"   Utracone:      {stats['dropped_samples']:,} próbek")
+        print(f"   Przeciążenia:  {stats['overload_count']}")
+
+
+# =============================================================================
+# FABRYKA ŹRÓDEŁ
+# =============================================================================
+
+BACKEND_TYPES = ("sdrplay", "simulator", "file")
+
+
+def create_backend(backend_type=None, out_of_process=None, **kwargs):
+    """
+    Utwórz źródło próbek I/Q
+
+    Args:
+        backend_type: "sdrplay", "simulator" lub "file" (None = AcquisitionConfig.BACKEND)
+        out_of_process: Uruchom źródło w osobnym procesie (None = AcquisitionConfig.OUT_OF_PROCESS)
+        **kwargs: Parametry przekazane do konstruktora źródła
+
+    Returns:
+        AcquisitionBackend
+    """
+    backend_type = (backend_type or AcquisitionConfig.BACKEND).lower()
+
+    if backend_type not in BACKEND_TYPES:
+        raise ValueError(f"Nieznane źródło: {backend_type} (dostępne: {', '.join(BACKEND_TYPES)})")
+
+    if AcquisitionConfig.OUT_OF_PROCESS if out_of_process is None else out_of_process:
+        from src.hardware.process_source import ProcessAcquisitionBackend
+        return ProcessAcquisitionBackend(backend_type, **kwargs)
+
+    # Importy lokalne - SDRplayController nie jest potrzebny na maszynach bez API
+    if backend_type == "sdrplay":
+        from src.hardware.sdr_controller import SDRplayController
+        return SDRplayController(**kwargs)
+
+    if backend_type == "simulator":
+        from src.hardware.simulated_source import SimulatedSDRSource
+        return SimulatedSDRSource(**kwargs)
+
+    if backend_type == "file":
+        from src.hardware.file_source import FileReplaySource
+        return FileReplaySource(**kwargs)
+
+    raise ValueError(f"Nieznane źródło: {backend_type} (dostępne: {', '.join(BACKEND_TYPES)})")
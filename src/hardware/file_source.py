@@ -0,0 +1,261 @@
+"""
+Odtwarzanie nagrań surowych I/Q
+Pliki int16 (I,Q przeplatane) czytane przez np.memmap - bez ładowania do RAM
+"""
+
+import sys
+import json
+import time
+import threading
+import numpy as np
+from pathlib import Path
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import ReceiverConfig, AcquisitionConfig
+from src.hardware.backend import AcquisitionBackend
+
+
+# Plik metadanych obok nagrania: nagranie.iq16 -> nagranie.iq16.json
+SIDECAR_SUFFIX = ".json"
+
+
+def sidecar_path(iq_path):
+    """Zwróć ścieżkę pliku metadanych dla nagrania"""
+    iq_path = Path(iq_path)
+    return iq_path.with_name(iq_path.name + SIDECAR_SUFFIX)
+
+
+def load_sidecar(iq_path):
+    """
+    Wczytaj metadane nagrania (jeśli istnieją)
+
+    Returns:
+        Słownik metadanych lub {} gdy brak pliku
+    """
+    path = sidecar_path(iq_path)
+    if not path.exists():
+        return {}
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def open_iq_memmap(iq_path):
+    """
+    Otwórz nagranie jako tablicę (N, 2) int16 bez wczytywania do pamięci
+
+    Returns:
+        np.memmap o kształcie (liczba_próbek, 2) - kolumna 0 = I, 1 = Q
+    """
+    data = np.memmap(iq_path, dtype=np.int16, mode='r')
+    n = len(data) // 2
+    return data[:2 * n].reshape(n, 2)
+
+
+class FileReplaySource(AcquisitionBackend):
+    """
+    Źródło odtwarzające nagranie surowych I/Q
+
+    Pakiety idą tą samą ścieżką co callback SDRplay (_ingest_packet), więc
+    cały potok (bufor, czytelnicy, FFT, integracja) działa jak na żywo.
+
+    Tryby:
+    - czas rzeczywisty: tempo = sample rate nagrania
+    - maksymalna szybkość: bez limitu tempa; producent czeka tylko na
+      czytelnika z create_reader() (kursor w nagłówku bufora, także
+      z innego procesu), więc żadna próbka nie jest pomijana
+      (wynik get_stats()['replay_rate_msps'] = maks. przepustowość potoku)
+    """
+
+    name = "Odtwarzanie pliku"
+
+    def __init__(self, file_path=None, realtime=None, loop=None, packet_samples=None):
+        """
+        Args:
+            file_path: Ścieżka nagrania int16 I/Q (None = z config)
+            realtime: True = tempo nagrania, False = maks. szybkość (None = z config)
+            loop: Odtwarzaj w pętli (None = z config)
+            packet_samples: Próbek na pakiet (None = z config)
+        """
+        super().__init__()
+
+        self.file_path = file_path or AcquisitionConfig.REPLAY_FILE
+        self.realtime = AcquisitionConfig.REPLAY_REALTIME if realtime is None else realtime
+        self.loop = AcquisitionConfig.REPLAY_LOOP if loop is None else loop
+        self.packet_samples = packet_samples or AcquisitionConfig.REPLAY_PACKET_SAMPLES
+
+        self.iq = None
+        self.metadata = {}
+        self.sr_hz = None
+
+        # Luki zapisane przez rejestrator: indeksy w pliku i skumulowane braki
+        self._gap_positions = np.zeros(0, dtype=np.int64)
+        self._gap_offsets = np.zeros(0, dtype=np.int64)
+
+        # Wątek odtwarzania
+        self._thread = None
+        self._running = False
+        self._position = 0
+        self._replay_start = None
+        self._replayed = 0
+
+    # =========================================================================
+    # INICJALIZACJA I KONFIGURACJA
+    # =========================================================================
+
+    def initialize(self):
+        """Otwórz nagranie (memmap) i wczytaj metadane"""
+        try:
+            if not self.file_path:
+                raise FileNotFoundError("Nie podano pliku nagrania (--file lub AcquisitionConfig.REPLAY_FILE)")
+
+            path = Path(self.file_path)
+            if not path.exists():
+                raise FileNotFoundError(f"Nie znaleziono pliku: {path}")
+
+            self.iq = open_iq_memmap(path)
+            self.metadata = load_sidecar(path)
+            self._load_gaps()
+
+            size_gb = path.stat().st_size / 1e9
+            print(f"📼 Nagranie: {path.name} ({len(self.iq):,} próbek, {size_gb:.2f} GB)")
+            if self.metadata:
+                print(f"   Metadane: {self.metadata.get('center_freq_mhz')} MHz, "
+                      f"{self.metadata.get('sample_rate_mhz')} MSPS, "
+                      f"start {self.metadata.get('start_time', '?')}")
+
+            return True
+
+        except Exception as e:
+            print(f"✗ Błąd otwarcia nagrania: {e}")
+            return False
+
+    def _load_gaps(self):
+        """Wczytaj luki strumienia z metadanych nagrania (IQRecorder)"""
+        gaps = np.array(self.metadata.get('gaps', []), dtype=np.int64).reshape(-1, 2)
+        self._gap_positions = gaps[:, 0]
+        self._gap_offsets = np.cumsum(gaps[:, 1])
+
+    def _stream_sample_num(self, position):
+        """Numer próbki w oryginalnym strumieniu (z odtworzonymi lukami)"""
+        k = np.searchsorted(self._gap_positions, position, side='right')
+        return position + (int(self._gap_offsets[k - 1]) if k > 0 else 0)
+
+    def _next_boundary(self, position):
+        """Najbliższa luka po position - pakiet nie może jej przekraczać"""
+        k = np.searchsorted(self._gap_positions, position, side='right')
+        return int(self._gap_positions[k]) if k < len(self._gap_positions) else len(self.iq)
+
+    def configure_and_start(self, freq_mhz=None, sr_mhz=None, gain_db=None):
+        """
+        Uruchom odtwarzanie
+
+        Sample rate nagrania (z metadanych) ma pierwszeństwo - od niego
+        zależy tempo trybu czasu rzeczywistego.
+
+        Args:
+            freq_mhz: Częstotliwość gdy nagranie nie ma metadanych (None = z config)
+            sr_mhz: Sample rate gdy nagranie nie ma metadanych (None = z config)
+            gain_db: Ignorowane
+        """
+        sr_mhz = self.metadata.get('sample_rate_mhz') or sr_mhz or ReceiverConfig.SAMPLE_RATE_MHZ
+        self.sr_hz = sr_mhz * 1e6
+
+        self.center_freq_mhz = (self.metadata.get('center_freq_mhz') or freq_mhz
+                                or ReceiverConfig.CENTER_FREQ_MHZ)
+        self.sample_rate_mhz = sr_mhz
+
+        print(f"▶️  Odtwarzanie: {sr_mhz} MSPS, "
+              f"{'czas rzeczywisty' if self.realtime else 'maks. szybkość'}"
+              f"{', pętla' if self.loop else ''}")
+
+        self._position = 0
+        self._replayed = 0
+        self._replay_start = time.perf_counter()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="FileReplay", daemon=True)
+        self._thread.start()
+
+        self.is_streaming = True
+        return True
+
+    # =========================================================================
+    # ODTWARZANIE
+    # =========================================================================
+
+    def _run(self):
+        """Pętla wątku odtwarzania"""
+
+        total = len(self.iq)
+        max_lag = self.ring.capacity // 2
+
+        while self._running:
+            if self._position >= total:
+                if not self.loop:
+                    print("⏹  Koniec nagrania")
+                    break
+                self._position = 0
+
+            end = min(self._position + self.packet_samples, self._next_boundary(self._position))
+            packet = self.iq[self._position:end]
+            first_sample_num = self._stream_sample_num(self._position) & 0xFFFFFFFF
+
+            # Tryb maks. szybkości - nie nadpisuj danych, których czytelnik nie przeczytał
+            if not self.realtime:
+                while self._running and (self.ring.flow_lag() or 0) > max_lag:
+                    time.sleep(0.001)
+
+            try:
+                self._ingest_packet(packet[:, 0], packet[:, 1], first_sample_num)
+            except Exception as e:
+                print(f"✗ Błąd odtwarzania: {e}")
+
+            self._replayed += end - self._position
+            self._position = end
+
+            # Tempo czasu rzeczywistego
+            if self.realtime:
+                delay = self._replay_start + self._replayed / self.sr_hz - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+        self._running = False
+        self.is_streaming = False
+
+    # =========================================================================
+    # ZATRZYMANIE I STATYSTYKI
+    # =========================================================================
+
+    def stop(self):
+        """Zatrzymaj odtwarzanie"""
+
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+        if self.is_streaming:
+            print("✓ Odtwarzanie zatrzymane")
+        self.is_streaming = False
+
+    def close(self):
+        """Dokończ nagranie, zatrzymaj odtwarzanie i zamknij plik"""
+        self.stop_recording()
+        self.stop()
+        self.iq = None
+        self.clear_buffer()
+
+    def get_stats(self):
+        """Statystyki z postępem i tempem odtwarzania"""
+        stats = super().get_stats()
+
+        elapsed = time.perf_counter() - self._replay_start if self._replay_start else 0.0
+        total = len(self.iq) if self.iq is not None else 0
+
+        stats['replay_progress_percent'] = (self._position / total) * 100 if total else 0.0
+        stats['replay_rate_msps'] = (self._replayed / elapsed) / 1e6 if elapsed > 0 else 0.0
+        return stats
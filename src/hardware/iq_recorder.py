@@ -0,0 +1,310 @@
+"""
+Rejestrator surowych I/Q
+Pakiety int16 z callbacku -> bufory w pamięci -> wątek zapisu na dysk
+"""
+
+import sys
+import json
+import queue
+import threading
+import numpy as np
+from pathlib import Path
+from datetime import datetime
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import DataConfig
+from src.hardware.file_source import sidecar_path
+
+
+# Wyrównanie buforów i zapisów (strona / sektor dysku)
+WRITE_ALIGNMENT = 4096
+
+# firstSampleNum jest 32-bitowy
+_SAMPLE_NUM_MASK = 0xFFFFFFFF
+_SAMPLE_NUM_HALF = 0x80000000
+
+
+def _aligned_buffer(num_samples):
+    """Zaalokuj bufor (num_samples, 2) int16 wyrównany do WRITE_ALIGNMENT"""
+    nbytes = num_samples * 4
+    raw = np.empty(nbytes + WRITE_ALIGNMENT, dtype=np.uint8)
+    offset = (-raw.ctypes.data) % WRITE_ALIGNMENT
+    return raw[offset:offset + nbytes].view(np.int16).reshape(num_samples, 2)
+
+
+class IQRecorder:
+    """
+    Zapis nieprzetworzonych pakietów int16 I/Q do pliku
+
+    - Callback kopiuje pakiet do aktywnego bufora w pamięci (bez I/O)
+    - Pełny bufor trafia do kolejki wątku zapisu, a callback od razu
+      przełącza się na wolny bufor (podwójne/wielokrotne buforowanie)
+    - Wątek zapisu robi duże, wyrównane zapisy przez niebuforowany plik
+    - Gdy dysk nie nadąża i nie ma wolnego bufora, pakiet jest odrzucany
+      i liczony (callback nigdy nie czeka na dysk)
+
+    Format: int16 I/Q przeplatane (jak FileReplaySource) + metadane JSON obok.
+    """
+
+    def __init__(self, buffer_mb=None, buffer_count=None):
+        """
+        Args:
+            buffer_mb: Rozmiar jednego bufora [MB] (None = z config)
+            buffer_count: Liczba buforów (None = z config, min. 2)
+        """
+        buffer_mb = buffer_mb or DataConfig.RAW_BUFFER_MB
+        buffer_count = max(2, buffer_count or DataConfig.RAW_BUFFER_COUNT)
+
+        # Rozmiar bufora w próbkach - wielokrotność wyrównania (4 bajty / próbkę)
+        samples = int(buffer_mb * 1024 * 1024) // 4
+        self.buffer_samples = max(WRITE_ALIGNMENT, samples - samples % (WRITE_ALIGNMENT // 4))
+
+        self._buffers = [_aligned_buffer(self.buffer_samples) for _ in range(buffer_count)]
+
+        self.path = None
+        self.metadata = {}
+
+        self._file = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._free = queue.Queue()
+        self._filled = queue.Queue()
+        self._active = None
+        self._fill = 0
+
+        self._next_sample_num = None
+        self.is_recording = False
+
+        self._reset_stats()
+
+    def _reset_stats(self):
+        """Wyzeruj statystyki nagrania"""
+        self.samples_written = 0
+        self.samples_recorded = 0
+        self.dropped_packets = 0
+        self.dropped_samples = 0
+        self.stream_gap_samples = 0
+        self.gaps = []              # [(indeks próbki w pliku, brakujące próbki)]
+        self.write_errors = 0       # Bufory utracone przez błąd zapisu (liczone też w dropped_samples)
+
+    # =========================================================================
+    # START / STOP
+    # =========================================================================
+
+    def start(self, path, metadata=None):
+        """
+        Rozpocznij nagrywanie
+
+        Args:
+            path: Ścieżka pliku nagrania (.iq16)
+            metadata: Słownik metadanych (częstotliwość, rate, gain...)
+        """
+        if self.is_recording:
+            raise RuntimeError("Nagrywanie już trwa")
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._reset_stats()
+        self._next_sample_num = None
+
+        self.metadata = dict(metadata or {})
+        self.metadata.update({
+            'format': 'int16_iq_interleaved',
+            'adc_bits': 14,
+            'start_time': datetime.now().isoformat(timespec='milliseconds'),
+        })
+        self._write_sidecar()
+
+        # Niebuforowany plik - bufory w pamięci są już duże i wyrównane
+        self._file = open(self.path, 'wb', buffering=0)
+
+        while not self._free.empty():
+            self._free.get_nowait()
+        for buf in self._buffers[1:]:
+            self._free.put(buf)
+        self._active = self._buffers[0]
+        self._fill = 0
+
+        self._thread = threading.Thread(target=self._writer_loop, name="IQRecorder", daemon=True)
+        self._thread.start()
+
+        self.is_recording = True
+        print(f"⏺  Nagrywanie I/Q: {self.path} "
+              f"({len(self._buffers)} x {self.buffer_samples * 4 / 1e6:.1f} MB buforów)")
+
+    def stop(self):
+        """Zakończ nagrywanie - zapisz resztę danych i zaktualizuj metadane"""
+
+        if not self.is_recording:
+            return
+
+        with self._lock:
+            self.is_recording = False
+            if self._fill > 0:
+                self._filled.put((self._active, self._fill))
+            self._active = None
+            self._fill = 0
+
+        # Sygnał końca dla wątku zapisu
+        self._filled.put(None)
+        self._thread.join()
+        self._thread = None
+
+        self._file.close()
+        self._file = None
+
+        self.metadata.update({
+            'end_time': datetime.now().isoformat(timespec='milliseconds'),
+            'num_samples': self.samples_written,
+            'dropped_packets': self.dropped_packets,
+            'dropped_samples': self.dropped_samples,
+            'stream_gap_samples': self.stream_gap_samples,
+            'gaps': self.gaps,
+        })
+        self._write_sidecar()
+
+        print(f"⏹  Nagrywanie zakończone: {self.samples_written:,} próbek "
+              f"({self.samples_written * 4 / 1e9:.2f} GB)")
+        if self.dropped_packets or self.stream_gap_samples:
+            print(f"⚠️  Odrzucone pakiety: {self.dropped_packets} ({self.dropped_samples:,} próbek), "
+                  f"luki strumienia: {self.stream_gap_samples:,} próbek")
+
+    def _write_sidecar(self):
+        """Zapisz metadane JSON obok nagrania"""
+        with open(sidecar_path(self.path), 'w', encoding='utf-8') as f:
+            json.dump(self.metadata, f, indent=2, ensure_ascii=False)
+
+    # =========================================================================
+    # ZAPIS Z CALLBACKU (producent)
+    # =========================================================================
+
+    def write_packet(self, xi, xq, first_sample_num=None):
+        """
+        Skopiuj pakiet do bufora w pamięci - wywoływane z wątku strumienia
+
+        Args:
+            xi: Tablica int16 próbek I
+            xq: Tablica int16 próbek Q
+            first_sample_num: firstSampleNum z callbacku (wykrywanie luk)
+        """
+        n = len(xi)
+
+        with self._lock:
+            if not self.is_recording:
+                return
+
+            self._track_gap(first_sample_num, n)
+
+            pos = 0
+            while pos < n:
+                if self._active is None:
+                    # Wszystkie bufory czekają na dysk - odrzuć resztę pakietu
+                    try:
+                        self._active = self._free.get_nowait()
+                        self._fill = 0
+                    except queue.Empty:
+                        self.dropped_packets += 1
+                        self.dropped_samples += n - pos
+                        self.gaps.append((self.samples_recorded, n - pos))
+                        return
+
+                count = min(n - pos, self.buffer_samples - self._fill)
+                self._active[self._fill:self._fill + count, 0] = xi[pos:pos + count]
+                self._active[self._fill:self._fill + count, 1] = xq[pos:pos + count]
+                self._fill += count
+                self.samples_recorded += count
+                pos += count
+
+                if self._fill == self.buffer_samples:
+                    self._filled.put((self._active, self._fill))
+                    self._active = None
+                    self._fill = 0
+
+    def _track_gap(self, first_sample_num, n):
+        """Zapamiętaj luki w strumieniu urządzenia (wg firstSampleNum)"""
+        if first_sample_num is None:
+            return
+
+        expected = self._next_sample_num
+        self._next_sample_num = (first_sample_num + n) & _SAMPLE_NUM_MASK
+
+        if expected is None:
+            return
+
+        gap = (first_sample_num - expected) & _SAMPLE_NUM_MASK
+        if 0 < gap < _SAMPLE_NUM_HALF:
+            self.stream_gap_samples += gap
+            self.gaps.append((self.samples_recorded, gap))
+
+    # =========================================================================
+    # WĄTEK ZAPISU (konsument)
+    # =========================================================================
+
+    def _writer_loop(self):
+        """Zapisuj pełne bufory na dysk i zwracaj je do puli"""
+
+        while True:
+            item = self._filled.get()
+            if item is None:
+                break
+
+            buf, count = item
+            try:
+                view = memoryview(buf[:count]).cast('B')
+                written = 0
+                while written < len(view):
+                    written += self._file.write(view[written:])
+                self.samples_written += count
+            except Exception as e:
+                self.write_errors += 1
+                print(f"✗ Błąd zapisu nagrania: {e}")
+                self._lose_buffer(count)
+
+            self._free.put(buf)
+
+    def _lose_buffer(self, count):
+        """
+        Bufor nie trafił na dysk - utnij plik do jego początku i zapisz lukę
+
+        Pozycje luk i samples_recorded liczą próbki skopiowane do buforów,
+        więc wszystko za utraconym buforem przesuwa się o count próbek wstecz
+        (metadane zgadzają się z pozycjami w pliku).
+        """
+        start = self.samples_written
+        try:
+            # Częściowy zapis rozjechałby wyrównanie I/Q w pliku
+            self._file.seek(start * 4)
+            self._file.truncate()
+        except Exception as e:
+            print(f"✗ Nie można obciąć nagrania po błędzie zapisu: {e}")
+
+        with self._lock:
+            self.samples_recorded -= count
+            self.dropped_samples += count
+            gaps = [(pos if pos <= start else max(start, pos - count), missing)
+                    for pos, missing in self.gaps]
+            gaps.append((start, count))
+            self.gaps = sorted(gaps, key=lambda gap: gap[0])
+
+    # =========================================================================
+    # STATYSTYKI
+    # =========================================================================
+
+    def get_stats(self):
+        """Zwróć statystyki nagrania"""
+        return {
+            'is_recording': self.is_recording,
+            'path': str(self.path) if self.path else None,
+            'samples_written': self.samples_written,
+            'bytes_written': self.samples_written * 4,
+            'pending_buffers': self._filled.qsize(),
+            'dropped_packets': self.dropped_packets,
+            'dropped_samples': self.dropped_samples,
+            'stream_gap_samples': self.stream_gap_samples,
+            'write_errors': self.write_errors,
+        }
@@ -0,0 +1,264 @@
+"""
+Akwizycja w osobnym procesie
+Źródło I/Q (callback USB) działa poza procesem GUI i zapisuje próbki do
+bufora pierścieniowego w pamięci współdzielonej
+"""
+
+import sys
+import time
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from pathlib import Path
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import AcquisitionConfig
+from src.hardware.backend import AcquisitionBackend, create_backend
+from src.hardware.ring_buffer import IQRingBuffer
+
+
+# Limit czasu odpowiedzi procesu akwizycji [s]
+COMMAND_TIMEOUT_SEC = 30.0
+
+# Polecenia kanału kontrolnego (proces GUI -> proces akwizycji)
+_ALLOWED_COMMANDS = (
+    "initialize", "configure_and_start", "stop", "get_stats",
+    "start_recording", "stop_recording", "close",
+)
+
+
+def _snapshot_config(cls):
+    """Skopiuj proste atrybuty klasy konfiguracji (nadpisania z linii poleceń)"""
+    return {
+        name: value for name, value in vars(cls).items()
+        if not name.startswith('_') and isinstance(value, (bool, int, float, str, list, tuple, type(None)))
+    }
+
+
+def _acquisition_main(shm_name, capacity, backend_type, backend_kwargs, config_overrides, conn):
+    """
+    Główna funkcja procesu akwizycji
+
+    Tworzy źródło, podmienia jego bufor na bufor w pamięci współdzielonej
+    i wykonuje polecenia z kanału kontrolnego aż do 'close'.
+    """
+    for name, value in config_overrides.items():
+        setattr(AcquisitionConfig, name, value)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    backend = create_backend(backend_type, out_of_process=False, **backend_kwargs)
+    backend.ring = IQRingBuffer(capacity, buffer=shm.buf, attach=True)
+
+    running = True
+    while running:
+        try:
+            seq, command, args = conn.recv()
+        except (EOFError, OSError):
+            # Proces GUI zniknął - zatrzymaj sprzęt
+            seq, command, args = None, "close", ()
+
+        try:
+            if command not in _ALLOWED_COMMANDS:
+                raise ValueError(f"Nieznane polecenie: {command}")
+
+            result = getattr(backend, command)(*args)
+            if command == "close":
+                running = False
+
+            # Parametry strumienia wracają do procesu GUI razem z wynikiem;
+            # numer polecenia pozwala odrzucić spóźnione odpowiedzi
+            reply = (seq, "ok", result, backend.center_freq_mhz, backend.sample_rate_mhz)
+        except Exception as e:
+            reply = (seq, "error", f"{type(e).__name__}: {e}", None, None)
+
+        try:
+            conn.send(reply)
+        except (EOFError, OSError):
+            running = False
+
+    backend.ring.release()
+    shm.close()
+
+
+class ProcessAcquisitionBackend(AcquisitionBackend):
+    """
+    Źródło I/Q uruchomione w osobnym procesie
+
+    - Proces akwizycji ma własny interpreter i GIL - przerysowanie wykresu
+      czy modalne okno w GUI nie opóźnia callbacku USB
+    - Próbki trafiają do IQRingBuffer w multiprocessing.shared_memory;
+      proces GUI czyta go bezpośrednio (RingReader - jedna kopia bloku)
+    - Polecenia (start/stop/nagrywanie) i statystyki (przeciążenia, utracone
+      próbki, stan procesu) idą małym kanałem kontrolnym (Pipe)
+    """
+
+    def __init__(self, backend_type=None, **backend_kwargs):
+        """
+        Args:
+            backend_type: Typ źródła uruchamianego w procesie (None = z config)
+            **backend_kwargs: Parametry konstruktora źródła
+        """
+        self.backend_type = backend_type or AcquisitionConfig.BACKEND
+        self.name = f"{self.backend_type} (osobny proces)"
+        self._shm = None
+
+        super().__init__()
+
+        ctx = mp.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe()
+        self._lock = threading.Lock()
+        self._seq = 0               # Numer ostatniego polecenia (odpowiedzi po limicie czasu są odrzucane)
+        self._recording_path = None
+
+        self._process = ctx.Process(
+            target=_acquisition_main,
+            args=(self._shm.name, self.max_buffer_size, self.backend_type,
+                  backend_kwargs, _snapshot_config(AcquisitionConfig), child_conn),
+            name="RT2-Acquisition",
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+
+        print(f"🔀 Proces akwizycji: PID {self._process.pid}, "
+              f"bufor współdzielony {IQRingBuffer.nbytes(self.max_buffer_size) / 1e6:.0f} MB")
+
+    def _create_ring(self, capacity):
+        """Bufor w pamięci współdzielonej (producent w procesie akwizycji)"""
+        self._shm = shared_memory.SharedMemory(create=True, size=IQRingBuffer.nbytes(capacity))
+        return IQRingBuffer(capacity, buffer=self._shm.buf)
+
+    # =========================================================================
+    # KANAŁ KONTROLNY
+    # =========================================================================
+
+    def _call(self, command, *args, timeout=COMMAND_TIMEOUT_SEC):
+        """Wykonaj polecenie w procesie akwizycji i zwróć wynik"""
+
+        with self._lock:
+            if not self._process.is_alive():
+                raise RuntimeError("Proces akwizycji nie działa")
+
+            self._seq += 1
+            seq = self._seq
+            self._conn.send((seq, command, args))
+
+            # Odpowiedź na polecenie, które wcześniej przekroczyło limit czasu,
+            # może jeszcze czekać w kanale - pomiń odpowiedzi z innym numerem
+            deadline = time.monotonic() + timeout
+            while True:
+                if not self._conn.poll(max(0.0, deadline - time.monotonic())):
+                    raise TimeoutError(f"Proces akwizycji nie odpowiada ({command})")
+                reply_seq, status, result, freq_mhz, sr_mhz = self._conn.recv()
+                if reply_seq == seq:
+                    break
+
+        if status != "ok":
+            raise RuntimeError(result)
+
+        self.center_freq_mhz = freq_mhz
+        self.sample_rate_mhz = sr_mhz
+        return result
+
+    # =========================================================================
+    # INTERFEJS ŹRÓDŁA
+    # =========================================================================
+
+    def initialize(self):
+        """Połącz ze źródłem w procesie akwizycji"""
+        try:
+            return self._call("initialize")
+        except Exception as e:
+            print(f"✗ Błąd inicjalizacji (proces akwizycji): {e}")
+            return False
+
+    def configure_and_start(self, freq_mhz=None, sr_mhz=None, gain_db=None):
+        """Skonfiguruj i uruchom strumień w procesie akwizycji"""
+        try:
+            self.is_streaming = bool(self._call("configure_and_start", freq_mhz, sr_mhz, gain_db))
+        except Exception as e:
+            print(f"✗ Błąd konfiguracji (proces akwizycji): {e}")
+            self.is_streaming = False
+        return self.is_streaming
+
+    def stop(self):
+        """Zatrzymaj strumień"""
+        try:
+            self._call("stop")
+        except Exception as e:
+            print(f"✗ Błąd zatrzymania (proces akwizycji): {e}")
+        self.is_streaming = False
+
+    def start_recording(self, path=None):
+        """Nagrywanie odbywa się w procesie akwizycji (tam są surowe pakiety)"""
+        self._recording_path = self._call("start_recording", path)
+        return self._recording_path
+
+    def stop_recording(self):
+        """Zakończ nagrywanie w procesie akwizycji"""
+        if self._recording_path is None:
+            return None
+        self._recording_path = None
+        return self._call("stop_recording")
+
+    def close(self):
+        """Zamknij źródło (z dokończeniem nagrania), zakończ proces i zwolnij pamięć współdzieloną"""
+
+        if self._process.is_alive():
+            try:
+                self.stop_recording()
+            except Exception as e:
+                print(f"⚠️  Kończenie nagrania: {e}")
+            try:
+                self._call("close", timeout=10.0)
+            except Exception as e:
+                print(f"⚠️  Zamykanie procesu akwizycji: {e}")
+
+            self._process.join(timeout=5.0)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+
+        self.is_streaming = False
+        self._conn.close()
+
+        if self._shm is not None:
+            self.ring.release()
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    # =========================================================================
+    # STATYSTYKI
+    # =========================================================================
+
+    def get_stats(self):
+        """Statystyki bufora (lokalnie) + stan procesu i liczniki (kanał kontrolny)"""
+
+        alive = self._process.is_alive()
+        stats = super().get_stats()
+        stats['process_alive'] = alive
+        stats['process_pid'] = self._process.pid
+
+        if not alive:
+            stats['is_streaming'] = False
+            return stats
+
+        try:
+            t0 = time.perf_counter()
+            remote = self._call("get_stats", timeout=2.0)
+            stats['control_latency_ms'] = (time.perf_counter() - t0) * 1000
+            stats['is_streaming'] = remote['is_streaming']
+            stats['overload_count'] = remote['overload_count']
+            stats['recording'] = remote.get('recording')
+            for key, value in remote.items():
+                if key.startswith('replay_'):
+                    stats[key] = value
+        except Exception as e:
+            stats['control_error'] = str(e)
+
+        return stats
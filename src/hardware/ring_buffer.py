@@ -0,0 +1,381 @@
+"""
+Bufor pierścieniowy próbek I/Q
+Prealokowany, bez blokad - jeden producent (callback streamu), czytelnicy w innych wątkach
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+
+# Skala normalizacji 14-bit ADC (-8192..8191) do -1.0..1.0
+ADC_SCALE = np.float32(1.0 / 8192.0)
+
+# Sloty nagłówka (int64)
+_HDR_WRITE = 0          # Monotoniczny licznik zapisanych próbek
+_HDR_MAX_PACKET = 1     # Największy dotychczasowy pakiet (margines dla czytelnika)
+_HDR_SEQ = 2            # Licznik seqlock (nieparzysty = producent aktualizuje nagłówek)
+_HDR_STREAM_OFFSET = 3  # Indeks strumienia - indeks bufora (ważne od _HDR_GAP_AT)
+_HDR_GAP_AT = 4         # Indeks bufora początku ostatniego ciągłego odcinka
+_HDR_HW_DROPPED = 5     # Próbki utracone po stronie USB/API (wg firstSampleNum)
+_HDR_FLOW_CURSOR = 6    # Kursor czytelnika dla kontroli przepływu (-1 = brak)
+_HDR_EPOCH = 7          # Licznik resetów (czytelnik wykrywa restart streamu)
+_HEADER_SIZE = 8
+_HEADER_BYTES = _HEADER_SIZE * 8
+
+# firstSampleNum w sdrplay_api_StreamCbParamsT jest 32-bitowy
+_SAMPLE_NUM_MASK = 0xFFFFFFFF
+_SAMPLE_NUM_HALF = 0x80000000
+
+
+# Blok próbek dla czytelnika sekwencyjnego
+# samples      - complex64 [num_samples]
+# first_sample - indeks pierwszej próbki w strumieniu urządzenia
+# skipped      - próbki pominięte od poprzedniego bloku (utrata USB + przepełnienie)
+IQBlock = namedtuple('IQBlock', ['samples', 'first_sample', 'skipped'])
+
+
+class IQRingBuffer:
+    """
+    Bufor pierścieniowy complex64 (I/Q przeplatane w pamięci)
+
+    - Pojemność jest potęgą 2 - pozycja = indeks & maska
+    - Licznik zapisu rośnie monotonicznie, więc czytelnik sam wykrywa
+      nadpisanie danych (producent nigdy nie czeka na czytelnika)
+    - Zapis pakietu to jedna konwersja int16 -> float32 prosto do bufora,
+      bez pośrednich tablic i bez obiektów Pythona na próbkę
+    - Nagłówek i dane mogą leżeć w zewnętrznej pamięci (np. SharedMemory),
+      wtedy producent i czytelnicy mogą być w różnych procesach
+    """
+
+    def __init__(self, capacity=1 << 20, buffer=None, attach=False):
+        """
+        Args:
+            capacity: Pojemność w próbkach (potęga 2)
+            buffer: Zewnętrzna pamięć o rozmiarze IQRingBuffer.nbytes(capacity)
+                    (None = własna alokacja)
+            attach: True = dołącz do istniejącego bufora (nie zeruj nagłówka)
+        """
+        if capacity <= 0 or capacity & (capacity - 1):
+            raise ValueError(f"Pojemność bufora musi być potęgą 2, jest: {capacity}")
+
+        self.capacity = capacity
+        self._mask = capacity - 1
+
+        if buffer is None:
+            self._header = np.zeros(_HEADER_SIZE, dtype=np.int64)
+            self._data = np.zeros(capacity, dtype=np.complex64)
+        else:
+            self._header = np.ndarray((_HEADER_SIZE,), dtype=np.int64, buffer=buffer)
+            self._data = np.ndarray((capacity,), dtype=np.complex64, buffer=buffer,
+                                    offset=_HEADER_BYTES)
+            if not attach:
+                self._header[:] = 0
+
+        if not attach:
+            self._header[_HDR_FLOW_CURSOR] = -1
+
+        # Widok (capacity, 2) float32 - kolumna 0 = I, kolumna 1 = Q
+        self._iq = self._data.view(np.float32).reshape(capacity, 2)
+
+        # Oczekiwany firstSampleNum następnego pakietu (stan producenta)
+        self._next_sample_num = None
+
+    @staticmethod
+    def nbytes(capacity):
+        """Rozmiar pamięci (nagłówek + dane) dla bufora o danej pojemności"""
+        return _HEADER_BYTES + capacity * np.dtype(np.complex64).itemsize
+
+    def release(self):
+        """Zwolnij widoki na zewnętrzną pamięć (przed SharedMemory.close)"""
+        self._header = None
+        self._data = None
+        self._iq = None
+
+    # =========================================================================
+    # ZAPIS (producent)
+    # =========================================================================
+
+    def write_int16(self, xi, xq, first_sample_num=None):
+        """
+        Skopiuj pakiet 14-bit I/Q do bufora z normalizacją do -1.0..1.0
+
+        Args:
+            xi: Tablica int16 próbek I
+            xq: Tablica int16 próbek Q
+            first_sample_num: firstSampleNum z callbacku (None = strumień ciągły)
+        """
+        n = n_packet = len(xi)
+        if n == 0:
+            return
+
+        w = int(self._header[_HDR_WRITE])
+
+        # Pakiet większy niż bufor - zostaw tylko najnowsze próbki
+        if n > self.capacity:
+            xi = xi[-self.capacity:]
+            xq = xq[-self.capacity:]
+            w += n - self.capacity
+            n = self.capacity
+
+        if n > self._header[_HDR_MAX_PACKET]:
+            self._header[_HDR_MAX_PACKET] = n
+
+        start = w & self._mask
+        first = min(n, self.capacity - start)
+
+        np.multiply(xi[:first], ADC_SCALE, out=self._iq[start:start + first, 0], casting='unsafe')
+        np.multiply(xq[:first], ADC_SCALE, out=self._iq[start:start + first, 1], casting='unsafe')
+
+        if first < n:
+            # Zawinięcie na początek bufora
+            rest = n - first
+            np.multiply(xi[first:], ADC_SCALE, out=self._iq[:rest, 0], casting='unsafe')
+            np.multiply(xq[first:], ADC_SCALE, out=self._iq[:rest, 1], casting='unsafe')
+
+        gap = self._sequence_gap(first_sample_num, n_packet)
+
+        # Publikacja dopiero po skopiowaniu danych (seqlock - spójny nagłówek)
+        hdr = self._header
+        hdr[_HDR_SEQ] += 1
+        if gap:
+            hdr[_HDR_GAP_AT] = w
+            hdr[_HDR_STREAM_OFFSET] += gap
+            hdr[_HDR_HW_DROPPED] += gap
+        hdr[_HDR_WRITE] = w + n
+        hdr[_HDR_SEQ] += 1
+
+    def _sequence_gap(self, first_sample_num, n):
+        """Zwróć liczbę próbek brakujących przed tym pakietem (wg firstSampleNum)"""
+        if first_sample_num is None:
+            return 0
+
+        expected = self._next_sample_num
+        self._next_sample_num = (first_sample_num + n) & _SAMPLE_NUM_MASK
+
+        if expected is None:
+            return 0
+
+        gap = (first_sample_num - expected) & _SAMPLE_NUM_MASK
+
+        # Skok "do tyłu" (reinicjalizacja licznika w API) - nie traktuj jako utraty
+        if gap >= _SAMPLE_NUM_HALF:
+            return 0
+
+        return gap
+
+    def reset(self):
+        """Wyzeruj liczniki (dane zostają, ale są traktowane jako puste)"""
+        hdr = self._header
+        hdr[_HDR_SEQ] += 1
+        hdr[_HDR_WRITE] = 0
+        hdr[_HDR_STREAM_OFFSET] = 0
+        hdr[_HDR_GAP_AT] = 0
+        hdr[_HDR_HW_DROPPED] = 0
+        hdr[_HDR_EPOCH] += 1
+        hdr[_HDR_SEQ] += 1
+        self._next_sample_num = None
+
+    def flow_lag(self):
+        """
+        Zaległość czytelnika z kontrolą przepływu
+
+        Returns:
+            Liczba nieprzeczytanych próbek lub None gdy żaden czytelnik nie publikuje kursora
+        """
+        cursor = int(self._header[_HDR_FLOW_CURSOR])
+        if cursor < 0:
+            return None
+        return max(0, self.total_written - cursor)
+
+    # =========================================================================
+    # ODCZYT (konsument)
+    # =========================================================================
+
+    @property
+    def total_written(self):
+        """Łączna liczba próbek zapisanych od ostatniego resetu"""
+        return int(self._header[_HDR_WRITE])
+
+    @property
+    def hw_dropped(self):
+        """Łączna liczba próbek utraconych przed buforem (luki firstSampleNum)"""
+        return int(self._header[_HDR_HW_DROPPED])
+
+    def snapshot(self):
+        """
+        Spójny odczyt nagłówka
+
+        Returns:
+            (write_index, stream_offset, gap_at, epoch)
+        """
+        hdr = self._header
+        while True:
+            seq = int(hdr[_HDR_SEQ])
+            if seq & 1:
+                continue
+            w = int(hdr[_HDR_WRITE])
+            offset = int(hdr[_HDR_STREAM_OFFSET])
+            gap_at = int(hdr[_HDR_GAP_AT])
+            epoch = int(hdr[_HDR_EPOCH])
+            if int(hdr[_HDR_SEQ]) == seq:
+                return w, offset, gap_at, epoch
+
+    def available(self):
+        """Liczba próbek możliwych do odczytu"""
+        return min(self.total_written, self.capacity)
+
+    def _copy_range(self, start, n, out):
+        """Skopiuj zakres [start, start+n) licznika do out (jedna kopia)"""
+        pos = start & self._mask
+        first = min(n, self.capacity - pos)
+        out[:first] = self._data[pos:pos + first]
+        if first < n:
+            out[first:n] = self._data[:n - first]
+
+    def _is_intact(self, start):
+        """Sprawdź czy zakres od start nie został (lub nie jest) nadpisany"""
+        w = int(self._header[_HDR_WRITE])
+        guard = int(self._header[_HDR_MAX_PACKET])
+        return w - start <= self.capacity - guard
+
+    def read_latest(self, num_samples, out=None, retries=3):
+        """
+        Odczytaj najnowsze num_samples próbek
+
+        Args:
+            num_samples: Liczba próbek
+            out: Opcjonalna tablica docelowa complex64 (unika alokacji)
+            retries: Liczba ponowień gdy producent nadpisał dane w trakcie kopiowania
+
+        Returns:
+            Tablica complex64 lub None jeśli za mało danych
+        """
+        if num_samples > self.capacity:
+            raise ValueError(f"Żądano {num_samples} próbek, pojemność bufora: {self.capacity}")
+
+        if out is None:
+            out = np.empty(num_samples, dtype=np.complex64)
+
+        for _ in range(retries):
+            w = int(self._header[_HDR_WRITE])
+            if w < num_samples:
+                return None
+
+            start = w - num_samples
+            self._copy_range(start, num_samples, out)
+
+            if self._is_intact(start):
+                return out
+
+        return None
+
+
+class RingReader:
+    """
+    Czytelnik kolejnych, niezachodzących bloków z IQRingBuffer
+
+    Każdy blok jest ciągły w strumieniu urządzenia. Gdy czytelnik nie nadąża
+    (producent nadpisał nieprzeczytane dane) lub API zgubiło pakiety, następny
+    blok zaczyna się od najbliższych poprawnych danych, a pole skipped podaje
+    dokładną liczbę pominiętych próbek strumienia.
+    """
+
+    def __init__(self, ring, from_start=False, publish_cursor=False):
+        """
+        Args:
+            ring: IQRingBuffer
+            from_start: True = czytaj od najstarszych dostępnych danych,
+                        False = tylko dane zapisane po utworzeniu czytelnika
+            publish_cursor: Publikuj kursor w nagłówku bufora - producent
+                            (np. odtwarzanie pliku) może wtedy na niego czekać
+        """
+        self.ring = ring
+        self.publish_cursor = publish_cursor
+
+        w, offset, gap_at, self._epoch = ring.snapshot()
+        self._cursor = max(gap_at, w - ring.available()) if from_start else w
+        self._next_stream_index = None
+        self._publish()
+
+        # Statystyki
+        self.blocks_read = 0
+        self.samples_read = 0
+        self.samples_skipped = 0
+
+    def lag(self):
+        """Liczba próbek czekających na odczyt"""
+        return max(0, self.ring.total_written - self._cursor)
+
+    def _publish(self):
+        """Zapisz kursor w nagłówku bufora (kontrola przepływu)"""
+        if self.publish_cursor:
+            self.ring._header[_HDR_FLOW_CURSOR] = self._cursor
+
+    def detach(self):
+        """Przestań publikować kursor (producent nie czeka już na tego czytelnika)"""
+        if self.publish_cursor:
+            self.ring._header[_HDR_FLOW_CURSOR] = -1
+            self.publish_cursor = False
+
+    def read_block(self, num_samples, out=None):
+        """
+        Odczytaj następny blok num_samples kolejnych próbek
+
+        Args:
+            num_samples: Długość bloku
+            out: Opcjonalna tablica docelowa complex64
+
+        Returns:
+            IQBlock lub None jeśli nie ma jeszcze pełnego bloku
+        """
+        ring = self.ring
+        if num_samples > ring.capacity // 4:
+            raise ValueError(f"Blok {num_samples} za duży dla bufora {ring.capacity}")
+
+        if out is None:
+            out = np.empty(num_samples, dtype=np.complex64)
+
+        while True:
+            w, offset, gap_at, epoch = ring.snapshot()
+
+            # Reset bufora (reinicjalizacja streamu) - zacznij od nowa; licznik
+            # resetów, bo producent mógł już zapisać więcej niż stary kursor
+            if epoch != self._epoch:
+                self._epoch = epoch
+                self._cursor = gap_at
+                self._next_stream_index = None
+
+            # Luka w strumieniu urządzenia - blok nie może jej przekraczać
+            if self._cursor < gap_at:
+                self._cursor = gap_at
+
+            # Przepełnienie - dane pod kursorem zostały (lub zaraz zostaną) nadpisane
+            if not ring._is_intact(self._cursor):
+                self._cursor = max(gap_at, w - ring.capacity // 2)
+
+            if w - self._cursor < num_samples:
+                return None
+
+            start = self._cursor
+            ring._copy_range(start, num_samples, out)
+
+            if ring._is_intact(start):
+                break
+
+        self._cursor = start + num_samples
+        self._publish()
+
+        # Indeks w strumieniu urządzenia (start >= gap_at, więc offset jest ważny)
+        first_sample = start + offset
+        if self._next_stream_index is None:
+            skipped = 0
+        else:
+            skipped = first_sample - self._next_stream_index
+        self._next_stream_index = first_sample + num_samples
+
+        self.blocks_read += 1
+        self.samples_read += num_samples
+        self.samples_skipped += skipped
+
+        return IQBlock(out, first_sample, skipped)
@@ -17,9 +17,10 @@ if str(project_root) not in sys.path:
 from src.api.structures import *
 from src.api.constants import *
 from config.settings import HardwareConfig, ReceiverConfig
+from src.hardware.backend import AcquisitionBackend
 
 
-class SDRplayController:
+class SDRplayController(AcquisitionBackend):
     """
     Kontroler dla SDRplay RSP1A
     Zarządza:
@@ -29,29 +30,21 @@ class SDRplayController:
     - Callbackami
     """
 
+    name = "SDRplay RSP1A"
+
     def __init__(self):
         """Inicjalizacja kontrolera"""
+        super().__init__()
+
         self.dll = None
         self.device = None
         self.device_params = None
 
-        # Bufory danych I/Q
-        self.i_buffer = []
-        self.q_buffer = []
-        self.max_buffer_size = 1000000  # 1M próbek
-
         # Callbacki
         self.stream_cb = None
         self.stream_b_cb = None
         self.event_cb = None
 
-        # Statystyki
-        self.overload_count = 0
-        self.total_samples = 0
-
-        # Status
-        self.is_streaming = False
-
     # =========================================================================
     # INICJALIZACJA I ZARZĄDZANIE URZĄDZENIEM
     # =========================================================================
@@ -298,6 +291,8 @@ class SDRplayController:
             if err != ErrorCode.SUCCESS:
                 raise Exception(f"Init failed: {ErrorCode.get_name(err)} ({err})")
 
+            self.center_freq_mhz = freq_mhz
+            self.sample_rate_mhz = sr_mhz
             self.is_streaming = True
             print("✓ Streaming uruchomiony!")
 
@@ -321,39 +316,18 @@ class SDRplayController:
 
             if reset:
                 # Reset bufora przy reinicjalizacji
-                self.i_buffer.clear()
-                self.q_buffer.clear()
-                self.total_samples = 0
+                self.ring.reset()
                 return
 
             try:
-                # Konwertuj na numpy arrays
+                # Widok na pamięć API (bez kopiowania)
                 i_arr = np.ctypeslib.as_array(xi, shape=(n,))
                 q_arr = np.ctypeslib.as_array(xq, shape=(n,))
 
-                # Sprawdź saturację ADC
-                max_i = np.max(np.abs(i_arr))
-                max_q = np.max(np.abs(q_arr))
-
-                if max_i > 8000 or max_q > 8000:
-                    self.overload_count += 1
-                    if self.overload_count % 100 == 0:  # Co 100 pakietów
-                        print(f"⚠️  Saturacja ADC: I={max_i}, Q={max_q} (max=8191)")
-
-                # Normalizuj do -1.0..1.0 (14-bit: -8192 do 8191)
-                i_norm = i_arr.astype(np.float32) / 8192.0
-                q_norm = q_arr.astype(np.float32) / 8192.0
+                # Numer pierwszej próbki - wykrywanie zgubionych pakietów
+                first_sample_num = params.contents.firstSampleNum if params else None
 
-                # Dodaj do bufora
-                self.i_buffer.extend(i_norm)
-                self.q_buffer.extend(q_norm)
-
-                # Ogranicz rozmiar bufora
-                if len(self.i_buffer) > self.max_buffer_size:
-                    self.i_buffer = self.i_buffer[-self.max_buffer_size//2:]
-                    self.q_buffer = self.q_buffer[-self.max_buffer_size//2:]
-
-                self.total_samples += n
+                self._ingest_packet(i_arr, q_arr, first_sample_num)
 
             except Exception as e:
                 print(f"✗ Błąd w stream callback: {e}")
@@ -387,37 +361,6 @@ class SDRplayController:
         self.stream_b_cb = StreamCallback_t(_stream_b_callback)
         self.event_cb = EventCallback_t(_event_callback)
 
-    # =========================================================================
-    # POBIERANIE DANYCH
-    # =========================================================================
-
-    def get_samples(self, num_samples=65536):
-        """
-        Pobierz próbki I/Q z bufora
-
-        Args:
-            num_samples: Liczba próbek (domyślnie 65536 dla FFT)
-
-        Returns:
-            Complex numpy array (I+jQ) lub None jeśli za mało danych
-        """
-        if len(self.i_buffer) >= num_samples:
-            i_data = np.array(self.i_buffer[-num_samples:])
-            q_data = np.array(self.q_buffer[-num_samples:])
-            return i_data + 1j * q_data
-
-        return None
-
-    def get_buffer_size(self):
-        """Zwróć aktualny rozmiar bufora"""
-        return len(self.i_buffer)
-
-    def clear_buffer(self):
-        """Wyczyść bufor danych"""
-        self.i_buffer.clear()
-        self.q_buffer.clear()
-        self.total_samples = 0
-
     # =========================================================================
     # ZATRZYMANIE I CLEANUP
     # =========================================================================
@@ -447,6 +390,9 @@ class SDRplayController:
     def close(self):
         """Zamknij połączenie i zwolnij zasoby"""
 
+        # Dokończ nagranie I/Q (bufory, metadane) przed zatrzymaniem strumienia
+        self.stop_recording()
+
         # Zatrzymaj streaming jeśli działa
         if self.is_streaming:
             self.stop()
@@ -471,27 +417,3 @@ class SDRplayController:
 
         # Wyczyść
         self.clear_buffer()
-
-    # =========================================================================
-    # STATYSTYKI I INFO
-    # =========================================================================
-
-    def get_stats(self):
-        """Zwróć statystyki działania"""
-        return {
-            'is_streaming': self.is_streaming,
-            'buffer_size': len(self.i_buffer),
-            'total_samples': self.total_samples,
-            'overload_count': self.overload_count,
-            'buffer_fill_percent': (len(self.i_buffer) / self.max_buffer_size) * 100
-        }
-
-    def print_stats(self):
-        """Wyświetl statystyki"""
-        stats = self.get_stats()
-
-        print("\n📊 Statystyki:")
-        print(f"   Streaming:     {'✓ AKTYWNY' if stats['is_streaming'] else '✗ ZATRZYMANY'}")
-        print(f"   Bufor:         {stats['buffer_size']:,} próbek ({stats['buffer_fill_percent']:.1f}%)")
-        print(f"   Łącznie:       {stats['total_samples']:,} próbek")
-        print(f"   Przeciążenia:  {stats['overload_count']}")
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""
+Symulowane źródło SDR
+Syntetyczne 14-bit I/Q (int16) z linią HI, DC spike i tonami RFI - bez sprzętu
+"""
+
+import sys
+import time
+import threading
+import numpy as np
+from pathlib import Path
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import ReceiverConfig, AcquisitionConfig, PhysicsConstants
+from src.hardware.backend import AcquisitionBackend
+
+
+# Długość okresowej tablicy linii HI (próbki)
+HI_TABLE_SAMPLES = 1 << 20
+
+
+class SimulatedSDRSource(AcquisitionBackend):
+    """
+    Symulator RSP1A
+
+    Generuje pakiety int16 w osobnym wątku (jak callback API) i przekazuje je
+    tą samą ścieżką co SDRplayController (_ingest_packet). Cały pakiet jest
+    liczony wektorowo:
+    - szum odbiornika: gaussowski, niezależny w I i Q
+    - linia HI: szum o profilu gaussowskim wokół HYDROGEN_LINE_FREQ_MHZ,
+      syntezowany raz w dziedzinie częstotliwości jako tablica okresowa
+    - DC spike: stały offset (jak przy Zero IF)
+    - tony RFI: fazowo ciągłe sinusoidy zespolone
+    """
+
+    name = "Symulator"
+
+    def __init__(self, packet_samples=None, realtime=None, seed=None):
+        """
+        Args:
+            packet_samples: Próbek na pakiet (None = z config)
+            realtime: True = tempo próbkowania, False = maks. szybkość (None = z config)
+            seed: Ziarno generatora (None = z config)
+        """
+        super().__init__()
+
+        self.packet_samples = packet_samples or AcquisitionConfig.SIM_PACKET_SAMPLES
+        self.realtime = AcquisitionConfig.SIM_REALTIME if realtime is None else realtime
+        self.rng = np.random.default_rng(AcquisitionConfig.SIM_SEED if seed is None else seed)
+
+        # Parametry strumienia (ustawiane w configure_and_start)
+        self.freq_mhz = None
+        self.sr_hz = None
+
+        # Tablice sygnału (prekomputowane)
+        self._hi_table = None
+        self._tone_tables = []
+        self._tone_freqs_hz = []
+
+        # Wątek generatora
+        self._thread = None
+        self._running = False
+        self._sample_num = 0
+
+    # =========================================================================
+    # INICJALIZACJA I KONFIGURACJA
+    # =========================================================================
+
+    def initialize(self):
+        """Symulator nie wymaga połączenia"""
+        print(f"🧪 Źródło: symulator ({self.packet_samples} próbek/pakiet, "
+              f"{'czas rzeczywisty' if self.realtime else 'maks. szybkość'})")
+        return True
+
+    def configure_and_start(self, freq_mhz=None, sr_mhz=None, gain_db=None):
+        """
+        Przygotuj tablice sygnału i uruchom wątek generatora
+
+        Args:
+            freq_mhz: Częstotliwość [MHz] (None = z config)
+            sr_mhz: Sample rate [MHz] (None = z config)
+            gain_db: Ignorowane (zachowane dla zgodności interfejsu)
+        """
+        self.freq_mhz = freq_mhz or ReceiverConfig.CENTER_FREQ_MHZ
+        self.sr_hz = (sr_mhz or ReceiverConfig.SAMPLE_RATE_MHZ) * 1e6
+
+        print(f"\n📋 Symulator: {self.freq_mhz} MHz, {self.sr_hz / 1e6} MSPS")
+
+        self._build_hi_table()
+        self._build_tone_tables()
+
+        self.center_freq_mhz = self.freq_mhz
+        self.sample_rate_mhz = self.sr_hz / 1e6
+
+        self._sample_num = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="SimulatedSDR", daemon=True)
+        self._thread.start()
+
+        self.is_streaming = True
+        print("✓ Streaming (symulacja) uruchomiony!")
+        return True
+
+    def _build_hi_table(self):
+        """Zsyntezuj okresowy szum o profilu linii HI (jedno IFFT)"""
+
+        n = HI_TABLE_SAMPLES - HI_TABLE_SAMPLES % self.packet_samples
+        n = max(n, self.packet_samples)
+
+        # Częstotliwość linii z uwzględnieniem prędkości radialnej
+        c_km_s = PhysicsConstants.SPEED_OF_LIGHT / 1000.0
+        f_line_mhz = PhysicsConstants.HYDROGEN_LINE_FREQ_MHZ * (
+            1 - AcquisitionConfig.SIM_HI_LINE_VELOCITY_KMS / c_km_s)
+        f_offset_hz = (f_line_mhz - self.freq_mhz) * 1e6
+
+        sigma_hz = AcquisitionConfig.SIM_HI_LINE_WIDTH_KHZ * 1e3 / 2.3548
+        freqs = np.fft.fftfreq(n, 1 / self.sr_hz)
+        profile = np.exp(-0.5 * ((freqs - f_offset_hz) / sigma_hz) ** 2)
+
+        phases = self.rng.uniform(0, 2 * np.pi, n)
+        table = np.fft.ifft(np.sqrt(profile) * np.exp(1j * phases))
+
+        # Moc linii: szczytowa gęstość = SNR * gęstość szumu (2*rms^2 / fs)
+        noise_power = 2 * AcquisitionConfig.SIM_NOISE_RMS ** 2
+        snr = 10 ** (AcquisitionConfig.SIM_HI_LINE_SNR_DB / 10)
+        line_power = snr * noise_power * sigma_hz * np.sqrt(2 * np.pi) / self.sr_hz
+
+        table *= np.sqrt(line_power / np.mean(np.abs(table) ** 2))
+        self._hi_table = table.astype(np.complex64)
+
+    def _build_tone_tables(self):
+        """Prekomputuj przebiegi tonów RFI dla jednego pakietu (faza 0)"""
+
+        n = np.arange(self.packet_samples)
+        self._tone_tables = []
+        self._tone_freqs_hz = []
+
+        for offset_mhz, amplitude in AcquisitionConfig.SIM_RFI_TONES:
+            f_hz = offset_mhz * 1e6
+            table = amplitude * np.exp(2j * np.pi * f_hz * n / self.sr_hz)
+            self._tone_tables.append(table.astype(np.complex64))
+            self._tone_freqs_hz.append(f_hz)
+
+    # =========================================================================
+    # GENERATOR
+    # =========================================================================
+
+    def generate_packet(self, sample_index):
+        """
+        Wygeneruj jeden pakiet
+
+        Args:
+            sample_index: Indeks pierwszej próbki (ciągłość fazy tonów i linii)
+
+        Returns:
+            (xi, xq) - tablice int16
+        """
+        n = self.packet_samples
+
+        # Linia HI (tablica okresowa) + DC spike
+        pos = sample_index % len(self._hi_table)
+        signal = self._hi_table[pos:pos + n] + np.complex64(AcquisitionConfig.SIM_DC_OFFSET)
+
+        # Tony RFI - rotacja fazy liczona od indeksu próbki (bez dryfu)
+        for table, f_hz in zip(self._tone_tables, self._tone_freqs_hz):
+            phase = 2 * np.pi * ((f_hz * sample_index / self.sr_hz) % 1.0)
+            signal += table * np.complex64(np.exp(1j * phase))
+
+        # Szum odbiornika
+        iq = self.rng.standard_normal((2, n), dtype=np.float32)
+        iq *= AcquisitionConfig.SIM_NOISE_RMS
+        iq[0] += signal.real
+        iq[1] += signal.imag
+
+        # Kwantyzacja 14-bit
+        np.rint(iq, out=iq)
+        np.clip(iq, -8192, 8191, out=iq)
+        iq16 = iq.astype(np.int16)
+
+        return iq16[0], iq16[1]
+
+    def _run(self):
+        """Pętla wątku generatora"""
+
+        t0 = time.perf_counter()
+        sent = 0
+
+        while self._running:
+            xi, xq = self.generate_packet(self._sample_num)
+
+            try:
+                self._ingest_packet(xi, xq, self._sample_num & 0xFFFFFFFF)
+            except Exception as e:
+                print(f"✗ Błąd w wątku symulatora: {e}")
+
+            self._sample_num += self.packet_samples
+            sent += self.packet_samples
+
+            # Tempo czasu rzeczywistego
+            if self.realtime:
+                delay = t0 + sent / self.sr_hz - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+    # =========================================================================
+    # ZATRZYMANIE
+    # =========================================================================
+
+    def stop(self):
+        """Zatrzymaj wątek generatora"""
+
+        if not self.is_streaming:
+            return
+
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+        self.is_streaming = False
+        print("✓ Streaming (symulacja) zatrzymany")
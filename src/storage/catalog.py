@@ -0,0 +1,587 @@
+"""
+Katalog obserwacji
+Indeks SQLite wszystkich zapisanych produktów (zintegrowane widma,
+sub-integracje, nagrania I/Q): metadane, ścieżka, przedział czasu i
+statystyki widma - wyszukiwanie bez otwierania plików
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import numpy as np
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import DataConfig
+from src.dsp.spectral_plan import power_to_db
+
+
+# Kolumny tabeli products (nazwa, typ SQLite) - kolejność jak w INSERT
+COLUMNS = (
+    ('path', 'TEXT PRIMARY KEY'),
+    ('kind', 'TEXT'),                   # spectrum / subint / iq
+    ('format', 'TEXT'),                 # NPZ, HDF5, FITS, CSV, SUBINT, IQ16
+    ('size_bytes', 'INTEGER'),
+    ('mtime', 'REAL'),
+    ('time_start', 'REAL'),             # [s od epoki]
+    ('time_end', 'REAL'),
+    ('source', 'TEXT'),
+    ('center_freq_mhz', 'REAL'),
+    ('sample_rate_mhz', 'REAL'),
+    ('fft_size', 'INTEGER'),
+    ('window_type', 'TEXT'),
+    ('lna_state', 'INTEGER'),
+    ('gain_reduction_db', 'REAL'),
+    ('integration_count', 'INTEGER'),   # Zintegrowanych ramek FFT
+    ('channels', 'INTEGER'),
+    ('records', 'INTEGER'),             # Rekordów sub-integracji / widm w pliku
+    ('peak_velocity_km_s', 'REAL'),
+    ('peak_power_db', 'REAL'),
+    ('rms_db', 'REAL'),                 # Rozrzut widma [dB] wokół liniowej linii bazowej
+    ('metadata', 'TEXT'),               # Pełne metadane (JSON)
+    ('indexed_at', 'REAL'),
+)
+COLUMN_NAMES = tuple(name for name, _ in COLUMNS)
+
+# Kolumny z indeksem (typowe filtry)
+INDEXED_COLUMNS = ('kind', 'time_start', 'center_freq_mhz', 'lna_state', 'integration_count')
+
+# Metadane kopiowane do kolumn (klucz = nazwa kolumny)
+METADATA_COLUMNS = ('source', 'center_freq_mhz', 'sample_rate_mhz', 'fft_size', 'window_type',
+                    'lna_state', 'gain_reduction_db', 'integration_count')
+
+# Rozszerzenia plików widm
+SPECTRUM_SUFFIXES = (".npz", ".h5", ".hdf5", ".fits", ".sdfits", ".csv")
+
+
+# =============================================================================
+# OPIS PRODUKTU
+# =============================================================================
+
+def parse_time(value):
+    """Czas [s od epoki] z liczby, tekstu ISO lub 'YYYYmmdd_HHMMSS' (None gdy brak)"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    text = str(value)
+    for parse in (datetime.fromisoformat, lambda t: datetime.strptime(t, "%Y%m%d_%H%M%S")):
+        try:
+            return parse(text).timestamp()
+        except ValueError:
+            pass
+    return None
+
+
+def _file_stats(path):
+    """(rozmiar [B], czas modyfikacji) pliku lub katalogu (suma / najnowszy plik)"""
+    path = Path(path)
+    if path.is_dir():
+        stats = [p.stat() for p in path.iterdir() if p.is_file()]
+        return sum(s.st_size for s in stats), max((s.st_mtime for s in stats), default=0.0)
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime
+
+
+def spectrum_summary(doppler, power_db):
+    """
+    Statystyki widma do katalogu
+
+    Returns:
+        dict: peak_velocity_km_s, peak_power_db (maksimum), rms_db (odchylenie
+        standardowe po odjęciu liniowej linii bazowej) - None gdy brak danych
+    """
+    doppler = np.asarray(doppler, dtype=np.float64)
+    power_db = np.asarray(power_db, dtype=np.float64)
+    finite = np.isfinite(power_db) & np.isfinite(doppler)
+    if finite.sum() < 3:
+        return {'peak_velocity_km_s': None, 'peak_power_db': None, 'rms_db': None}
+
+    x, y = doppler[finite], power_db[finite]
+    peak = int(np.argmax(y))
+    baseline = np.polyval(np.polyfit(x, y, 1), x)
+    return {
+        'peak_velocity_km_s': float(x[peak]),
+        'peak_power_db': float(y[peak]),
+        'rms_db': float(np.std(y - baseline)),
+    }
+
+
+def make_entry(path, kind, file_format, metadata, time_start=None, time_end=None, summary=None, **columns):
+    """
+    Wiersz katalogu
+
+    Args:
+        path: Plik / katalog produktu
+        kind: 'spectrum', 'subint' lub 'iq'
+        file_format: Nazwa formatu
+        metadata: dict metadanych produktu (kolumny METADATA_COLUMNS + JSON)
+        time_start, time_end: Przedział obserwacji (liczba, ISO lub 'YYYYmmdd_HHMMSS')
+        summary: spectrum_summary() lub None
+        **columns: Pozostałe kolumny (channels, records, integration_count...)
+
+    Returns:
+        dict kolumna -> wartość
+    """
+    path = Path(path).resolve()
+    size, mtime = _file_stats(path)
+    metadata = dict(metadata or {})
+
+    # Przedział czasu: jawny, z metadanych, ze znacznika zapisu, w ostateczności mtime
+    time_start = parse_time(time_start if time_start is not None else metadata.get('time_start'))
+    time_end = parse_time(time_end if time_end is not None else metadata.get('time_end'))
+    if time_start is None and time_end is None:
+        time_start = time_end = parse_time(metadata.get('timestamp')) or mtime
+    time_start = time_start if time_start is not None else time_end
+    time_end = time_end if time_end is not None else time_start
+
+    entry = dict.fromkeys(COLUMN_NAMES)
+    for key in METADATA_COLUMNS:
+        value = metadata.get(key)
+        entry[key] = value.item() if isinstance(value, np.generic) else value
+    entry.update(summary or {})
+    entry.update(columns)
+    entry.update({
+        'path': str(path),
+        'kind': kind,
+        'format': file_format,
+        'size_bytes': size,
+        'mtime': mtime,
+        'time_start': time_start,
+        'time_end': time_end,
+        'metadata': json.dumps(metadata, default=str, ensure_ascii=False),
+        'indexed_at': time.time(),
+    })
+    return entry
+
+
+# Kolumny CSV write_integrated_spectrum -> klucze tablic jak w NPZ / HDF5
+CSV_COLUMN_KEYS = {'doppler_velocity_km_s': 'doppler_velocities_km_s', 'power_db': 'power_db',
+                   'power_linear': 'power_linear', 'sigma_linear': 'sigma_linear',
+                   'stderr_linear': 'stderr_linear'}
+
+
+def _read_spectrum_csv(path):
+    """Tablice i metadane widma CSV (linie komentarza '# Klucz: wartość', wiersz nazw kolumn)"""
+    metadata = {}
+    header_keys = {'Liczba integracji': ('integration_count', int),
+                   'Częstotliwość centralna': ('center_freq_mhz', lambda v: float(v.split()[0])),
+                   'Data': ('timestamp', str),
+                   'Metadane': (None, json.loads)}
+    with open(path, encoding='utf-8', errors='replace') as f:
+        lines = f.read().splitlines()
+    names = None
+    body = []
+    for line in lines:
+        line = line.strip().strip('"')
+        if line.startswith('#'):
+            key, _, value = line.lstrip('# ').partition(':')
+            if key in header_keys:
+                name, convert = header_keys[key]
+                try:
+                    value = convert(value.strip())
+                except ValueError:
+                    continue
+                if name is None:
+                    metadata.update(value)
+                else:
+                    metadata[name] = value
+        elif line and line[0].isalpha():
+            names = names or [name.strip().lower() for name in line.split(',')]
+        elif line:
+            body.append(line)
+    table = np.loadtxt(body, delimiter=',', ndmin=2)
+
+    # Bez rozpoznanego wiersza nazw: pierwsze dwie kolumny to prędkość i moc [dB]
+    keys = [CSV_COLUMN_KEYS.get(name) for name in names or ()]
+    if len(keys) != table.shape[1] or 'power_db' not in keys:
+        keys = ['doppler_velocities_km_s', 'power_db']
+    arrays = {key: table[:, i] for i, key in enumerate(keys) if key is not None}
+    return arrays, metadata
+
+
+def read_spectrum(path):
+    """
+    Wczytaj zapisane zintegrowane widmo (NPZ, HDF5, CSV)
+
+    Args:
+        path: Plik widma (write_integrated_spectrum lub zapis ręczny)
+
+    Returns:
+        (arrays, metadata, format) - arrays zawiera co najmniej
+        doppler_velocities_km_s i power_db; None gdy plik nie jest widmem
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    if suffix == ".npz":
+        # Metadane zapisane przez np.savez (dict) - wymagają allow_pickle
+        with np.load(path, allow_pickle=True) as data:
+            if 'power_db' not in data.files:
+                return None
+            arrays = {key: data[key] for key in data.files if key != 'metadata'}
+            metadata = data['metadata'].item() if 'metadata' in data.files else {}
+        return arrays, metadata, 'NPZ'
+    if suffix in (".h5", ".hdf5"):
+        from src.storage.hdf5_writer import load_spectrum_hdf5
+        axes, spectra, metadata = load_spectrum_hdf5(path)
+        return dict(axes, **spectra), metadata, 'HDF5'
+    if suffix == ".csv":
+        arrays, metadata = _read_spectrum_csv(path)
+        return arrays, metadata, 'CSV'
+    return None
+
+
+def _describe_spectrum(path):
+    """Wiersz katalogu dla zapisanego zintegrowanego widma (None gdy to nie widmo)"""
+    spectrum = read_spectrum(path)
+    if spectrum is None:
+        return None
+    arrays, metadata, file_format = spectrum
+    doppler = arrays['doppler_velocities_km_s']
+    power_db = arrays['power_db']
+
+    return make_entry(path, 'spectrum', file_format, metadata,
+                      summary=spectrum_summary(doppler, power_db),
+                      channels=len(power_db), records=1)
+
+
+def _describe_dataset(path):
+    """Wiersz katalogu dla sub-integracji (.subint, HDF5, SDFITS) - SDFITS z 1 wierszem to widmo"""
+    from src.storage.subint import open_subint
+
+    dataset = open_subint(path)
+    try:
+        records = len(dataset)
+        metadata = dict(dataset.metadata)
+        if dataset.path.suffix.lower() in (".fits", ".sdfits"):
+            # Słowa kluczowe FITS -> nazwy metadanych
+            header = metadata
+            metadata = {
+                'source': header.get('BACKEND'),
+                'center_freq_mhz': header['CENTFREQ'] / 1e6 if 'CENTFREQ' in header else None,
+                'sample_rate_mhz': header['SAMPRATE'] / 1e6 if 'SAMPRATE' in header else None,
+                'fft_size': header.get('FFTSIZE'),
+                'window_type': header.get('WINDOW'),
+                'lna_state': header.get('LNASTATE'),
+                'gain_reduction_db': header.get('GAINRED'),
+                'fits_header': header,
+            }
+            file_format = 'FITS'
+        else:
+            file_format = 'HDF5' if dataset.path.suffix.lower() in (".h5", ".hdf5") else 'SUBINT'
+
+        summary = None
+        time_start = time_end = None
+        if records:
+            time_start = float(dataset.column('time_start')[0])
+            time_end = float(dataset.column('time_end')[-1])
+            metadata['integration_count'] = int(dataset.column('frames').sum())
+            doppler, power, _, _ = dataset.average()
+            summary = spectrum_summary(doppler, power_to_db(power))
+
+        kind = 'spectrum' if file_format == 'FITS' and records == 1 else 'subint'
+        return make_entry(path, kind, file_format, metadata, time_start, time_end, summary,
+                          channels=dataset.channels, records=records)
+    finally:
+        dataset.close()
+
+
+def _describe_recording(path):
+    """Wiersz katalogu dla nagrania I/Q (metadane z pliku .json obok)"""
+    from src.hardware.file_source import load_sidecar
+
+    metadata = load_sidecar(path)
+    metadata.pop('gaps', None)    # Lista luk może być długa - liczba w stream_gap_samples
+
+    return make_entry(path, 'iq', 'IQ16', metadata,
+                      metadata.get('start_time'), metadata.get('end_time'),
+                      records=metadata.get('num_samples'))
+
+
+def describe_product(path):
+    """
+    Przeczytaj produkt i zbuduj wiersz katalogu
+
+    Funkcja modułu (bez stanu) - wołana także w procesach skanera
+
+    Args:
+        path: Plik widma, zbiór sub-integracji lub nagranie I/Q
+
+    Returns:
+        dict (make_entry) lub None gdy ścieżka nie jest produktem
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    name = path.name
+
+    if name == DataConfig.CHECKPOINT_FILE or name.endswith(".tmp"):
+        return None
+    if suffix == DataConfig.RAW_FILE_EXTENSION:
+        return _describe_recording(path)
+    if suffix in (".subint", ".fits", ".sdfits"):
+        return _describe_dataset(path)
+    if suffix in (".h5", ".hdf5"):
+        from src.storage.hdf5_writer import hdf5_available, h5py
+        if not hdf5_available():
+            return None
+        with h5py.File(path, 'r') as f:
+            is_spectrum = 'spectrum' in f
+        return _describe_spectrum(path) if is_spectrum else _describe_dataset(path)
+    if suffix in SPECTRUM_SUFFIXES:
+        return _describe_spectrum(path)
+    return None
+
+
+def _describe_safe(path):
+    """describe_product dla skanera: (ścieżka, wiersz lub None, błąd lub None)"""
+    try:
+        return path, describe_product(path), None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def find_products(directory):
+    """
+    Ścieżki produktów w katalogu (rekurencyjnie; katalogi .subint jako całość,
+    katalogi ukryte - np. robocze .work przetwarzania wsadowego - pominięte)
+    """
+    directory = Path(directory)
+    suffixes = set(SPECTRUM_SUFFIXES) | {DataConfig.RAW_FILE_EXTENSION, ".subint"}
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        root = Path(root)
+        for name in list(dirs):
+            if name.startswith("."):
+                dirs.remove(name)
+            elif name.endswith(".subint"):
+                paths.append(root / name)
+                dirs.remove(name)
+        paths.extend(root / name for name in files if Path(name).suffix.lower() in suffixes)
+    return sorted(paths)
+
+
+# =============================================================================
+# KATALOG
+# =============================================================================
+
+class ObservationCatalog:
+    """
+    Baza SQLite produktów (DataConfig.DATA_DIR / CATALOG_FILE)
+
+    - add(): wiersze z make_entry / describe_product (INSERT OR REPLACE po ścieżce)
+    - index(): przeczytaj produkt i dodaj - wołane po zapisie
+    - backfill(): skan katalogu równolegle w procesach (ProcessPoolExecutor);
+      pliki bez zmian (rozmiar, mtime) są pomijane, usunięte - wypisywane
+    - query(): filtry na kolumnach z indeksami - odpowiedź w milisekundach
+
+    Każda operacja otwiera własne połączenie (tryb WAL), więc katalog można
+    używać z wielu wątków i procesów naraz.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: Plik bazy (None = DATA_DIR / CATALOG_FILE)
+        """
+        self.path = Path(path) if path is not None else Path(DataConfig.DATA_DIR) / DataConfig.CATALOG_FILE
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS products "
+                         f"({', '.join(f'{name} {kind}' for name, kind in COLUMNS)})")
+            for name in INDEXED_COLUMNS:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_products_{name} ON products ({name})")
+
+    @contextmanager
+    def _connect(self):
+        """Połączenie na czas jednej operacji (commit na końcu)"""
+        conn = sqlite3.connect(self.path, timeout=30.0)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    # =========================================================================
+    # ZAPIS
+    # =========================================================================
+
+    def add(self, entries):
+        """
+        Dodaj / zaktualizuj wiersze
+
+        Args:
+            entries: dict (make_entry) lub lista takich słowników
+        """
+        if isinstance(entries, dict):
+            entries = [entries]
+        rows = [tuple(entry.get(name) for name in COLUMN_NAMES) for entry in entries]
+        if not rows:
+            return
+        placeholders = ", ".join("?" * len(COLUMN_NAMES))
+        with self._connect() as conn:
+            conn.executemany(f"INSERT OR REPLACE INTO products ({', '.join(COLUMN_NAMES)}) "
+                             f"VALUES ({placeholders})", rows)
+
+    def remove(self, paths):
+        """Usuń wiersze produktów"""
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM products WHERE path = ?",
+                             [(str(Path(p).resolve()),) for p in paths])
+
+    def index(self, *paths, progress=None):
+        """
+        Przeczytaj produkty i dodaj do katalogu (np. po zakończeniu zrzutów)
+
+        Args:
+            *paths: Ścieżki produktów
+            progress: callable(ułamek) lub None (SaveService)
+
+        Returns:
+            Liczba dodanych wierszy
+        """
+        entries = []
+        for i, path in enumerate(paths):
+            entry = describe_product(path)
+            if entry is not None:
+                entries.append(entry)
+            if progress is not None:
+                progress((i + 1) / len(paths))
+        self.add(entries)
+        return len(entries)
+
+    def backfill(self, directory=None, workers=None, force=False, chunksize=16):
+        """
+        Zindeksuj istniejące produkty w katalogu
+
+        Args:
+            directory: Katalog (None = DATA_DIR)
+            workers: Liczba procesów (None = CATALOG_WORKERS / liczba rdzeni, 1 = w tym procesie)
+            force: Przeczytaj ponownie także pliki bez zmian
+            chunksize: Plików na zadanie procesu
+
+        Returns:
+            dict: scanned, indexed, unchanged, skipped, removed, errors [(ścieżka, błąd)], elapsed_sec
+        """
+        t0 = time.perf_counter()
+        directory = Path(directory) if directory is not None else Path(DataConfig.DATA_DIR)
+        workers = workers or DataConfig.CATALOG_WORKERS or os.cpu_count() or 1
+
+        with self._connect() as conn:
+            known = {row[0]: (row[1], row[2]) for row in
+                     conn.execute("SELECT path, size_bytes, mtime FROM products")}
+
+        paths = [p for p in find_products(directory) if p.resolve() != self.path.resolve()]
+        todo = []
+        for path in paths:
+            key = str(path.resolve())
+            if not force and key in known and known[key] == _file_stats(path):
+                continue
+            todo.append(path)
+
+        if workers > 1 and len(todo) > chunksize:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_describe_safe, todo, chunksize=chunksize))
+        else:
+            results = [_describe_safe(path) for path in todo]
+
+        entries = [entry for _, entry, _ in results if entry is not None]
+        errors = [(str(path), error) for path, _, error in results if error is not None]
+        self.add(entries)
+
+        # Wiersze plików, których już nie ma w skanowanym katalogu
+        root = str(directory.resolve())
+        present = {str(p.resolve()) for p in paths}
+        missing = [p for p in known if p.startswith(root) and p not in present and not Path(p).exists()]
+        if missing:
+            self.remove(missing)
+
+        return {
+            'scanned': len(paths),
+            'indexed': len(entries),
+            'unchanged': len(paths) - len(todo),
+            'skipped': len(todo) - len(entries) - len(errors),
+            'removed': len(missing),
+            'errors': errors,
+            'elapsed_sec': time.perf_counter() - t0,
+        }
+
+    # =========================================================================
+    # ZAPYTANIA
+    # =========================================================================
+
+    def query(self, order_by="time_start", descending=False, limit=None, **filters):
+        """
+        Wyszukaj produkty
+
+        Filtry: kolumna=wartość (równość), min_<kolumna>=x (>=), max_<kolumna>=x (<=),
+        like_<kolumna>='wzorzec' (LIKE), np.:
+            query(kind='spectrum', lna_state=5, min_integration_count=10000)
+
+        Args:
+            order_by: Kolumna sortowania
+            descending: Sortuj malejąco
+            limit: Maksymalna liczba wyników
+
+        Returns:
+            Lista dict (metadata jako dict)
+        """
+        clauses = []
+        params = []
+        operators = {'min_': ">=", 'max_': "<=", 'like_': "LIKE"}
+        for key, value in filters.items():
+            operator = "="
+            for prefix, op in operators.items():
+                if key.startswith(prefix) and key[len(prefix):] in COLUMN_NAMES:
+                    key, operator = key[len(prefix):], op
+                    break
+            if key not in COLUMN_NAMES:
+                raise ValueError(f"Nieznana kolumna katalogu: {key}")
+            if value is None and operator == "=":
+                clauses.append(f"{key} IS NULL")
+                continue
+            clauses.append(f"{key} {operator} ?")
+            params.append(value)
+
+        if order_by not in COLUMN_NAMES:
+            raise ValueError(f"Nieznana kolumna katalogu: {order_by}")
+        sql = "SELECT * FROM products"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = [dict(row) for row in conn.execute(sql, params)]
+        for row in rows:
+            row['metadata'] = json.loads(row['metadata']) if row['metadata'] else {}
+        return rows
+
+    def summary(self):
+        """Liczba produktów, łączny rozmiar i przedział czasu per rodzaj"""
+        with self._connect() as conn:
+            return [
+                {'kind': kind, 'count': count, 'size_bytes': size, 'time_start': t0, 'time_end': t1}
+                for kind, count, size, t0, t1 in conn.execute(
+                    "SELECT kind, COUNT(*), SUM(size_bytes), MIN(time_start), MAX(time_end) "
+                    "FROM products GROUP BY kind ORDER BY kind")
+            ]
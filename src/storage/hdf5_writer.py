@@ -0,0 +1,271 @@
+"""
+Zapis HDF5
+Rozszerzalne, porcjowane i kompresowane zbiory (h5py - opcjonalnie):
+zintegrowane widmo oraz sub-integracje dopisywane w trakcie obserwacji,
+z odczytem wycinka czasu / zakresu prędkości bez wczytywania pliku
+"""
+
+import sys
+import json
+import numpy as np
+from pathlib import Path
+from datetime import datetime
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import DataConfig
+from src.storage.subint import RECORD_FIELDS, SubintegrationDataset, default_subint_path
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+
+HDF5_SUFFIX = ".h5"
+
+# Pola rekordu sub-integracji zapisywane jako macierze (rekordy x kanały)
+SPECTRUM_FIELDS = (('power', np.float32), ('m2', np.float32), ('counts', np.int32))
+
+
+def hdf5_available():
+    """Czy h5py jest zainstalowane"""
+    return h5py is not None
+
+
+def _require_h5py():
+    if h5py is None:
+        raise RuntimeError("Zapis HDF5 wymaga pakietu h5py (pip install h5py)")
+
+
+def _compression():
+    """Argumenty kompresji zbiorów z DataConfig (gzip + shuffle)"""
+    if not DataConfig.COMPRESSION_ENABLED:
+        return {}
+    return {'compression': 'gzip', 'compression_opts': DataConfig.COMPRESSION_LEVEL, 'shuffle': True}
+
+
+def _attr_value(value):
+    """Wartość metadanych jako atrybut HDF5 (None -> "", struktury -> JSON)"""
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, default=str)
+    if isinstance(value, (str, bool, int, float, np.generic)):
+        return value
+    return str(value)
+
+
+def write_attrs(node, metadata):
+    """Zapisz słownik metadanych jako atrybuty grupy / zbioru"""
+    for key, value in metadata.items():
+        node.attrs[key] = _attr_value(value)
+
+
+def read_attrs(node):
+    """Atrybuty jako słownik (tekst JSON pozostaje tekstem)"""
+    return {key: (value.item() if isinstance(value, np.generic) else value)
+            for key, value in node.attrs.items()}
+
+
+# =============================================================================
+# ZINTEGROWANE WIDMO
+# =============================================================================
+
+def save_spectrum_hdf5(path, axes, spectra, metadata, groups=None):
+    """
+    Zapisz pojedyncze widmo (np. wynik integracji)
+
+    Args:
+        path: Plik .h5
+        axes: dict osi -> /axes/<nazwa> (np. doppler_velocities_km_s)
+        spectra: dict tablic o długości osi -> /spectrum/<nazwa>
+        metadata: dict -> atrybuty pliku
+        groups: dict nazwa grupy -> dict tablic o innym kształcie (np. przedziały
+                integracji) - load_spectrum_hdf5 ich nie czyta
+    """
+    _require_h5py()
+    compression = _compression()
+
+    with h5py.File(path, 'w') as f:
+        write_attrs(f, dict(metadata, format='spectrum', created=datetime.now().isoformat(timespec='seconds')))
+        for group_name, arrays in (('axes', axes), ('spectrum', spectra), *(groups or {}).items()):
+            group = f.create_group(group_name)
+            for name, values in arrays.items():
+                values = np.asarray(values)
+                group.create_dataset(name, data=values, chunks=True if compression else None, **compression)
+
+
+def load_spectrum_hdf5(path, v_min=None, v_max=None, axis='doppler_velocities_km_s'):
+    """
+    Wczytaj widmo z save_spectrum_hdf5 (opcjonalnie tylko zakres prędkości)
+
+    Returns:
+        (axes, spectra, metadata) - słowniki tablic i atrybutów
+    """
+    _require_h5py()
+    with h5py.File(path, 'r') as f:
+        channels = slice(None)
+        if v_min is not None or v_max is not None:
+            values = f['axes'][axis][()]
+            inside = np.flatnonzero((values >= (-np.inf if v_min is None else v_min)) &
+                                    (values <= (np.inf if v_max is None else v_max)))
+            channels = slice(int(inside[0]), int(inside[-1]) + 1) if len(inside) else slice(0, 0)
+        axes = {name: data[channels] for name, data in f['axes'].items()}
+        spectra = {name: data[channels] for name, data in f['spectrum'].items()}
+        return axes, spectra, read_attrs(f)
+
+
+# =============================================================================
+# SUB-INTEGRACJE (ZAPIS W TRAKCIE OBSERWACJI)
+# =============================================================================
+
+class HDF5SubintStore:
+    """
+    Sub-integracje w pliku HDF5 - ujście SubintegrationDumper (open/write/close)
+
+        /axes/doppler, freqs_mhz, freqs_mhz_raw      (kanały)
+        /spectra/power, m2 (float32), counts (int32) (rekordy x kanały)
+        /time/time_start, time_end, first_sample, end_sample, frames (rekordy)
+        atrybuty pliku = metadane (konfiguracja, plan widma)
+
+    Zbiory są rozszerzalne (maxshape None) i porcjowane po 1 rekord
+    x HDF5_CHUNK_CHANNELS kanałów, więc odczyt jednego rekordu lub zakresu
+    prędkości dotyka tylko potrzebnych porcji. Porcja = jeden rekord, bo
+    dopisanie do częściowo zapełnionej porcji skompresowanej zapisuje ją
+    od nowa, a HDF5 nie odzyskuje zwolnionego miejsca w pliku. Plik jest w trybie
+    SWMR - można go czytać (HDF5SubintDataset) w trakcie dopisywania.
+    Zmiana planu widma otwiera kolejny plik <nazwa>_partN.h5.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: Plik (None = DATA_DIR/subint_<czas>.h5)
+        """
+        _require_h5py()
+        self.base_path = Path(path) if path is not None else default_subint_path(HDF5_SUFFIX)
+        self.path = None
+        self.paths = []
+        self.metadata = None
+
+        self._file = None
+        self.records_written = 0
+
+    def open(self, axes, metadata):
+        """Utwórz kolejny plik dla planu widma (osie, metadane z 'channels')"""
+        if self.paths:
+            base = self.base_path
+            path = base.with_name(f"{base.stem}_part{len(self.paths) + 1}{base.suffix}")
+        else:
+            path = self.base_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        channels = metadata['channels']
+        compression = _compression()
+        chunk_channels = min(channels, DataConfig.HDF5_CHUNK_CHANNELS)
+
+        f = h5py.File(path, 'w', libver='latest')
+        self.metadata = dict(metadata, format='subint_records',
+                             start_time=datetime.now().isoformat(timespec='milliseconds'))
+        write_attrs(f, self.metadata)
+
+        group = f.create_group('axes')
+        for name, values in axes.items():
+            group.create_dataset(name, data=np.asarray(values))
+
+        group = f.create_group('spectra')
+        for name, dtype in SPECTRUM_FIELDS:
+            group.create_dataset(name, shape=(0, channels), maxshape=(None, channels), dtype=dtype,
+                                 chunks=(1, chunk_channels), **compression)
+
+        group = f.create_group('time')
+        for name, dtype in RECORD_FIELDS:
+            group.create_dataset(name, shape=(0,), maxshape=(None,), dtype=dtype, chunks=(1024,))
+
+        f.swmr_mode = True
+        self._file = f
+        self.path = path
+        self.paths.append(path)
+        self.records_written = 0
+
+    def write(self, records):
+        """Dopisz rekordy (tablica record_dtype) i opróżnij bufory pliku"""
+        f = self._file
+        n = self.records_written
+        end = n + len(records)
+
+        for name, _ in SPECTRUM_FIELDS:
+            data = f['spectra'][name]
+            data.resize(end, axis=0)
+            data[n:end] = records[name]
+        for name, _ in RECORD_FIELDS:
+            data = f['time'][name]
+            data.resize(end, axis=0)
+            data[n:end] = records[name]
+
+        f.flush()
+        self.records_written = end
+
+    def close(self, extra=None):
+        """Zamknij plik (liczba rekordów i czas końca w atrybutach)"""
+        if self._file is None:
+            return
+        f = self._file
+        self._file = None
+
+        # Atrybutów nie można dodawać w trybie SWMR - dopisz po ponownym otwarciu
+        f.close()
+        with h5py.File(self.path, 'r+') as f:
+            write_attrs(f, dict(extra or {}, end_time=datetime.now().isoformat(timespec='milliseconds'),
+                                num_records=self.records_written))
+
+
+class HDF5SubintDataset(SubintegrationDataset):
+    """
+    Odczyt sub-integracji z pliku HDF5 (także w trakcie zapisu - SWMR)
+
+    Rekordy i kanały są czytane z pliku dopiero przy dostępie: spectrum()
+    czyta jeden wiersz, average(..., channels=channel_range(...)) tylko
+    porcje z danym zakresem prędkości.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Plik .h5
+        """
+        _require_h5py()
+        self.path = Path(path)
+        self._file = h5py.File(self.path, 'r', libver='latest', swmr=True)
+        self.metadata = read_attrs(self._file)
+        self.axes = {name: data[()] for name, data in self._file['axes'].items()}
+        self.channels = int(self.metadata['channels'])
+
+    def __len__(self):
+        # Liczba pełnych rekordów (spectra zapisywane przed time)
+        data = self._file['time']['frames']
+        data.refresh()
+        return data.shape[0]
+
+    def close(self):
+        """Zamknij plik"""
+        self._file.close()
+
+    def column(self, name):
+        data = self._file['time'][name]
+        data.refresh()
+        return data[:len(self)]
+
+    def _block(self, start, stop, channels):
+        spectra = self._file['spectra']
+        blocks = []
+        for name, _ in SPECTRUM_FIELDS:
+            data = spectra[name]
+            data.refresh()
+            blocks.append(data[start:stop, channels])
+        power, m2, counts = blocks
+        return counts, power, m2
@@ -0,0 +1,283 @@
+"""
+Zapis w tle
+Wątek zapisu produktów (zintegrowane widmo: HDF5, SDFITS, NPZ, CSV) -
+GUI oddaje migawkę danych i nie czeka na formatowanie, kompresję ani dysk
+"""
+
+import sys
+import json
+import time
+import queue
+import threading
+import numpy as np
+from pathlib import Path
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.storage.hdf5_writer import save_spectrum_hdf5
+from src.storage.sdfits import save_spectrum_sdfits
+from src.storage.subint import make_record
+from src.storage.catalog import make_entry, spectrum_summary
+
+
+# Rozszerzenie pliku -> format (pozostałe: NPZ)
+PRODUCT_FORMATS = {'.h5': 'HDF5', '.hdf5': 'HDF5', '.fits': 'FITS', '.csv': 'CSV'}
+
+# Wierszy CSV formatowanych naraz - postęp i oddanie GIL między porcjami
+CSV_CHUNK_ROWS = 16384
+
+
+def product_format(path):
+    """Format produktu z rozszerzenia pliku ('HDF5', 'FITS', 'CSV' lub 'NPZ')"""
+    return PRODUCT_FORMATS.get(Path(path).suffix.lower(), 'NPZ')
+
+
+# =============================================================================
+# PRODUKTY
+# =============================================================================
+
+def write_csv(path, columns, names, header=(), number_format="%.10g", progress=None):
+    """
+    Tabela CSV z kolumn numpy - formatowanie wektorowe
+
+    Jeden szablon wiersza powielony dla całej porcji i jedno formatowanie
+    % na porcję (bez pętli po wierszach w Pythonie)
+
+    Args:
+        path: Plik .csv
+        columns: Kolumny (tablice tej samej długości)
+        names: Nazwy kolumn (wiersz nagłówka)
+        header: Linie komentarza przed nagłówkiem (bez '# ')
+        number_format: Format liczby (printf)
+        progress: callable(ułamek) lub None
+    """
+    table = np.column_stack([np.asarray(column, dtype=np.float64) for column in columns])
+    rows = len(table)
+    row_format = ",".join([number_format] * table.shape[1]) + "\n"
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for line in header:
+            f.write(f"# {line}\n")
+        f.write(",".join(names) + "\n")
+        for start in range(0, rows, CSV_CHUNK_ROWS):
+            block = table[start:start + CSV_CHUNK_ROWS]
+            f.write((row_format * len(block)) % tuple(block.ravel().tolist()))
+            if progress is not None:
+                progress((start + len(block)) / rows)
+
+
+def write_integrated_spectrum(path, integrator, metadata, freqs_mhz=None, catalog=None, progress=None):
+    """
+    Zapisz zintegrowane widmo - format z rozszerzenia pliku
+
+    Wołane w wątku zapisu: integrator to migawka (SpectrumIntegrator.copy()),
+    więc dB, sigma i niepewność średniej liczone są tutaj, nie w GUI
+
+    Args:
+        path: Plik (.h5 / .hdf5, .fits, .csv, pozostałe - .npz)
+        integrator: Kopia integratora
+        metadata: dict metadanych (SpectrumEngine.describe_plan + liczba integracji, czas)
+        freqs_mhz: Oś częstotliwości [MHz] (SDFITS)
+        catalog: ObservationCatalog - wiersz z widma w pamięci po zapisie (None = bez)
+        progress: callable(ułamek) lub None
+
+    Returns:
+        Nazwa formatu
+    """
+    file_format = product_format(path)
+    metadata = dict(metadata, time_start=integrator.start_time, time_end=integrator.end_time)
+
+    doppler_velocities = integrator.axis
+    power_db = integrator.mean_db()
+
+    if file_format == 'FITS':
+        # SDFITS: moc, M2 i liczba przyjętych ramek per kanał, oś z planu widma
+        save_spectrum_sdfits(path, make_record(integrator), {'freqs_mhz': freqs_mhz}, metadata)
+    else:
+        _write_spectrum_arrays(path, file_format, integrator, metadata, doppler_velocities, power_db, progress)
+
+    # Indeks w katalogu z danych w pamięci (bez ponownego czytania pliku)
+    if catalog is not None:
+        try:
+            catalog.add(make_entry(path, 'spectrum', file_format, metadata,
+                                   summary=spectrum_summary(doppler_velocities, power_db),
+                                   channels=len(power_db), records=1))
+        except Exception as e:
+            print(f"⚠️  Katalog: nie zindeksowano {path}: {e}")
+    return file_format
+
+
+def _write_spectrum_arrays(path, file_format, integrator, metadata, doppler_velocities, power_db, progress):
+    """Zapis HDF5 / CSV / NPZ: widmo dB i liniowe, sigma, niepewność średniej, udział przyjętych ramek"""
+    power = integrator.mean_power()
+    sigma = integrator.std()
+    stderr = integrator.stderr()
+
+    # Udział ramek przyjętych przez flagowanie RFI
+    accepted_fraction = integrator.accepted_fraction()
+
+    if file_format == 'HDF5':
+        save_spectrum_hdf5(
+            path,
+            {'doppler_velocities_km_s': doppler_velocities},
+            {
+                'power_db': power_db,
+                'power_linear': power,
+                'sigma_linear': sigma,
+                'stderr_linear': stderr,
+                'accepted_fraction': accepted_fraction,
+            },
+            metadata
+        )
+    elif file_format == 'CSV':
+        write_csv(
+            path,
+            [doppler_velocities, power_db, power, sigma, stderr],
+            ['Doppler_Velocity_km_s', 'Power_dB', 'Power_Linear', 'Sigma_Linear', 'Stderr_Linear'],
+            header=[
+                "Zintegrowane widmo - Radioteleskop 1420 MHz",
+                f"Liczba integracji: {metadata.get('integration_count', integrator.count)}",
+                f"Częstotliwość centralna: {metadata.get('center_freq_mhz')} MHz",
+                f"Data: {metadata.get('timestamp')}",
+                f"Metadane: {json.dumps(metadata, default=str, ensure_ascii=False)}",
+            ],
+            progress=progress
+        )
+    else:
+        np.savez_compressed(
+            path,
+            doppler_velocities_km_s=doppler_velocities,
+            power_db=power_db,
+            power_linear=power,
+            sigma_linear=sigma,
+            stderr_linear=stderr,
+            accepted_fraction=accepted_fraction,
+            metadata=metadata
+        )
+
+
+# =============================================================================
+# WĄTEK ZAPISU
+# =============================================================================
+
+class SaveJob:
+    """Jedno zlecenie zapisu - stan czytany przez GUI (SaveService.poll / current)"""
+
+    def __init__(self, job_id, name, func, args, kwargs, kind="save"):
+        self.id = job_id
+        self.name = name
+        self.kind = kind            # save (produkt) / catalog (indeksowanie)
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+        self.status = "queued"      # queued / running / done / error
+        self.progress = 0.0         # 0..1 (zgłaszany przez funkcję zapisu)
+        self.result = None
+        self.error = None
+        self.elapsed_sec = 0.0
+
+
+class SaveService:
+    """
+    Kolejka zapisów wykonywana przez jeden wątek w tle
+
+    - submit(): zlecenie (funkcja + migawka danych) trafia do kolejki,
+      wywołujący wraca od razu - dane muszą być kopią, której nikt już nie
+      modyfikuje (np. SpectrumEngine.snapshot_integration)
+    - Zlecenia wykonywane po kolei: kolejność plików zachowana, jeden
+      duży zapis naraz na dysku
+    - Funkcja zlecenia dostaje progress=callable(ułamek)
+    - poll(): zlecenia zakończone od ostatniego wywołania - GUI odczytuje je
+      w swoim timerze, więc widżety nie są dotykane z wątku zapisu
+    - Błąd zapisu nie zatrzymuje wątku: trafia do job.error
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._finished = queue.Queue()
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._pending = 0
+
+        self.current = None         # Zlecenie w trakcie zapisu (SaveJob) lub None
+        self.jobs_done = 0
+        self.jobs_failed = 0
+
+        self._thread = threading.Thread(target=self._worker_loop, name="SaveService", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        """Zlecenia w kolejce i w trakcie zapisu"""
+        return self._pending
+
+    def submit(self, name, func, *args, kind="save", **kwargs):
+        """
+        Zleć zapis
+
+        Args:
+            name: Nazwa zlecenia (status, komunikaty - np. nazwa pliku)
+            func: Funkcja zapisu - func(*args, progress=..., **kwargs)
+            *args, **kwargs: Argumenty (migawki danych)
+            kind: Rodzaj zlecenia (komunikaty w GUI)
+
+        Returns:
+            SaveJob
+        """
+        with self._lock:
+            job = SaveJob(self._next_id, name, func, args, kwargs, kind)
+            self._next_id += 1
+            self._pending += 1
+        self._queue.put(job)
+        return job
+
+    def poll(self):
+        """Zwróć zlecenia zakończone (done / error) od ostatniego wywołania"""
+        jobs = []
+        while True:
+            try:
+                jobs.append(self._finished.get_nowait())
+            except queue.Empty:
+                return jobs
+
+    def close(self, timeout=None):
+        """Dokończ zlecenia z kolejki i zatrzymaj wątek"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _worker_loop(self):
+        """Wątek zapisu - wykonuj zlecenia aż do sygnału końca (None)"""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+
+            def progress(fraction, job=job):
+                job.progress = min(1.0, max(0.0, fraction))
+
+            job.status = "running"
+            self.current = job
+            t0 = time.perf_counter()
+            try:
+                job.result = job.func(*job.args, progress=progress, **job.kwargs)
+                job.progress = 1.0
+                job.status = "done"
+                self.jobs_done += 1
+            except Exception as e:
+                job.error = e
+                job.status = "error"
+                self.jobs_failed += 1
+            job.elapsed_sec = time.perf_counter() - t0
+            job.func = job.args = job.kwargs = None    # Zwolnij migawkę danych
+
+            self.current = None
+            with self._lock:
+                self._pending -= 1
+            self._finished.put(job)
@@ -0,0 +1,408 @@
+"""
+Eksport SDFITS
+Tabela binarna FITS w konwencji single-dish (EXTNAME = 'SINGLE DISH')
+zapisywana strumieniowo - wiersz na sub-integrację, bez budowania tabeli
+w pamięci (sam numpy, bez astropy)
+"""
+
+import os
+import sys
+import unicodedata
+import numpy as np
+from pathlib import Path
+from datetime import datetime, timezone
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import HardwareConfig, ReceiverConfig, DataConfig, PhysicsConstants
+from src.dsp.spectral_plan import freq_to_doppler_velocity
+from src.storage.subint import SubintegrationDataset, default_subint_path
+
+
+FITS_SUFFIX = ".fits"
+FITS_BLOCK = 2880
+CARD_LEN = 80
+
+# MJD epoki uniksowej (1970-01-01)
+MJD_UNIX_EPOCH = 40587.0
+
+
+# =============================================================================
+# NAGŁÓWEK FITS
+# =============================================================================
+
+def _ascii(text):
+    """Tekst ASCII dla nagłówka (bez polskich znaków diakrytycznych)"""
+    text = unicodedata.normalize('NFKD', str(text))
+    return text.encode('ascii', 'ignore').decode('ascii')
+
+
+def _format_value(value):
+    """Wartość karty FITS (logiczna / całkowita / rzeczywista - do kolumny 30, tekst od 11)"""
+    if isinstance(value, (bool, np.bool_)):
+        return ('T' if value else 'F').rjust(20)
+    if isinstance(value, (int, np.integer)):
+        return str(int(value)).rjust(20)
+    if isinstance(value, (float, np.floating)):
+        text = f"{float(value):.15G}"
+        if '.' not in text and 'E' not in text:
+            text += '.'
+        return text.rjust(20)
+    text = _ascii(value).replace("'", "''")
+    return f"'{text.ljust(8)}'".ljust(20)
+
+
+def card(key, value=None, comment=None):
+    """Jedna karta nagłówka (80 znaków)"""
+    key = key.upper()
+    if value is None:
+        text = key.ljust(8)
+    else:
+        text = f"{key.ljust(8)}= {_format_value(value)}"
+    if comment:
+        text += f" / {_ascii(comment)}"
+    return text[:CARD_LEN].ljust(CARD_LEN)
+
+
+def _header_bytes(cards):
+    """Karty + END, dopełnione spacjami do bloku 2880 B"""
+    text = "".join(cards) + "END".ljust(CARD_LEN)
+    text += " " * (-len(text) % FITS_BLOCK)
+    return text.encode('ascii')
+
+
+def parse_header(data):
+    """
+    Karty nagłówka -> dict (do karty END)
+
+    Returns:
+        (header, długość nagłówka w bajtach)
+    """
+    header = {}
+    for i in range(0, len(data), CARD_LEN):
+        text = data[i:i + CARD_LEN].decode('ascii')
+        key = text[:8].strip()
+        if key == "END":
+            end = i + CARD_LEN
+            return header, end + (-end % FITS_BLOCK)
+        if text[8:10] != "= ":
+            continue
+        value = text[10:].strip()
+        if value.startswith("'"):
+            closing = value.find("'", 1)
+            while closing + 1 < len(value) and value[closing + 1] == "'":
+                closing = value.find("'", closing + 2)
+            header[key] = value[1:closing].replace("''", "'").rstrip()
+            continue
+        value = value.split('/')[0].strip()
+        if value in ('T', 'F'):
+            header[key] = value == 'T'
+        else:
+            try:
+                header[key] = int(value)
+            except ValueError:
+                header[key] = float(value)
+    raise ValueError("Brak karty END w nagłówku FITS")
+
+
+# =============================================================================
+# KOLUMNY SDFITS
+# =============================================================================
+
+# Kolumny skalarne: (nazwa, format FITS, typ numpy big-endian, jednostka)
+SCALAR_COLUMNS = [
+    ('DATE-OBS', '23A', 'S23', ''),
+    ('MJD', '1D', '>f8', 'd'),
+    ('EXPOSURE', '1E', '>f4', 's'),
+    ('DURATION', '1E', '>f4', 's'),
+    ('TSYS', '1E', '>f4', 'K'),
+    ('CTYPE1', '8A', 'S8', ''),
+    ('CRVAL1', '1D', '>f8', 'Hz'),
+    ('CRPIX1', '1E', '>f4', ''),
+    ('CDELT1', '1D', '>f8', 'Hz'),
+    ('BANDWID', '1D', '>f8', 'Hz'),
+    ('FREQRES', '1D', '>f8', 'Hz'),
+    ('RESTFREQ', '1D', '>f8', 'Hz'),
+    ('VELDEF', '8A', 'S8', ''),
+    ('NFRAMES', '1K', '>i8', ''),
+    ('FIRSTSMP', '1K', '>i8', ''),
+    ('ENDSMP', '1K', '>i8', ''),
+]
+
+# Kolumny wektorowe (kanały): średnia moc, M2 i liczba przyjętych ramek
+VECTOR_COLUMNS = [
+    ('DATA', 'E', '>f4', 'counts'),
+    ('M2', 'E', '>f4', 'counts2'),
+    ('NCOUNT', 'J', '>i4', ''),
+]
+
+
+def row_dtype(channels):
+    """Typ wiersza tabeli (big-endian, kolejność kolumn jak w nagłówku)"""
+    fields = [(name, dtype) for name, _, dtype, _ in SCALAR_COLUMNS]
+    fields += [(name, dtype, (channels,)) for name, _, dtype, _ in VECTOR_COLUMNS]
+    return np.dtype(fields)
+
+
+def _header_keywords(metadata):
+    """Karty z ReceiverConfig, HardwareConfig, kalibracji i planu widma"""
+    return [
+        card('TELESCOP', DataConfig.TELESCOPE_NAME),
+        card('OBSERVER', DataConfig.OBSERVER_NAME),
+        card('SITENAME', DataConfig.OBSERVATORY_NAME),
+        card('INSTRUME', HardwareConfig.SDR_MODEL, 'Odbiornik SDR'),
+        card('BACKEND', metadata.get('source') or '', 'Zrodlo probek'),
+        card('DIAMETER', HardwareConfig.ANTENNA_DIAMETER_M, '[m] srednica czaszy'),
+        card('BEAMEFF', HardwareConfig.ANTENNA_EFFICIENCY, 'Sprawnosc anteny'),
+        card('BEAMWID', HardwareConfig.ANTENNA_BEAMWIDTH_DEG, '[deg] szerokosc wiazki'),
+        card('ANTGAIN', HardwareConfig.ANTENNA_GAIN_DBI, '[dBi]'),
+        card('LNAGAIN', HardwareConfig.LNA_GAIN_DB, '[dB] LNA zewnetrzny'),
+        card('LNANF', HardwareConfig.LNA_NF_DB, '[dB] szum LNA'),
+        card('GAINRED', metadata.get('gain_reduction_db', ReceiverConfig.GAIN_REDUCTION_DB), '[dB] redukcja IF'),
+        card('LNASTATE', metadata.get('lna_state', ReceiverConfig.LNA_STATE)),
+        card('IFMODE', metadata.get('if_mode', ReceiverConfig.IF_MODE)),
+        card('CENTFREQ', metadata.get('center_freq_mhz', ReceiverConfig.CENTER_FREQ_MHZ) * 1e6,
+             '[Hz] czestotliwosc LO (bez kalibracji)'),
+        card('SAMPRATE', metadata.get('sample_rate_mhz', ReceiverConfig.SAMPLE_RATE_MHZ) * 1e6, '[Hz]'),
+        card('CALIBRAT', bool(metadata.get('calibration_enabled', ReceiverConfig.FREQ_CALIBRATION_ENABLED)),
+             'Kalibracja czestotliwosci'),
+        card('CALPPM', float(metadata.get('freq_offset_ppm', ReceiverConfig.FREQ_OFFSET_PPM)), '[ppm]'),
+        card('CALKHZ', float(metadata.get('freq_offset_khz', ReceiverConfig.FREQ_OFFSET_KHZ)), '[kHz]'),
+        card('FFTSIZE', int(metadata.get('fft_size', 0))),
+        card('WINDOW', metadata.get('window_type', '')),
+        card('SPECMODE', metadata.get('spectrometer_mode', '')),
+        card('NORMALIZ', metadata.get('normalization', '')),
+        card('SKFLAG', bool(metadata.get('sk_enabled', False)), 'Flagowanie RFI (SK)'),
+    ]
+
+
+# =============================================================================
+# ZAPIS STRUMIENIOWY
+# =============================================================================
+
+class SDFITSWriter:
+    """
+    Strumieniowy zapis SDFITS - ujście SubintegrationDumper (open/write/close)
+
+    - open(): pusty HDU główny + nagłówek tabeli z NAXIS2 = 0
+    - write(): rekordy -> wiersze big-endian dopisywane na koniec pliku;
+      po każdym zapisie karta NAXIS2 jest nadpisywana w miejscu (stała
+      szerokość), więc plik przerwany awarią ma poprawną liczbę wierszy
+    - close(): dopełnienie danych do bloku 2880 B
+
+    Kolumny osi (CRVAL1/CDELT1/CRPIX1) z osi częstotliwości po kalibracji;
+    parametry odbiornika, sprzętu i kalibracji jako słowa kluczowe.
+    Zmiana planu widma otwiera kolejny plik <nazwa>_partN.fits.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: Plik (None = DATA_DIR/subint_<czas>.fits)
+        """
+        self.base_path = Path(path) if path is not None else default_subint_path(FITS_SUFFIX)
+        self.path = None
+        self.paths = []
+        self.metadata = None
+
+        self._file = None
+        self._naxis2_offset = None
+        self._row = None
+        self.records_written = 0
+
+    def open(self, axes, metadata):
+        """Nowy plik dla planu widma (osie z freqs_mhz, metadane z 'channels')"""
+        if self.paths:
+            base = self.base_path
+            path = base.with_name(f"{base.stem}_part{len(self.paths) + 1}{base.suffix}")
+        else:
+            path = self.base_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        channels = metadata['channels']
+        dtype = row_dtype(channels)
+        self.metadata = dict(metadata)
+
+        # Stałe kolumny osi widma (wspólne dla wszystkich wierszy planu)
+        freqs_hz = np.asarray(axes['freqs_mhz'], dtype=np.float64) * 1e6
+        ref = channels // 2
+        row = np.zeros(1, dtype=dtype)
+        row['CTYPE1'] = b'FREQ-OBS'
+        row['CRPIX1'] = ref + 1
+        row['CRVAL1'] = freqs_hz[ref]
+        row['CDELT1'] = freqs_hz[1] - freqs_hz[0] if channels > 1 else 0.0
+        row['BANDWID'] = metadata.get('sample_rate_mhz', ReceiverConfig.SAMPLE_RATE_MHZ) * 1e6
+        row['FREQRES'] = metadata.get('enbw_hz', abs(row['CDELT1'][0]))
+        row['RESTFREQ'] = PhysicsConstants.HYDROGEN_LINE_FREQ_MHZ * 1e6
+        row['VELDEF'] = b'RADI-OBS'
+        row['TSYS'] = HardwareConfig.T_SYS_KELVIN
+        self._row = row
+
+        primary = _header_bytes([
+            card('SIMPLE', True, 'Standard FITS'),
+            card('BITPIX', 8),
+            card('NAXIS', 0),
+            card('EXTEND', True),
+            card('ORIGIN', 'RT2_fft'),
+            card('DATE', datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"), 'Utworzenie pliku (UTC)'),
+            card('TELESCOP', DataConfig.TELESCOPE_NAME),
+        ])
+
+        cards = [
+            card('XTENSION', 'BINTABLE', 'Tabela binarna'),
+            card('BITPIX', 8),
+            card('NAXIS', 2),
+            card('NAXIS1', dtype.itemsize, 'Bajtow w wierszu'),
+            card('NAXIS2', 0, 'Liczba wierszy'),
+            card('PCOUNT', 0),
+            card('GCOUNT', 1),
+            card('TFIELDS', len(SCALAR_COLUMNS) + len(VECTOR_COLUMNS)),
+        ]
+        columns = [(name, form, unit) for name, form, _, unit in SCALAR_COLUMNS]
+        columns += [(name, f"{channels}{form}", unit) for name, form, _, unit in VECTOR_COLUMNS]
+        for i, (name, form, unit) in enumerate(columns, start=1):
+            cards.append(card(f'TTYPE{i}', name))
+            cards.append(card(f'TFORM{i}', form))
+            if unit:
+                cards.append(card(f'TUNIT{i}', unit))
+        cards += [
+            card('EXTNAME', 'SINGLE DISH'),
+            card('EXTVER', 1),
+            card('NMATRIX', 1),
+        ]
+        cards += _header_keywords(metadata)
+
+        f = open(path, 'wb')
+        f.write(primary)
+        self._naxis2_offset = len(primary) + 4 * CARD_LEN
+        f.write(_header_bytes(cards))
+        f.flush()
+
+        self._file = f
+        self.path = path
+        self.paths.append(path)
+        self.records_written = 0
+
+    def write(self, records):
+        """Dopisz rekordy sub-integracji (record_dtype) jako wiersze tabeli"""
+        rows = np.repeat(self._row, len(records))
+
+        duration = records['time_end'] - records['time_start']
+        first, end = records['first_sample'], records['end_sample']
+        sample_rate_hz = rows['BANDWID']
+        exposure = np.where((first >= 0) & (end > first), (end - first) / sample_rate_hz, duration)
+
+        rows['DATE-OBS'] = [datetime.fromtimestamp(t, timezone.utc).isoformat(timespec='milliseconds')[:23]
+                            for t in records['time_start']]
+        rows['MJD'] = records['time_start'] / 86400.0 + MJD_UNIX_EPOCH
+        rows['EXPOSURE'] = exposure
+        rows['DURATION'] = duration
+        rows['NFRAMES'] = records['frames']
+        rows['FIRSTSMP'] = first
+        rows['ENDSMP'] = end
+        rows['DATA'] = records['power']
+        rows['M2'] = records['m2']
+        rows['NCOUNT'] = records['counts']
+
+        f = self._file
+        f.write(rows.tobytes())
+        self.records_written += len(rows)
+
+        # Liczba wierszy w nagłówku - plik poprawny także po przerwaniu
+        f.seek(self._naxis2_offset)
+        f.write(card('NAXIS2', self.records_written, 'Liczba wierszy').encode('ascii'))
+        f.seek(0, os.SEEK_END)
+        f.flush()
+
+    def close(self, extra=None):
+        """Dopełnij dane do bloku FITS i zamknij plik"""
+        if self._file is None:
+            return
+        f = self._file
+        self._file = None
+
+        size = f.tell()
+        f.write(b'\0' * (-size % FITS_BLOCK))
+        f.close()
+
+
+def save_spectrum_sdfits(path, record, axes, metadata):
+    """
+    Zapisz jedno widmo (np. wynik integracji) jako jednowierszową tabelę SDFITS
+
+    Args:
+        path: Plik .fits
+        record: Tablica 1 rekordu record_dtype (moc, M2, liczniki, czas)
+        axes: dict osi (freqs_mhz)
+        metadata: dict metadanych (plan widma, odbiornik)
+    """
+    writer = SDFITSWriter(path)
+    writer.open(axes, dict(metadata, channels=record['power'].shape[-1]))
+    try:
+        writer.write(record)
+    finally:
+        writer.close()
+
+
+# =============================================================================
+# ODCZYT
+# =============================================================================
+
+class SDFITSDataset(SubintegrationDataset):
+    """
+    Odczyt tabeli SDFITS zapisanej przez SDFITSWriter (wiersze mapowane z pliku)
+
+    Te same metody co SubintegrationDataset (select, channel_range,
+    spectrum, average); oś prędkości liczona z CRVAL1/CDELT1/CRPIX1.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Plik .fits
+        """
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            data = f.read(64 * FITS_BLOCK)
+        _, primary_len = parse_header(data)
+        header, table_len = parse_header(data[primary_len:])
+        if header.get('EXTNAME') != 'SINGLE DISH':
+            raise ValueError(f"{self.path.name}: brak tabeli SINGLE DISH")
+
+        self.metadata = header
+        data_column = len(SCALAR_COLUMNS) + 1
+        self.channels = int(header[f'TFORM{data_column}'][:-1])
+        dtype = row_dtype(self.channels)
+        if header[f'TTYPE{data_column}'] != 'DATA' or dtype.itemsize != header['NAXIS1']:
+            raise ValueError(f"{self.path.name}: nieobsługiwany układ kolumn")
+
+        # Wiersze kompletne na dysku (NAXIS2 lub rozmiar pliku, jeśli mniejszy)
+        offset = primary_len + table_len
+        rows = min(header['NAXIS2'], (self.path.stat().st_size - offset) // dtype.itemsize)
+        self._records = (np.memmap(self.path, dtype=dtype, mode='r', offset=offset, shape=(rows,))
+                         if rows else np.zeros(0, dtype=dtype))
+
+        # Osie z pierwszego wiersza (stałe w pliku)
+        axes = {}
+        if rows:
+            first = self._records[0]
+            pixels = np.arange(self.channels) + 1 - float(first['CRPIX1'])
+            axes['freqs_mhz'] = (float(first['CRVAL1']) + pixels * float(first['CDELT1'])) / 1e6
+            axes['doppler'] = freq_to_doppler_velocity(axes['freqs_mhz'])
+        self.axes = axes
+
+    def column(self, name):
+        records = self._records
+        if name == 'time_start':
+            return (records['MJD'] - MJD_UNIX_EPOCH) * 86400.0
+        if name == 'time_end':
+            return self.column('time_start') + records['DURATION']
+        field = {'first_sample': 'FIRSTSMP', 'end_sample': 'ENDSMP', 'frames': 'NFRAMES'}[name]
+        return np.asarray(records[field], dtype=np.int64)
+
+    def _block(self, start, stop, channels):
+        block = self._records[start:stop]
+        return block['NCOUNT'][:, channels], block['DATA'][:, channels], block['M2'][:, channels]
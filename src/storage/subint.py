@@ -0,0 +1,547 @@
+"""
+Zrzuty sub-integracji
+Widmo uśrednione co N ramek lub T sekund strumienia (moc, M2, liczniki
+kanałów, czas, indeksy próbek) -> kolejka -> wątek zapisu do zbioru
+dopisywanego na dysku; późniejsze uśrednianie dowolnego przedziału czasu
+bez ponownego przetwarzania surowych I/Q
+"""
+
+import sys
+import json
+import time
+import queue
+import threading
+import numpy as np
+from pathlib import Path
+from datetime import datetime
+
+# Dodaj root projektu do Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import DataConfig
+from src.dsp.integrator import SpectrumIntegrator
+
+
+# =============================================================================
+# FORMAT REKORDU
+# =============================================================================
+
+SUBINT_SUFFIX = ".subint"
+
+# Nagłówek rekordu: czas ścienny [s od epoki], zakres próbek strumienia [first, end)
+# i liczba ramek FFT; potem widmo, M2 i liczba przyjętych ramek per kanał
+RECORD_FIELDS = [
+    ('time_start', '<f8'),
+    ('time_end', '<f8'),
+    ('first_sample', '<i8'),
+    ('end_sample', '<i8'),
+    ('frames', '<i8'),
+]
+
+
+def record_dtype(channels):
+    """Typ strukturalny rekordu sub-integracji dla widma o channels kanałach"""
+    return np.dtype(RECORD_FIELDS + [
+        ('power', '<f4', (channels,)),
+        ('m2', '<f4', (channels,)),
+        ('counts', '<i4', (channels,)),
+    ])
+
+
+def make_record(integrator, first_sample=None, end_sample=None):
+    """
+    Stan SpectrumIntegrator jako jeden rekord (tablica record_dtype o długości 1)
+
+    Args:
+        integrator: Integrator z co najmniej jednym widmem
+        first_sample, end_sample: Zakres próbek strumienia (None = nieznany, -1)
+    """
+    record = np.zeros(1, dtype=record_dtype(len(integrator.power_mean)))
+    record['time_start'] = integrator.start_time
+    record['time_end'] = integrator.end_time if integrator.end_time is not None else time.time()
+    record['first_sample'] = -1 if first_sample is None else first_sample
+    record['end_sample'] = -1 if end_sample is None else end_sample
+    record['frames'] = integrator.count
+    record['power'] = integrator.power_mean
+    record['m2'] = integrator.power_m2
+    record['counts'] = integrator.bin_counts
+    return record
+
+
+def default_subint_path(suffix=SUBINT_SUFFIX):
+    """DATA_DIR/subint_<czas><suffix>"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return Path(DataConfig.DATA_DIR) / f"subint_{timestamp}{suffix}"
+
+
+# =============================================================================
+# ZAPIS NA DYSK
+# =============================================================================
+
+class SubintegrationStore:
+    """
+    Zbiór sub-integracji jako katalog:
+
+        meta.json    - metadane (konfiguracja, typ rekordu, stan po zamknięciu)
+        axes.npz     - osie widma (doppler, freqs_mhz, freqs_mhz_raw)
+        records.bin  - rekordy record_dtype() dopisywane jeden za drugim
+
+    Liczba rekordów wynika z rozmiaru records.bin, więc zbiór przerwany
+    awarią jest czytelny do ostatniego pełnego rekordu. Zmiana planu
+    widma (liczba kanałów, osie) otwiera kolejną część: <nazwa>_partN.subint.
+
+    Metody wołane tylko z wątku SubintegrationDumper.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: Katalog zbioru (None = DATA_DIR/subint_<czas>.subint)
+        """
+        self.base_path = Path(path) if path is not None else default_subint_path()
+        self.path = None
+        self.paths = []
+        self.metadata = None
+
+        self._file = None
+        self.records_written = 0
+
+    def open(self, axes, metadata):
+        """
+        Utwórz kolejną część zbioru
+
+        Args:
+            axes: dict tablic osi (doppler, freqs_mhz, freqs_mhz_raw)
+            metadata: dict (musi zawierać 'channels')
+        """
+        if self.paths:
+            base = self.base_path
+            path = base.with_name(f"{base.stem}_part{len(self.paths) + 1}{base.suffix}")
+        else:
+            path = self.base_path
+        path.mkdir(parents=True, exist_ok=True)
+
+        np.savez(path / "axes.npz", **axes)
+
+        self.metadata = dict(metadata)
+        self.metadata.update({
+            'format': 'subint_records',
+            'record_dtype': record_dtype(metadata['channels']).descr,
+            'start_time': datetime.now().isoformat(timespec='milliseconds'),
+        })
+        self.path = path
+        self.paths.append(path)
+        self._write_meta()
+
+        self._file = open(path / "records.bin", 'ab')
+        self.records_written = 0
+
+    def write(self, records):
+        """Dopisz tablicę rekordów jednym zapisem"""
+        self._file.write(records.tobytes())
+        self._file.flush()
+        self.records_written += len(records)
+
+    def close(self, extra=None):
+        """Zamknij bieżącą część i uzupełnij metadane"""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+
+        self.metadata.update(extra or {})
+        self.metadata.update({
+            'end_time': datetime.now().isoformat(timespec='milliseconds'),
+            'num_records': self.records_written,
+        })
+        self._write_meta()
+
+    def _write_meta(self):
+        """Zapisz meta.json"""
+        with open(self.path / "meta.json", 'w', encoding='utf-8') as f:
+            json.dump(self.metadata, f, indent=2, ensure_ascii=False, default=str)
+
+
+# =============================================================================
+# ZRZUTY Z SILNIKA
+# =============================================================================
+
+class SubintegrationDumper:
+    """
+    Sub-integracje strumienia widm
+
+    - add() (wątek silnika) łączy widma wsadów / grup SK w bieżącej
+      sub-integracji (Chan, jak SpectrumIntegrator - z maską RFI i M2);
+      po every_frames ramkach lub every_sec sekundach strumienia gotowy
+      rekord trafia do kolejki
+    - Wątek zapisu odbiera rekordy i dopisuje wszystkie oczekujące jednym
+      zapisem (porcje); pełna kolejka = rekord odrzucony i policzony -
+      silnik nie czeka na dysk; wyjątkiem jest otwarcie nowej części, które
+      czeka na miejsce w kolejce (silnik woła add() poza swoją blokadą,
+      add() i close() wykluczają się blokadą zrzutów)
+    - Zmiana planu widma kończy bieżącą sub-integrację i otwiera nową część
+      zbioru
+
+    Granulacja: rekord obejmuje całe wsady (FFT_BATCH_FRAMES ramek) lub
+    grupy SK (SK_FRAMES ramek).
+    """
+
+    def __init__(self, sink=None, every_frames=None, every_sec=None, queue_size=None, describe=None):
+        """
+        Args:
+            sink: Zbiór docelowy (open/write/close), None = SubintegrationStore()
+            every_frames: Ramek FFT na rekord (None = z config, 0 = bez limitu)
+            every_sec: Sekund strumienia na rekord (None = z config, 0 = bez limitu)
+            queue_size: Rekordów oczekujących na zapis (None = z config)
+            describe: Funkcja plan -> dict metadanych części zbioru (None = brak)
+        """
+        self.sink = sink if sink is not None else SubintegrationStore()
+        self.every_frames = DataConfig.SUBINT_FRAMES if every_frames is None else every_frames
+        self.every_sec = DataConfig.SUBINT_SECONDS if every_sec is None else every_sec
+        if self.every_frames <= 0 and self.every_sec <= 0:
+            raise ValueError("Sub-integracja wymaga every_frames > 0 lub every_sec > 0")
+
+        self.describe = describe
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size or DataConfig.SUBINT_QUEUE_RECORDS)
+        self._acc = SpectrumIntegrator(float('inf'))
+        self._plan = None
+        self._first_sample = None
+        self._end_sample = None
+
+        self.records_queued = 0
+        self.records_dropped = 0
+        self.write_errors = 0
+        self.is_running = True
+
+        self._thread = threading.Thread(target=self._writer_loop, name="SubintWriter", daemon=True)
+        self._thread.start()
+
+    # =========================================================================
+    # AKUMULACJA (wątek silnika)
+    # =========================================================================
+
+    def add(self, plan, power, num_frames, accepted=None, m2=None, first_sample=None, end_sample=None):
+        """
+        Dodaj widmo (średnia num_frames ramek) do bieżącej sub-integracji
+
+        Args:
+            plan: SpectralPlan widma (zmiana = nowa część zbioru)
+            power, num_frames, accepted, m2: Jak SpectrumIntegrator.add
+            first_sample, end_sample: Zakres próbek strumienia [first, end) lub None
+        """
+        with self._lock:
+            if not self.is_running:
+                return
+
+            if plan is not self._plan:
+                if self._plan is None or plan.key != self._plan.key:
+                    self.flush()
+                    self._open(plan, len(power))
+                self._plan = plan
+
+            acc = self._acc
+            if not acc.active:
+                acc.reset(float('inf'))
+                acc.start()
+                self._first_sample = first_sample
+            acc.add(power, None, num_frames, accepted, m2)
+            self._end_sample = end_sample
+
+            if self.every_frames > 0 and acc.count >= self.every_frames:
+                self.flush()
+            elif self.every_sec > 0 and self._stream_seconds() >= self.every_sec:
+                self.flush()
+
+    def _stream_seconds(self):
+        """Długość bieżącej sub-integracji [s] - z indeksów próbek, a bez nich z zegara"""
+        if self._first_sample is not None and self._end_sample is not None:
+            return (self._end_sample - self._first_sample) / (self._plan.sample_rate_mhz * 1e6)
+        return self._acc.elapsed()
+
+    def _open(self, plan, channels):
+        """Nowa część zbioru dla planu (otwarcie w wątku zapisu)"""
+        axes = {
+            'doppler': plan.doppler,
+            'freqs_mhz': plan.freqs_mhz,
+            'freqs_mhz_raw': plan.freqs_mhz_raw,
+        }
+        metadata = dict(self.describe(plan) if self.describe is not None else {})
+        metadata.update({
+            'channels': channels,
+            'every_frames': self.every_frames,
+            'every_sec': self.every_sec,
+        })
+        self._put(('open', axes, metadata), block=True)
+
+    def flush(self):
+        """Zakończ bieżącą sub-integrację i wyślij rekord do zapisu"""
+        acc = self._acc
+        if not acc.active or acc.count == 0:
+            return
+        acc.stop()
+
+        record = make_record(acc, self._first_sample, self._end_sample)
+        if self._put(('records', record)):
+            self.records_queued += 1
+        else:
+            self.records_dropped += 1
+
+    def _put(self, item, block=False):
+        """Wstaw do kolejki zapisu; False gdy pełna (tylko block=False)"""
+        try:
+            self._queue.put(item, block=block)
+            return True
+        except queue.Full:
+            return False
+
+    def close(self):
+        """Zapisz ostatnią (niepełną) sub-integrację, zamknij zbiór i zatrzymaj wątek"""
+        with self._lock:
+            if not self.is_running:
+                return
+            self.flush()
+            self.is_running = False
+        self._queue.put(None)
+        self._thread.join()
+
+    # =========================================================================
+    # WĄTEK ZAPISU
+    # =========================================================================
+
+    def _writer_loop(self):
+        """Otwieraj części zbioru i dopisuj oczekujące rekordy porcjami"""
+
+        sink = self.sink
+        opened = False
+        done = False
+        while not done:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            pending = []
+            for item in items:
+                if item is not None and item[0] == 'records':
+                    pending.append(item[1])
+                    continue
+
+                # Granica części lub koniec - najpierw zapisz zebrane rekordy
+                self._write(sink, pending)
+                pending = []
+                if item is None:
+                    done = True
+                    break
+                try:
+                    if opened:
+                        sink.close(self._close_stats())
+                    sink.open(item[1], item[2])
+                    opened = True
+                except Exception as e:
+                    self.write_errors += 1
+                    print(f"✗ Błąd otwarcia zbioru sub-integracji: {e}")
+            self._write(sink, pending)
+
+        if opened:
+            try:
+                sink.close(self._close_stats())
+            except Exception as e:
+                self.write_errors += 1
+                print(f"✗ Błąd zamknięcia zbioru sub-integracji: {e}")
+
+    def _write(self, sink, records):
+        """Jeden zapis dla wszystkich oczekujących rekordów"""
+        if not records:
+            return
+        try:
+            sink.write(np.concatenate(records))
+        except Exception as e:
+            self.write_errors += 1
+            print(f"✗ Błąd zapisu sub-integracji: {e}")
+
+    def _close_stats(self):
+        """Statystyki do metadanych przy zamknięciu części"""
+        return {'records_dropped': self.records_dropped}
+
+    # =========================================================================
+    # STATYSTYKI
+    # =========================================================================
+
+    def get_stats(self):
+        """Statystyki zrzutów"""
+        sink = self.sink
+        return {
+            'path': str(sink.path) if getattr(sink, 'path', None) else None,
+            'paths': [str(path) for path in getattr(sink, 'paths', [sink.path]) if path is not None],
+            'records_queued': self.records_queued,
+            'records_dropped': self.records_dropped,
+            'pending_records': self._queue.qsize(),
+            'write_errors': self.write_errors,
+        }
+
+
+# =============================================================================
+# ODCZYT
+# =============================================================================
+
+class SubintegrationDataset:
+    """
+    Odczyt zbioru SubintegrationStore bez wczytywania całości
+
+    Rekordy są mapowane z pliku (np.memmap); average() łączy dowolny
+    przedział (i zakres kanałów) porcjami metodą Chana - wynik jak
+    pojedyncza integracja tego przedziału (średnia ważona liczbą
+    przyjętych ramek, pełna M2).
+
+    Podklasy (inne formaty) nadpisują column() i _block().
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Katalog zbioru (.subint)
+        """
+        self.path = Path(path)
+        with open(self.path / "meta.json", encoding='utf-8') as f:
+            self.metadata = json.load(f)
+        with np.load(self.path / "axes.npz") as axes:
+            self.axes = {key: axes[key] for key in axes.files}
+        self.channels = self.metadata['channels']
+
+        dtype = record_dtype(self.channels)
+        count = (self.path / "records.bin").stat().st_size // dtype.itemsize
+        self._records = (np.memmap(self.path / "records.bin", dtype=dtype, mode='r', shape=(count,))
+                         if count else np.zeros(0, dtype=dtype))
+
+    def __len__(self):
+        return len(self._records)
+
+    def close(self):
+        """Zwolnij plik"""
+        self._records = self._records[:0]
+
+    def column(self, name):
+        """Pole nagłówka rekordów (time_start, time_end, first_sample, end_sample, frames)"""
+        return np.asarray(self._records[name])
+
+    def _block(self, start, stop, channels):
+        """(counts, power, m2) rekordów [start, stop) dla zakresu kanałów"""
+        block = self._records[start:stop]
+        return block['counts'][:, channels], block['power'][:, channels], block['m2'][:, channels]
+
+    @property
+    def doppler(self):
+        """Oś prędkości radialnych [km/s]"""
+        return self.axes['doppler']
+
+    @property
+    def times(self):
+        """Środek każdego rekordu [s od epoki]"""
+        return (self.column('time_start') + self.column('time_end')) / 2
+
+    def select(self, t_start=None, t_end=None):
+        """
+        Zakres rekordów, których środek leży w [t_start, t_end)
+
+        Returns:
+            slice
+        """
+        times = self.times
+        start = 0 if t_start is None else int(np.searchsorted(times, t_start, side='left'))
+        stop = len(times) if t_end is None else int(np.searchsorted(times, t_end, side='left'))
+        return slice(start, stop)
+
+    def channel_range(self, v_min, v_max):
+        """
+        Zakres kanałów z prędkością w [v_min, v_max] km/s
+
+        Returns:
+            slice (ciągły zakres kanałów)
+        """
+        inside = np.flatnonzero((self.doppler >= v_min) & (self.doppler <= v_max))
+        if len(inside) == 0:
+            return slice(0, 0)
+        return slice(int(inside[0]), int(inside[-1]) + 1)
+
+    def spectrum(self, index, channels=None):
+        """
+        Jeden rekord
+
+        Returns:
+            (doppler, power, counts) dla zakresu kanałów (None = wszystkie)
+        """
+        channels = slice(None) if channels is None else channels
+        counts, power, _ = self._block(index, index + 1, channels)
+        return self.doppler[channels], np.asarray(power[0]), np.asarray(counts[0])
+
+    def average(self, start=None, stop=None, channels=None, chunk_records=64):
+        """
+        Uśrednij rekordy [start, stop)
+
+        Args:
+            start, stop: Indeksy rekordów (lub slice z select() jako start)
+            channels: Zakres kanałów (slice, np. z channel_range(); None = wszystkie)
+            chunk_records: Rekordów wczytywanych naraz
+
+        Returns:
+            (doppler, mean_power, sigma, counts) - sigma = odchylenie mocy
+            ramki; kanały bez przyjętych ramek = NaN
+        """
+        if isinstance(start, slice):
+            start, stop = start.start, start.stop
+        start, stop, _ = slice(start, stop).indices(len(self))
+        channels = slice(None) if channels is None else channels
+        doppler = self.doppler[channels]
+
+        n = np.zeros(len(doppler), dtype=np.int64)
+        mean = np.zeros(len(doppler), dtype=np.float64)
+        m2 = np.zeros(len(doppler), dtype=np.float64)
+
+        for i in range(start, stop, chunk_records):
+            counts, power, block_m2 = self._block(i, min(i + chunk_records, stop), channels)
+            counts = counts.astype(np.int64)
+            power = power.astype(np.float64)
+
+            # Statystyki porcji (dwa przebiegi), potem połączenie z sumą (Chan)
+            n_b = counts.sum(axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean_b = np.where(n_b > 0, (counts * power).sum(axis=0) / n_b, 0.0)
+            m2_b = block_m2.sum(axis=0, dtype=np.float64) + (counts * (power - mean_b) ** 2).sum(axis=0)
+
+            total = n + n_b
+            with np.errstate(invalid='ignore', divide='ignore'):
+                delta = mean_b - mean
+                weight = np.where(total > 0, n_b / total, 0.0)
+                mean += delta * weight
+                m2 += m2_b + delta * delta * n * weight
+            n = total
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(n > 0, mean, np.nan)
+            sigma = np.where(n > 1, np.sqrt(m2 / (n - 1)), np.nan)
+        return doppler, mean, sigma, n
+
+
+def open_subint(path):
+    """
+    Otwórz zbiór sub-integracji w formacie wynikającym ze ścieżki
+
+    Args:
+        path: Katalog .subint, plik .h5 / .hdf5 lub .fits (SDFITS)
+
+    Returns:
+        SubintegrationDataset (lub podklasa dla formatu)
+    """
+    path = Path(path)
+    if path.suffix.lower() in (".h5", ".hdf5"):
+        from src.storage.hdf5_writer import HDF5SubintDataset
+        return HDF5SubintDataset(path)
+    if path.suffix.lower() in (".fits", ".sdfits"):
+        from src.storage.sdfits import SDFITSDataset
+        return SDFITSDataset(path)
+    return SubintegrationDataset(path)